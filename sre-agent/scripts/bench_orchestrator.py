@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark agent-side latency of run/diagnose against recorded outputs")
+    ap.add_argument("--scenario", choices=["run", "diagnose", "all"], default="all")
+    ap.add_argument("--config-dir", default="configs")
+    ap.add_argument("--corpus", default=os.path.join("tests", "fixtures", "outputs"))
+    ap.add_argument("--iterations", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--alloc-iterations", type=int, default=3, help="extra iterations under tracemalloc")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="artificial delay per command")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay per command")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="artificial delay per stub LLM call")
+    ap.add_argument("--plan", default="", help="comma-separated cmd_ids the stub planner picks in round 1")
+    ap.add_argument("--output", default=None, help="write results JSON here")
+    ap.add_argument("--compare", default=None, help="baseline results JSON; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=0.2, help="relative p50/p99 growth counted as a regression")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.insert(0, os.path.join(root, "src"))
+
+    from evaluation.latency import compare_results, run_benchmark
+
+    scenarios = ["run", "diagnose"] if args.scenario == "all" else [args.scenario]
+    results = {}
+    for scenario in scenarios:
+        results[scenario] = run_benchmark(
+            scenario,
+            config_dir=os.path.join(root, args.config_dir),
+            outputs_dir=os.path.join(root, args.corpus),
+            iterations=args.iterations,
+            warmup=args.warmup,
+            alloc_iterations=args.alloc_iterations,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            llm_latency_ms=args.llm_latency_ms,
+            plan_cmds=[c for c in args.plan.split(",") if c],
+        )
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for scenario, current in results.items():
+            if scenario in baseline:
+                for r in compare_results(current, baseline[scenario], threshold=args.threshold):
+                    regressions.append({"scenario": scenario, **r})
+        results["_regressions"] = regressions
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
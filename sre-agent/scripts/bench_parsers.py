@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def bench(fn, repeat: int, number: int) -> float:
+    """Best-of-`repeat` seconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the parser engine over the captured-output corpus")
+    ap.add_argument("--corpus", default=os.path.join("tests", "fixtures", "outputs"))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--number", type=int, default=200)
+    ap.add_argument("--scale", type=int, default=200, help="replicate each output N times for the throughput run")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.insert(0, os.path.join(root, "src"))
+
+    from registry.parsers import ParserEngine
+    from registry.signals import extract_signals
+
+    engine = ParserEngine()
+    corpus_dir = os.path.join(root, args.corpus)
+    results = {}
+    total_bytes = 0
+    total_s = 0.0
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".txt"):
+            continue
+        cmd_id = name[:-4]
+        with open(os.path.join(corpus_dir, name), "r", encoding="utf-8") as f:
+            text = f.read()
+        big = text * args.scale
+        per_call = bench(lambda: extract_signals(engine.parse(cmd_id, text)), args.repeat, args.number)
+        big_s = bench(lambda: engine.parse(cmd_id, big), args.repeat, 1)
+        total_bytes += len(big)
+        total_s += big_s
+        results[cmd_id] = {
+            "bytes": len(text),
+            "signals": len(extract_signals(engine.parse(cmd_id, text))["signals"]),
+            "parse_and_signals_us": round(per_call * 1e6, 1),
+            "scaled_mb_per_s": round(len(big) / (1024 * 1024) / big_s, 1) if big_s else None,
+        }
+
+    results["_total"] = {
+        "scaled_bytes": total_bytes,
+        "scaled_mb_per_s": round(total_bytes / (1024 * 1024) / total_s, 1) if total_s else None,
+    }
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
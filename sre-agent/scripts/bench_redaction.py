@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+
+def legacy_redact(rules, text):
+    """The previous per-rule findall + sub loop, kept here for comparison."""
+    replaced_count = 0
+    applied = []
+    redacted = text
+    for name, pattern in rules:
+        matches = pattern.findall(redacted)
+        if matches:
+            applied.append(name)
+            replaced_count += len(matches)
+            redacted = pattern.sub(f"<{name}>", redacted)
+    return redacted, applied, replaced_count
+
+
+def jstack_sample(size: int, rng: random.Random) -> str:
+    lines = []
+    total = 0
+    n = 0
+    while total < size:
+        block = [
+            f'"http-nio-8080-exec-{n}" #{n + 40} daemon prio=5 os_prio=0 tid=0x00007f{rng.randrange(16**8):08x} '
+            f"nid=0x{rng.randrange(16**4):x} waiting on condition [0x00007f{rng.randrange(16**8):08x}]",
+            "   java.lang.Thread.State: WAITING (parking)",
+            "\tat sun.misc.Unsafe.park(Native Method)",
+            f"\t- parking to wait for  <0x00000000{rng.randrange(16**8):08x}> (a java.util.concurrent.locks.AbstractQueuedSynchronizer$ConditionObject)",
+            "\tat java.util.concurrent.locks.LockSupport.park(LockSupport.java:175)",
+            "\tat org.apache.tomcat.util.threads.TaskQueue.take(TaskQueue.java:107)",
+            "\tat java.lang.Thread.run(Thread.java:748)",
+            "",
+            "   Locked ownable synchronizers:",
+            "\t- None",
+            "",
+        ]
+        chunk = "\n".join(block) + "\n"
+        lines.append(chunk)
+        total += len(chunk)
+        n += 1
+    return "".join(lines)
+
+
+def journal_sample(size: int, rng: random.Random) -> str:
+    lines = []
+    total = 0
+    while total < size:
+        ip = ".".join(str(rng.randrange(256)) for _ in range(4))
+        line = (
+            f"Jan 01 00:{rng.randrange(60):02d}:{rng.randrange(60):02d} host svc[{rng.randrange(1, 65535)}]: "
+            f"GET /api/v1/orders/{rng.randrange(10**6)} from {ip} user=u{rng.randrange(1000)} "
+            f"took {rng.randrange(1000)}ms file=/var/log/svc/app.log\n"
+        )
+        if rng.random() < 0.05:
+            line = line[:-1] + f" token=tk{rng.randrange(10**9)} contact=ops{rng.randrange(100)}@example.com\n"
+        lines.append(line)
+        total += len(line)
+    return "".join(lines)
+
+
+def bench(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Micro-benchmark redaction on synthetic jstack/journalctl output")
+    ap.add_argument("--size-mb", type=float, default=8.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--chunk-kb", type=int, default=64, help="chunk size for the streaming redactor")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.insert(0, os.path.join(root, "src"))
+
+    from storage.redaction import RULES, StreamRedactor, redact
+
+    # The old PATH/USER patterns (double-escaped \w) for an apples-to-apples baseline.
+    legacy_rules = list(RULES)
+    legacy_rules[3] = ("PATH", re.compile(r"/(?:[\\w.-]+/)+[\\w.-]+"))
+    legacy_rules[4] = ("USER", re.compile(r"\buser(?:name)?=\\w+\b", re.IGNORECASE))
+
+    def streamed(text: str) -> None:
+        r = StreamRedactor()
+        step = args.chunk_kb * 1024
+        for i in range(0, len(text), step):
+            r.feed(text[i : i + step])
+        r.close()
+
+    rng = random.Random(42)
+    size = int(args.size_mb * 1024 * 1024)
+    samples = {"jstack": jstack_sample(size, rng), "journalctl": journal_sample(size, rng)}
+
+    results = {}
+    for name, text in samples.items():
+        legacy_s = bench(lambda t: legacy_redact(legacy_rules, t), text, args.repeat)
+        fixed_legacy_s = bench(lambda t: legacy_redact(RULES, t), text, args.repeat)
+        single_s = bench(redact, text, args.repeat)
+        stream_s = bench(streamed, text, args.repeat)
+        _, applied, count = redact(text)
+        mb = len(text) / (1024 * 1024)
+        results[name] = {
+            "size_mb": round(mb, 2),
+            "replaced_count": count,
+            "applied": applied,
+            "legacy_loop_s": round(legacy_s, 4),
+            "legacy_loop_fixed_rules_s": round(fixed_legacy_s, 4),
+            "single_pass_s": round(single_s, 4),
+            "streaming_s": round(stream_s, 4),
+            "single_pass_mb_per_s": round(mb / single_s, 1) if single_s else None,
+            "speedup_vs_fixed_loop": round(fixed_legacy_s / single_s, 2) if single_s else None,
+        }
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
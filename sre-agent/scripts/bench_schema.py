@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+
+def timed(fn, packs) -> float:
+    start = time.perf_counter()
+    for pack in packs:
+        fn(pack)
+    return time.perf_counter() - start
+
+
+def make_packs(n: int, bad_ratio: float, seed: int):
+    rng = random.Random(seed)
+    packs = []
+    for i in range(n):
+        pack = {
+            "meta": {"host": f"h{i}", "service": "svc", "timestamp": "2026-01-01T00:00:00Z"},
+            "snapshots": [
+                {"cmd_id": f"c{j}", "signal": f"s{j}", "summary": "ok", "audit_ref": f"evidence/raw/c{j}.txt"}
+                for j in range(rng.randint(3, 12))
+            ],
+            "hypothesis": [{"category": "CPU", "confidence": rng.random(), "why": "cpu_busy_pct>=85", "evidence_refs": []}],
+            "next_checks": [{"cmd_id": "top_threads", "purpose": "hot threads"}],
+            "signals": {"cpu_busy_pct": rng.uniform(0, 100), "loadavg_1m": rng.uniform(0, 16)},
+            "policy": {"allowed_risks": ["READ_ONLY"], "deny_keywords": []},
+        }
+        if rng.random() < bad_ratio:
+            pack.pop(rng.choice(["meta", "snapshots", "hypothesis", "next_checks"]))
+        packs.append(pack)
+    return packs
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark evidence-pack schema validation")
+    ap.add_argument("--schema", default=os.path.join("schemas", "evidence_schema.json"))
+    ap.add_argument("--packs", type=int, default=10000)
+    ap.add_argument("--bad-ratio", type=float, default=0.1, help="share of packs missing a required section")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--baseline-packs", type=int, default=500, help="packs timed with uncached jsonschema.validate (slow)")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.insert(0, os.path.join(root, "src"))
+
+    from jsonschema import validate
+
+    from reporting.schema_validate import is_valid, load_schema, structural_check
+
+    schema = load_schema(os.path.join(root, args.schema))
+    packs = make_packs(args.packs, args.bad_ratio, args.seed)
+
+    def uncached(pack):
+        try:
+            validate(instance=pack, schema=schema)
+        except Exception:
+            pass
+
+    def prechecked(pack):
+        return structural_check(pack, schema) is None and is_valid(pack, schema)
+
+    runs = {
+        "jsonschema_validate": (uncached, packs[: max(1, args.baseline_packs)]),
+        "compiled": (lambda p: is_valid(p, schema), packs),
+        "precheck_then_compiled": (prechecked, packs),
+        "precheck_only": (lambda p: structural_check(p, schema), packs),
+    }
+    results = {}
+    for name, (fn, subset) in runs.items():
+        s = timed(fn, subset)
+        results[name] = {"packs": len(subset), "total_s": round(s, 3), "per_pack_us": round(s / len(subset) * 1e6, 1)}
+    base = results["jsonschema_validate"]["per_pack_us"]
+    for entry in results.values():
+        entry["speedup"] = round(base / entry["per_pack_us"], 1) if entry["per_pack_us"] else None
+    results["_packs"] = {"count": len(packs), "rejected_by_precheck": sum(1 for p in packs if structural_check(p, schema))}
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
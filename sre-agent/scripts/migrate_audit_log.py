@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Move a single-file audit.log into the segmented, session-indexed layout (<audit_log>.d/)"
+    )
+    ap.add_argument("audit_log", help="path of the legacy jsonl audit log (the runtime.yaml audit_log value)")
+    ap.add_argument("--segment-max-bytes", type=int, default=None)
+    ap.add_argument("--batch", type=int, default=5000, help="records appended per lock acquisition")
+    ap.add_argument(
+        "--keep",
+        action="store_true",
+        help="leave the legacy file in place (default: rename to *.migrated); reads see its records twice until it is moved",
+    )
+    ap.add_argument("--reindex", action="store_true", help="only rebuild session indexes from existing segments")
+    args = ap.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.insert(0, os.path.join(root, "src"))
+
+    from storage.audit_store import DEFAULT_SEGMENT_MAX_BYTES, AuditStore
+
+    store = AuditStore(args.audit_log, segment_max_bytes=args.segment_max_bytes or DEFAULT_SEGMENT_MAX_BYTES)
+
+    if args.reindex:
+        print(json.dumps({"reindexed": store.reindex(), "segments": len(store.segments())}))
+        return 0
+
+    if not os.path.isfile(args.audit_log):
+        print(f"no legacy audit log at {args.audit_log}", file=sys.stderr)
+        return 1
+
+    migrated = skipped = 0
+    batch = []
+    with open(args.audit_log, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except Exception:
+                skipped += 1
+                continue
+            if not isinstance(record, dict):
+                skipped += 1
+                continue
+            # Re-serialize so every segment line is canonical single-line JSON.
+            batch.append((json.dumps(record, ensure_ascii=False), str(record.get("session_id") or "")))
+            if len(batch) >= args.batch:
+                migrated += store.append_lines(batch)
+                batch = []
+    if batch:
+        migrated += store.append_lines(batch)
+
+    if not args.keep:
+        os.replace(args.audit_log, args.audit_log + ".migrated")
+
+    print(
+        json.dumps(
+            {"migrated": migrated, "skipped": skipped, "segments": len(store.segments()), "root": store.root},
+            ensure_ascii=False,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,41 +8,49 @@ import sys
 
 def main() -> int:
     ap = argparse.ArgumentParser(description="Replay and evaluate evidence packs")
+    ap.add_argument(
+        "sources",
+        nargs="*",
+        help="cases .jsonl/.json files or report/ directories (default: tests/fixtures/cases.json)",
+    )
     ap.add_argument("--cases", default=os.path.join("tests", "fixtures", "cases.json"))
     ap.add_argument("--schema", default=os.path.join("schemas", "evidence_schema.json"))
+    ap.add_argument("--rules", default=os.path.join("configs", "rules.yaml"), help="rules.yaml to replay against ('' = built-in rules)")
+    ap.add_argument("--labels", default=None, help="JSON {session_id: expected_category} for report/ trees")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size (1 = in-process)")
+    ap.add_argument("--chunk-size", type=int, default=500)
+    ap.add_argument("--structural-only", action="store_true", help="skip full JSON Schema validation (pre-check only)")
+    ap.add_argument("--output", default=None, help="write the JSON summary here as well")
     args = ap.parse_args()
 
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     sys.path.insert(0, os.path.join(root, "src"))
 
-    from evaluation.replay import replay_one
-    from evaluation.metrics import compute_metrics
-
-    with open(os.path.join(root, args.cases), "r", encoding="utf-8") as f:
-        cases = json.load(f)
-
-    tmp_dir = os.path.join(root, "report", "replay_suite")
-    os.makedirs(tmp_dir, exist_ok=True)
-
-    results = []
-    for c in cases:
-        p = os.path.join(tmp_dir, f"{c['id']}.json")
-        evidence = {
-            "meta": {"host": "h", "service": "svc", "timestamp": "2026-01-01T00:00:00Z"},
-            "snapshots": [],
-            "hypothesis": [],
-            "next_checks": [],
-            "signals": c["signals"],
-            "policy": {"allowed_risks": ["READ_ONLY"], "deny_keywords": []},
-        }
-        with open(p, "w", encoding="utf-8") as wf:
-            json.dump(evidence, wf, ensure_ascii=True, indent=2)
-
-        res = replay_one(p, os.path.join(root, args.schema), c["expected_category"])
-        results.append(res)
-
-    m = compute_metrics(results)
-    print(json.dumps({"total": m.total, "accuracy": m.accuracy, "schema_pass_rate": m.schema_pass_rate}, indent=2))
+    from config import load_configs
+    from evaluation.corpus import ReplayOptions, replay_corpus
+
+    rules_path = os.path.join(root, args.rules) if args.rules else ""
+    rules_cfg = load_configs([rules_path]).get("rules", {}) if rules_path else {}
+    labels = {}
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    opts = ReplayOptions(
+        schema_path=os.path.join(root, args.schema),
+        rules=rules_cfg,
+        labels=labels,
+        full_validation=not args.structural_only,
+    )
+    sources = args.sources or [os.path.join(root, args.cases)]
+    summary = replay_corpus(sources, opts, workers=args.workers, chunk_size=args.chunk_size)
+    summary["rules"] = args.rules or "built-in"
+
+    text = json.dumps(summary, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
     return 0
 
 
@@ -0,0 +1,101 @@
+"""Executor interfaces.
+
+Sync executors (`LocalExecutor`, `SSHExecutor`) block one thread per command.
+Async executors (`AsyncLocalExecutor`, `AsyncSSHExecutor`) run commands as
+asyncio subprocesses so one event loop can drive thousands of commands.
+The orchestrator is async internally; `as_async_executor` lets it accept
+either kind.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+from typing import Any, List, Optional, Protocol, Sequence
+
+from adapters.exec.batch import BatchItem, BatchResult
+from adapters.exec.stream import OutputLimit, is_truncated, limit_kwargs
+
+
+class Executor(Protocol):
+    def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
+        """Run a rendered command on host; return stdout (+ framed stderr).
+
+        `limit` caps the captured output; the command is terminated once it
+        exceeds the cap. Callers only pass it when a cap is configured.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release pooled connections."""
+        raise NotImplementedError
+
+
+class AsyncExecutor(Protocol):
+    async def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
+        raise NotImplementedError
+
+    async def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+async def gather_items(
+    run: Any,
+    host: str,
+    items: Sequence[BatchItem],
+    *,
+    concurrency: int = 1,
+) -> List[BatchResult]:
+    """Async counterpart of batch.run_items_individually."""
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(max(1, int(concurrency or 1)))
+    batch_start = loop.time()
+
+    async def _one(item: BatchItem) -> BatchResult:
+        async with sem:
+            start = loop.time()
+            out = await run(host, item.command, item.timeout, **limit_kwargs(item.limit))
+            return BatchResult(
+                key=item.key,
+                output=out,
+                elapsed_ms=int((loop.time() - start) * 1000),
+                timed_out=(out or "").startswith("command timeout"),
+                truncated=is_truncated(out),
+                start_offset_ms=int((start - batch_start) * 1000),
+            )
+
+    return list(await asyncio.gather(*[_one(i) for i in items]))
+
+
+class ThreadedAsyncExecutor:
+    """Adapt a sync executor to the async interface via worker threads."""
+
+    def __init__(self, executor: Any) -> None:
+        self.executor = executor
+
+    async def run(self, host: str, command: str, timeout: int = 30, **kwargs: Any) -> str:
+        return await asyncio.to_thread(self.executor.run, host, command, timeout=timeout, **kwargs)
+
+    async def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        run_batch = getattr(self.executor, "run_batch", None)
+        if callable(run_batch):
+            return await asyncio.to_thread(run_batch, host, items, concurrency=concurrency)
+        return await gather_items(self.run, host, items, concurrency=concurrency)
+
+    def close(self) -> None:
+        close = getattr(self.executor, "close", None)
+        if callable(close):
+            close()
+
+
+def is_async_executor(executor: Any) -> bool:
+    return inspect.iscoroutinefunction(getattr(executor, "run", None))
+
+
+def as_async_executor(executor: Any) -> Any:
+    if is_async_executor(executor):
+        return executor
+    return ThreadedAsyncExecutor(executor)
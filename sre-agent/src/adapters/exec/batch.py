@@ -0,0 +1,262 @@
+"""Batched command execution.
+
+A batch ships several rendered commands to the target as one bash script and
+frames each command's output so the agent can split it back into separate
+evidence entries:
+
+    <<<SRE:{nonce}:BEGIN:{idx}>>>
+    ...stdout...
+    <<<SRE:{nonce}:STDERR:{idx}>>>
+    ...stderr...
+    <<<SRE:{nonce}:END:{idx}:{exit_code}:{elapsed_ms}:{start_offset_ms}>>>
+
+Nothing is written on the target: each command runs in its own process
+substitution that holds its capped output in memory, and frames are streamed
+to stdout in item order. Per-command timeouts use coreutils `timeout` when it
+is available and a shell watchdog otherwise; the caller still bounds the whole
+batch. Output caps are enforced remotely: only the head and, via `tail -c`,
+the real end of each stream cross the wire, and the command dies of SIGPIPE
+once it writes past the ceiling (see `OutputLimit.ceiling`).
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from adapters.exec.stream import OutputLimit, StreamCapture, is_truncated, limit_kwargs
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    key: str
+    command: str
+    timeout: int = 30
+    limit: Optional[OutputLimit] = None
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    key: str
+    output: str
+    exit_code: Optional[int] = None
+    elapsed_ms: int = 0
+    timed_out: bool = False
+    truncated: bool = False
+    # When the item started, relative to the start of the batch.
+    start_offset_ms: int = 0
+
+
+# coreutils `timeout` exits 124 on timeout (137 if it had to SIGKILL).
+_TIMEOUT_CODES = (124, 137)
+_SIGPIPE_CODE = 141
+
+
+def new_nonce() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def build_batch_script(items: Sequence[BatchItem], *, nonce: str, concurrency: int = 1) -> str:
+    """Render one bash script that runs `items` and frames their outputs.
+
+    Up to `concurrency` items run at once; frames are emitted in item order and
+    the next item starts as soon as an earlier frame has been written out.
+    """
+    limit = max(1, int(concurrency or 1))
+    lines: List[str] = [
+        "_sre_ms() { _t=$(date +%s%N 2>/dev/null); case $_t in ''|*[!0-9]*) echo -1;; *) echo $((_t / 1000000));; esac; }",
+        # _sre_cap MAX HEAD CEILING (MAX 0 = unlimited): pass the first HEAD
+        # bytes and the real end of the stream, at most MAX + 1 bytes in all
+        # (the extra byte marks truncation); stop reading at CEILING. `dd`
+        # reads exactly HEAD bytes where `head -c` may over-read the pipe.
+        '_sre_cap() { if [ "$1" -gt 0 ]; then head -c "$3" | { [ "$2" -gt 0 ] &&'
+        ' dd bs="$2" count=1 iflag=fullblock 2>/dev/null; tail -c "$(($1 - $2 + 1))"; };'
+        " else cat; fi; }",
+        "if command -v timeout >/dev/null 2>&1; then _sre_to=1; else _sre_to=; fi",
+        # _sre_exec TIMEOUT CMD: exit 124 on timeout, like coreutils `timeout`.
+        "_sre_exec() {",
+        '  if [ -n "$_sre_to" ]; then timeout -k 2 "$1" bash -c "$2" </dev/null; return; fi',
+        '  local _p _w _rc _st=$SECONDS',
+        # Job control puts the command in its own process group so the
+        # watchdog can kill its children too.
+        '  set -m; bash -c "$2" </dev/null & _p=$!; set +m',
+        "  ( trap 'kill $! 2>/dev/null; exit 0' TERM; sleep \"$1\" & wait $!; kill -TERM -- \"-$_p\" 2>/dev/null;"
+        " sleep 2 & wait $!; kill -KILL -- \"-$_p\" 2>/dev/null ) </dev/null >/dev/null 2>&1 &",
+        "  _w=$!",
+        '  wait "$_p"; _rc=$?',
+        '  kill "$_w" 2>/dev/null',
+        '  if [ "$_rc" -gt 128 ] && [ $((SECONDS - _st)) -ge "$1" ]; then _rc=124; fi',
+        '  return "$_rc"',
+        "}",
+        # _sre_job IDX TIMEOUT CMD MAX HEAD CEILING: run one item, then write its whole frame.
+        # stderr (NULs dropped) is read first, then NUL, then stdout + ".<rc>".
+        "_sre_job() {",
+        "  local _s _e _el _o= _x= _rc",
+        "  _s=$(_sre_ms)",
+        "  { IFS= read -r -d '' _x; IFS= read -r -d '' _o; } < <({ printf '\\0%s\\0' \"$( {"
+        ' { _sre_exec "$2" "$3" | _sre_cap "$4" "$5" "$6"; printf \'.%s\' "${PIPESTATUS[0]}"; } 2>&1 1>&5'
+        " | tr -d '\\000' | _sre_cap \"$4\" \"$5\" \"$6\" >&2; } 5>&1 )\" >&2; } 2>&1)",
+        "  _e=$(_sre_ms)",
+        '  _rc=${_o##*.}; _o=${_o%.*}',
+        "  case $_rc in ''|*[!0-9]*) _rc=-1;; esac",
+        '  if [ "$_s" -ge 0 ] && [ "$_e" -ge 0 ]; then _el=$((_e - _s)); else _el=-1; fi',
+        '  if [ "$_s" -ge 0 ] && [ "$_sre_t0" -ge 0 ]; then _s=$((_s - _sre_t0)); else _s=-1; fi',
+        f"  printf '<<<SRE:{nonce}:BEGIN:%s>>>\\n%s\\n<<<SRE:{nonce}:STDERR:%s>>>\\n%s\\n<<<SRE:{nonce}:END:%s:%s:%s:%s>>>\\n'"
+        ' "$1" "$_o" "$1" "$_x" "$1" "$_rc" "$_el" "$_s"',
+        "}",
+        "_sre_t0=$(_sre_ms)",
+    ]
+
+    def _launch(idx: int) -> str:
+        item = items[idx]
+        timeout = max(1, int(item.timeout or 30))
+        lim = item.limit if item.limit is not None and item.limit.enabled else OutputLimit()
+        caps = f"{lim.max_bytes} {lim.head_bytes} {lim.ceiling if lim.enabled else 0}"
+        return f"exec {{_sre_f{idx}}}< <(_sre_job {idx} {timeout} {shlex.quote(item.command)} {caps})"
+
+    for idx in range(min(limit, len(items))):
+        lines.append(_launch(idx))
+    for idx in range(len(items)):
+        lines.append(f'cat <&"$_sre_f{idx}"; exec {{_sre_f{idx}}}<&-')
+        if idx + limit < len(items):
+            lines.append(_launch(idx + limit))
+    return "\n".join(lines)
+
+
+def batch_timeout(items: Sequence[BatchItem], concurrency: int = 1) -> int:
+    """Overall agent-side timeout for a batch (remote timeouts plus slack)."""
+    timeouts = sorted((max(1, int(i.timeout or 30)) for i in items), reverse=True)
+    if not timeouts:
+        return 30
+    limit = max(1, int(concurrency or 1))
+    # Worst case: commands run in waves of `limit`.
+    waves = [timeouts[i] for i in range(0, len(timeouts), limit)]
+    return sum(waves) + 5 + 2 * len(waves)
+
+
+def batch_limit(items: Sequence[BatchItem]) -> Optional[OutputLimit]:
+    """Cap for the whole framed batch output (None if any item is uncapped)."""
+    caps = [i.limit.max_bytes for i in items if i.limit is not None and i.limit.enabled]
+    if not items or len(caps) != len(items):
+        return None
+    # stdout + stderr per item (+1 truncation byte each) plus framing.
+    total = sum(2 * (c + 1) for c in caps) + 256 * len(items)
+    return OutputLimit(max_bytes=total, head_bytes=total, tail_bytes=0)
+
+
+def _render_capped(out: str, err: str, limit: Optional[OutputLimit], stopped: bool = False) -> Tuple[str, bool]:
+    """Apply the item's cap/head/tail retention to remotely capped streams.
+
+    `stopped` means the remote side cut the command off at its ceiling.
+    """
+    if limit is not None:
+        # Both streams are already capped remotely; never stop at the ceiling here.
+        limit = replace(limit, ceiling_bytes=0)
+    with StreamCapture(limit) as capture:
+        capture.feed(out.encode("utf-8", errors="replace"))
+        capture.feed(err.encode("utf-8", errors="replace"), stderr=True)
+        capture.stopped = stopped and capture.truncated
+        return capture.render(), capture.truncated
+
+
+def _strip_added_newline(text: str) -> str:
+    # The script emits one "\n" after each captured stream.
+    return text[:-1] if text.endswith("\n") else text
+
+
+def parse_batch_output(
+    text: str,
+    items: Sequence[BatchItem],
+    *,
+    nonce: str,
+    fallback_output: str = "",
+    fallback_elapsed_ms: int = 0,
+) -> List[BatchResult]:
+    """Demultiplex framed batch output back into one result per item.
+
+    Items without a complete frame (e.g. the whole batch timed out or the ssh
+    connection failed) get `fallback_output` so the caller still records them.
+    """
+    frame = re.compile(
+        rf"<<<SRE:{re.escape(nonce)}:BEGIN:(\d+)>>>\n(.*?)<<<SRE:{re.escape(nonce)}:STDERR:\1>>>\n(.*?)"
+        rf"<<<SRE:{re.escape(nonce)}:END:\1:(-?\d+):(-?\d+)(?::(-?\d+))?>>>",
+        re.DOTALL,
+    )
+    found: Dict[int, BatchResult] = {}
+    for m in frame.finditer(text or ""):
+        idx = int(m.group(1))
+        if idx >= len(items) or idx in found:
+            continue
+        item = items[idx]
+        out = _strip_added_newline(m.group(2))
+        err = _strip_added_newline(m.group(3))
+        rc = int(m.group(4))
+        elapsed = int(m.group(5))
+        offset = int(m.group(6) or 0)
+        timed_out = rc in _TIMEOUT_CODES
+        output, truncated = _render_capped(out, err, item.limit, stopped=rc == _SIGPIPE_CODE)
+        if truncated and rc == _SIGPIPE_CODE:
+            # Killed by our own `head -c` at the ceiling, not a failure of the command itself.
+            rc = 0
+        if timed_out:
+            output += ("\n" if output else "") + f"command timeout after {item.timeout}s"
+        found[idx] = BatchResult(
+            key=item.key,
+            output=output,
+            exit_code=rc if rc >= 0 else None,
+            elapsed_ms=elapsed if elapsed >= 0 else fallback_elapsed_ms,
+            timed_out=timed_out,
+            truncated=truncated,
+            start_offset_ms=max(0, offset),
+        )
+
+    results: List[BatchResult] = []
+    for idx, item in enumerate(items):
+        if idx in found:
+            results.append(found[idx])
+            continue
+        results.append(
+            BatchResult(
+                key=item.key,
+                output=fallback_output or "batch error: no output frame",
+                exit_code=None,
+                elapsed_ms=fallback_elapsed_ms,
+                timed_out=(fallback_output or "").startswith("command timeout"),
+            )
+        )
+    return results
+
+
+def run_items_individually(
+    run: Callable[..., str],
+    host: str,
+    items: Sequence[BatchItem],
+    *,
+    concurrency: int = 1,
+) -> List[BatchResult]:
+    """Fallback batch for executors without a remote round trip to save."""
+
+    batch_start = time.time()
+
+    def _one(item: BatchItem) -> BatchResult:
+        start = time.time()
+        out = run(host, item.command, item.timeout, **limit_kwargs(item.limit))
+        return BatchResult(
+            key=item.key,
+            output=out,
+            elapsed_ms=int((time.time() - start) * 1000),
+            timed_out=(out or "").startswith("command timeout"),
+            truncated=is_truncated(out),
+            start_offset_ms=int((start - batch_start) * 1000),
+        )
+
+    workers = max(1, min(int(concurrency or 1), len(items)))
+    if workers == 1:
+        return [_one(i) for i in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sre-batch") as pool:
+        return list(pool.map(_one, items))
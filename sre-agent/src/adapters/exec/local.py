@@ -1,28 +1,113 @@
-"""Local execution adapter."""
+"""Local execution adapter.
 
+Registry commands marked `procfs:` are served in-process by
+`adapters.exec.procfs` (no fork/exec); everything else runs via subprocess.
+"""
+
+import asyncio
+import os
+import signal
 import subprocess
-from typing import Dict
+from typing import Any, Dict, List, Optional, Sequence
+
+from adapters.exec.base import gather_items
+from adapters.exec.batch import BatchItem, BatchResult, run_items_individually
+from adapters.exec.procfs import ProcfsBackend
+from adapters.exec.stream import OutputLimit, StreamCapture, read_streaming, run_streaming
 
 
 class LocalExecutor:
-    def __init__(self, config: Dict[str, str]) -> None:
+    def __init__(self, config: Dict[str, Any]) -> None:
         self.config = config
+        self.procfs = ProcfsBackend.from_config(config)
 
-    def run(self, host: str, command: str, timeout: int = 30) -> str:
+    def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
         _ = host
+        if self.procfs is not None:
+            native = self.procfs.run(command, limit)
+            if native is not None:
+                return native
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
-            output = result.stdout or ""
-            if result.stderr:
-                output += "\n[stderr]\n" + result.stderr
-            return output
+            # Stream into a capped spill buffer instead of capture_output=True.
+            with StreamCapture(limit) as capture:
+                run_streaming(command, shell=True, timeout=timeout, capture=capture)
+                return capture.render()
         except subprocess.TimeoutExpired:
             return f"command timeout after {timeout}s"
         except Exception as exc:
             return f"exec error: {type(exc).__name__}: {exc}"
+
+    def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        # No round trip to save locally; run items on a bounded thread pool.
+        return run_items_individually(self.run, host, items, concurrency=concurrency)
+
+    def close(self) -> None:
+        return None
+
+
+class AsyncLocalExecutor:
+    """asyncio variant of LocalExecutor (no thread per in-flight command)."""
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.config = config
+        self.procfs = ProcfsBackend.from_config(config)
+
+    async def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
+        _ = host
+        if self.procfs is not None and self.procfs.match(command) is not None:
+            # A read of a hung process's /proc files can block: keep it off the loop.
+            try:
+                native = await asyncio.wait_for(asyncio.to_thread(self.procfs.run, command, limit), timeout=timeout)
+            except asyncio.TimeoutError:
+                return f"command timeout after {timeout}s"
+            if native is not None:
+                return native
+        try:
+            proc = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except Exception as exc:
+            return f"exec error: {type(exc).__name__}: {exc}"
+        with StreamCapture(limit) as capture:
+            try:
+                await asyncio.wait_for(_drain(proc, capture), timeout=timeout)
+            except asyncio.TimeoutError:
+                await _kill_process_group(proc)
+                return f"command timeout after {timeout}s"
+            except asyncio.CancelledError:
+                await _kill_process_group(proc)
+                raise
+            return capture.render()
+
+    async def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        return await gather_items(self.run, host, items, concurrency=concurrency)
+
+    def close(self) -> None:
+        return None
+
+
+async def _drain(proc: "asyncio.subprocess.Process", capture: StreamCapture) -> None:
+    if await read_streaming(proc, capture):
+        await proc.wait()
+    else:
+        # Output cap exceeded: stop the command early.
+        await _kill_process_group(proc)
+
+
+async def _kill_process_group(proc: "asyncio.subprocess.Process") -> None:
+    """Kill a shell and its children (the shell runs in its own session)."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+    try:
+        # Drain what is left in the pipes so their transports close.
+        await proc.communicate()
+    except Exception:
+        pass
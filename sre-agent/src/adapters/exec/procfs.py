@@ -0,0 +1,164 @@
+"""In-process procfs backend for local execution.
+
+When the agent runs on the affected host (`--exec-mode local`, e.g. as a
+sidecar), commands that only read kernel files do not need a shell: every
+fork/exec competes with the struggling workload. Registry commands marked
+`procfs: <handler>` in commands.yaml are served by reading and formatting the
+files in Python instead:
+
+    loadavg:
+      cmd: cat /proc/loadavg
+      procfs: cat
+
+A rendered command is matched against the marked templates (placeholders
+become strict patterns: `{pid}` digits only), so only exact registry
+commands take this path; everything else falls back to subprocess.
+
+Handlers reproduce the tool's output so the regular parsers apply:
+- cat: the concatenated files (only under /proc and /sys)
+- free_m: `free -m` from /proc/meminfo (procps-ng layout, used = total - available)
+- nproc: CPUs this process may run on (sched_getaffinity, as nproc does)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shlex
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from adapters.exec.stream import OutputLimit, StreamCapture
+
+
+LOG = logging.getLogger("sre_agent.exec.procfs")
+
+PROC_ROOT = "/proc"
+_READ_ROOTS = ("/proc/", "/sys/")
+_PLACEHOLDER_PATTERNS = {"pid": r"[0-9]+", "service": r"[A-Za-z0-9_.@-]+"}
+_DEFAULT_PLACEHOLDER = r"[A-Za-z0-9_.:@-]+"
+_PLACEHOLDER_RE = re.compile(r"\\\{([A-Za-z_][A-Za-z0-9_]*)\\\}")
+
+# (stdout, stderr)
+Output = Tuple[bytes, bytes]
+
+
+def _cat(args: List[str], root: str) -> Output:
+    out: List[bytes] = []
+    err: List[bytes] = []
+    for path in args:
+        if not path.startswith(_READ_ROOTS) or ".." in path.split("/"):
+            raise ValueError(f"procfs cat outside /proc,/sys: {path}")
+        try:
+            # `root` stands in for /proc (tests use a fake tree).
+            real = os.path.join(root, path[len("/proc/") :]) if path.startswith("/proc/") else path
+            with open(real, "rb") as f:
+                out.append(f.read())
+        except OSError as exc:
+            err.append(f"cat: {path}: {exc.strerror}\n".encode("utf-8"))
+    return b"".join(out), b"".join(err)
+
+
+def _meminfo(root: str) -> Dict[str, int]:
+    values: Dict[str, int] = {}
+    with open(os.path.join(root, "meminfo"), "r", encoding="utf-8") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            parts = rest.split()
+            if parts and parts[0].isdigit():
+                values[key] = int(parts[0])
+    return values
+
+
+def _free_m(args: List[str], root: str) -> Output:
+    m = _meminfo(root)
+    total = m.get("MemTotal", 0)
+    free = m.get("MemFree", 0)
+    cache = m.get("Buffers", 0) + m.get("Cached", 0) + m.get("SReclaimable", 0)
+    available = m.get("MemAvailable", free + cache)
+    swap_total = m.get("SwapTotal", 0)
+    swap_free = m.get("SwapFree", 0)
+
+    def mb(kb: int) -> int:
+        return kb // 1024
+
+    lines = [
+        f"{'':15}{'total':>12}{'used':>12}{'free':>12}{'shared':>12}{'buff/cache':>12}{'available':>12}",
+        f"{'Mem:':15}{mb(total):>12}{mb(total - available):>12}{mb(free):>12}{mb(m.get('Shmem', 0)):>12}"
+        f"{mb(cache):>12}{mb(available):>12}",
+        f"{'Swap:':15}{mb(swap_total):>12}{mb(swap_total - swap_free):>12}{mb(swap_free):>12}",
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8"), b""
+
+
+def _nproc(args: List[str], root: str) -> Output:
+    try:
+        n = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        n = os.cpu_count() or 1
+    return f"{n}\n".encode("utf-8"), b""
+
+
+HANDLERS: Dict[str, Callable[[List[str], str], Output]] = {
+    "cat": _cat,
+    "free_m": _free_m,
+    "nproc": _nproc,
+}
+
+
+def _template_pattern(template: str) -> "re.Pattern[str]":
+    escaped = re.escape(template.strip())
+    return re.compile(
+        _PLACEHOLDER_RE.sub(
+            lambda m: f"(?:{_PLACEHOLDER_PATTERNS.get(m.group(1), _DEFAULT_PLACEHOLDER)})", escaped
+        )
+    )
+
+
+class ProcfsBackend:
+    """Serves registry commands marked `procfs:` without fork/exec."""
+
+    def __init__(self, routes: List[Tuple["re.Pattern[str]", str]], *, root: str = PROC_ROOT) -> None:
+        self.routes = routes
+        self.root = root
+        self.served = 0
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> Optional["ProcfsBackend"]:
+        """From an executor config: `commands` (the registry) and `procfs_native` (default on)."""
+        if str(config.get("procfs_native", True)).lower() in ("false", "0", "no"):
+            return None
+        routes: List[Tuple["re.Pattern[str]", str]] = []
+        for cmd_id, meta in (config.get("commands") or {}).items():
+            if not isinstance(meta, Mapping) or not meta.get("procfs") or not meta.get("cmd"):
+                continue
+            handler = str(meta["procfs"])
+            if handler not in HANDLERS:
+                raise ValueError(f"{cmd_id}: unknown procfs handler {handler!r}")
+            routes.append((_template_pattern(str(meta["cmd"])), handler))
+        if not routes:
+            return None
+        return cls(routes, root=str(config.get("procfs_root") or PROC_ROOT))
+
+    def match(self, command: str) -> Optional[str]:
+        text = command.strip()
+        for pattern, handler in self.routes:
+            if pattern.fullmatch(text):
+                return handler
+        return None
+
+    def run(self, command: str, limit: Optional[OutputLimit] = None) -> Optional[str]:
+        """The command's output, or None if it is not a procfs command (use subprocess)."""
+        handler = self.match(command)
+        if handler is None:
+            return None
+        try:
+            out, err = HANDLERS[handler](shlex.split(command)[1:], self.root)
+        except (OSError, ValueError) as exc:
+            LOG.debug("procfs fallback command=%s err=%s", command, exc)
+            return None
+        self.served += 1
+        with StreamCapture(limit) as capture:
+            if capture.feed(out):
+                capture.feed(err, stderr=True)
+            return capture.render()
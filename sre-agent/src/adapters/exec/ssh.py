@@ -2,10 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 import shlex
+import socket
 import subprocess
-from typing import Any, Dict, List, Mapping
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from adapters.exec.batch import (
+    BatchItem,
+    BatchResult,
+    batch_limit,
+    batch_timeout,
+    build_batch_script,
+    new_nonce,
+    parse_batch_output,
+)
+from adapters.exec.ssh_pool import ControlMasterPool, ParamikoPool
+from adapters.exec.stream import OutputLimit, StreamCapture, read_channel, read_streaming, run_streaming
 
 
 def _bash_single_quote(value: str) -> str:
@@ -58,6 +74,16 @@ class SSHExecutor:
         elif isinstance(path_extra, list):
             self.path_extra = [str(x) for x in path_extra if str(x).strip()]
 
+        # Session-scoped connection reuse (ControlMaster / cached paramiko Transport).
+        pool_cfg = config.get("pool") if isinstance(config.get("pool"), Mapping) else {}
+        self.pool_enabled = str(pool_cfg.get("enabled", True)).lower() not in ("false", "0", "no")
+        self.pool_idle_timeout = int(pool_cfg.get("idle_timeout_sec") or 300)
+        self.pool_health_check = int(pool_cfg.get("health_check_interval_sec") or 30)
+        self.pool_control_dir = str(pool_cfg.get("control_dir") or "")
+        self._control_pool: Optional[ControlMasterPool] = None
+        self._paramiko_pool: Optional[ParamikoPool] = None
+        # Executors may be shared across threads (baseline concurrency, fleet mode).
+        self._pool_lock = threading.Lock()
 
     def _build_remote_script(self, command: str) -> str:
         lines: List[str] = []
@@ -89,51 +115,157 @@ class SSHExecutor:
             lines.append(f"export PATH={_bash_single_quote(p)}:$PATH")
         lines.extend(self.shell_init)
         lines.append(command)
-        return "; ".join([x for x in lines if x.strip()])
+        # Newline-joined: "; " after `then`/`do` lines is a bash syntax error.
+        return "\n".join([x for x in lines if x.strip()])
 
-    def run(self, host: str, command: str, timeout: int = 30) -> str:
+    def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
         if self.password:
-            return self._run_paramiko(host, command, timeout)
-        return self._run_subprocess(host, command, timeout)
+            return self._run_paramiko(host, command, timeout, limit)
+        return self._run_subprocess(host, command, timeout, limit)
+
+    def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        """Run several commands in one remote round trip.
+
+        Outputs are framed per command (see adapters.exec.batch) and split back
+        into one BatchResult per item, in item order.
+        """
+        if not items:
+            return []
+        nonce = new_nonce()
+        script = build_batch_script(items, nonce=nonce, concurrency=concurrency)
+        start_ts = time.time()
+        text = self.run(host, script, timeout=batch_timeout(items, concurrency), limit=batch_limit(items))
+        elapsed_ms = int((time.time() - start_ts) * 1000)
+        return parse_batch_output(
+            text,
+            items,
+            nonce=nonce,
+            fallback_output=text.strip(),
+            fallback_elapsed_ms=elapsed_ms,
+        )
 
-    def _run_subprocess(self, host: str, command: str, timeout: int) -> str:
+    def close(self) -> None:
+        """Release pooled connections (call once per session)."""
+        with self._pool_lock:
+            control, self._control_pool = self._control_pool, None
+            paramiko_pool, self._paramiko_pool = self._paramiko_pool, None
+        if control is not None:
+            control.close()
+        if paramiko_pool is not None:
+            paramiko_pool.close()
+
+    def __enter__(self) -> "SSHExecutor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _base_ssh_args(self) -> List[str]:
+        strict = "yes" if self.strict_host_key else "no"
+        return [
+            "-o",
+            "BatchMode=yes",
+            "-o",
+            f"StrictHostKeyChecking={strict}",
+            "-o",
+            f"ConnectTimeout={self.connect_timeout}",
+            "-p",
+            str(self.port),
+        ]
+
+    def _control(self) -> Optional[ControlMasterPool]:
+        if not self.pool_enabled:
+            return None
+        with self._pool_lock:
+            if self._control_pool is None:
+                self._control_pool = ControlMasterPool(
+                    idle_timeout_sec=self.pool_idle_timeout,
+                    health_check_interval_sec=self.pool_health_check,
+                    control_dir=self.pool_control_dir,
+                )
+            return self._control_pool
+
+    def _paramiko(self) -> ParamikoPool:
+        with self._pool_lock:
+            if self._paramiko_pool is None:
+                self._paramiko_pool = ParamikoPool(
+                    port=self.port,
+                    user=self.user,
+                    password=self.password,
+                    connect_timeout=self.connect_timeout,
+                    idle_timeout_sec=self.pool_idle_timeout,
+                    health_check_interval_sec=self.pool_health_check,
+                )
+            return self._paramiko_pool
+
+    def _ssh_argv(self, host: str, command: str) -> Tuple[str, List[str], Optional[ControlMasterPool]]:
+        """Build the `ssh` argv for command; returns (target, argv, control pool)."""
         target = host if "@" in host else f"{self.user}@{host}"
 
         script = self._build_remote_script(command)
         wrapped = f"bash -lc {shlex.quote(script)}"
 
-        strict = "yes" if self.strict_host_key else "no"
-        cmd = (
-            "ssh -o BatchMode=yes "
-            f"-o StrictHostKeyChecking={strict} "
-            f"-o ConnectTimeout={self.connect_timeout} "
-            f"-p {self.port} "
-            f"{shlex.quote(target)} {shlex.quote(wrapped)}"
-        )
+        base = self._base_ssh_args()
+        pool = self._control()
+        if pool is not None:
+            pool.remember(target, base)
+        argv = ["ssh", *base, *(pool.ssh_options() if pool else []), target, wrapped]
+        return target, argv, pool
+
+    def _run_subprocess(self, host: str, command: str, timeout: int, limit: Optional[OutputLimit] = None) -> str:
+        target, argv, pool = self._ssh_argv(host, command)
+        if pool is not None:
+            pool.ensure_healthy(target)
 
         try:
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-            )
-            output = result.stdout or ""
-            if result.stderr:
-                output += "\n[stderr]\n" + result.stderr
-            return output
+            # Killing the local ssh client on cap overflow closes the channel,
+            # so the remote command is stopped as well.
+            with StreamCapture(limit) as capture:
+                rc = run_streaming(argv, shell=False, timeout=timeout, capture=capture)
+                if pool is None or not pool.is_mux_failure(rc, capture.stderr_text()):
+                    return capture.render()
+            # Stale control socket: drop the master and retry once on a fresh connection.
+            pool.reset(target)
+            with StreamCapture(limit) as capture:
+                run_streaming(argv, shell=False, timeout=timeout, capture=capture)
+                return capture.render()
         except subprocess.TimeoutExpired:
             return f"command timeout after {timeout}s"
         except Exception as exc:
             return f"ssh error: {type(exc).__name__}: {exc}"
 
-    def _run_paramiko(self, host: str, command: str, timeout: int) -> str:
+    def _run_paramiko(self, host: str, command: str, timeout: int, limit: Optional[OutputLimit] = None) -> str:
         try:
-            import paramiko
+            import paramiko  # noqa: F401
         except Exception as exc:
             return f"paramiko not available: {exc}"
 
+        script = self._build_remote_script(command)
+        wrapped = f"bash -lc {shlex.quote(script)}"
+
+        if not self.pool_enabled:
+            return self._run_paramiko_oneshot(host, wrapped, timeout, limit)
+
+        chan = None
+        try:
+            chan = self._paramiko().open_session(host, timeout)
+            chan.settimeout(timeout)
+            chan.exec_command(wrapped)
+            return _read_paramiko_channel(chan, timeout, limit)
+        except socket.timeout:
+            return f"command timeout after {timeout}s"
+        except Exception as exc:
+            return f"ssh error: {type(exc).__name__}: {exc}"
+        finally:
+            try:
+                if chan is not None:
+                    chan.close()
+            except Exception:
+                pass
+
+    def _run_paramiko_oneshot(self, host: str, wrapped: str, timeout: int, limit: Optional[OutputLimit] = None) -> str:
+        import paramiko
+
         client = paramiko.SSHClient()
         client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
@@ -148,13 +280,9 @@ class SSHExecutor:
                 look_for_keys=False,
             )
 
-            script = self._build_remote_script(command)
-            wrapped = f"bash -lc {shlex.quote(script)}"
             stdin, stdout, stderr = client.exec_command(wrapped, timeout=timeout)
-            _ = stdin
-            out = stdout.read().decode("utf-8", errors="replace") if stdout else ""
-            err = stderr.read().decode("utf-8", errors="replace") if stderr else ""
-            return out + ("\n[stderr]\n" + err if err else "")
+            _ = stdin, stderr
+            return _read_paramiko_channel(stdout.channel, timeout, limit)
         except Exception as exc:
             return f"ssh error: {type(exc).__name__}: {exc}"
         finally:
@@ -162,3 +290,97 @@ class SSHExecutor:
                 client.close()
             except Exception:
                 pass
+
+
+def _read_paramiko_channel(chan: Any, timeout: int, limit: Optional[OutputLimit]) -> str:
+    with StreamCapture(limit) as capture:
+        completed, _ = read_channel(chan, capture, timeout)
+        if not completed:
+            return f"command timeout after {timeout}s"
+        # On cap overflow the caller closes the channel, which ends the remote command.
+        return capture.render()
+
+
+class AsyncSSHExecutor:
+    """asyncio variant of SSHExecutor.
+
+    Key-based auth runs `ssh` as an asyncio subprocess over the shared
+    ControlMaster pool. Password auth has no async paramiko API, so those
+    commands run on worker threads over the pooled Transport.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self.sync = SSHExecutor(config)
+
+    async def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
+        if self.sync.password:
+            return await asyncio.to_thread(self.sync._run_paramiko, host, command, timeout, limit)
+        return await self._run_subprocess(host, command, timeout, limit)
+
+    async def _exec(self, argv: List[str], timeout: int, capture: StreamCapture) -> int:
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def _drain() -> None:
+            if await read_streaming(proc, capture):
+                await proc.wait()
+            else:
+                proc.kill()
+                await proc.communicate()
+
+        try:
+            await asyncio.wait_for(_drain(), timeout=timeout)
+        except BaseException:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+            try:
+                await proc.communicate()
+            except Exception:
+                pass
+            raise
+        return proc.returncode if proc.returncode is not None else -1
+
+    async def _run_subprocess(self, host: str, command: str, timeout: int, limit: Optional[OutputLimit] = None) -> str:
+        target, argv, pool = self.sync._ssh_argv(host, command)
+        try:
+            if pool is not None:
+                await asyncio.to_thread(pool.ensure_healthy, target)
+            with StreamCapture(limit) as capture:
+                rc = await self._exec(argv, timeout, capture)
+                if pool is None or not pool.is_mux_failure(rc, capture.stderr_text()):
+                    return capture.render()
+            await asyncio.to_thread(pool.reset, target)
+            with StreamCapture(limit) as capture:
+                await self._exec(argv, timeout, capture)
+                return capture.render()
+        except asyncio.TimeoutError:
+            return f"command timeout after {timeout}s"
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            return f"ssh error: {type(exc).__name__}: {exc}"
+
+    async def run_batch(self, host: str, items: Sequence[BatchItem], *, concurrency: int = 1) -> List[BatchResult]:
+        if not items:
+            return []
+        nonce = new_nonce()
+        script = build_batch_script(items, nonce=nonce, concurrency=concurrency)
+        start_ts = time.time()
+        text = await self.run(host, script, timeout=batch_timeout(items, concurrency), limit=batch_limit(items))
+        elapsed_ms = int((time.time() - start_ts) * 1000)
+        return parse_batch_output(
+            text,
+            items,
+            nonce=nonce,
+            fallback_output=text.strip(),
+            fallback_elapsed_ms=elapsed_ms,
+        )
+
+    def close(self) -> None:
+        self.sync.close()
@@ -0,0 +1,264 @@
+"""Session-scoped SSH connection pools.
+
+Two pools back `SSHExecutor`:
+- ControlMasterPool: OpenSSH multiplexing (ControlMaster/ControlPersist) for
+  the `ssh` subprocess path. The first command per host opens the master
+  connection; later commands reuse its socket without a new TCP/auth handshake.
+- ParamikoPool: one authenticated `paramiko.Transport` per (host, port, user)
+  for the password path; every command opens a new channel on it.
+
+Both evict idle connections, health-check before reuse and reconnect once on
+failure. Call `close()` at the end of a session.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+LOG = logging.getLogger("sre_agent.exec.ssh_pool")
+
+# `ssh` exits 255 on connection-level errors. Only the client's own
+# ControlMaster messages (at the start of a stderr line) mean a stale/broken
+# control socket; "Connection refused" or "Broken pipe" alone may come from
+# the remote command or the target host itself, where a retry does not help.
+_MUX_ERROR_RE = re.compile(r"^(?:mux_client_\w+: |Control socket connect\()", re.MULTILINE)
+
+
+class ControlMasterPool:
+    def __init__(
+        self,
+        *,
+        idle_timeout_sec: int = 300,
+        health_check_interval_sec: int = 30,
+        control_dir: str = "",
+    ) -> None:
+        # Idle eviction is delegated to ssh itself via ControlPersist.
+        self.idle_timeout_sec = max(1, int(idle_timeout_sec))
+        self.health_check_interval_sec = max(0, int(health_check_interval_sec))
+        self._owns_dir = not control_dir
+        # Keep the path short: unix socket paths are limited to ~104 bytes.
+        self.control_dir = control_dir or tempfile.mkdtemp(prefix="sre-ssh-")
+        os.makedirs(self.control_dir, mode=0o700, exist_ok=True)
+        self._targets: Dict[str, List[str]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def ssh_options(self) -> List[str]:
+        return [
+            "-o",
+            "ControlMaster=auto",
+            "-o",
+            f"ControlPath={os.path.join(self.control_dir, '%C')}",
+            "-o",
+            f"ControlPersist={self.idle_timeout_sec}s",
+        ]
+
+    def remember(self, target: str, base_args: List[str]) -> None:
+        """Record connection args for `target` so close()/reset() can address its master."""
+        with self._lock:
+            self._targets.setdefault(target, list(base_args))
+
+    def ensure_healthy(self, target: str) -> None:
+        """Periodically verify the master for `target`; drop it if it is dead.
+
+        A master that outlived ControlPersist is gone already, so only check
+        targets that were used recently enough to still have one.
+        """
+        now = time.time()
+        with self._lock:
+            known = target in self._targets
+            last_used = self._last_used.get(target, 0.0)
+            last_checked = self._last_checked.get(target, 0.0)
+            self._last_used[target] = now
+        if not known or not self.health_check_interval_sec:
+            return
+        if now - last_used >= self.idle_timeout_sec or now - last_checked < self.health_check_interval_sec:
+            return
+        with self._lock:
+            self._last_checked[target] = now
+        if not self.check(target):
+            LOG.info("ssh control master unhealthy, resetting target=%s", target)
+            self.reset(target)
+
+    def is_mux_failure(self, returncode: int, stderr: str) -> bool:
+        """ssh failed (exit 255) because of the control socket, not the command."""
+        if returncode != 255:
+            return False
+        return _MUX_ERROR_RE.search(stderr or "") is not None
+
+    def check(self, target: str) -> bool:
+        """Health check: ask the master for `target` whether it is alive."""
+        return self._control(target, "check") == 0
+
+    def reset(self, target: str) -> None:
+        """Tear down the master for `target`; the next command reconnects."""
+        self._control(target, "exit")
+
+    def _control(self, target: str, op: str) -> int:
+        with self._lock:
+            base = self._targets.get(target)
+        if base is None:
+            return 1
+        try:
+            res = subprocess.run(
+                ["ssh", *base, *self.ssh_options(), "-O", op, target],
+                capture_output=True,
+                text=True,
+                timeout=10,
+            )
+            return res.returncode
+        except Exception as exc:
+            LOG.debug("ssh -O %s failed target=%s err=%s", op, target, exc)
+            return 1
+
+    def close(self) -> None:
+        with self._lock:
+            targets = list(self._targets)
+        for target in targets:
+            self.reset(target)
+        with self._lock:
+            self._targets.clear()
+            self._last_used.clear()
+            self._last_checked.clear()
+        if self._owns_dir:
+            shutil.rmtree(self.control_dir, ignore_errors=True)
+
+
+@dataclass
+class _PooledTransport:
+    client: Any
+    transport: Any
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    last_checked: float = field(default_factory=time.time)
+
+
+class ParamikoPool:
+    def __init__(
+        self,
+        *,
+        port: int,
+        user: str,
+        password: str,
+        connect_timeout: int = 10,
+        idle_timeout_sec: int = 300,
+        health_check_interval_sec: int = 30,
+    ) -> None:
+        self.port = port
+        self.user = user
+        self.password = password
+        self.connect_timeout = connect_timeout
+        self.idle_timeout_sec = max(1, int(idle_timeout_sec))
+        self.health_check_interval_sec = max(0, int(health_check_interval_sec))
+        self._entries: Dict[Tuple[str, int, str], _PooledTransport] = {}
+        self._lock = threading.Lock()
+        # Serializes connects per key so concurrent commands share one handshake.
+        self._connect_locks: Dict[Tuple[str, int, str], threading.Lock] = {}
+
+    def _key(self, host: str) -> Tuple[str, int, str]:
+        return (host, self.port, self.user)
+
+    def _connect(self, host: str) -> _PooledTransport:
+        import paramiko
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=host,
+            port=self.port,
+            username=self.user,
+            password=self.password,
+            timeout=self.connect_timeout,
+            allow_agent=False,
+            look_for_keys=False,
+        )
+        transport = client.get_transport()
+        if transport is None:
+            client.close()
+            raise RuntimeError("ssh transport not available after connect")
+        transport.set_keepalive(max(1, self.health_check_interval_sec or 30))
+        LOG.info("ssh pool connected host=%s port=%s user=%s", host, self.port, self.user)
+        return _PooledTransport(client=client, transport=transport)
+
+    def _healthy(self, entry: _PooledTransport, now: float) -> bool:
+        if not entry.transport.is_active():
+            return False
+        if self.health_check_interval_sec and now - entry.last_checked >= self.health_check_interval_sec:
+            try:
+                entry.transport.send_ignore()
+            except Exception:
+                return False
+            entry.last_checked = now
+        return True
+
+    def evict_idle(self) -> None:
+        now = time.time()
+        stale: List[_PooledTransport] = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if now - entry.last_used >= self.idle_timeout_sec:
+                    stale.append(self._entries.pop(key))
+        for entry in stale:
+            _close_quietly(entry.client)
+
+    def acquire(self, host: str) -> Any:
+        """Return a live transport for `host`, reconnecting if needed."""
+        self.evict_idle()
+        key = self._key(host)
+        with self._lock:
+            conn_lock = self._connect_locks.setdefault(key, threading.Lock())
+        with conn_lock:
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and not self._healthy(entry, now):
+                LOG.info("ssh pool dropping unhealthy transport host=%s", host)
+                self.discard(host)
+                entry = None
+            if entry is None:
+                entry = self._connect(host)
+                with self._lock:
+                    self._entries[key] = entry
+            entry.last_used = now
+            return entry.transport
+
+    def discard(self, host: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(self._key(host), None)
+        if entry is not None:
+            _close_quietly(entry.client)
+
+    def open_session(self, host: str, timeout: int) -> Any:
+        """Open a channel on the pooled transport; reconnect once on failure."""
+        try:
+            return self.acquire(host).open_session(timeout=timeout)
+        except Exception as exc:
+            LOG.info("ssh pool reconnecting host=%s err=%s: %s", host, type(exc).__name__, exc)
+            self.discard(host)
+            return self.acquire(host).open_session(timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            _close_quietly(entry.client)
+
+
+def _close_quietly(client: Optional[Any]) -> None:
+    try:
+        if client is not None:
+            client.close()
+    except Exception:
+        pass
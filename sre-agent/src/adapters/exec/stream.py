@@ -0,0 +1,342 @@
+"""Streaming, size-capped command output capture.
+
+Executors read stdout/stderr in chunks into a `StreamCapture` instead of
+buffering whole streams in memory. Bytes spill to a temp file past a small
+in-memory threshold. Past a command's cap (`max_bytes` in commands.yaml,
+default `execution.output`) reading continues into a rolling tail of
+`tail_bytes`, so the kept tail is the real end of the output (the newest
+lines of a log); only at the hard ceiling (`ceiling_bytes`, default
+4 x max_bytes) is the command terminated. The rendered text keeps the head
+and the tail around a truncation marker, so agent memory stays bounded by the
+cap no matter how much the command prints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import selectors
+import signal
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+# Bytes kept in memory per stream before spilling to disk.
+SPILL_THRESHOLD = 1024 * 1024
+CEILING_FACTOR = 4
+
+_TRUNCATED_RE = re.compile(r"\[sre-agent: output truncated at (\d+) bytes")
+
+
+@dataclass(frozen=True)
+class OutputLimit:
+    """Per-command output cap; max_bytes <= 0 means unlimited."""
+
+    max_bytes: int = 0
+    head_bytes: int = 0
+    tail_bytes: int = 0
+    # Bytes read before the command is killed; 0 = 4 x max_bytes.
+    ceiling_bytes: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def ceiling(self) -> int:
+        return max(self.max_bytes, self.ceiling_bytes or CEILING_FACTOR * self.max_bytes)
+
+
+def _int(v: Any, default: int) -> int:
+    try:
+        return int(v)
+    except Exception:
+        return default
+
+
+def output_limit(meta: Optional[Mapping[str, Any]], defaults: Optional[Mapping[str, Any]] = None) -> Optional[OutputLimit]:
+    """Resolve the cap for one command from its registry meta and defaults.
+
+    head/tail default to half of max_bytes each, so an untruncated output is
+    never larger than a truncated one.
+    """
+    meta = meta or {}
+    defaults = defaults or {}
+    max_bytes = _int(meta.get("max_bytes", defaults.get("max_bytes")), 0)
+    if max_bytes <= 0:
+        return None
+    head = _int(meta.get("head_bytes", defaults.get("head_bytes")), max_bytes // 2)
+    tail = _int(meta.get("tail_bytes", defaults.get("tail_bytes")), max_bytes // 2)
+    head = max(0, min(head, max_bytes))
+    tail = max(0, min(tail, max_bytes - head))
+    ceiling = max(0, _int(meta.get("ceiling_bytes", defaults.get("ceiling_bytes")), 0))
+    return OutputLimit(max_bytes=max_bytes, head_bytes=head, tail_bytes=tail, ceiling_bytes=ceiling)
+
+
+def truncation_marker(limit: OutputLimit, seen: int = 0, stopped: bool = False) -> str:
+    read = f" of {seen}{'+ (stopped at ceiling)' if stopped else ''}" if seen else ""
+    return (
+        f"[sre-agent: output truncated at {limit.max_bytes} bytes; "
+        f"kept head {limit.head_bytes} / tail {limit.tail_bytes} bytes{read}]"
+    )
+
+
+def is_truncated(output: str) -> bool:
+    return bool(output) and _TRUNCATED_RE.search(output) is not None
+
+
+class SpillBuffer:
+    """Append-only byte buffer that spills to a temp file past a threshold."""
+
+    def __init__(self, spill_threshold: int = SPILL_THRESHOLD) -> None:
+        self._file = tempfile.SpooledTemporaryFile(max_size=spill_threshold, mode="w+b")
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        if data:
+            self._file.write(data)
+            self.size += len(data)
+
+    def read_range(self, start: int, length: int) -> bytes:
+        if length <= 0 or start >= self.size:
+            return b""
+        self._file.seek(max(0, start))
+        data = self._file.read(length)
+        self._file.seek(0, os.SEEK_END)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _Stream:
+    """One captured stream: the first bytes (up to the shared cap) plus a
+    rolling tail of what came after."""
+
+    def __init__(self) -> None:
+        self.buf = SpillBuffer()
+        self.ring = bytearray()
+        self.over = 0  # bytes past the cap, of which `ring` keeps the last
+
+    @property
+    def size(self) -> int:
+        return self.buf.size
+
+
+class StreamCapture:
+    """Collect stdout/stderr chunks under one shared byte cap.
+
+    Bytes past `max_bytes` only feed a per-stream rolling tail. `feed`
+    returns False once `ceiling` bytes have been read; the caller should then
+    stop reading and terminate the command.
+    """
+
+    def __init__(self, limit: Optional[OutputLimit] = None) -> None:
+        self.limit = limit if limit is not None and limit.enabled else None
+        self._out = _Stream()
+        self._err = _Stream()
+        self.out = self._out.buf
+        self.err = self._err.buf
+        self.truncated = False
+        self.stopped = False
+        self.seen = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.out.size + self.err.size
+
+    def feed(self, data: bytes, *, stderr: bool = False) -> bool:
+        if self.stopped:
+            return False
+        stream = self._err if stderr else self._out
+        self.seen += len(data)
+        if self.limit is None:
+            stream.buf.write(data)
+            return True
+        room = max(0, self.limit.max_bytes - self.total_bytes)
+        stream.buf.write(data[:room])
+        rest = data[room:]
+        if rest:
+            self.truncated = True
+            stream.over += len(rest)
+            tail = self.limit.tail_bytes
+            stream.ring += rest[-tail:] if tail else b""
+            del stream.ring[: max(0, len(stream.ring) - tail)]
+        if self.seen >= self.limit.ceiling and self.truncated:
+            self.stopped = True
+            return False
+        return True
+
+    def _text(self, stream: _Stream, head: int, tail: int) -> str:
+        buf, ring = stream.buf, bytes(stream.ring)
+        complete = stream.over <= len(ring)
+        if not self.truncated or (complete and head + tail >= buf.size + stream.over):
+            data = buf.read_range(0, buf.size) + ring
+        else:
+            kept = buf.read_range(0, min(head, buf.size))
+            if stream.over >= tail:
+                end = ring[len(ring) - tail :] if tail else b""
+            else:
+                # The tail reaches back from the rolling part into the buffer.
+                start = max(len(kept), buf.size - (tail - stream.over))
+                end = buf.read_range(start, buf.size - start) + ring
+            data = kept + b"\n...\n" + end
+        return data.decode("utf-8", errors="replace")
+
+    def stderr_text(self) -> str:
+        return self._text(self._err, 0, self.err.size + self._err.over)
+
+    def render(self) -> str:
+        """stdout (+ framed stderr), with head/tail retention when truncated."""
+        head = tail = 0
+        if self.limit is not None:
+            head, tail = self.limit.head_bytes, self.limit.tail_bytes
+        # stderr is usually tiny; give it its share of the head budget first.
+        err_head = min(self.err.size, head // 4) if self.truncated else self.err.size
+        out = self._text(self._out, head - err_head, tail)
+        err = self._text(self._err, err_head, 0) if self.err.size else ""
+        output = out + ("\n[stderr]\n" + err if err else "")
+        if self.truncated and self.limit is not None:
+            marker = truncation_marker(self.limit, self.seen, self.stopped)
+            output += ("\n" if output and not output.endswith("\n") else "") + marker
+        return output
+
+    def close(self) -> None:
+        self.out.close()
+        self.err.close()
+
+    def __enter__(self) -> "StreamCapture":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def kill_process_group(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
+
+def run_streaming(
+    args: Union[str, List[str]],
+    *,
+    shell: bool,
+    timeout: int,
+    capture: StreamCapture,
+) -> int:
+    """Run a subprocess, streaming its output into `capture`.
+
+    Returns the exit code. Raises subprocess.TimeoutExpired after killing the
+    process group when `timeout` elapses; a command that exceeds the output
+    cap is killed and its (truncated) output kept.
+    """
+    proc = subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    sel = selectors.DefaultSelector()
+    try:
+        sel.register(proc.stdout, selectors.EVENT_READ, False)
+        sel.register(proc.stderr, selectors.EVENT_READ, True)
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                kill_process_group(proc)
+                proc.wait()
+                raise subprocess.TimeoutExpired(args, timeout)
+            for key, _ in sel.select(timeout=min(remaining, 1.0)):
+                chunk = os.read(key.fd, CHUNK_SIZE)
+                if not chunk:
+                    sel.unregister(key.fileobj)
+                    continue
+                if not capture.feed(chunk, stderr=key.data):
+                    kill_process_group(proc)
+                    return proc.wait()
+        return proc.wait(timeout=max(0.1, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        kill_process_group(proc)
+        proc.wait()
+        raise
+    finally:
+        sel.close()
+        for f in (proc.stdout, proc.stderr):
+            try:
+                f.close()
+            except Exception:
+                pass
+
+
+async def read_streaming(proc: "asyncio.subprocess.Process", capture: StreamCapture) -> bool:
+    """Drain an asyncio subprocess's pipes into `capture`.
+
+    Returns False when the cap was exceeded (the caller kills the process).
+    """
+    over = asyncio.Event()
+
+    async def _pump(stream: Optional[asyncio.StreamReader], stderr: bool) -> None:
+        if stream is None:
+            return
+        while not over.is_set():
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            if not capture.feed(chunk, stderr=stderr):
+                over.set()
+                return
+
+    # A silent pipe would block its pump forever once the other one hits the
+    # cap, so also wake up on `over`.
+    pumps = asyncio.gather(_pump(proc.stdout, False), _pump(proc.stderr, True))
+    waiter = asyncio.ensure_future(over.wait())
+    try:
+        await asyncio.wait([pumps, waiter], return_when=asyncio.FIRST_COMPLETED)
+        if pumps.done():
+            pumps.result()
+    finally:
+        waiter.cancel()
+        pumps.cancel()
+    return not over.is_set()
+
+
+def read_channel(chan: Any, capture: StreamCapture, timeout: int) -> Tuple[bool, bool]:
+    """Drain a paramiko channel into `capture`.
+
+    Returns (completed, within_cap); completed is False on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    chan.settimeout(0.5)
+    while True:
+        progressed = False
+        while chan.recv_ready():
+            if not capture.feed(chan.recv(CHUNK_SIZE)):
+                return True, False
+            progressed = True
+        while chan.recv_stderr_ready():
+            if not capture.feed(chan.recv_stderr(CHUNK_SIZE), stderr=True):
+                return True, False
+            progressed = True
+        if chan.exit_status_ready() and not chan.recv_ready() and not chan.recv_stderr_ready():
+            return True, True
+        if time.monotonic() >= deadline:
+            return False, True
+        if not progressed:
+            time.sleep(0.01)
+
+
+def limit_kwargs(limit: Optional[OutputLimit]) -> Dict[str, Any]:
+    """Only pass `limit=` to executors when a cap is configured."""
+    return {"limit": limit} if limit is not None else {}
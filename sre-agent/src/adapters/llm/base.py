@@ -20,6 +20,13 @@ class LLMClient(Protocol):
 
 
 def create_llm_client(vendor: str, config: Dict[str, Any]) -> LLMClient:
+    """Build the vendor client, wrapped in the response cache when `config["cache"]` enables it."""
+    from .cache import with_cache
+
+    return with_cache(_create_vendor_client(vendor, config), vendor, config or {})
+
+
+def _create_vendor_client(vendor: str, config: Dict[str, Any]) -> LLMClient:
     vendor_key = (vendor or "").lower()
     if vendor_key in ("anthropic", "claude"):
         from .anthropic import AnthropicClient
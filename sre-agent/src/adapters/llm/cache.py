@@ -0,0 +1,231 @@
+"""Persistent LLM response cache.
+
+`CachedLLMClient` wraps any `LLMClient` and stores `generate_json` results in
+one SQLite file, keyed on (vendor, model, temperature, prompt hash, schema
+hash). Re-running `report` on the same evidence, replaying a diagnosis or
+retrying after a crash then skips the model round trip.
+
+- TTL: entries older than `ttl_sec` are misses (and deleted).
+- LRU: when the store exceeds `max_entries` / `max_bytes`, least recently
+  used entries are evicted.
+- bypass: do not read the cache (always call the model) but still refresh it.
+- Callers that reject a response (schema validation) call `invalidate` so a
+  bad answer is not replayed.
+
+`stats()` returns hit/miss counters; multi-round diagnosis writes them into
+the diagnosis trace.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from .base import LLMClient
+
+
+LOG = logging.getLogger("sre_agent.llm.cache")
+
+DEFAULT_PATH = os.path.join("report", "llm_cache.sqlite3")
+DEFAULT_TTL_SEC = 7 * 86400
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed);
+"""
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(vendor: str, model: str, temperature: float, prompt: str, schema: Mapping[str, Any]) -> str:
+    schema_hash = _sha256(json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+    return _sha256("\n".join([vendor, model, repr(float(temperature or 0.0)), _sha256(prompt), schema_hash]))
+
+
+class LLMCache:
+    """Single-file, size-bounded LRU store with TTL (safe to share across threads)."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = path
+        self.ttl_sec = float(ttl_sec)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        # WAL lets concurrent CLI runs read while one writes.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            value, created = row
+            if self.ttl_sec > 0 and now - created > self.ttl_sec:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            self.counters["hits"] += 1
+        try:
+            obj = json.loads(value)
+        except Exception:
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    def put(self, key: str, value: Mapping[str, Any]) -> None:
+        text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, text, now, now, len(text.encode("utf-8"))),
+            )
+            self.counters["stores"] += 1
+            self._evict()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def _evict(self) -> None:
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute("SELECT key, size FROM llm_cache ORDER BY accessed ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        self.counters["evictions"] += evicted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            return {**self.counters, "entries": int(entries), "bytes": int(size)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachedLLMClient:
+    """LLMClient wrapper that serves repeated (prompt, schema) calls from `LLMCache`."""
+
+    def __init__(self, inner: LLMClient, cache: LLMCache, *, vendor: str, model: str, bypass: bool = False) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.vendor = vendor
+        self.model = model
+        self.bypass = bypass
+
+    def key(self, prompt: str, schema: Dict[str, Any], temperature: float = 0.0) -> str:
+        return cache_key(self.vendor, self.model, temperature, prompt, schema)
+
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        *,
+        temperature: float = 0.0,
+        prefix: str = "",
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        # Keyed on the full text: a prefix-split call and the joined prompt share an entry.
+        key = self.key(prefix + prompt, schema, temperature)
+        if self.bypass:
+            self.cache.count("bypassed")
+        else:
+            cached = self.cache.get(key)
+            if cached is not None:
+                LOG.info("llm cache hit vendor=%s model=%s key=%s", self.vendor, self.model, key[:12])
+                return cached
+        # Optional kwargs are only passed when set: not every client accepts them.
+        options: Dict[str, Any] = {}
+        if prefix:
+            options["prefix"] = prefix
+        if timeout:
+            options["timeout"] = timeout
+        result = self.inner.generate_json(prompt, schema, temperature=temperature, **options)
+        if isinstance(result, dict):
+            self.cache.put(key, result)
+        return result
+
+    def invalidate(self, prompt: str, schema: Dict[str, Any], *, temperature: float = 0.0) -> None:
+        self.cache.invalidate(self.key(prompt, schema, temperature))
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    def capabilities(self) -> Dict[str, bool]:
+        return self.inner.capabilities()
+
+
+def with_cache(inner: LLMClient, vendor: str, config: Mapping[str, Any]) -> LLMClient:
+    """Wrap `inner` per the `llm.cache` config block; unchanged when disabled."""
+    cfg = config.get("cache") or {}
+    if not isinstance(cfg, Mapping) or str(cfg.get("enabled", False)).lower() in ("false", "0", "no", ""):
+        return inner
+    try:
+        cache = LLMCache(
+            str(cfg.get("path") or DEFAULT_PATH),
+            ttl_sec=float(cfg.get("ttl_sec") or DEFAULT_TTL_SEC),
+            max_entries=int(cfg.get("max_entries") or DEFAULT_MAX_ENTRIES),
+            max_bytes=int(cfg.get("max_bytes") or DEFAULT_MAX_BYTES),
+        )
+    except (OSError, sqlite3.Error) as exc:
+        LOG.warning("llm cache disabled path=%s err=%s", cfg.get("path"), exc)
+        return inner
+    model = str(config.get("model") or os.getenv("SRE_LLM_MODEL") or "")
+    bypass = str(cfg.get("bypass", False)).lower() in ("true", "1", "yes")
+    return CachedLLMClient(inner, cache, vendor=(vendor or "").lower(), model=model, bypass=bypass)
+
+
+def invalidate_response(llm: Any, prompt: str, schema: Dict[str, Any], *, temperature: float = 0.0) -> None:
+    """Drop a rejected response from the cache, if `llm` is cached."""
+    invalidate = getattr(llm, "invalidate", None)
+    if callable(invalidate):
+        invalidate(prompt, schema, temperature=temperature)
+
+
+def cache_stats(llm: Any) -> Optional[Dict[str, int]]:
+    stats = getattr(llm, "cache_stats", None)
+    return stats() if callable(stats) else None
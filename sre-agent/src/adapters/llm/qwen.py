@@ -54,7 +54,15 @@ class QwenClient:
             or os.getenv("OPENAI_API_KEY", "")
         )
 
-    def generate_json(self, prompt: str, schema: Dict[str, Any], *, temperature: float = 0.0) -> Dict[str, Any]:
+    def generate_json(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        *,
+        temperature: float = 0.0,
+        prefix: str = "",
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
         # Schema is enforced by downstream validate_schema(); here we force JSON-only output.
         from openai import OpenAI
 
@@ -71,17 +79,21 @@ class QwenClient:
             "Return ONLY a single JSON object that conforms to the provided schema. "
             "No markdown, no explanation, no code fences."
         )
-        user = prompt
+        # A stable prefix goes in its own leading message so the endpoint's
+        # prompt cache can reuse it across planner rounds.
+        messages = [{"role": "system", "content": system}]
+        if prefix:
+            messages.append({"role": "user", "content": prefix})
+        messages.append({"role": "user", "content": prompt})
 
         # Use Chat Completions API for broad compatibility.
         LOG.info("qwen request model=%s base_url=%s", model, base_url or "<default>")
         resp = client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
+            messages=messages,
             temperature=float(temperature or 0.0),
+            # Per-request HTTP timeout: callers pass the time left in their deadline.
+            **({"timeout": float(timeout)} if timeout else {}),
         )
         content: Optional[str] = None
         try:
@@ -95,4 +107,4 @@ class QwenClient:
 
     def capabilities(self) -> Dict[str, bool]:
         # We can emit JSON; strict server-side json_schema support is endpoint dependent.
-        return {"json_schema": False, "tool_calling": False, "streaming": False}
+        return {"json_schema": False, "tool_calling": False, "streaming": False, "prompt_prefix": True, "request_timeout": True}
@@ -21,19 +21,22 @@ if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
 from adapters.llm.base import create_llm_client  # noqa: E402
+from adapters.llm.cache import cache_stats  # noqa: E402
 from adapters.agent_sdk.base import create_agent_sdk_client  # noqa: E402
-from adapters.exec.ssh import SSHExecutor  # noqa: E402
-from adapters.exec.local import LocalExecutor  # noqa: E402
+from adapters.exec.ssh import AsyncSSHExecutor, SSHExecutor  # noqa: E402
+from adapters.exec.local import AsyncLocalExecutor, LocalExecutor  # noqa: E402
+from adapters.exec.stream import limit_kwargs, output_limit  # noqa: E402
 from config import load_configs, apply_env_overrides  # noqa: E402
 from policy.command_policy import is_command_allowed  # noqa: E402
 from policy.validators import validate_pid, validate_service  # noqa: E402
-from registry.commands import get_command_meta, load_commands, render_command  # noqa: E402
+from registry.commands import get_command_meta, load_commands, render_meta  # noqa: E402
 from storage.audit_store import AuditStore  # noqa: E402
 from storage.redaction import hash_text, redact  # noqa: E402
 from reporting.report_builder import build_report  # noqa: E402
-from reporting.schema_validate import validate_schema  # noqa: E402
+from reporting.schema_validate import load_schema, validate_schema  # noqa: E402
 from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
 from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose  # noqa: E402
+from orchestrator.fleet import load_hosts, run_fleet  # noqa: E402
 from integrations.webhook import normalize_alert  # noqa: E402
 from integrations.webhook import build_ticket_payload  # noqa: E402
 
@@ -88,6 +91,61 @@ def build_config_paths(config_dir: str) -> Dict[str, str]:
     }
 
 
+def load_full_config(config_dir: str) -> Dict[str, Any]:
+    """Load runtime/policy/commands/routing/rules and apply env overrides."""
+    config_paths = build_config_paths(config_dir)
+    base_cfg = load_configs(
+        [
+            config_paths["runtime"],
+            config_paths["policy"],
+            config_paths["commands"],
+            config_paths["routing"],
+            config_paths["rules"],
+        ]
+    )
+    base_cfg = apply_env_overrides(base_cfg)
+    return merge_env_config(base_cfg, load_runtime_env())
+
+
+def local_executor_config(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """`local` runtime config plus the registry, for the in-process procfs fast path."""
+    return {**(cfg.get("local") or {}), "commands": load_commands(cfg)}
+
+
+def build_executor(cfg: Dict[str, Any], args: argparse.Namespace, exec_mode: str, *, use_async: bool = False) -> Any:
+    """Build the executor for exec_mode; async executors avoid one thread per command."""
+    if exec_mode == "local":
+        local_cfg = local_executor_config(cfg)
+        return AsyncLocalExecutor(local_cfg) if use_async else LocalExecutor(local_cfg)
+    ssh_cfg = cfg.get("ssh", {})
+    if args.ssh_user:
+        ssh_cfg["user"] = args.ssh_user
+    if args.ssh_password:
+        ssh_cfg["password"] = args.ssh_password
+    if args.ssh_port:
+        ssh_cfg["port"] = str(args.ssh_port)
+    return AsyncSSHExecutor(ssh_cfg) if use_async else SSHExecutor(ssh_cfg)
+
+
+def llm_config(cfg: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """`llm` config for this run; --no-llm-cache bypasses cached responses (they are still refreshed)."""
+    llm_cfg = dict(cfg.get("llm", {}))
+    if getattr(args, "no_llm_cache", False) and isinstance(llm_cfg.get("cache"), dict):
+        llm_cfg["cache"] = {**llm_cfg["cache"], "bypass": True}
+    return llm_cfg
+
+
+def speculation_config(cfg: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    """Config for this run; --no-speculation disables prefetch during planning."""
+    if not getattr(args, "no_speculation", False):
+        return cfg
+    return {**cfg, "speculation": {**(cfg.get("speculation") or {}), "enabled": False}}
+
+
+def use_async_executor(cfg: Dict[str, Any]) -> bool:
+    return bool((cfg.get("execution") or {}).get("async_executor", False))
+
+
 def handle_exec(args: argparse.Namespace) -> int:
     LOG.info("exec start host=%s cmd_id=%s exec_mode=%s", args.host, args.cmd_id, args.exec_mode)
     config_paths = build_config_paths(args.config_dir)
@@ -111,7 +169,7 @@ def handle_exec(args: argparse.Namespace) -> int:
         print("command blocked by policy")
         return 3
 
-    template = meta.get("cmd")
+    template = str(meta.get("cmd") or "")
     if "{service}" in template and not validate_service(args.service or ""):
         LOG.error("exec invalid service cmd_id=%s", args.cmd_id)
         print("invalid or missing --service")
@@ -122,7 +180,7 @@ def handle_exec(args: argparse.Namespace) -> int:
         return 4
 
     try:
-        command = render_command(template, service=args.service, pid=args.pid)
+        command = render_meta(meta, service=args.service, pid=args.pid)
     except Exception as exc:
         LOG.exception("exec failed to render cmd_id=%s", args.cmd_id)
         print(f"failed to render command: {exc}")
@@ -136,7 +194,7 @@ def handle_exec(args: argparse.Namespace) -> int:
 
     executor = None
     if exec_mode == "local":
-        executor = LocalExecutor({})
+        executor = LocalExecutor(local_executor_config(cfg))
     else:
         ssh_cfg = cfg.get("ssh", {})
         if args.ssh_user:
@@ -152,7 +210,11 @@ def handle_exec(args: argparse.Namespace) -> int:
 
     started_at = datetime.now(timezone.utc).isoformat()
     start_ts = time.time()
-    output = executor.run(args.host, command, timeout=args.timeout)
+    try:
+        limit = output_limit(meta, (cfg.get("execution") or {}).get("output"))
+        output = executor.run(args.host, command, timeout=args.timeout, **limit_kwargs(limit))
+    finally:
+        executor.close()
     elapsed_ms = int((time.time() - start_ts) * 1000)
     LOG.info("exec finished cmd_id=%s elapsed_ms=%s", args.cmd_id, elapsed_ms)
 
@@ -171,7 +233,7 @@ def handle_exec(args: argparse.Namespace) -> int:
             "redacted_fields": rules,
             "redacted_count": replaced,
         }
-        AuditStore(audit_log).write(record)
+        AuditStore.from_config({**cfg, "audit_log": audit_log}).write(record)
 
     print(redacted)
     return 0
@@ -202,18 +264,17 @@ def handle_report(args: argparse.Namespace) -> int:
     cfg = merge_env_config(cfg, load_runtime_env())
 
     llm_vendor = args.llm_vendor or cfg.get("llm_vendor", "qwen")
-    _llm = create_llm_client(llm_vendor, cfg.get("llm", {}))
+    _llm = create_llm_client(llm_vendor, llm_config(cfg, args))
 
     with open(args.evidence, "r", encoding="utf-8") as f:
         evidence = json.load(f)
-    with open(args.schema, "r", encoding="utf-8") as f:
-        schema = json.load(f)
+    schema = load_schema(args.schema)
 
     # Pass policy into evidence so report builder can enforce it.
     if isinstance(evidence, dict):
         evidence.setdefault("policy", cfg.get("action_policy", {}))
     report = build_report(_llm, evidence, schema)
-    LOG.info("report finished")
+    LOG.info("report finished llm_cache=%s", cache_stats(_llm))
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return 0
 
@@ -227,18 +288,7 @@ def handle_run(args: argparse.Namespace) -> int:
         args.exec_mode,
         args.window_minutes,
     )
-    config_paths = build_config_paths(args.config_dir)
-    base_cfg = load_configs(
-        [
-            config_paths["runtime"],
-            config_paths["policy"],
-            config_paths["commands"],
-            config_paths["routing"],
-            config_paths["rules"],
-        ]
-    )
-    base_cfg = apply_env_overrides(base_cfg)
-    cfg = merge_env_config(base_cfg, load_runtime_env())
+    cfg = load_full_config(args.config_dir)
 
     exec_mode = (args.exec_mode or "ssh").lower()
     if exec_mode not in ("ssh", "local"):
@@ -246,17 +296,7 @@ def handle_run(args: argparse.Namespace) -> int:
         print("invalid --exec-mode (use ssh|local)")
         return 6
 
-    if exec_mode == "local":
-        executor = LocalExecutor({})
-    else:
-        ssh_cfg = cfg.get("ssh", {})
-        if args.ssh_user:
-            ssh_cfg["user"] = args.ssh_user
-        if args.ssh_password:
-            ssh_cfg["password"] = args.ssh_password
-        if args.ssh_port:
-            ssh_cfg["port"] = str(args.ssh_port)
-        executor = SSHExecutor(ssh_cfg)
+    executor = build_executor(cfg, args, exec_mode, use_async=use_async_executor(cfg))
 
     # session id: deterministic enough for local usage
     from datetime import datetime
@@ -273,14 +313,16 @@ def handle_run(args: argparse.Namespace) -> int:
         exec_mode=exec_mode,
         pid=args.pid,
         platform=args.platform,
+        sample_interval_sec=args.sample_interval,
+        sample_duration_sec=args.sample_duration,
     )
 
-    evidence_pack = orch.run(ctx)
+    try:
+        evidence_pack = orch.run(ctx)
+    finally:
+        executor.close()
     LOG.info("run finished session_id=%s", session_id)
-    schema_path = args.evidence_schema
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema = json.load(f)
-    validate_schema(evidence_pack, schema)
+    validate_schema(evidence_pack, load_schema(args.evidence_schema))
 
     if args.output:
         with open(args.output, "w", encoding="utf-8") as f:
@@ -291,18 +333,7 @@ def handle_run(args: argparse.Namespace) -> int:
 
 
 def handle_diagnose(args: argparse.Namespace) -> int:
-    config_paths = build_config_paths(args.config_dir)
-    base_cfg = load_configs(
-        [
-            config_paths["runtime"],
-            config_paths["policy"],
-            config_paths["commands"],
-            config_paths["routing"],
-            config_paths["rules"],
-        ]
-    )
-    base_cfg = apply_env_overrides(base_cfg)
-    cfg = merge_env_config(base_cfg, load_runtime_env())
+    cfg = load_full_config(args.config_dir)
 
     exec_mode = (args.exec_mode or "ssh").lower()
     if exec_mode not in ("ssh", "local"):
@@ -310,24 +341,14 @@ def handle_diagnose(args: argparse.Namespace) -> int:
         print("invalid --exec-mode (use ssh|local)")
         return 6
 
-    if exec_mode == "local":
-        executor = LocalExecutor({})
-    else:
-        ssh_cfg = cfg.get("ssh", {})
-        if args.ssh_user:
-            ssh_cfg["user"] = args.ssh_user
-        if args.ssh_password:
-            ssh_cfg["password"] = args.ssh_password
-        if args.ssh_port:
-            ssh_cfg["port"] = str(args.ssh_port)
-        executor = SSHExecutor(ssh_cfg)
+    executor = build_executor(cfg, args, exec_mode, use_async=use_async_executor(cfg))
 
     from datetime import datetime
 
     session_id = args.session_id or datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 
     llm_vendor = args.llm_vendor or cfg.get("llm_vendor", "qwen")
-    llm = create_llm_client(llm_vendor, cfg.get("llm", {}))
+    llm = create_llm_client(llm_vendor, llm_config(cfg, args))
 
     ctx = OrchestratorContext(
         host=args.host,
@@ -338,6 +359,8 @@ def handle_diagnose(args: argparse.Namespace) -> int:
         exec_mode=exec_mode,
         pid=args.pid,
         platform=args.platform,
+        sample_interval_sec=args.sample_interval,
+        sample_duration_sec=args.sample_duration,
     )
 
     budget = DiagnoseBudget(
@@ -346,6 +369,8 @@ def handle_diagnose(args: argparse.Namespace) -> int:
         max_total_cmds=args.max_total_cmds,
         time_budget_sec=args.time_budget_sec,
         confidence_threshold=args.confidence_threshold,
+        prompt_token_budget=args.prompt_token_budget,
+        report_reserve_sec=args.report_reserve_sec,
     )
 
     LOG.info(
@@ -359,15 +384,18 @@ def handle_diagnose(args: argparse.Namespace) -> int:
         llm_vendor,
     )
 
-    result = multi_round_diagnose(
-        config=cfg,
-        ctx=ctx,
-        executor=executor,
-        llm=llm,
-        plan_schema_path=args.plan_schema,
-        report_schema_path=args.report_schema,
-        budget=budget,
-    )
+    try:
+        result = multi_round_diagnose(
+            config=speculation_config(cfg, args),
+            ctx=ctx,
+            executor=executor,
+            llm=llm,
+            plan_schema_path=args.plan_schema,
+            report_schema_path=args.report_schema,
+            budget=budget,
+        )
+    finally:
+        executor.close()
 
     def _ensure_parent(path: str) -> None:
         parent = os.path.dirname(path)
@@ -402,6 +430,101 @@ def handle_diagnose(args: argparse.Namespace) -> int:
     return 0
 
 
+def handle_fleet(args: argparse.Namespace) -> int:
+    cfg = load_full_config(args.config_dir)
+
+    exec_mode = (args.exec_mode or "ssh").lower()
+    if exec_mode not in ("ssh", "local"):
+        LOG.error("fleet invalid exec_mode=%s", exec_mode)
+        print("invalid --exec-mode (use ssh|local)")
+        return 6
+
+    hosts = load_hosts(args.hosts_file)
+    if not hosts:
+        LOG.error("fleet empty host list hosts_file=%s", args.hosts_file)
+        print("no hosts in --hosts-file")
+        return 2
+
+    from datetime import datetime
+
+    fleet_id = args.session_id or "fleet_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+    base_ctx = OrchestratorContext(
+        host="",
+        service=args.service,
+        window_minutes=args.window_minutes,
+        env=args.env or "",
+        session_id=fleet_id,
+        exec_mode=exec_mode,
+        pid=args.pid,
+        platform=args.platform,
+        sample_interval_sec=args.sample_interval,
+        sample_duration_sec=args.sample_duration,
+    )
+
+    llm = None
+    diagnose_kwargs: Dict[str, Any] = {}
+    if args.diagnose:
+        llm_vendor = args.llm_vendor or cfg.get("llm_vendor", "qwen")
+        llm = create_llm_client(llm_vendor, llm_config(cfg, args))
+        diagnose_kwargs = {
+            "plan_schema_path": args.plan_schema,
+            "report_schema_path": args.report_schema,
+            "budget": DiagnoseBudget(
+                max_rounds=args.max_rounds,
+                max_cmds_per_round=args.max_cmds_per_round,
+                max_total_cmds=args.max_total_cmds,
+                time_budget_sec=args.time_budget_sec,
+                confidence_threshold=args.confidence_threshold,
+                prompt_token_budget=args.prompt_token_budget,
+                report_reserve_sec=args.report_reserve_sec,
+            ),
+        }
+
+    LOG.info(
+        "fleet start fleet_id=%s hosts=%s service=%s exec_mode=%s max_workers=%s diagnose=%s",
+        fleet_id,
+        len(hosts),
+        args.service,
+        exec_mode,
+        args.max_workers,
+        bool(args.diagnose),
+    )
+
+    # Fleet sessions share one event loop; async executors keep thread count flat.
+    executor = build_executor(cfg, args, exec_mode, use_async=True)
+    try:
+        summary = run_fleet(
+            config=speculation_config(cfg, args),
+            hosts=hosts,
+            base_ctx=base_ctx,
+            executor=executor,
+            max_workers=args.max_workers,
+            llm=llm,
+            diagnose_kwargs=diagnose_kwargs,
+        )
+    finally:
+        executor.close()
+
+    output = args.output or os.path.join(cfg.get("evidence", {}).get("base_dir", "report"), fleet_id, "fleet_summary.json")
+    parent = os.path.dirname(output)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    LOG.info(
+        "fleet finished fleet_id=%s succeeded=%s failed=%s summary=%s",
+        fleet_id,
+        summary["succeeded"],
+        summary["failed"],
+        os.path.abspath(output),
+    )
+
+    print(json.dumps({k: summary[k] for k in ("fleet_id", "total", "succeeded", "failed", "by_category")}, ensure_ascii=False, indent=2))
+    # Partial failures are tolerated; only a fleet where every host failed is an error.
+    return 0 if summary["succeeded"] else 1
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="SRE Agent CLI")
     ap.add_argument("--config-dir", default="configs")
@@ -429,11 +552,14 @@ def main() -> None:
     rep.add_argument("--evidence", required=True)
     rep.add_argument("--schema", required=True)
     rep.add_argument("--llm-vendor", default=None)
+    rep.add_argument("--no-llm-cache", action="store_true", help="always call the LLM (responses still refresh the cache)")
 
     run = sub.add_parser("run", help="run orchestrator to collect evidence pack")
     run.add_argument("--host", required=True)
     run.add_argument("--service", required=True)
     run.add_argument("--window-minutes", type=int, default=30)
+    run.add_argument("--sample-interval", type=float, default=0.0, help="sampling mode: probe /proc every N seconds (0 = off)")
+    run.add_argument("--sample-duration", type=int, default=0, help="sampling duration in seconds (0 = window, capped by sampling.max_duration_sec)")
     run.add_argument("--env", default="")
     run.add_argument("--pid", default=None)
     run.add_argument("--platform", default="auto", help="auto|linux|darwin|k8s")
@@ -449,6 +575,8 @@ def main() -> None:
     diag.add_argument("--host", required=True)
     diag.add_argument("--service", required=True)
     diag.add_argument("--window-minutes", type=int, default=30)
+    diag.add_argument("--sample-interval", type=float, default=0.0, help="sampling mode: probe /proc every N seconds (0 = off)")
+    diag.add_argument("--sample-duration", type=int, default=0, help="sampling duration in seconds (0 = window, capped by sampling.max_duration_sec)")
     diag.add_argument("--env", default="")
     diag.add_argument("--pid", default=None)
     diag.add_argument("--platform", default="auto", help="auto|linux|darwin|k8s")
@@ -458,6 +586,8 @@ def main() -> None:
     diag.add_argument("--ssh-password", default=None)
     diag.add_argument("--ssh-port", type=int, default=None)
     diag.add_argument("--llm-vendor", default=None)
+    diag.add_argument("--no-llm-cache", action="store_true", help="always call the LLM (responses still refresh the cache)")
+    diag.add_argument("--no-speculation", action="store_true", help="do not prefetch likely commands while the LLM plans")
     diag.add_argument("--plan-schema", default=os.path.join("schemas", "plan_schema.json"))
     diag.add_argument("--report-schema", default=os.path.join("schemas", "report_schema.json"))
     diag.add_argument("--max-rounds", type=int, default=3)
@@ -465,10 +595,42 @@ def main() -> None:
     diag.add_argument("--max-total-cmds", type=int, default=12)
     diag.add_argument("--time-budget-sec", type=int, default=120)
     diag.add_argument("--confidence-threshold", type=float, default=0.85)
+    diag.add_argument("--prompt-token-budget", type=int, default=8000, help="Planner prompt token budget per round")
+    diag.add_argument("--report-reserve-sec", type=int, default=20, help="Part of --time-budget-sec kept for the final report")
     diag.add_argument("--output-evidence", default=os.path.join("report", "evidence_pack.json"))
     diag.add_argument("--output-report", default=os.path.join("report", "report.json"))
     diag.add_argument("--output-trace", default=os.path.join("report", "diagnosis_trace.json"))
 
+    fleet = sub.add_parser("fleet", help="run/diagnose many hosts concurrently and rank them")
+    fleet.add_argument("--hosts-file", required=True, help="file with one host per line, or - for stdin")
+    fleet.add_argument("--service", required=True)
+    fleet.add_argument("--max-workers", type=int, default=16, help="max hosts diagnosed concurrently")
+    fleet.add_argument("--diagnose", action="store_true", help="run multi-round LLM diagnose per host")
+    fleet.add_argument("--window-minutes", type=int, default=30)
+    fleet.add_argument("--sample-interval", type=float, default=0.0, help="sampling mode: probe /proc every N seconds (0 = off)")
+    fleet.add_argument("--sample-duration", type=int, default=0, help="sampling duration in seconds (0 = window, capped by sampling.max_duration_sec)")
+    fleet.add_argument("--env", default="")
+    fleet.add_argument("--pid", default=None)
+    fleet.add_argument("--platform", default="auto", help="auto|linux|darwin|k8s")
+    fleet.add_argument("--session-id", default=None, help="fleet id; per-host session ids are <fleet id>-<host>")
+    fleet.add_argument("--exec-mode", default="ssh")
+    fleet.add_argument("--ssh-user", default=None)
+    fleet.add_argument("--ssh-password", default=None)
+    fleet.add_argument("--ssh-port", type=int, default=None)
+    fleet.add_argument("--llm-vendor", default=None)
+    fleet.add_argument("--no-llm-cache", action="store_true", help="always call the LLM (responses still refresh the cache)")
+    fleet.add_argument("--no-speculation", action="store_true", help="do not prefetch likely commands while the LLM plans")
+    fleet.add_argument("--plan-schema", default=os.path.join("schemas", "plan_schema.json"))
+    fleet.add_argument("--report-schema", default=os.path.join("schemas", "report_schema.json"))
+    fleet.add_argument("--max-rounds", type=int, default=3)
+    fleet.add_argument("--max-cmds-per-round", type=int, default=3)
+    fleet.add_argument("--max-total-cmds", type=int, default=12)
+    fleet.add_argument("--time-budget-sec", type=int, default=120)
+    fleet.add_argument("--confidence-threshold", type=float, default=0.85)
+    fleet.add_argument("--prompt-token-budget", type=int, default=8000, help="Planner prompt token budget per round")
+    fleet.add_argument("--report-reserve-sec", type=int, default=20, help="Part of --time-budget-sec kept for the final report")
+    fleet.add_argument("--output", default=None, help="fleet summary path (default: <evidence base_dir>/<fleet id>/fleet_summary.json)")
+
     alert = sub.add_parser("ingest-alert", help="normalize an alert payload to run args")
     alert.add_argument("--payload", required=True, help="path to JSON payload")
 
@@ -487,6 +649,8 @@ def main() -> None:
         raise SystemExit(handle_run(args))
     if args.command == "diagnose":
         raise SystemExit(handle_diagnose(args))
+    if args.command == "fleet":
+        raise SystemExit(handle_fleet(args))
     if args.command == "ingest-alert":
         with open(args.payload, "r", encoding="utf-8") as f:
             payload = json.load(f)
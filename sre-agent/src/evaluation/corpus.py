@@ -0,0 +1,188 @@
+"""Parallel, streaming replay over large evidence corpora.
+
+Sources are streamed, never loaded whole:
+- `*.jsonl`: one case per line, `{"id", "expected_category", "signals"}` or
+  `{"id", "expected_category", "evidence": <evidence pack>}`
+- `*.json`: a list of such cases (tests/fixtures/cases.json) or one evidence pack
+- a directory: every `<session>/index/evidence_pack.json` below it (report/ trees)
+
+Evidence packs from report trees carry no label; the expected category comes
+from `labels` (session_id -> category) or, failing that, the category the
+agent recorded in the pack (a regression check of the current rules against
+past conclusions).
+
+The parent only reads raw lines/paths and groups them into chunks; parsing,
+schema checks and rule evaluation happen in a process pool whose workers
+load the schema and compile the rules once. At most `2 * workers` chunks are
+in flight, so memory stays flat however large the corpus is.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from evaluation.metrics import MetricsAccumulator
+from evaluation.replay import ReplayResult, replay_pack
+from orchestrator.rules import RuleEngine, shared_rule_engine
+from reporting.schema_validate import load_schema
+
+
+PACK_NAME = os.path.join("index", "evidence_pack.json")
+
+# A unit of work: ("line", jsonl text) | ("case", case dict) | ("pack", path).
+Item = Tuple[str, Any]
+
+
+@dataclass(frozen=True)
+class ReplayOptions:
+    schema_path: str
+    rules: Mapping[str, Any]
+    labels: Mapping[str, str]
+    full_validation: bool = True
+
+
+def iter_items(sources: Iterable[str]) -> Iterator[Item]:
+    for source in sources:
+        if os.path.isdir(source):
+            for dirpath, dirnames, _ in os.walk(source):
+                dirnames.sort()
+                path = os.path.join(dirpath, PACK_NAME)
+                if os.path.isfile(path):
+                    yield ("pack", path)
+        elif source.endswith(".jsonl"):
+            with open(source, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield ("line", line)
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                for case in data:
+                    yield ("case", case)
+            else:
+                yield ("pack", source)
+
+
+def _chunks(items: Iterator[Item], size: int) -> Iterator[List[Item]]:
+    chunk: List[Item] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _case_pack(case: Mapping[str, Any]) -> Dict[str, Any]:
+    if isinstance(case.get("evidence"), dict):
+        return case["evidence"]
+    return {
+        "meta": {"host": "h", "service": "svc", "timestamp": "2026-01-01T00:00:00Z"},
+        "snapshots": [],
+        "hypothesis": [],
+        "next_checks": [],
+        "signals": case.get("signals") or {},
+    }
+
+
+def _pack_label(pack: Mapping[str, Any], path: str, labels: Mapping[str, str]) -> Tuple[str, str]:
+    meta = pack.get("meta") if isinstance(pack.get("meta"), dict) else {}
+    session_id = str(meta.get("session_id") or os.path.basename(os.path.dirname(os.path.dirname(path))))
+    if session_id in labels:
+        return session_id, labels[session_id]
+    hyps = pack.get("hypothesis") or []
+    recorded = hyps[0].get("category") if hyps and isinstance(hyps[0], dict) else None
+    return session_id, str(recorded or "UNKNOWN")
+
+
+def _replay_item(item: Item, schema: Dict[str, Any], engine: RuleEngine, opts: ReplayOptions) -> ReplayResult:
+    kind, value = item
+    if kind == "pack":
+        with open(value, "r", encoding="utf-8") as f:
+            pack = json.load(f)
+        case_id, expected = _pack_label(pack, value, opts.labels)
+    else:
+        case = json.loads(value) if kind == "line" else value
+        pack = _case_pack(case)
+        case_id = str(case.get("id") or "")
+        expected = str(case.get("expected_category") or opts.labels.get(case_id) or "UNKNOWN")
+    result = replay_pack(pack, schema, expected, engine, full_validation=opts.full_validation)
+    return replace(result, case_id=case_id)
+
+
+def replay_chunk(chunk: List[Item], opts: ReplayOptions) -> Tuple[List[ReplayResult], List[str]]:
+    """Replay one chunk; unreadable cases are reported as errors, not raised."""
+    schema = load_schema(opts.schema_path)
+    engine = shared_rule_engine(dict(opts.rules))
+    results: List[ReplayResult] = []
+    errors: List[str] = []
+    for item in chunk:
+        try:
+            results.append(_replay_item(item, schema, engine, opts))
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            where = item[1] if item[0] == "pack" else str(item[1])[:80]
+            errors.append(f"{where}: {exc}")
+    return results, errors
+
+
+def _warm(opts: ReplayOptions) -> None:
+    # Compile rules and schema once per worker, before the first chunk.
+    shared_rule_engine(dict(opts.rules))
+    load_schema(opts.schema_path)
+
+
+def replay_corpus(
+    sources: Iterable[str],
+    opts: ReplayOptions,
+    *,
+    workers: int = 0,
+    chunk_size: int = 500,
+    on_result: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Replay every case in `sources`; returns the metrics summary.
+
+    `workers` <= 1 replays in-process. `on_result(result)` sees each result
+    (in completion order) if given.
+    """
+    acc = MetricsAccumulator()
+    error_samples: List[str] = []
+
+    def collect(results: List[ReplayResult], errors: List[str]) -> None:
+        for r in results:
+            acc.add(r)
+            if on_result is not None:
+                on_result(r)
+        for e in errors:
+            acc.add_error()
+            if len(error_samples) < 20:
+                error_samples.append(e)
+
+    start = time.monotonic()
+    chunks = _chunks(iter_items(sources), max(1, int(chunk_size)))
+    if workers <= 1:
+        for chunk in chunks:
+            collect(*replay_chunk(chunk, opts))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(opts,)) as pool:
+            pending: Set[Future] = set()
+            for chunk in chunks:
+                pending.add(pool.submit(replay_chunk, chunk, opts))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        collect(*fut.result())
+            for fut in pending:
+                collect(*fut.result())
+    summary = acc.summary(time.monotonic() - start)
+    summary["workers"] = max(1, workers)
+    summary["full_validation"] = opts.full_validation
+    if error_samples:
+        summary["error_samples"] = error_samples
+    return summary
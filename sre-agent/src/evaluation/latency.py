@@ -0,0 +1,378 @@
+"""Orchestrator latency benchmark.
+
+Measures the time the agent spends outside the target commands. Each
+iteration loads the configs, then drives `Orchestrator.run` ("run") or
+`multi_round_diagnose` ("diagnose") against a `RecordedExecutor` (captured
+outputs from tests/fixtures/outputs, with optional artificial latency) and a
+`StubPlannerLLM`.
+
+`StageProfiler` wraps the stage entry points for the duration of a run and
+accumulates wall time per stage (nested calls within a stage count once):
+
+    config_load, exec, redaction, parsing, evidence_writes, rules,
+    prompt_build, schema_validation, llm, total
+
+Stages overlap when commands run concurrently, so they need not sum to
+`total`. Allocations are measured in separate tracemalloc iterations so the
+timings are not skewed. Results are plain JSON (see `run_benchmark`) and
+`compare_results` flags stages whose p50/p99 regressed against a baseline.
+"""
+
+from __future__ import annotations
+
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from adapters.exec.stream import OutputLimit
+from config import load_configs
+from orchestrator import graph, multi_stage
+from orchestrator.graph import Orchestrator, OrchestratorContext
+from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose
+from orchestrator.planner_prompt import PlanPromptBuilder
+from orchestrator.rules import RuleSession
+from registry.commands import load_commands, render_meta
+from registry.parsers import ParserEngine
+from reporting import report_builder
+from storage.audit_store import AuditStore
+from storage.evidence_store import EvidenceStore
+from storage.writer import WriteBehind
+
+
+CONFIG_FILES = ("runtime.yaml", "policy.yaml", "commands.yaml", "routing.yaml", "rules.yaml")
+SCENARIOS = ("run", "diagnose")
+STAGES = (
+    "config_load",
+    "exec",
+    "redaction",
+    "parsing",
+    "evidence_writes",
+    "rules",
+    "prompt_build",
+    "schema_validation",
+    "llm",
+    "total",
+)
+
+# (owner, attribute, stage): the entry points StageProfiler times.
+STAGE_TARGETS: Tuple[Tuple[Any, str, str], ...] = (
+    (graph, "redact", "redaction"),
+    (ParserEngine, "parse", "parsing"),
+    (graph, "extract_signals", "parsing"),
+    (EvidenceStore, "put_raw", "evidence_writes"),
+    (EvidenceStore, "put_redacted", "evidence_writes"),
+    (EvidenceStore, "put_parsed", "evidence_writes"),
+    (EvidenceStore, "write_index", "evidence_writes"),
+    (AuditStore, "write", "evidence_writes"),
+    (WriteBehind, "flush", "evidence_writes"),
+    (RuleSession, "update", "rules"),
+    (PlanPromptBuilder, "build", "prompt_build"),
+    (report_builder, "build_report_prompt", "prompt_build"),
+    (multi_stage, "validate_schema", "schema_validation"),
+    (report_builder, "validate_schema", "schema_validation"),
+)
+
+
+class StageProfiler:
+    """Accumulates wall time per stage while `active()` has the targets wrapped."""
+
+    def __init__(self, targets: Sequence[Tuple[Any, str, str]] = STAGE_TARGETS) -> None:
+        self.targets = list(targets)
+        self.seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.seconds = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        depth: Dict[str, int] = self._local.__dict__.setdefault("depth", {})
+        outer = not depth.get(name)
+        depth[name] = depth.get(name, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            depth[name] -= 1
+            if outer:
+                self.add(name, time.perf_counter() - start)
+
+    def _wrap(self, fn: Callable[..., Any], name: str) -> Callable[..., Any]:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            with self.stage(name):
+                return fn(*args, **kwargs)
+
+        return timed
+
+    @contextmanager
+    def active(self) -> Iterator["StageProfiler"]:
+        saved = [(owner, attr, owner.__dict__[attr]) for owner, attr, _ in self.targets]
+        try:
+            for owner, attr, name in self.targets:
+                setattr(owner, attr, self._wrap(getattr(owner, attr), name))
+            yield self
+        finally:
+            for owner, attr, original in reversed(saved):
+                setattr(owner, attr, original)
+
+
+class RecordedExecutor:
+    """Answers registry commands with captured outputs (`<cmd_id>.txt`) after an artificial delay."""
+
+    def __init__(
+        self,
+        commands_cfg: Dict[str, Any],
+        outputs_dir: str,
+        *,
+        service: Optional[str] = None,
+        pid: Optional[str] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        seed: int = 0,
+        profiler: Optional[StageProfiler] = None,
+    ) -> None:
+        self.outputs: Dict[str, str] = {}
+        for cmd_id, meta in commands_cfg.items():
+            path = os.path.join(outputs_dir, f"{cmd_id}.txt")
+            if not isinstance(meta, dict) or not os.path.isfile(path):
+                continue
+            try:
+                command = render_meta(meta, service=service, pid=pid)
+            except (KeyError, ValueError):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                self.outputs[command.strip()] = f.read()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.profiler = profiler
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def run(self, host: str, command: str, timeout: int = 30, *, limit: Optional[OutputLimit] = None) -> str:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        start = time.perf_counter()
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        out = self.outputs.get(command.strip(), "ok\n")
+        if self.profiler is not None:
+            self.profiler.add("exec", time.perf_counter() - start)
+        return out
+
+
+class StubPlannerLLM:
+    """Plans `plan_cmds` in the first round, then stops; returns a minimal valid report."""
+
+    def __init__(
+        self, plan_cmds: Sequence[str], *, latency_ms: float = 0.0, profiler: Optional[StageProfiler] = None
+    ) -> None:
+        self.plan_cmds = list(plan_cmds)
+        self.latency_ms = latency_ms
+        self.profiler = profiler
+        self.calls = 0
+
+    def generate_json(self, prompt: str, schema: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        self.calls += 1
+        start = time.perf_counter()
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        try:
+            if "decision" in (schema.get("properties") or {}):
+                cmds, self.plan_cmds = self.plan_cmds, []
+                return {
+                    "decision": "CONTINUE" if cmds else "STOP",
+                    "current_hypothesis": {"category": "CPU", "confidence": 0.5, "why": "bench"},
+                    "next_cmds": [
+                        {"cmd_id": c, "purpose": "bench", "expected_signal": "s", "timeout_sec": 5, "priority": 1}
+                        for c in cmds
+                    ],
+                    "missing_info": [],
+                    "stop_reason": "" if cmds else "enough",
+                }
+            return {
+                "meta": {
+                    "host": "bench",
+                    "service": "svc",
+                    "timestamp": "2026-01-01T00:00:00Z",
+                    "collection_window_minutes": 30,
+                    "agent_version": "dev",
+                },
+                "root_cause": {"category": "CPU", "summary": "bench", "confidence": 0.5},
+                "evidence_table": [],
+                "next_actions": [],
+                "audit": {"session_id": "bench", "commands": []},
+                "redaction": {"applied": False, "rules": [], "replaced_count": 0},
+            }
+        finally:
+            if self.profiler is not None:
+                self.profiler.add("llm", time.perf_counter() - start)
+
+    def capabilities(self) -> Dict[str, Any]:
+        return {"json_schema": False, "tool_calling": False, "streaming": False}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(-(-pct * len(ordered) // 100))))
+    return ordered[rank - 1]
+
+
+def _stats_ms(samples: Sequence[float]) -> Dict[str, float]:
+    ms = [s * 1000.0 for s in samples]
+    return {
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "max_ms": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def _load_config(config_dir: str, base_dir: str) -> Dict[str, Any]:
+    cfg = load_configs([os.path.join(config_dir, name) for name in CONFIG_FILES])
+    cfg.setdefault("evidence", {})["base_dir"] = base_dir
+    cfg["audit_log"] = os.path.join(base_dir, "audit.log")
+    return cfg
+
+
+def run_iteration(
+    scenario: str,
+    *,
+    config_dir: str,
+    outputs_dir: str,
+    base_dir: str,
+    iteration: int,
+    profiler: StageProfiler,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    llm_latency_ms: float = 0.0,
+    plan_cmds: Sequence[str] = (),
+    pid: str = "4242",
+) -> None:
+    """One session of `scenario`; stage times accumulate on `profiler`."""
+    start = time.perf_counter()
+    with profiler.stage("config_load"):
+        cfg = _load_config(config_dir, base_dir)
+    executor = RecordedExecutor(
+        load_commands(cfg),
+        outputs_dir,
+        service="svc",
+        pid=pid,
+        latency_ms=latency_ms,
+        jitter_ms=jitter_ms,
+        seed=iteration,
+        profiler=profiler,
+    )
+    ctx = OrchestratorContext(
+        host="bench", service="svc", session_id=f"bench-{scenario}-{iteration}", exec_mode="ssh", platform="linux", pid=pid
+    )
+    if scenario == "run":
+        Orchestrator(cfg, executor=executor).run(ctx)
+    elif scenario == "diagnose":
+        schemas = os.path.join(os.path.dirname(config_dir.rstrip(os.sep)), "schemas")
+        multi_round_diagnose(
+            config=cfg,
+            ctx=ctx,
+            executor=executor,
+            llm=StubPlannerLLM(plan_cmds, latency_ms=llm_latency_ms, profiler=profiler),
+            plan_schema_path=os.path.join(schemas, "plan_schema.json"),
+            report_schema_path=os.path.join(schemas, "report_schema.json"),
+            budget=DiagnoseBudget(max_rounds=2),
+        )
+    else:
+        raise ValueError(f"unknown scenario: {scenario}")
+    profiler.add("total", time.perf_counter() - start)
+
+
+def run_benchmark(
+    scenario: str,
+    *,
+    config_dir: str,
+    outputs_dir: str,
+    iterations: int = 50,
+    warmup: int = 3,
+    alloc_iterations: int = 3,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Per-stage p50/p99 over `iterations` sessions plus tracemalloc figures.
+
+    Extra keyword arguments go to run_iteration (latency_ms, jitter_ms,
+    llm_latency_ms, plan_cmds, pid).
+    """
+    profiler = StageProfiler()
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    alloc_peak: List[int] = []
+    alloc_net: List[int] = []
+    base_dir = tempfile.mkdtemp(prefix="sre-bench-")
+    try:
+        with profiler.active():
+            for i in range(warmup + iterations + alloc_iterations):
+                measured = warmup <= i < warmup + iterations
+                tracing = i >= warmup + iterations
+                profiler.reset()
+                if tracing:
+                    tracemalloc.start()
+                    before = tracemalloc.get_traced_memory()[0]
+                try:
+                    run_iteration(
+                        scenario, config_dir=config_dir, outputs_dir=outputs_dir, base_dir=base_dir, iteration=i,
+                        profiler=profiler, **kwargs,
+                    )
+                finally:
+                    if tracing:
+                        current, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                        alloc_peak.append(peak)
+                        alloc_net.append(current - before)
+                if measured:
+                    for stage in STAGES:
+                        samples[stage].append(profiler.seconds.get(stage, 0.0))
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    return {
+        "scenario": scenario,
+        "iterations": iterations,
+        "settings": {k: (list(v) if isinstance(v, (list, tuple)) else v) for k, v in sorted(kwargs.items())},
+        "env": {"python": platform.python_version(), "platform": sys.platform},
+        "stages": {stage: _stats_ms(samples[stage]) for stage in STAGES},
+        "alloc": {
+            "iterations": len(alloc_peak),
+            "peak_kb_max": round(max(alloc_peak) / 1024, 1) if alloc_peak else 0.0,
+            "net_kb_mean": round(sum(alloc_net) / len(alloc_net) / 1024, 1) if alloc_net else 0.0,
+        },
+    }
+
+
+def compare_results(
+    current: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = 0.2, min_ms: float = 0.5
+) -> List[Dict[str, Any]]:
+    """Stages whose p50 or p99 grew by more than `threshold` (and `min_ms`) over the baseline."""
+    regressions: List[Dict[str, Any]] = []
+    for stage, stats in (current.get("stages") or {}).items():
+        old = (baseline.get("stages") or {}).get(stage)
+        if not old:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            now, before = float(stats.get(key) or 0.0), float(old.get(key) or 0.0)
+            if now - before > min_ms and now > before * (1.0 + threshold):
+                regressions.append({"stage": stage, "metric": key, "baseline": before, "current": now})
+    return regressions
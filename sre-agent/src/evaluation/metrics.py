@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional
 
 from evaluation.replay import ReplayResult
 
@@ -28,3 +29,87 @@ def compute_metrics(results: List[ReplayResult]) -> Metrics:
     correct = sum(1 for r in results if r.predicted == r.expected)
     schema_ok = sum(1 for r in results if r.schema_ok)
     return Metrics(total=total, correct=correct, schema_ok=schema_ok)
+
+
+@dataclass(frozen=True)
+class CategoryMetrics:
+    category: str
+    tp: int
+    fp: int
+    fn: int
+
+    @property
+    def support(self) -> int:
+        return self.tp + self.fn
+
+    @property
+    def precision(self) -> float:
+        return (self.tp / (self.tp + self.fp)) if (self.tp + self.fp) else 0.0
+
+    @property
+    def recall(self) -> float:
+        return (self.tp / self.support) if self.support else 0.0
+
+
+class MetricsAccumulator:
+    """Streaming replay metrics: counts only, no result list is kept."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.correct = 0
+        self.schema_ok = 0
+        self.errors = 0
+        self._tp: Counter = Counter()
+        self._fp: Counter = Counter()
+        self._fn: Counter = Counter()
+
+    def add(self, result: ReplayResult) -> None:
+        self.total += 1
+        self.schema_ok += int(result.schema_ok)
+        if result.predicted == result.expected:
+            self.correct += 1
+            self._tp[result.expected] += 1
+        else:
+            self._fp[result.predicted] += 1
+            self._fn[result.expected] += 1
+
+    def add_error(self) -> None:
+        self.errors += 1
+
+    def metrics(self) -> Metrics:
+        return Metrics(total=self.total, correct=self.correct, schema_ok=self.schema_ok)
+
+    def categories(self) -> List[CategoryMetrics]:
+        names = sorted(set(self._tp) | set(self._fp) | set(self._fn))
+        return [CategoryMetrics(category=c, tp=self._tp[c], fp=self._fp[c], fn=self._fn[c]) for c in names]
+
+    def summary(self, elapsed_s: Optional[float] = None) -> Dict[str, Any]:
+        m = self.metrics()
+        out: Dict[str, Any] = {
+            "total": m.total,
+            "errors": self.errors,
+            "accuracy": round(m.accuracy, 6),
+            "schema_pass_rate": round(m.schema_pass_rate, 6),
+            "per_category": {
+                c.category: {
+                    "precision": round(c.precision, 6),
+                    "recall": round(c.recall, 6),
+                    "support": c.support,
+                    "tp": c.tp,
+                    "fp": c.fp,
+                    "fn": c.fn,
+                }
+                for c in self.categories()
+            },
+        }
+        if elapsed_s is not None:
+            out["elapsed_s"] = round(elapsed_s, 3)
+            out["cases_per_sec"] = round(m.total / elapsed_s, 1) if elapsed_s > 0 else None
+        return out
+
+
+def compute_category_metrics(results: Iterable[ReplayResult]) -> List[CategoryMetrics]:
+    acc = MetricsAccumulator()
+    for r in results:
+        acc.add(r)
+    return acc.categories()
@@ -1,18 +1,20 @@
 """Offline replay for evidence packs.
 
 The replay uses the stored evidence_pack JSON and runs deterministic rule engine
-to verify classification + schema validity.
+to verify classification + schema validity. Schemas come from the shared
+validator registry (reporting.schema_validate), so a suite loads and compiles
+each schema once; `full_validation=False` keeps only the structural pre-check
+for bulk runs.
 """
 
 from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from jsonschema import validate
-
-from orchestrator.rules import RuleEngine
+from orchestrator.rules import RuleEngine, shared_rule_engine
+from reporting.schema_validate import is_valid, load_schema, structural_check
 
 
 @dataclass(frozen=True)
@@ -21,6 +23,7 @@ class ReplayResult:
     predicted: str
     expected: str
     schema_ok: bool
+    case_id: str = ""
 
 
 def load_json(path: str) -> Dict[str, Any]:
@@ -28,26 +31,41 @@ def load_json(path: str) -> Dict[str, Any]:
         return json.load(f)
 
 
-def replay_one(evidence_pack_path: str, schema_path: str, expected_category: str) -> ReplayResult:
-    evidence = load_json(evidence_pack_path)
-    schema = load_json(schema_path)
-
-    schema_ok = True
-    try:
-        validate(instance=evidence, schema=schema)
-    except Exception:
-        schema_ok = False
-
-    signals = evidence.get("signals") or {}
-    engine = RuleEngine({})
+def replay_one(
+    evidence_pack_path: str,
+    schema_path: str,
+    expected_category: str,
+    rule_engine: Optional[RuleEngine] = None,
+    *,
+    full_validation: bool = True,
+) -> ReplayResult:
+    return replay_pack(
+        load_json(evidence_pack_path), load_schema(schema_path), expected_category, rule_engine, full_validation=full_validation
+    )
+
+
+def replay_pack(
+    evidence: Dict[str, Any],
+    schema: Dict[str, Any],
+    expected_category: str,
+    rule_engine: Optional[RuleEngine] = None,
+    *,
+    full_validation: bool = True,
+) -> ReplayResult:
+    schema_ok = structural_check(evidence, schema) is None
+    if schema_ok and full_validation:
+        schema_ok = is_valid(evidence, schema)
+
+    signals = (evidence.get("signals") or {}) if isinstance(evidence, dict) else {}
+    engine = rule_engine or shared_rule_engine({})
     hyps = engine.classify(signals)
     predicted = hyps[0]["category"] if hyps else "UNKNOWN"
 
     return ReplayResult(ok=(predicted == expected_category and schema_ok), predicted=predicted, expected=expected_category, schema_ok=schema_ok)
 
 
-def replay_suite(cases: List[Tuple[str, str, str]]) -> List[ReplayResult]:
+def replay_suite(cases: List[Tuple[str, str, str]], rule_engine: Optional[RuleEngine] = None) -> List[ReplayResult]:
     results: List[ReplayResult] = []
     for evidence_pack_path, schema_path, expected in cases:
-        results.append(replay_one(evidence_pack_path, schema_path, expected))
+        results.append(replay_one(evidence_pack_path, schema_path, expected, rule_engine))
     return results
@@ -0,0 +1,52 @@
+"""Concurrent execution of a command dependency DAG (see registry.bindings.plan_dag)."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Mapping, Set, TypeVar
+
+
+T = TypeVar("T")
+
+
+async def run_dag(
+    graph: Mapping[str, Set[str]],
+    run: Callable[[str], Awaitable[T]],
+    *,
+    concurrency: int = 1,
+) -> Dict[str, T]:
+    """Run every node once all its deps finished, up to `concurrency` at a time.
+
+    Ready nodes start in `graph` order (the semaphore admits waiters FIFO), so
+    independent branches overlap while dependents wait only for their own
+    inputs. Deps outside `graph` count as already done. A failing node cancels
+    the rest and its exception propagates.
+    """
+    waiting: Dict[str, Set[str]] = {n: {d for d in deps if d in graph} for n, deps in graph.items()}
+    slots = asyncio.Semaphore(max(1, int(concurrency or 1)))
+    running: Dict["asyncio.Task[T]", str] = {}
+    results: Dict[str, T] = {}
+
+    async def bounded(node: str) -> T:
+        async with slots:
+            return await run(node)
+
+    try:
+        while waiting or running:
+            for node in [n for n, deps in waiting.items() if not deps]:
+                del waiting[node]
+                running[asyncio.create_task(bounded(node))] = node
+            if not running:
+                raise ValueError("command dependency cycle: " + ", ".join(sorted(waiting)))
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node = running.pop(task)
+                results[node] = task.result()
+                for deps in waiting.values():
+                    deps.discard(node)
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    return results
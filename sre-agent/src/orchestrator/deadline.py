@@ -0,0 +1,70 @@
+"""Session deadline shared by the orchestrator, executors and LLM calls.
+
+`multi_round_diagnose` turns `DiagnoseBudget.time_budget_sec` into one
+`Deadline` at session start and carries it on `OrchestratorContext`:
+
+- every command timeout is clamped to the time left (`clamp`);
+- commands are not started once it has passed;
+- planner LLM calls are abandoned when it passes (`run`);
+- the diagnose loop runs against `reserve(report_reserve_sec)`, so the final
+  report keeps its share of the budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The session deadline passed before the operation finished."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    at: float = math.inf  # time.monotonic() value; inf = unbounded
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "Deadline":
+        if seconds is None or seconds <= 0:
+            return cls()
+        return cls(time.monotonic() + float(seconds))
+
+    @property
+    def bounded(self) -> bool:
+        return self.at != math.inf
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic()) if self.bounded else math.inf
+
+    def expired(self) -> bool:
+        return self.bounded and time.monotonic() >= self.at
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """An earlier deadline that leaves `seconds` of this one for later work."""
+        return Deadline(self.at - max(0.0, float(seconds))) if self.bounded else self
+
+    def clamp(self, timeout: int) -> int:
+        """`timeout` capped to the whole seconds left (at least 1)."""
+        if not self.bounded:
+            return int(timeout)
+        return max(1, min(int(timeout), int(math.ceil(self.remaining()))))
+
+    async def run(self, aw: Awaitable[T]) -> T:
+        """Await `aw`, cancelling it and raising DeadlineExceeded at the deadline."""
+        if not self.bounded:
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, timeout=self.remaining())
+        except asyncio.TimeoutError as exc:
+            raise DeadlineExceeded(f"deadline exceeded by {time.monotonic() - self.at:.1f}s") from exc
+
+
+def clamp_timeout(deadline: Optional[Deadline], timeout: int) -> int:
+    return deadline.clamp(timeout) if deadline is not None else int(timeout)
@@ -0,0 +1,199 @@
+"""Fleet mode: diagnose many hosts from one invocation.
+
+Each host gets its own Orchestrator session (and optionally a multi-round
+diagnose) with a per-host session id. Config, the rule engine, the executor
+(and its connection pools) and the LLM client are shared across hosts.
+A failing host is recorded in the summary and never aborts the fleet.
+
+Sessions run as asyncio tasks on one event loop; with an async executor
+(AsyncSSHExecutor) hundreds of hosts need no thread per in-flight command.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional
+
+from orchestrator.graph import Orchestrator, OrchestratorContext, now_iso
+from orchestrator.rules import shared_rule_engine
+
+
+LOG = logging.getLogger("sre_agent.orchestrator.fleet")
+
+_SESSION_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+@dataclass(frozen=True)
+class FleetHostResult:
+    host: str
+    session_id: str
+    ok: bool
+    primary: str = "UNKNOWN"
+    confidence: float = 0.0
+    why: str = ""
+    stop_reason: str = ""
+    elapsed_ms: int = 0
+    error: str = ""
+
+
+def parse_host_list(lines: Iterable[str]) -> List[str]:
+    """One host per line; blank lines and `#` comments are ignored, duplicates dropped."""
+    hosts: List[str] = []
+    for line in lines:
+        host = line.split("#", 1)[0].strip()
+        if host:
+            hosts.append(host)
+    return list(dict.fromkeys(hosts))
+
+
+def load_hosts(path: str) -> List[str]:
+    """Read a host list from a file, or from stdin when path is '-'."""
+    if path == "-":
+        return parse_host_list(sys.stdin)
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_host_list(f)
+
+
+def fleet_session_id(base: str, host: str) -> str:
+    return f"{base}-{_SESSION_UNSAFE.sub('_', host)}"
+
+
+def _top_hypothesis(evidence_pack: Dict[str, Any]) -> Dict[str, Any]:
+    hyp = evidence_pack.get("hypothesis")
+    if isinstance(hyp, list) and hyp and isinstance(hyp[0], dict):
+        return hyp[0]
+    return {}
+
+
+def run_fleet(**kwargs: Any) -> Dict[str, Any]:
+    """Sync wrapper around run_fleet_async (see there for arguments)."""
+    return asyncio.run(run_fleet_async(**kwargs))
+
+
+async def run_fleet_async(
+    *,
+    config: Dict[str, Any],
+    hosts: List[str],
+    base_ctx: OrchestratorContext,
+    executor: Any,
+    max_workers: int = 16,
+    llm: Optional[Any] = None,
+    diagnose_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run one session per host concurrently and return the fleet summary.
+
+    `base_ctx` supplies service/window/env/exec_mode/pid/platform; its
+    session_id is the fleet id and the prefix of every per-host session id.
+    When `llm` is given, each host runs `multi_round_diagnose` with
+    `diagnose_kwargs` (plan/report schema paths, budget); otherwise only the
+    deterministic Orchestrator.run.
+    """
+    if not base_ctx.session_id:
+        raise ValueError("session_id is required")
+
+    rule_engine = shared_rule_engine(config.get("rules", {}))
+    orch = Orchestrator(config, executor=executor, rule_engine=rule_engine)
+
+    async def _one(host: str) -> FleetHostResult:
+        ctx = replace(base_ctx, host=host, session_id=fleet_session_id(base_ctx.session_id, host))
+        start_ts = time.time()
+        try:
+            stop_reason = ""
+            if llm is not None:
+                from orchestrator.multi_stage import multi_round_diagnose_async
+
+                result = await multi_round_diagnose_async(
+                    config=config,
+                    ctx=ctx,
+                    executor=executor,
+                    llm=llm,
+                    rule_engine=rule_engine,
+                    **(diagnose_kwargs or {}),
+                )
+                evidence_pack = result["evidence_pack"]
+                stop_reason = str((result.get("diagnosis_trace") or {}).get("stop_reason") or "")
+            else:
+                evidence_pack = await orch.run_async(ctx)
+            top = _top_hypothesis(evidence_pack)
+            return FleetHostResult(
+                host=host,
+                session_id=ctx.session_id,
+                ok=True,
+                primary=str(top.get("category") or "UNKNOWN"),
+                confidence=float(top.get("confidence") or 0.0),
+                why=str(top.get("why") or ""),
+                stop_reason=stop_reason,
+                elapsed_ms=int((time.time() - start_ts) * 1000),
+            )
+        except Exception as exc:
+            LOG.exception("fleet host failed host=%s session_id=%s", host, ctx.session_id)
+            return FleetHostResult(
+                host=host,
+                session_id=ctx.session_id,
+                ok=False,
+                elapsed_ms=int((time.time() - start_ts) * 1000),
+                error=f"{type(exc).__name__}: {exc}",
+            )
+
+    workers = max(1, min(int(max_workers or 1), len(hosts) or 1))
+    sem = asyncio.Semaphore(workers)
+
+    async def _bounded(host: str) -> FleetHostResult:
+        async with sem:
+            res = await _one(host)
+        LOG.info(
+            "fleet host done host=%s ok=%s primary=%s confidence=%s",
+            res.host,
+            res.ok,
+            res.primary,
+            res.confidence,
+        )
+        return res
+
+    LOG.info("fleet start fleet_id=%s hosts=%s workers=%s", base_ctx.session_id, len(hosts), workers)
+    start_ts = time.time()
+    results: List[FleetHostResult] = list(await asyncio.gather(*[_bounded(h) for h in hosts]))
+
+    return build_fleet_summary(
+        fleet_id=base_ctx.session_id,
+        results=results,
+        elapsed_ms=int((time.time() - start_ts) * 1000),
+        evidence_base_dir=config.get("evidence", {}).get("base_dir", "report"),
+    )
+
+
+def build_fleet_summary(
+    *,
+    fleet_id: str,
+    results: List[FleetHostResult],
+    elapsed_ms: int,
+    evidence_base_dir: str,
+) -> Dict[str, Any]:
+    """Rank hosts by primary hypothesis confidence (failures last)."""
+    ranked = sorted(results, key=lambda r: (not r.ok, -r.confidence, r.host))
+    by_category: Dict[str, int] = {}
+    for r in ranked:
+        if r.ok:
+            by_category[r.primary] = by_category.get(r.primary, 0) + 1
+    hosts = []
+    for rank, r in enumerate(ranked, start=1):
+        item = asdict(r)
+        item["rank"] = rank
+        item["session_dir"] = os.path.join(evidence_base_dir, r.session_id)
+        hosts.append(item)
+    return {
+        "fleet_id": fleet_id,
+        "timestamp": now_iso(),
+        "elapsed_ms": elapsed_ms,
+        "total": len(results),
+        "succeeded": sum(1 for r in results if r.ok),
+        "failed": sum(1 for r in results if not r.ok),
+        "by_category": dict(sorted(by_category.items(), key=lambda kv: (-kv[1], kv[0]))),
+        "hosts": hosts,
+    }
@@ -9,23 +9,31 @@ stores raw/redacted/parsed evidence, and produces an evidence_pack.
 
 from __future__ import annotations
 
+import asyncio
 import time
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import sys
 
+from adapters.exec.base import as_async_executor
+from adapters.exec.batch import BatchItem
+from adapters.exec.stream import OutputLimit, is_truncated, limit_kwargs, output_limit
 from policy.command_policy import is_command_allowed
 from policy.validators import validate_pid, validate_service
-from registry.commands import get_command_meta, render_command
-from registry.parsers import parse_output
+from registry.bindings import BindingState, needed_bindings, plan_dag
+from registry.commands import get_command_meta, load_commands, render_meta
+from registry.parsers import ParserEngine
 from registry.signals import extract_signals
-from orchestrator.rules import RuleEngine
+from orchestrator.dag import run_dag
+from orchestrator.deadline import Deadline, clamp_timeout
+from orchestrator.rules import RuleEngine, shared_rule_engine
 from storage.audit_store import AuditStore
 from storage.evidence_store import EvidenceStore
-from storage.redaction import hash_text, redact
+from storage.redaction import hash_text, redact, redact_value
+from storage.writer import WriteBehind
 
 
 LOG = logging.getLogger("sre_agent.orchestrator")
@@ -41,6 +49,50 @@ def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def route_table(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Category -> cmd_ids. routing.yaml merged into the config gives
+    `routes: {CATEGORY: [...]}`; a nested `routes: {routes: {...}}` is accepted too."""
+    routes = config.get("routes") or config.get("routing") or {}
+    if not isinstance(routes, dict):
+        return {}
+    nested = routes.get("routes")
+    return nested if isinstance(nested, dict) else routes
+
+
+def snapshot_signal(out: str, signals: Optional[Dict[str, Any]] = None) -> str:
+    """One-line snapshot text: an aggregate's summary when the parser produced
+    one (e.g. thread dumps), else the output's first line."""
+    for v in (signals or {}).values():
+        if isinstance(v, dict) and isinstance(v.get("summary"), str) and v["summary"]:
+            return v["summary"]
+    text = (out or "").strip()
+    return text.splitlines()[0] if text else ""
+
+
+def _as_positive_int(v: Any, default: int) -> int:
+    try:
+        n = int(v)
+    except Exception:
+        return default
+    return n if n > 0 else default
+
+
+@dataclass(frozen=True)
+class CommandRun:
+    """Executor output for one command plus timing, before redaction/persistence."""
+
+    output: str
+    started_at: str
+    start_ts: float
+    elapsed_ms: int
+    timed_out: bool = False
+    truncated: bool = False
+    # Timeout the executor was given (after deadline clamping).
+    timeout_sec: int = 0
+    # Set for batched runs: when the whole batch was sent.
+    batch_started_at: str = ""
+
+
 @dataclass
 class OrchestratorContext:
     host: str
@@ -51,13 +103,57 @@ class OrchestratorContext:
     exec_mode: str = "ssh"  # ssh|local
     pid: Optional[str] = None
     platform: str = ""  # auto|linux|darwin|k8s
+    # Sampling mode: probe /proc every interval for duration (0 = window_minutes, capped).
+    sample_interval_sec: float = 0.0
+    sample_duration_sec: int = 0
+    # Session deadline: command timeouts are clamped to it; None = unbounded.
+    deadline: Optional[Deadline] = None
+
+
+@dataclass(frozen=True)
+class SamplingPlan:
+    cmd_id: str
+    count: int
+    interval_sec: float
+
+    @property
+    def duration_sec(self) -> float:
+        return (self.count - 1) * self.interval_sec
+
+
+def sampling_plan(config: Dict[str, Any], ctx: OrchestratorContext) -> Optional[SamplingPlan]:
+    """Resolve sampling mode from ctx (CLI flags) over runtime.yaml `sampling`; None = off."""
+    cfg = config.get("sampling") or {}
+    try:
+        interval = float(ctx.sample_interval_sec or cfg.get("interval_sec") or 0)
+        duration = float(ctx.sample_duration_sec or cfg.get("duration_sec") or 0)
+    except (TypeError, ValueError):
+        return None
+    if interval <= 0:
+        return None
+    interval = max(interval, float(cfg.get("min_interval_sec") or 0.5))
+    if duration <= 0:
+        duration = ctx.window_minutes * 60.0
+    duration = min(duration, float(_as_positive_int(cfg.get("max_duration_sec"), 300)))
+    if ctx.deadline is not None and ctx.deadline.bounded:
+        # Leave the command's own startup/teardown slack inside the deadline.
+        duration = min(duration, ctx.deadline.remaining() - 5.0)
+    count = min(int(duration // interval) + 1, _as_positive_int(cfg.get("max_samples"), 3600))
+    if count < 2:
+        return None
+    return SamplingPlan(cmd_id=str(cfg.get("cmd_id") or "proc_sample"), count=count, interval_sec=interval)
 
 
 class Orchestrator:
-    def __init__(self, config: Dict[str, Any], *, executor: Any) -> None:
+    def __init__(self, config: Dict[str, Any], *, executor: Any, rule_engine: Optional[RuleEngine] = None) -> None:
         self.config = config
         self.executor = executor
-        self.rule_engine = RuleEngine(config.get("rules", {}))
+        # Internally everything is async; sync executors run on worker threads.
+        self.aexecutor = as_async_executor(executor)
+        # Rules are compiled once per process and shared; per-session state lives in RuleSession.
+        self.rule_engine = rule_engine or shared_rule_engine(config.get("rules", {}))
+        # Parser specs are compiled once per orchestrator, not per output.
+        self.parsers = ParserEngine(load_commands(config))
 
     def _resolve_platform(self, ctx: OrchestratorContext) -> str:
         platform = (ctx.platform or "auto").lower()
@@ -65,74 +161,178 @@ class Orchestrator:
             platform = _platform_auto(ctx.exec_mode)
         return platform
 
-    def exec_cmd(
+    def prepare_cmd(
         self,
         *,
         ctx: OrchestratorContext,
         cmd_id: str,
         platform: str,
-        store: EvidenceStore,
-        audit_store: Optional[AuditStore],
         commands_cfg: Dict[str, Any],
         allowed_risks: List[str],
         deny_keywords: List[str],
         pid: Optional[str] = None,
         service: Optional[str] = None,
-        timeout: int = 30,
-    ) -> Tuple[str, str, Dict[str, Any]]:
-        """Execute one registered command and persist evidence.
-
-        Returns (redacted_output, audit_id, signals_or_error).
+        params: Optional[Dict[str, Any]] = None,
+        bindings: Optional[BindingState] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Policy-check and render one registered command.
+
+        Placeholders not given via `pid`/`params` are filled from `bindings`
+        (e.g. a pid discovered from jps/ps_cpu output).
+        Returns (command, error). `command` is empty when `error` is set.
         """
         meta = get_command_meta(commands_cfg, cmd_id)
         if not is_command_allowed(meta, allowed_risks, deny_keywords):
-            return "", "", {"error": "blocked_by_policy"}
+            return "", {"error": "blocked_by_policy"}
 
         cmd_platform = (meta.get("platform") or "").lower()
         if cmd_platform and cmd_platform not in ("any", "all") and cmd_platform != platform:
-            return "", "", {"error": "platform_mismatch", "platform": platform, "cmd_platform": cmd_platform}
-
-        template = meta.get("cmd")
+            return "", {"error": "platform_mismatch", "platform": platform, "cmd_platform": cmd_platform}
+
+        template = str(meta.get("cmd") or "")
+        if bindings is not None:
+            bound: Dict[str, Any] = {}
+            for name in needed_bindings(meta, bindings.bindings):
+                value = bindings.get(name)
+                if value is None and name != "pid":
+                    return "", {"error": "unresolved_binding", "binding": name}
+                bound[name] = value
+            pid = pid or ctx.pid or bound.pop("pid", None)
+            bound.pop("pid", None)
+            params = {**bound, **(params or {})}
         if "{service}" in template:
             _svc = service or ctx.service
             if not validate_service(_svc):
-                return "", "", {"error": "invalid_service"}
+                return "", {"error": "invalid_service"}
         if "{pid}" in template:
             _pid = pid or ctx.pid or ""
             if not validate_pid(_pid):
-                return "", "", {"error": "invalid_pid"}
+                return "", {"error": "invalid_pid"}
+
+        return render_meta(meta, service=(service or ctx.service), pid=(pid or ctx.pid), **(params or {})), {}
+
+    def command_limit(self, commands_cfg: Dict[str, Any], cmd_id: str) -> Optional[OutputLimit]:
+        """Per-command output cap: commands.yaml max_bytes/head_bytes/tail_bytes over execution.output."""
+        defaults = (self.config.get("execution") or {}).get("output") or {}
+        return output_limit(commands_cfg.get(cmd_id) or {}, defaults)
 
-        command = render_command(template, service=(service or ctx.service), pid=(pid or ctx.pid))
+    async def run_cmd(
+        self, ctx: OrchestratorContext, command: str, timeout: int, limit: Optional[OutputLimit] = None
+    ) -> CommandRun:
+        """Run one rendered command (see `prepare_cmd`) without persisting anything.
 
+        The timeout is clamped to the session deadline; the value used is
+        returned in `CommandRun.timeout_sec`. Pass the run to `record_cmd`
+        to turn it into evidence.
+        """
         started_at = now_iso()
         start_ts = time.time()
-        output = self.executor.run(ctx.host, command, timeout=timeout)
+        timeout = clamp_timeout(ctx.deadline, timeout)
+        output = await self.aexecutor.run(ctx.host, command, timeout=timeout, **limit_kwargs(limit))
         elapsed_ms = int((time.time() - start_ts) * 1000)
+        return CommandRun(
+            output=output,
+            started_at=started_at,
+            start_ts=start_ts,
+            elapsed_ms=elapsed_ms,
+            timed_out=(output or "").startswith("command timeout"),
+            truncated=is_truncated(output),
+            timeout_sec=timeout,
+        )
+
+    async def _run_batch(
+        self,
+        ctx: OrchestratorContext,
+        commands: Sequence[Tuple[str, str, Optional[OutputLimit]]],
+        timeout: int,
+        concurrency: int,
+    ) -> List[CommandRun]:
+        """Run (cmd_id, command, limit) triples in one executor round trip.
+
+        Each item's start is the batch start plus the offset the executor
+        reports for it, so items queued behind `concurrency` get their own
+        `started_at`/`start_ts`.
+        """
+        batch_started_at = now_iso()
+        batch_ts = time.time()
+        timeout = clamp_timeout(ctx.deadline, timeout)
+        items = [
+            BatchItem(key=cmd_id, command=command, timeout=timeout, limit=limit) for cmd_id, command, limit in commands
+        ]
+        results = await self.aexecutor.run_batch(ctx.host, items, concurrency=concurrency)
+        runs: List[CommandRun] = []
+        for r in results:
+            start_ts = batch_ts + max(0, r.start_offset_ms) / 1000.0
+            runs.append(
+                CommandRun(
+                    output=r.output,
+                    started_at=datetime.fromtimestamp(start_ts, timezone.utc).isoformat(),
+                    start_ts=start_ts,
+                    elapsed_ms=r.elapsed_ms,
+                    timed_out=r.timed_out,
+                    truncated=r.truncated,
+                    timeout_sec=timeout,
+                    batch_started_at=batch_started_at,
+                )
+            )
+        return runs
+
+    def _use_batch(self) -> bool:
+        exec_cfg = self.config.get("execution") or {}
+        return bool(exec_cfg.get("batch"))
+
+    def record_cmd(
+        self,
+        *,
+        ctx: OrchestratorContext,
+        cmd_id: str,
+        command: str,
+        run: CommandRun,
+        store: EvidenceStore,
+        audit_store: Optional[AuditStore],
+        bindings: Optional[BindingState] = None,
+        speculative: str = "",
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Redact, audit and persist one command output; the raw parse feeds `bindings`.
 
+        `speculative` marks runs started before the planner selected them
+        (recorded in the audit record and the evidence index).
+        """
+        output = run.output
         redacted, redaction_rules, redacted_count = redact(output)
         output_hash = hash_text(redacted)
 
-        audit_id = f"{cmd_id}-{int(start_ts)}"
+        audit_id = f"{cmd_id}-{int(run.start_ts)}"
         if audit_store is not None:
-            audit_store.write(
-                {
-                    "session_id": ctx.session_id,
-                    "id": audit_id,
-                    "cmd_id": cmd_id,
-                    "cmd": command,
-                    "started_at": started_at,
-                    "elapsed_ms": elapsed_ms,
-                    "output_hash": output_hash,
-                    "redacted_fields": redaction_rules,
-                    "redacted_count": redacted_count,
-                }
-            )
+            record = {
+                "session_id": ctx.session_id,
+                "id": audit_id,
+                "cmd_id": cmd_id,
+                "cmd": command,
+                "started_at": run.started_at,
+                "elapsed_ms": run.elapsed_ms,
+                "timeout_sec": run.timeout_sec,
+                "output_hash": output_hash,
+                "redacted_fields": redaction_rules,
+                "redacted_count": redacted_count,
+            }
+            if run.batch_started_at:
+                record["batch_started_at"] = run.batch_started_at
+            if speculative:
+                record["speculative"] = speculative
+            audit_store.write(record)
 
         raw_ref = store.put_raw(cmd_id, output)
-        redacted_ref = store.put_redacted(cmd_id, redacted)
-        parsed = parse_output(cmd_id, redacted)
+        redacted_ref = store.put_redacted(cmd_id, redacted, digest=output_hash)
+        # Parse the raw output, then redact the parsed layer and the signals:
+        # parsing redacted text would see `<PATH>` for ps/jps command lines and
+        # df mounts. The raw parse never leaves the process.
+        parsed_raw = self.parsers.parse(cmd_id, output)
+        if bindings is not None:
+            bindings.observe(cmd_id, parsed_raw)
+        parsed = redact_value(parsed_raw)
         parsed_ref = store.put_parsed(cmd_id, parsed)
-        sig = extract_signals(parsed)
+        sig = {"signals": redact_value(extract_signals(parsed_raw).get("signals", {}))}
         store.write_index(
             f"event-{cmd_id}-{audit_id}",
             {
@@ -141,14 +341,163 @@ class Orchestrator:
                 "redacted_ref": redacted_ref,
                 "parsed_ref": parsed_ref,
                 "signals": sig.get("signals", {}),
-                "timing": {"elapsed_ms": elapsed_ms, "timeout": False},
+                "timing": {"elapsed_ms": run.elapsed_ms, "timeout": run.timed_out, "timeout_sec": run.timeout_sec},
+                "output": {"bytes": len(output.encode("utf-8", errors="replace")), "truncated": run.truncated},
                 "audit_ref": audit_id,
                 "redaction": {"rules": redaction_rules, "replaced_count": redacted_count},
+                **({"speculative": speculative} if speculative else {}),
             },
         )
         return redacted, audit_id, sig.get("signals", {})
 
-    def run(self, ctx: OrchestratorContext) -> Dict[str, Any]:
+    def exec_cmd(self, **kwargs: Any) -> Tuple[str, str, Dict[str, Any]]:
+        """Sync wrapper around exec_cmd_async (see there for arguments)."""
+        return asyncio.run(self.exec_cmd_async(**kwargs))
+
+    async def exec_cmd_async(
+        self,
+        *,
+        ctx: OrchestratorContext,
+        cmd_id: str,
+        platform: str,
+        store: EvidenceStore,
+        audit_store: Optional[AuditStore],
+        commands_cfg: Dict[str, Any],
+        allowed_risks: List[str],
+        deny_keywords: List[str],
+        pid: Optional[str] = None,
+        service: Optional[str] = None,
+        timeout: int = 30,
+        params: Optional[Dict[str, Any]] = None,
+        bindings: Optional[BindingState] = None,
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Execute one registered command and persist evidence.
+
+        `params` fills extra template placeholders (see registry.commands.render_command).
+        Returns (redacted_output, audit_id, signals_or_error).
+        """
+        command, err = self.prepare_cmd(
+            ctx=ctx,
+            cmd_id=cmd_id,
+            platform=platform,
+            commands_cfg=commands_cfg,
+            allowed_risks=allowed_risks,
+            deny_keywords=deny_keywords,
+            pid=pid,
+            service=service,
+            params=params,
+            bindings=bindings,
+        )
+        if err:
+            return "", "", err
+        if ctx.deadline is not None and ctx.deadline.expired():
+            return "", "", {"error": "deadline_exceeded"}
+
+        return self.record_cmd(
+            ctx=ctx,
+            cmd_id=cmd_id,
+            command=command,
+            run=await self.run_cmd(ctx, command, timeout, self.command_limit(commands_cfg, cmd_id)),
+            store=store,
+            audit_store=audit_store,
+            bindings=bindings,
+        )
+
+    def exec_cmds(self, **kwargs: Any) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        """Sync wrapper around exec_cmds_async (see there for arguments)."""
+        return asyncio.run(self.exec_cmds_async(**kwargs))
+
+    async def exec_cmds_async(
+        self,
+        *,
+        ctx: OrchestratorContext,
+        cmd_ids: Sequence[str],
+        platform: str,
+        store: EvidenceStore,
+        audit_store: Optional[AuditStore],
+        commands_cfg: Dict[str, Any],
+        allowed_risks: List[str],
+        deny_keywords: List[str],
+        timeout: int = 30,
+        concurrency: int = 1,
+        metrics: Optional[Dict[str, Any]] = None,
+        bindings: Optional[BindingState] = None,
+    ) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+        """Execute several registered commands concurrently against one host.
+
+        Up to `concurrency` commands are in flight at once, or they run as one
+        framed batch script when `execution.batch` is enabled and the executor
+        supports it; redaction, audit records and evidence writes happen
+        afterwards in `cmd_ids` order so the evidence pack and audit log stay
+        deterministic.
+
+        Returns a list of (cmd_id, redacted_output, audit_id, signals_or_error).
+        """
+        prepared: List[Tuple[str, str, Dict[str, Any]]] = []
+        for cmd_id in cmd_ids:
+            command, err = self.prepare_cmd(
+                ctx=ctx,
+                cmd_id=cmd_id,
+                platform=platform,
+                commands_cfg=commands_cfg,
+                allowed_risks=allowed_risks,
+                deny_keywords=deny_keywords,
+                bindings=bindings,
+            )
+            if not err and ctx.deadline is not None and ctx.deadline.expired():
+                command, err = "", {"error": "deadline_exceeded"}
+            prepared.append((cmd_id, command, err))
+
+        runnable = [
+            (i, command, self.command_limit(commands_cfg, cmd_id))
+            for i, (cmd_id, command, err) in enumerate(prepared)
+            if not err
+        ]
+        runs: Dict[int, CommandRun] = {}
+        workers = max(1, min(int(concurrency or 1), len(runnable)))
+        if runnable and self._use_batch():
+            batch = await self._run_batch(
+                ctx, [(prepared[i][0], command, limit) for i, command, limit in runnable], timeout, workers
+            )
+            runs = {i: run for (i, _, _), run in zip(runnable, batch)}
+        elif runnable:
+            sem = asyncio.Semaphore(workers)
+
+            async def _bounded(command: str, limit: Optional[OutputLimit]) -> CommandRun:
+                async with sem:
+                    return await self.run_cmd(ctx, command, timeout, limit)
+
+            done = await asyncio.gather(*[_bounded(command, limit) for _, command, limit in runnable])
+            runs = {i: run for (i, _, _), run in zip(runnable, done)}
+
+        results: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        for i, (cmd_id, command, err) in enumerate(prepared):
+            if err:
+                results.append((cmd_id, "", "", err))
+                continue
+            run = runs[i]
+            if run.timed_out and metrics is not None:
+                metrics["timeouts"] = metrics.get("timeouts", 0) + 1
+            if run.truncated and metrics is not None:
+                metrics["truncated"] = metrics.get("truncated", 0) + 1
+            out, audit_ref, sig = self.record_cmd(
+                ctx=ctx,
+                cmd_id=cmd_id,
+                command=command,
+                run=run,
+                store=store,
+                audit_store=audit_store,
+                bindings=bindings,
+            )
+            results.append((cmd_id, out, audit_ref, sig))
+        return results
+
+    def run(self, ctx: OrchestratorContext, bindings: Optional[BindingState] = None) -> Dict[str, Any]:
+        """Sync wrapper around run_async (do not call from a running event loop)."""
+        return asyncio.run(self.run_async(ctx, bindings=bindings))
+
+    async def run_async(self, ctx: OrchestratorContext, bindings: Optional[BindingState] = None) -> Dict[str, Any]:
+        """Run one session. `bindings` carries discovered values (pid, ...) to the caller's later rounds."""
         LOG.info(
             "orchestrator start session_id=%s host=%s service=%s pid=%s exec_mode=%s platform=%s window_minutes=%s",
             ctx.session_id,
@@ -167,18 +516,29 @@ class Orchestrator:
         if ctx.pid is not None and ctx.pid != "" and not validate_pid(ctx.pid):
             raise ValueError("invalid pid")
 
-        evidence_base_dir = self.config.get("evidence", {}).get("base_dir", "report")
-        store = EvidenceStore(evidence_base_dir, ctx.session_id)
+        # Evidence/audit disk writes happen on a write-behind thread, off the command path.
+        writer = WriteBehind.from_config((self.config.get("evidence") or {}).get("write_behind"))
+        if bindings is None:
+            bindings = BindingState.from_config(self.config, service=ctx.service, pid=ctx.pid)
+        try:
+            return await self._run_session(ctx, writer, bindings)
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.close)
+
+    async def _run_session(
+        self, ctx: OrchestratorContext, writer: Optional[WriteBehind], bindings: BindingState
+    ) -> Dict[str, Any]:
+        store = EvidenceStore.from_config(self.config.get("evidence"), ctx.session_id, writer=writer)
 
-        audit_log = self.config.get("audit_log") or ""
-        audit_store = AuditStore(audit_log) if audit_log else None
+        audit_store = AuditStore.from_config(self.config, writer=writer)
 
         policy = self.config.get("action_policy", {})
         allowed_risks = policy.get("allowed_risks", ["READ_ONLY"])
         deny_keywords = policy.get("deny_keywords", [])
 
         commands_cfg = self.config.get("commands", {})
-        routes = (self.config.get("routes") or self.config.get("routing") or {}).get("routes", {})
+        routes = route_table(self.config)
 
         platform = self._resolve_platform(ctx)
 
@@ -196,13 +556,36 @@ class Orchestrator:
         snapshots: List[Dict[str, Any]] = []
         audit_refs: List[str] = []
         all_signals: Dict[str, Any] = {}
-        metrics: Dict[str, Any] = {"timeouts": 0, "empty_outputs": 0, "skipped": 0}
+        metrics: Dict[str, Any] = {"timeouts": 0, "truncated": 0, "empty_outputs": 0, "skipped": 0}
+
+        # Sampling runs as one long-lived command alongside the baseline.
+        plan = sampling_plan(self.config, ctx) if platform == "linux" else None
+        sampling: Optional["asyncio.Task[Tuple[str, str, Dict[str, Any]]]"] = None
+        if plan is not None:
+            LOG.info("sampling start count=%s interval_sec=%s", plan.count, plan.interval_sec)
+            sampling = asyncio.create_task(
+                self.exec_cmd_async(
+                    ctx=ctx,
+                    cmd_id=plan.cmd_id,
+                    platform=platform,
+                    store=store,
+                    audit_store=audit_store,
+                    commands_cfg=commands_cfg,
+                    allowed_risks=allowed_risks,
+                    deny_keywords=deny_keywords,
+                    timeout=int(plan.duration_sec) + 30,
+                    params={"count": plan.count, "interval": f"{plan.interval_sec:g}"},
+                    bindings=bindings,
+                )
+            )
 
-        for cmd_id in baseline_cmds:
-            LOG.info("baseline exec cmd_id=%s", cmd_id)
-            out, audit_ref, sig = self.exec_cmd(
+        concurrency = _as_positive_int((self.config.get("execution") or {}).get("per_host_concurrency"), 1)
+        LOG.info("baseline exec cmds=%s concurrency=%s", len(baseline_cmds), concurrency)
+        baseline_start = time.time()
+        try:
+            baseline_results = await self.exec_cmds_async(
                 ctx=ctx,
-                cmd_id=cmd_id,
+                cmd_ids=baseline_cmds,
                 platform=platform,
                 store=store,
                 audit_store=audit_store,
@@ -210,7 +593,17 @@ class Orchestrator:
                 allowed_risks=allowed_risks,
                 deny_keywords=deny_keywords,
                 timeout=30,
+                concurrency=concurrency,
+                metrics=metrics,
+                bindings=bindings,
             )
+        except BaseException:
+            if sampling is not None:
+                sampling.cancel()
+            raise
+        metrics["baseline_elapsed_ms"] = int((time.time() - baseline_start) * 1000)
+
+        for cmd_id, out, audit_ref, sig in baseline_results:
             if not audit_ref and not out:
                 metrics["skipped"] += 1
             if not audit_ref:
@@ -221,7 +614,7 @@ class Orchestrator:
                 if v is not None:
                     all_signals[k] = v
             # lightweight snapshot summary
-            first_line = (out or "").strip().splitlines()[0] if (out or "").strip() else ""
+            first_line = snapshot_signal(out, sig)
             if not (out or "").strip():
                 metrics["empty_outputs"] += 1
             snapshots.append(
@@ -233,21 +626,42 @@ class Orchestrator:
                 }
             )
 
-        # classify (rule-based)
-        hypotheses = self.rule_engine.classify(all_signals)
+        if sampling is not None:
+            out, audit_ref, sig = await sampling
+            if audit_ref:
+                audit_refs.append(audit_ref)
+                for k, v in (sig or {}).items():
+                    if v is not None:
+                        all_signals[k] = v
+                snapshots.append(
+                    {
+                        "cmd_id": plan.cmd_id,
+                        "signal": snapshot_signal(out, sig)[:200],
+                        "summary": "sampled",
+                        "audit_ref": audit_ref,
+                    }
+                )
+            else:
+                LOG.warning("sampling skipped cmd_id=%s err=%s", plan.cmd_id, sig)
+                metrics["skipped"] += 1
+
+        # classify (rule-based); the session re-evaluates only rules whose signals changed
+        rules = self.rule_engine.session()
+        hypotheses = rules.update(all_signals)
         for h in hypotheses:
             h["evidence_refs"] = audit_refs[:8]
         primary = hypotheses[0]["category"] if hypotheses else "UNKNOWN"
         LOG.info("classify primary=%s", primary)
 
-        # targeted routing (deterministic)
-        targeted_cmds = routes.get(primary, [])
-        next_checks: List[Dict[str, str]] = []
-        for cmd_id in targeted_cmds:
-            if cmd_id in baseline_cmds:
-                continue
-            LOG.info("targeted exec cmd_id=%s", cmd_id)
-            out, audit_ref, sig = self.exec_cmd(
+        # targeted routing (deterministic): a dependency DAG, so commands that
+        # need a binding (e.g. {pid}) wait only for its source commands while
+        # independent branches run concurrently.
+        targeted_cmds = [c for c in routes.get(primary, []) if c not in baseline_cmds]
+        dag = plan_dag(targeted_cmds, commands_cfg, bindings, done=baseline_cmds)
+        LOG.info("targeted exec dag=%s concurrency=%s", {k: sorted(v) for k, v in dag.items()}, concurrency)
+
+        async def run_targeted(cmd_id: str) -> Tuple[str, str, Dict[str, Any]]:
+            return await self.exec_cmd_async(
                 ctx=ctx,
                 cmd_id=cmd_id,
                 platform=platform,
@@ -257,13 +671,22 @@ class Orchestrator:
                 allowed_risks=allowed_risks,
                 deny_keywords=deny_keywords,
                 timeout=30,
+                bindings=bindings,
             )
+
+        targeted_start = time.time()
+        targeted_results = await run_dag(dag, run_targeted, concurrency=concurrency)
+        metrics["targeted_elapsed_ms"] = int((time.time() - targeted_start) * 1000)
+        next_checks: List[Dict[str, str]] = []
+        # Evidence follows DAG order, not completion order, so packs stay deterministic.
+        for cmd_id in dag:
+            out, audit_ref, sig = targeted_results[cmd_id]
             if audit_ref:
                 audit_refs.append(audit_ref)
                 for k, v in (sig or {}).items():
                     if v is not None:
                         all_signals[k] = v
-                first_line = (out or "").strip().splitlines()[0] if (out or "").strip() else ""
+                first_line = snapshot_signal(out, sig)
                 if not (out or "").strip():
                     metrics["empty_outputs"] += 1
                 snapshots.append(
@@ -275,11 +698,13 @@ class Orchestrator:
                     }
                 )
             else:
-                LOG.warning("targeted failed cmd_id=%s", cmd_id)
+                LOG.warning("targeted failed cmd_id=%s err=%s", cmd_id, sig)
                 next_checks.append({"cmd_id": cmd_id, "purpose": "blocked_or_failed"})
+        if bindings.bindings:
+            metrics["bindings"] = bindings.summary()
 
         # Re-run rules after targeted signals
-        hypotheses = self.rule_engine.classify(all_signals)
+        hypotheses = rules.update(all_signals)
         for h in hypotheses:
             h["evidence_refs"] = audit_refs[:8]
         primary = hypotheses[0]["category"] if hypotheses else primary
@@ -309,13 +734,15 @@ class Orchestrator:
             "metrics": metrics,
         }
 
+        # Barrier: every event/audit write of this session lands before the pack.
+        await asyncio.to_thread(store.flush)
         store.write_index("evidence_pack", evidence_pack)
         LOG.info(
             "orchestrator finished session_id=%s primary=%s baseline=%s targeted=%s",
             ctx.session_id,
             primary,
             len(baseline_cmds),
-            len(targeted_cmds),
+            len(dag),
         )
         # Keep audit summary for offline replay (best-effort).
         if audit_store is not None:
@@ -334,8 +761,7 @@ class Orchestrator:
                             "redacted_fields": r.get("redacted_fields", []),
                             "redacted_count": r.get("redacted_count", 0),
                         }
-                        for r in audit_store.read_all()
-                        if r.get("session_id") == ctx.session_id
+                        for r in audit_store.read_session(ctx.session_id)
                     ],
                 },
             )
@@ -9,21 +9,30 @@ Design goals:
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from adapters.llm.base import LLMClient
-from orchestrator.graph import Orchestrator, OrchestratorContext
-from orchestrator.planner_prompt import build_plan_prompt
-from reporting.schema_validate import validate_schema
+from adapters.llm.cache import cache_stats, invalidate_response
+from orchestrator.deadline import Deadline, DeadlineExceeded
+from orchestrator.graph import Orchestrator, OrchestratorContext, route_table, snapshot_signal
+from orchestrator.planner_prompt import DEFAULT_TOKEN_BUDGET, PlanPromptBuilder
+from orchestrator.speculation import SpeculationPolicy, Speculator
+from orchestrator.rules import RuleEngine
+from reporting.schema_validate import load_schema, validate_schema
+from registry.bindings import BindingState
 from registry.commands import get_command_meta
+from storage.writer import WriteBehind
 
 
 LOG = logging.getLogger("sre_agent.orchestrator.multi_stage")
 
+# Below this many seconds left, the LLM report is skipped for the fallback.
+MIN_REPORT_SEC = 2.0
+
 
 @dataclass(frozen=True)
 class DiagnoseBudget:
@@ -32,14 +41,9 @@ class DiagnoseBudget:
     max_total_cmds: int = 12
     time_budget_sec: int = 120
     confidence_threshold: float = 0.85
-
-
-def _load_json_file(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, dict):
-        raise ValueError(f"invalid json object: {path}")
-    return data
+    prompt_token_budget: int = DEFAULT_TOKEN_BUDGET
+    # Part of time_budget_sec kept for the final report (at most half of it).
+    report_reserve_sec: int = 20
 
 
 def _primary_category(evidence_pack: Dict[str, Any]) -> str:
@@ -51,6 +55,12 @@ def _primary_category(evidence_pack: Dict[str, Any]) -> str:
     return "UNKNOWN"
 
 
+def _top_confidence(evidence_pack: Dict[str, Any]) -> float:
+    hyps = evidence_pack.get("hypothesis") or []
+    hyp0 = hyps[0] if isinstance(hyps, list) and hyps else None
+    return _as_float(hyp0.get("confidence"), 0.0) if isinstance(hyp0, dict) else 0.0
+
+
 def _as_int(v: Any, default: int) -> int:
     try:
         return int(v)
@@ -66,8 +76,7 @@ def _as_float(v: Any, default: float) -> float:
 
 
 def _get_allowed_cmd_pool(config: Dict[str, Any], primary: str) -> List[str]:
-    routes_root = (config.get("routes") or config.get("routing") or {}).get("routes", {})
-    pool = routes_root.get(primary) or []
+    pool = route_table(config).get(primary) or []
     if not isinstance(pool, list):
         return []
     return [str(x) for x in pool if str(x).strip()]
@@ -85,6 +94,8 @@ def _filter_plan_cmds(
     proposed = plan.get("next_cmds")
     if not isinstance(proposed, list):
         proposed = []
+    # priority 1 is the most urgent; stable, so equal priorities keep plan order.
+    proposed = sorted(proposed, key=lambda it: _as_int(it.get("priority"), 5) if isinstance(it, dict) else 5)
 
     kept: List[Dict[str, Any]] = []
     blocked: List[Dict[str, Any]] = []
@@ -112,7 +123,12 @@ def _filter_plan_cmds(
     return kept, blocked
 
 
-def multi_round_diagnose(
+def multi_round_diagnose(**kwargs: Any) -> Dict[str, Any]:
+    """Sync wrapper around multi_round_diagnose_async (see there for arguments)."""
+    return asyncio.run(multi_round_diagnose_async(**kwargs))
+
+
+async def multi_round_diagnose_async(
     *,
     config: Dict[str, Any],
     ctx: OrchestratorContext,
@@ -121,20 +137,36 @@ def multi_round_diagnose(
     plan_schema_path: str,
     report_schema_path: str,
     budget: DiagnoseBudget,
+    rule_engine: Optional[RuleEngine] = None,
 ) -> Dict[str, Any]:
     """Run baseline collection then multi-round LLM planning loop.
 
+    `executor` may be sync or async. LLM calls run on a worker thread so
+    other sessions on the same event loop keep making progress.
+    Pass `rule_engine` to share one engine across sessions (e.g. fleet mode).
+
     Returns a dict containing:
     - evidence_pack
     - diagnosis_report
     - diagnosis_trace
     """
-    plan_schema = _load_json_file(plan_schema_path)
-    report_schema = _load_json_file(report_schema_path)
+    plan_schema = load_schema(plan_schema_path)
+    report_schema = load_schema(report_schema_path)
+
+    # One deadline for the whole session (baseline included); commands and
+    # planner calls run against loop_deadline, which keeps the report reserve.
+    session_start = time.monotonic()
+    deadline = Deadline.after(budget.time_budget_sec)
+    if ctx.deadline is not None and ctx.deadline.at < deadline.at:
+        deadline = ctx.deadline
+    loop_deadline = deadline.reserve(min(float(budget.report_reserve_sec), budget.time_budget_sec / 2.0))
+    ctx = replace(ctx, deadline=loop_deadline)
 
     # Step 1: baseline + deterministic targeted collection (existing behavior)
-    orch = Orchestrator(config, executor=executor)
-    evidence_pack = orch.run(ctx)
+    orch = Orchestrator(config, executor=executor, rule_engine=rule_engine)
+    # Bindings (e.g. a pid discovered from jps/ps_cpu) carry over into planned rounds.
+    bindings = BindingState.from_config(config, service=ctx.service, pid=ctx.pid)
+    evidence_pack = await orch.run_async(ctx, bindings=bindings)
     primary = _primary_category(evidence_pack)
     initial_primary = primary
 
@@ -147,195 +179,341 @@ def multi_round_diagnose(
     )
     total_cmds_before = len(executed_cmd_ids)
 
-    start_ts = time.time()
     stop_reason = ""
 
-    # Evidence store base dir is used by Orchestrator already; keep trace in same session index.
-    evidence_base_dir = config.get("evidence", {}).get("base_dir", "report")
-    from storage.evidence_store import EvidenceStore
-
-    store = EvidenceStore(evidence_base_dir, ctx.session_id)
-
-    audit_log = config.get("audit_log") or ""
-    from storage.audit_store import AuditStore
-
-    audit_store = AuditStore(audit_log) if audit_log else None
+    writer = WriteBehind.from_config((config.get("evidence") or {}).get("write_behind"))
+    try:
+        # Evidence store base dir is used by Orchestrator already; keep trace in same session index.
+        from storage.evidence_store import EvidenceStore
 
-    policy = config.get("action_policy", {})
-    allowed_risks = policy.get("allowed_risks", ["READ_ONLY"])
-    deny_keywords = policy.get("deny_keywords", [])
+        store = EvidenceStore.from_config(config.get("evidence"), ctx.session_id, writer=writer)
 
-    platform = orch._resolve_platform(ctx)
+        from storage.audit_store import AuditStore
 
-    for round_idx in range(1, int(budget.max_rounds) + 1):
-        elapsed = int(time.time() - start_ts)
-        if elapsed >= int(budget.time_budget_sec):
-            stop_reason = "time_budget_exceeded"
-            break
-        if len(executed_cmd_ids) - total_cmds_before >= int(budget.max_total_cmds):
-            stop_reason = "max_total_cmds_exceeded"
-            break
+        audit_store = AuditStore.from_config(config, writer=writer)
 
-        remaining_pool = [c for c in allowed_pool if c not in executed_cmd_ids]
-        if not remaining_pool:
-            stop_reason = "allowed_cmd_pool_exhausted"
-            break
-
-        # Build compact state for LLM: only summaries + signals, no raw.
-        state = {
-            "meta": evidence_pack.get("meta", {}),
-            "primary_category": primary,
-            "hypothesis": evidence_pack.get("hypothesis", []),
-            "signals": evidence_pack.get("signals", {}),
-            "snapshots": evidence_pack.get("snapshots", [])[-20:],
-            "executed_cmd_ids": sorted(list(executed_cmd_ids)),
-            "budget": {
-                "round": round_idx,
-                "max_rounds": int(budget.max_rounds),
-                "max_cmds_per_round": int(budget.max_cmds_per_round),
-                "max_total_cmds": int(budget.max_total_cmds),
-                "time_budget_sec": int(budget.time_budget_sec),
-                "confidence_threshold": float(budget.confidence_threshold),
-            },
-        }
+        policy = config.get("action_policy", {})
+        allowed_risks = policy.get("allowed_risks", ["READ_ONLY"])
+        deny_keywords = policy.get("deny_keywords", [])
 
-        prompt = build_plan_prompt(
-            state=state,
-            allowed_cmd_pool=remaining_pool,
+        platform = orch._resolve_platform(ctx)
+        rules = orch.rule_engine.session()
+        rules.update(evidence_pack.get("signals") or {})
+        prompts = PlanPromptBuilder(
             plan_schema=plan_schema,
             max_cmds_per_round=int(budget.max_cmds_per_round),
+            token_budget=int(budget.prompt_token_budget),
         )
+        llm_caps = getattr(llm, "capabilities", dict)() or {}
+        split_prefix = bool(llm_caps.get("prompt_prefix"))
+        speculator = Speculator(SpeculationPolicy.from_config(config))
+        host_slots = asyncio.Semaphore(_as_int((config.get("execution") or {}).get("per_host_concurrency"), 1) or 1)
+
+        for round_idx in range(1, int(budget.max_rounds) + 1):
+            if loop_deadline.expired():
+                stop_reason = "time_budget_exceeded"
+                break
+            if len(executed_cmd_ids) - total_cmds_before >= int(budget.max_total_cmds):
+                stop_reason = "max_total_cmds_exceeded"
+                break
 
-        LOG.info("llm plan round=%s primary=%s remaining_pool=%s", round_idx, primary, len(remaining_pool))
-        plan = llm.generate_json(prompt, plan_schema, temperature=0.2)
-        validate_schema(plan, plan_schema)
+            remaining_pool = [c for c in allowed_pool if c not in executed_cmd_ids]
+            if not remaining_pool:
+                stop_reason = "allowed_cmd_pool_exhausted"
+                break
 
-        decision = str(plan.get("decision") or "").upper()
-        # Early stop by LLM
-        if decision == "STOP":
-            stop_reason = str(plan.get("stop_reason") or "llm_stop")
-            trace_rounds.append(
-                {
+            # Build compact state for LLM: only summaries + signals, no raw.
+            # The prompt builder sends only what changed since the last round.
+            state = {
+                "meta": evidence_pack.get("meta", {}),
+                "primary_category": primary,
+                "hypothesis": evidence_pack.get("hypothesis", []),
+                "signals": evidence_pack.get("signals", {}),
+                "snapshots": evidence_pack.get("snapshots", []),
+                "executed_cmd_ids": sorted(list(executed_cmd_ids)),
+                "budget": {
                     "round": round_idx,
-                    "decision": "STOP",
-                    "plan": plan,
-                    "allowed_cmd_pool": remaining_pool,
-                    "blocked": [],
-                    "executed": [],
-                }
-            )
-            break
+                    "max_rounds": int(budget.max_rounds),
+                    "max_cmds_per_round": int(budget.max_cmds_per_round),
+                    "max_total_cmds": int(budget.max_total_cmds),
+                    "time_budget_sec": int(budget.time_budget_sec),
+                    "confidence_threshold": float(budget.confidence_threshold),
+                },
+            }
 
-        kept, blocked = _filter_plan_cmds(
-            plan=plan,
-            allowed_pool=remaining_pool,
-            already_executed=executed_cmd_ids,
-            commands_cfg=commands_cfg,
-            max_cmds_per_round=int(budget.max_cmds_per_round),
-        )
+            prompt = prompts.build(state=state, allowed_cmd_pool=remaining_pool)
+            prompt_trace = prompt.trace(budget.prompt_token_budget)
 
-        executed: List[Dict[str, Any]] = []
-        for item in kept:
-            cmd_id = str(item.get("cmd_id"))
-            timeout_sec = _as_int(item.get("timeout_sec"), 30)
-            out, audit_ref, sig = orch.exec_cmd(
+            LOG.info(
+                "llm plan round=%s primary=%s remaining_pool=%s prompt_tokens=%s level=%s",
+                round_idx,
+                primary,
+                len(remaining_pool),
+                prompt_trace["total_tokens"],
+                prompt.level,
+            )
+            # Likely next commands run while the planner thinks; only selected ones become evidence.
+            spec_buf, spec_trace = speculator.launch(
+                orch=orch,
                 ctx=ctx,
-                cmd_id=cmd_id,
+                category=primary,
+                pool=remaining_pool,
+                signals=evidence_pack.get("signals") or {},
                 platform=platform,
-                store=store,
-                audit_store=audit_store,
                 commands_cfg=commands_cfg,
                 allowed_risks=allowed_risks,
                 deny_keywords=deny_keywords,
-                timeout=timeout_sec,
+                bindings=bindings,
+                slots=host_slots,
             )
+            llm_options: Dict[str, Any] = {"temperature": 0.2}
+            if split_prefix:
+                llm_options["prefix"] = prompt.prefix
+            if llm_caps.get("request_timeout") and loop_deadline.bounded:
+                llm_options["timeout"] = max(1.0, loop_deadline.remaining())
+            llm_start = time.monotonic()
+            try:
+                plan = await loop_deadline.run(
+                    asyncio.to_thread(
+                        llm.generate_json, prompt.context if split_prefix else prompt.text, plan_schema, **llm_options
+                    )
+                )
+                prompt_trace["llm_ms"] = int((time.monotonic() - llm_start) * 1000)
+                try:
+                    validate_schema(plan, plan_schema)
+                except Exception:
+                    invalidate_response(llm, prompt.text, plan_schema, temperature=0.2)
+                    raise
+            except BaseException as exc:
+                dropped = await spec_buf.discard(ctx=ctx, audit_store=audit_store)
+                if not isinstance(exc, DeadlineExceeded):
+                    raise
+                LOG.warning("llm plan abandoned at deadline round=%s", round_idx)
+                stop_reason = "time_budget_exceeded"
+                prompt_trace["llm_ms"] = int((time.monotonic() - llm_start) * 1000)
+                trace_rounds.append(
+                    {
+                        "round": round_idx,
+                        "decision": "DEADLINE",
+                        "allowed_cmd_pool": remaining_pool,
+                        "prompt": prompt_trace,
+                        "speculation": speculator.settle(spec_buf, spec_trace, dropped),
+                        "blocked": [],
+                        "executed": [],
+                    }
+                )
+                break
 
-            # Merge into evidence_pack snapshots/signals
-            if audit_ref:
-                evidence_pack.setdefault("snapshots", [])
-                first_line = (out or "").strip().splitlines()[0] if (out or "").strip() else ""
-                evidence_pack["snapshots"].append(
+            decision = str(plan.get("decision") or "").upper()
+            # Early stop by LLM
+            if decision == "STOP":
+                stop_reason = str(plan.get("stop_reason") or "llm_stop")
+                dropped = await spec_buf.discard(ctx=ctx, audit_store=audit_store)
+                trace_rounds.append(
                     {
-                        "cmd_id": cmd_id,
-                        "signal": first_line[:200],
-                        "summary": f"round_{round_idx}",
-                        "audit_ref": audit_ref,
+                        "round": round_idx,
+                        "decision": "STOP",
+                        "plan": plan,
+                        "allowed_cmd_pool": remaining_pool,
+                        "prompt": prompt_trace,
+                        "speculation": speculator.settle(spec_buf, spec_trace, dropped),
+                        "blocked": [],
+                        "executed": [],
                     }
                 )
-            if isinstance(sig, dict):
-                evidence_pack.setdefault("signals", {})
-                for k, v in sig.items():
-                    if v is not None:
-                        evidence_pack["signals"][k] = v
-
-            executed_cmd_ids.add(cmd_id)
-            executed.append({"cmd_id": cmd_id, "timeout_sec": timeout_sec, "audit_ref": audit_ref})
-
-        # Update hypothesis after new evidence using existing rule engine
-        if isinstance(evidence_pack.get("signals"), dict):
-            from orchestrator.rules import RuleEngine
-
-            re = RuleEngine(config.get("rules", {}))
-            hypotheses = re.classify(evidence_pack.get("signals") or {})
-            evidence_pack["hypothesis"] = hypotheses
-            primary = _primary_category(evidence_pack)
-
-        trace_rounds.append(
-            {
-                "round": round_idx,
-                "decision": decision or "CONTINUE",
-                "plan": plan,
-                "allowed_cmd_pool": remaining_pool,
-                "blocked": blocked,
-                "executed": executed,
-            }
-        )
+                break
 
-        # Persist per-round trace
-        store.write_index(f"llm_round_{round_idx:03d}", trace_rounds[-1])
+            kept, blocked = _filter_plan_cmds(
+                plan=plan,
+                allowed_pool=remaining_pool,
+                already_executed=executed_cmd_ids,
+                commands_cfg=commands_cfg,
+                max_cmds_per_round=int(budget.max_cmds_per_round),
+            )
 
-        # Confidence early stop
-        try:
-            hyp0 = (evidence_pack.get("hypothesis") or [])[0]
-            conf = _as_float(hyp0.get("confidence"), 0.0) if isinstance(hyp0, dict) else 0.0
-            if conf >= float(budget.confidence_threshold):
+            speculator.stats.record(primary, [str(item.get("cmd_id")) for item in kept])
+
+            async def run_planned(item: Dict[str, Any]) -> Tuple[str, int, bool, str, str, Dict[str, Any]]:
+                cmd_id = str(item.get("cmd_id"))
+                timeout_sec = _as_int(item.get("timeout_sec"), 30)
+                # A speculative run already held a host slot while it executed.
+                taken = await spec_buf.take(cmd_id, timeout_sec) if cmd_id in spec_buf else None
+                if taken is not None:
+                    command, run = taken
+                    out, audit_ref, sig = orch.record_cmd(
+                        ctx=ctx,
+                        cmd_id=cmd_id,
+                        command=command,
+                        run=run,
+                        store=store,
+                        audit_store=audit_store,
+                        bindings=bindings,
+                        speculative="hit",
+                    )
+                    return cmd_id, run.timeout_sec, True, out, audit_ref, sig
+                async with host_slots:
+                    out, audit_ref, sig = await orch.exec_cmd_async(
+                        ctx=ctx,
+                        cmd_id=cmd_id,
+                        platform=platform,
+                        store=store,
+                        audit_store=audit_store,
+                        commands_cfg=commands_cfg,
+                        allowed_risks=allowed_risks,
+                        deny_keywords=deny_keywords,
+                        timeout=timeout_sec,
+                        bindings=bindings,
+                    )
+                return cmd_id, timeout_sec, False, out, audit_ref, sig
+
+            # kept is priority-ordered; the semaphore admits waiters FIFO, so
+            # dispatch follows priority and results are merged as they land.
+            executed: List[Dict[str, Any]] = []
+            cancelled: List[str] = []
+            in_flight = {asyncio.create_task(run_planned(item)): str(item.get("cmd_id")) for item in kept}
+            try:
+                while in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        del in_flight[task]
+                        cmd_id, timeout_sec, speculative, out, audit_ref, sig = task.result()
+
+                        # Merge into evidence_pack snapshots/signals
+                        if audit_ref:
+                            evidence_pack.setdefault("snapshots", [])
+                            first_line = snapshot_signal(out, sig if isinstance(sig, dict) else None)
+                            evidence_pack["snapshots"].append(
+                                {
+                                    "cmd_id": cmd_id,
+                                    "signal": first_line[:200],
+                                    "summary": f"round_{round_idx}",
+                                    "audit_ref": audit_ref,
+                                }
+                            )
+                        if isinstance(sig, dict):
+                            evidence_pack.setdefault("signals", {})
+                            for k, v in sig.items():
+                                if v is not None:
+                                    evidence_pack["signals"][k] = v
+
+                        executed_cmd_ids.add(cmd_id)
+                        entry = {"cmd_id": cmd_id, "timeout_sec": timeout_sec, "audit_ref": audit_ref}
+                        if speculative:
+                            entry["speculative"] = True
+                        executed.append(entry)
+
+                        # Update hypothesis after new evidence (only rules reading new/changed signals run)
+                        evidence_pack["hypothesis"] = rules.update(evidence_pack.get("signals") or {})
+                        primary = _primary_category(evidence_pack)
+
+                    if in_flight and _top_confidence(evidence_pack) >= float(budget.confidence_threshold):
+                        # Evidence is already conclusive: stop paying for the rest of the round.
+                        cancelled = sorted(in_flight.values())
+                        LOG.info("confidence reached mid-round round=%s cancel=%s", round_idx, cancelled)
+                        break
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                if in_flight:
+                    await asyncio.gather(*in_flight, return_exceptions=True)
+            dropped = await spec_buf.discard(ctx=ctx, audit_store=audit_store)
+
+            trace_rounds.append(
+                {
+                    "round": round_idx,
+                    "decision": decision or "CONTINUE",
+                    "plan": plan,
+                    "allowed_cmd_pool": remaining_pool,
+                    "prompt": prompt_trace,
+                    "speculation": speculator.settle(spec_buf, spec_trace, dropped),
+                    "blocked": blocked,
+                    "executed": executed,
+                    "cancelled": cancelled,
+                }
+            )
+
+            # Persist per-round trace
+            store.write_index(f"llm_round_{round_idx:03d}", trace_rounds[-1])
+
+            # Confidence early stop
+            if _top_confidence(evidence_pack) >= float(budget.confidence_threshold):
                 stop_reason = "confidence_threshold_reached"
                 break
-        except Exception:
-            pass
-
-    if not stop_reason:
-        stop_reason = "max_rounds_reached"
-
-    # Final report
-    from reporting.report_builder import build_report
-
-    evidence_pack.setdefault("meta", {})
-    # add minimal fields expected by report schema meta if missing
-    if isinstance(evidence_pack.get("meta"), dict):
-        evidence_pack["meta"].setdefault("collection_window_minutes", ctx.window_minutes)
-        evidence_pack["meta"].setdefault("agent_version", "dev")
-
-    report = build_report(llm, evidence_pack, report_schema)
-    validate_schema(report, report_schema)
-
-    diagnosis_trace = {
-        "session_id": ctx.session_id,
-        "initial_primary": initial_primary,
-        "primary": _primary_category(evidence_pack),
-        "stop_reason": stop_reason,
-        "budget": {
-            "max_rounds": int(budget.max_rounds),
-            "max_cmds_per_round": int(budget.max_cmds_per_round),
-            "max_total_cmds": int(budget.max_total_cmds),
-            "time_budget_sec": int(budget.time_budget_sec),
-            "confidence_threshold": float(budget.confidence_threshold),
-        },
-        "rounds": trace_rounds,
-    }
-
-    store.write_index("diagnosis_trace", diagnosis_trace)
-    store.write_index("diagnosis_report", report)
-    store.write_index("evidence_pack", evidence_pack)
-
-    return {"evidence_pack": evidence_pack, "diagnosis_report": report, "diagnosis_trace": diagnosis_trace}
+
+        if not stop_reason:
+            stop_reason = "max_rounds_reached"
+
+        # Final report
+        from reporting.report_builder import build_fallback_report, build_report
+
+        evidence_pack.setdefault("meta", {})
+        # add minimal fields expected by report schema meta if missing
+        if isinstance(evidence_pack.get("meta"), dict):
+            evidence_pack["meta"].setdefault("collection_window_minutes", ctx.window_minutes)
+            evidence_pack["meta"].setdefault("agent_version", "dev")
+
+        # The LLM report gets whatever is left of the session deadline (at least
+        # the reserve); past it, a rule-based report is built from the pack.
+        report_trace: Dict[str, Any] = {"source": "llm"}
+        report_start = time.monotonic()
+        if deadline.bounded and deadline.remaining() < MIN_REPORT_SEC:
+            report_trace = {"source": "fallback", "reason": "report_reserve_exhausted"}
+        else:
+            try:
+                report = await deadline.run(
+                    asyncio.to_thread(
+                        build_report,
+                        llm,
+                        evidence_pack,
+                        report_schema,
+                        timeout=deadline.remaining() if deadline.bounded else None,
+                    )
+                )
+            except DeadlineExceeded:
+                LOG.warning("llm report abandoned at deadline session_id=%s", ctx.session_id)
+                report_trace = {"source": "fallback", "reason": "report_deadline_exceeded"}
+        if report_trace["source"] == "fallback":
+            report = build_fallback_report(evidence_pack, report_schema, reason=report_trace["reason"])
+        # Both report builders validate against report_schema before returning.
+        report_trace["ms"] = int((time.monotonic() - report_start) * 1000)
+
+        diagnosis_trace = {
+            "session_id": ctx.session_id,
+            "initial_primary": initial_primary,
+            "primary": _primary_category(evidence_pack),
+            "stop_reason": stop_reason,
+            "budget": {
+                "max_rounds": int(budget.max_rounds),
+                "max_cmds_per_round": int(budget.max_cmds_per_round),
+                "max_total_cmds": int(budget.max_total_cmds),
+                "time_budget_sec": int(budget.time_budget_sec),
+                "confidence_threshold": float(budget.confidence_threshold),
+                "prompt_token_budget": int(budget.prompt_token_budget),
+                "report_reserve_sec": int(budget.report_reserve_sec),
+            },
+            "elapsed_sec": round(time.monotonic() - session_start, 3),
+            "report": report_trace,
+            "rounds": trace_rounds,
+            "prompt_tokens": {
+                "prefix": trace_rounds[0]["prompt"]["prefix_tokens"] if trace_rounds else 0,
+                "total": sum(r["prompt"]["total_tokens"] for r in trace_rounds),
+                "delta": sum(r["prompt"]["delta_tokens"] for r in trace_rounds),
+            },
+        }
+        diagnosis_trace["speculation"] = speculator.summary()
+        await asyncio.to_thread(speculator.stats.save)
+        llm_cache = cache_stats(llm)
+        if llm_cache is not None:
+            # Counters of the (possibly fleet-shared) cache client at session end.
+            diagnosis_trace["llm_cache"] = llm_cache
+
+        # Barrier: per-round events/audit records land before the final indexes.
+        await asyncio.to_thread(store.flush)
+        store.write_index("diagnosis_trace", diagnosis_trace)
+        store.write_index("diagnosis_report", report)
+        store.write_index("evidence_pack", evidence_pack)
+
+        return {"evidence_pack": evidence_pack, "diagnosis_report": report, "diagnosis_trace": diagnosis_trace}
+    finally:
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
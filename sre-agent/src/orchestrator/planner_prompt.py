@@ -2,26 +2,70 @@
 
 The planner is constrained to choose cmd_ids only from the provided allowlist.
 It must return a JSON object that conforms to `schemas/plan_schema.json`.
+
+`PlanPromptBuilder` splits the prompt into:
+- a stable prefix (instructions + plan schema), byte-identical every round,
+  sent as its own message when the LLM client supports it so providers can
+  reuse their prompt cache;
+- an append-only context: round 1 carries the full (redacted) state, later
+  rounds only what changed (new signals/snapshots, hypothesis, remaining
+  pool). Round N's context extends round N-1's, so only the delta is new.
+
+The whole prompt is held under `token_budget` by deterministic compaction
+levels (see `_compact`); the chosen level and token counts are reported per
+round in the diagnosis trace.
 """
 
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
 
 
-def build_plan_prompt(
-    *,
-    state: Dict[str, Any],
-    allowed_cmd_pool: Sequence[str],
-    plan_schema: Dict[str, Any],
-    max_cmds_per_round: int,
-) -> str:
-    allowed = list(dict.fromkeys([c for c in (allowed_cmd_pool or []) if str(c).strip()]))
-    budget = state.get("budget") if isinstance(state.get("budget"), dict) else {}
-    executed = state.get("executed_cmd_ids") if isinstance(state.get("executed_cmd_ids"), list) else []
+DEFAULT_TOKEN_BUDGET = 8000
+MAX_LEVEL = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer-free estimate: ~4 ASCII chars per token, 1 token per other char."""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+@dataclass(frozen=True)
+class PlanPrompt:
+    prefix: str
+    context: str
+    level: int = 0
+    delta_tokens: int = 0
 
-    # Keep prompt compact: state contains only redacted summaries/signals.
+    @property
+    def text(self) -> str:
+        return self.prefix + self.context
+
+    @property
+    def prefix_tokens(self) -> int:
+        return estimate_tokens(self.prefix)
+
+    @property
+    def context_tokens(self) -> int:
+        return estimate_tokens(self.context)
+
+    def trace(self, budget: int) -> Dict[str, Any]:
+        return {
+            "prefix_tokens": self.prefix_tokens,
+            "context_tokens": self.context_tokens,
+            "delta_tokens": self.delta_tokens,
+            "total_tokens": self.prefix_tokens + self.context_tokens,
+            "token_budget": int(budget),
+            "compaction_level": self.level,
+        }
+
+
+def build_plan_prefix(plan_schema: Dict[str, Any], max_cmds_per_round: int) -> str:
     return (
         "You are an SRE diagnosis planner. Your job is to decide what evidence to collect next.\n"
         "Hard constraints:\n"
@@ -29,12 +73,201 @@ def build_plan_prompt(
         "- The JSON MUST conform to the provided plan schema (no extra keys).\n"
         "- You MUST ONLY choose cmd_id from allowed_cmd_pool (never invent cmd_id).\n"
         f"- You MUST propose at most {int(max_cmds_per_round)} cmd_id in next_cmds.\n"
-        "- If evidence is sufficient, choose decision=STOP and explain stop_reason.\n\n"
-        "Context (redacted summaries only):\n"
-        f"state={json.dumps(state, ensure_ascii=False)}\n\n"
-        f"allowed_cmd_pool={json.dumps(allowed, ensure_ascii=False)}\n"
-        f"already_executed_cmd_ids={json.dumps(executed, ensure_ascii=False)}\n"
-        f"budget={json.dumps(budget, ensure_ascii=False)}\n\n"
+        "- priority 1 is the most urgent; next_cmds run concurrently in priority order and the round\n"
+        "  stops early once the confidence threshold is reached.\n"
+        "- If evidence is sufficient, choose decision=STOP and explain stop_reason.\n"
+        "- Context rounds below are cumulative: later rounds only list what changed.\n\n"
         "Plan schema:\n"
-        f"{json.dumps(plan_schema, ensure_ascii=False)}\n"
+        f"{json.dumps(plan_schema, ensure_ascii=False, sort_keys=True, separators=(',', ':'))}\n\n"
+    )
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _clip(text: Any, n: int) -> str:
+    s = str(text or "")
+    return s if len(s) <= n else s[: max(0, n - 1)] + "…"
+
+
+def _compact_signals(signals: Dict[str, Any], level: int) -> Dict[str, Any]:
+    if level <= 0:
+        return dict(signals)
+    out: Dict[str, Any] = {}
+    for k, v in signals.items():
+        if isinstance(v, dict):
+            # Aggregates (thread dumps, time series) shrink to their summary line.
+            if v.get("summary"):
+                out[k] = _clip(v["summary"], 200 if level < 2 else 120)
+            continue
+        if isinstance(v, (list, tuple)):
+            continue
+        if level >= 2:
+            if k.startswith("ts_") and not k.endswith(("_p95", "_slope_per_min")):
+                continue
+            if isinstance(v, float):
+                v = round(v, 2)
+        out[k] = v
+    return out
+
+
+def _compact_snapshots(snapshots: List[Dict[str, Any]], level: int) -> List[Any]:
+    if level <= 0:
+        return list(snapshots)
+    if level >= 3:
+        return [s.get("cmd_id") for s in snapshots]
+    width = 120 if level == 1 else 60
+    return [{"cmd_id": s.get("cmd_id"), "signal": _clip(s.get("signal"), width)} for s in snapshots]
+
+
+def _compact(section: Dict[str, Any], level: int, *, collapse: bool) -> Dict[str, Any]:
+    """Deterministic compaction of one context section.
+
+    0 full; 1 aggregates -> summaries, snapshot text <= 120 chars; 2 numeric
+    rounding, only p95/slope time-series stats, snapshot text <= 60 chars;
+    3 snapshots as cmd_ids, intermediate rounds collapsed to one line.
+    Level 4 (hard truncation) is applied to the rendered text.
+    """
+    if collapse and level >= 3:
+        hyp = (section.get("hypothesis") or [{}])[0] if section.get("hypothesis") else {}
+        return {
+            "round": section.get("round"),
+            "summary": (
+                f"primary={section.get('primary_category')} "
+                f"hypothesis={hyp.get('category')}:{hyp.get('confidence')} "
+                f"new_signals={len(section.get('signals') or {})} "
+                f"executed={','.join(str(s.get('cmd_id')) for s in section.get('snapshots') or [])}"
+            ),
+        }
+    out = dict(section)
+    if "signals" in out:
+        out["signals"] = _compact_signals(out["signals"], level)
+    if "snapshots" in out:
+        out["snapshots"] = _compact_snapshots(out["snapshots"], level)
+    if level >= 1 and isinstance(out.get("hypothesis"), list):
+        out["hypothesis"] = [
+            {k: (_clip(v, 160) if k == "why" else v) for k, v in h.items() if k not in ("evidence_refs", "counter_evidence")}
+            for h in out["hypothesis"]
+            if isinstance(h, dict)
+        ]
+    return out
+
+
+class PlanPromptBuilder:
+    """Per-session planner prompt state: stable prefix + append-only context rounds."""
+
+    def __init__(
+        self,
+        *,
+        plan_schema: Dict[str, Any],
+        max_cmds_per_round: int,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+    ) -> None:
+        self.prefix = build_plan_prefix(plan_schema, max_cmds_per_round)
+        self.token_budget = max(1, int(token_budget))
+        self._sections: List[Dict[str, Any]] = []
+        self._sent_signals: Dict[str, Any] = {}
+        self._sent_snapshots = 0
+        self._last_context = ""
+
+    def build(self, *, state: Dict[str, Any], allowed_cmd_pool: Sequence[str]) -> PlanPrompt:
+        allowed = list(dict.fromkeys([c for c in (allowed_cmd_pool or []) if str(c).strip()]))
+        budget = state.get("budget") if isinstance(state.get("budget"), dict) else {}
+        signals = state.get("signals") if isinstance(state.get("signals"), dict) else {}
+        snapshots = [s for s in (state.get("snapshots") or []) if isinstance(s, dict)]
+        executed = state.get("executed_cmd_ids") if isinstance(state.get("executed_cmd_ids"), list) else []
+
+        if not self._sections:
+            section: Dict[str, Any] = {
+                "round": budget.get("round", 1),
+                "meta": state.get("meta", {}),
+                "primary_category": state.get("primary_category"),
+                "hypothesis": state.get("hypothesis", []),
+                "signals": dict(signals),
+                "snapshots": snapshots,
+                "already_executed_cmd_ids": list(executed),
+                "budget": budget,
+            }
+        else:
+            changed = {k: v for k, v in signals.items() if k not in self._sent_signals or self._sent_signals[k] != v}
+            section = {
+                "round": budget.get("round", len(self._sections) + 1),
+                "primary_category": state.get("primary_category"),
+                "hypothesis": state.get("hypothesis", []),
+                "signals": changed,
+                "snapshots": snapshots[self._sent_snapshots :],
+            }
+        section["allowed_cmd_pool"] = allowed
+        self._sections.append(section)
+        self._sent_signals = dict(signals)
+        self._sent_snapshots = len(snapshots)
+
+        context, level = self._render()
+        prev = self._last_context
+        delta = context[len(prev) :] if context.startswith(prev) else context
+        self._last_context = context
+        return PlanPrompt(prefix=self.prefix, context=context, level=level, delta_tokens=estimate_tokens(delta))
+
+    def _render_level(self, level: int) -> str:
+        last = len(self._sections) - 1
+        parts = []
+        for i, section in enumerate(self._sections):
+            compacted = _compact(section, level, collapse=0 < i < last)
+            label = "Context (redacted summaries only)" if i == 0 else "Changes since previous round"
+            parts.append(f"{label}, round {section.get('round')}:\n{_dumps(compacted)}\n\n")
+        return "".join(parts)
+
+    def _render(self) -> "tuple[str, int]":
+        budget_left = self.token_budget - estimate_tokens(self.prefix)
+        text = ""
+        for level in range(MAX_LEVEL):
+            text = self._render_level(level)
+            if estimate_tokens(text) <= budget_left:
+                return text, level
+        return _truncate(text, budget_left), MAX_LEVEL
+
+
+def _cut(text: str, token_budget: int, *, keep_tail: bool) -> str:
+    """Drop characters until `text` fits, marking the cut (~4 chars/token to start)."""
+    keep = max(0, token_budget * 4)
+    while True:
+        marker = f"\n…[{max(0, len(text) - keep)} chars of context truncated]\n\n"
+        out = marker + text[len(text) - keep :] if keep_tail else text[:keep] + marker
+        if keep == 0 or estimate_tokens(out) <= token_budget:
+            return out
+        keep = max(0, keep - 32)
+
+
+def _truncate(text: str, token_budget: int) -> str:
+    """Level 4: keep the newest round whole and cut older context from the end.
+
+    If the newest round alone does not fit, only its tail (which ends with the
+    allowed_cmd_pool) is kept.
+    """
+    head, sep, tail = text.rpartition("Changes since previous round")
+    last = sep + tail if sep else text
+    older = head if sep else ""
+    if estimate_tokens(last) > token_budget:
+        return _cut(last, token_budget, keep_tail=True)
+    room = token_budget - estimate_tokens(last)
+    if not older or estimate_tokens(older) <= room:
+        return older + last
+    return _cut(older, room, keep_tail=False) + last
+
+
+def build_plan_prompt(
+    *,
+    state: Dict[str, Any],
+    allowed_cmd_pool: Sequence[str],
+    plan_schema: Dict[str, Any],
+    max_cmds_per_round: int,
+    token_budget: Optional[int] = None,
+) -> str:
+    """One-shot prompt (a fresh builder): prefix + full context."""
+    builder = PlanPromptBuilder(
+        plan_schema=plan_schema,
+        max_cmds_per_round=max_cmds_per_round,
+        token_budget=token_budget or DEFAULT_TOKEN_BUDGET,
     )
+    return builder.build(state=state, allowed_cmd_pool=allowed_cmd_pool).text
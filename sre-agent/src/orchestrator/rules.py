@@ -1,12 +1,30 @@
 """Rule engine for deterministic classification.
 
-This is a minimal, config-driven rule evaluator.
+Rules are config-driven and compiled once (`shared_rule_engine` caches one
+engine per rules config for the whole process). A rule is a condition tree:
+
+- a leaf: `{signal, op, threshold}` (op: > >= < <= == !=)
+- `all: [...]` / `any: [...]`: AND / OR of nested conditions
+
+`derived:` defines signals computed from others (`ratio`, `diff`, `sum`, or
+`rate` = change per second between two session updates, times `scale`).
+Rules may reference derived signals like any other signal.
+
+The engine indexes rules by the (raw) signals they read. `RuleSession`
+keeps the last signal values and per-rule results, so `update()` only
+re-evaluates rules whose inputs changed since the previous call; the
+orchestrator and the multi-round loop update one session as evidence comes
+in. Matched rules are aggregated per category (`aggregate: max`, the
+default, or `noisy_or`).
 """
 
 from __future__ import annotations
 
+import json
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 
 def _to_float(v: Any) -> Optional[float]:
@@ -18,31 +36,151 @@ def _to_float(v: Any) -> Optional[float]:
         return None
 
 
+_OPS = {
+    ">": lambda v, t: v > t,
+    ">=": lambda v, t: v >= t,
+    "<": lambda v, t: v < t,
+    "<=": lambda v, t: v <= t,
+    "==": lambda v, t: v == t,
+    "!=": lambda v, t: v != t,
+}
+
+
 @dataclass(frozen=True)
-class Rule:
-    category: str
+class Cond:
     signal: str
     op: str
     threshold: float
-    confidence: float
-    why: str
 
-    def match(self, signals: Dict[str, Any]) -> bool:
+    def signals(self) -> FrozenSet[str]:
+        return frozenset((self.signal,))
+
+    def match(self, signals: Mapping[str, Any]) -> bool:
         v = _to_float(signals.get(self.signal))
         if v is None:
             return False
-        if self.op == ">":
-            return v > self.threshold
-        if self.op == ">=":
-            return v >= self.threshold
-        if self.op == "<":
-            return v < self.threshold
-        if self.op == "<=":
-            return v <= self.threshold
-        return False
+        fn = _OPS.get(self.op)
+        return bool(fn and fn(v, self.threshold))
+
+
+@dataclass(frozen=True)
+class AllOf:
+    parts: Tuple["Expr", ...]
+
+    def signals(self) -> FrozenSet[str]:
+        return frozenset().union(*(p.signals() for p in self.parts))
+
+    def match(self, signals: Mapping[str, Any]) -> bool:
+        return all(p.match(signals) for p in self.parts)
+
+
+@dataclass(frozen=True)
+class AnyOf:
+    parts: Tuple["Expr", ...]
+
+    def signals(self) -> FrozenSet[str]:
+        return frozenset().union(*(p.signals() for p in self.parts))
+
+    def match(self, signals: Mapping[str, Any]) -> bool:
+        return any(p.match(signals) for p in self.parts)
+
+
+Expr = Union[Cond, AllOf, AnyOf]
+
+
+def compile_expr(item: Mapping[str, Any]) -> Expr:
+    """Compile one condition tree; raises ValueError/TypeError on bad input."""
+    if "all" in item or "any" in item:
+        key = "all" if "all" in item else "any"
+        parts = item.get(key)
+        if not isinstance(parts, list) or not parts:
+            raise ValueError(f"{key} needs a non-empty list")
+        compiled = tuple(compile_expr(p) for p in parts)
+        return AllOf(compiled) if key == "all" else AnyOf(compiled)
+    op = str(item.get("op"))
+    if op not in _OPS:
+        raise ValueError(f"unknown op: {op}")
+    return Cond(signal=str(item.get("signal")), op=op, threshold=float(item.get("threshold")))
+
+
+@dataclass(frozen=True)
+class Rule:
+    category: str
+    expr: Expr
+    confidence: float
+    why: str
+
+    @classmethod
+    def simple(cls, category: str, signal: str, op: str, threshold: float, confidence: float, why: str) -> "Rule":
+        return cls(category, Cond(signal, op, threshold), confidence, why)
+
+    def match(self, signals: Mapping[str, Any]) -> bool:
+        return self.expr.match(signals)
+
+    def explain(self, signals: Mapping[str, Any]) -> str:
+        if isinstance(self.expr, Cond):
+            sig = self.expr.signal
+            return f"{self.why} (signal={sig} value={signals.get(sig)})"
+        refs = ", ".join(f"{s}={signals.get(s)}" for s in sorted(self.expr.signals()))
+        return f"{self.why} (signals: {refs})"
+
+
+@dataclass(frozen=True)
+class Derived:
+    name: str
+    op: str  # ratio|diff|sum|rate
+    args: Tuple[str, ...]
+    scale: float = 1.0
+
+    def compute(self, values: Mapping[str, Any], prev: Optional[Tuple[float, float]], now: float) -> Optional[float]:
+        nums = [_to_float(values.get(a)) for a in self.args]
+        if any(n is None for n in nums):
+            return None
+        if self.op == "ratio":
+            return nums[0] / nums[1] * self.scale if nums[1] else None
+        if self.op == "diff":
+            return (nums[0] - nums[1]) * self.scale
+        if self.op == "sum":
+            return sum(nums) * self.scale
+        if self.op == "rate":
+            if prev is None or now <= prev[0]:
+                return None
+            return (nums[0] - prev[1]) / (now - prev[0]) * self.scale
+        return None
+
+
+_DERIVED_ARITY = {"ratio": 2, "diff": 2, "sum": None, "rate": 1}
+
+
+def _compile_derived(item: Mapping[str, Any]) -> Derived:
+    op = str(item.get("op"))
+    if op not in _DERIVED_ARITY:
+        raise ValueError(f"unknown derived op: {op}")
+    args = tuple(str(a) for a in (item.get("args") or []))
+    arity = _DERIVED_ARITY[op]
+    if not args or (arity is not None and len(args) != arity):
+        raise ValueError(f"derived {op} takes {arity or 'one or more'} args")
+    return Derived(name=str(item.get("name")), op=op, args=args, scale=float(item.get("scale", 1.0)))
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    Rule.simple("IO_WAIT", "iowait_pct", ">=", 20.0, 0.8, "high iowait"),
+    Rule.simple("MEMORY", "mem_available_mb", "<=", 200.0, 0.7, "low available memory"),
+    Rule.simple("CPU", "loadavg_1m", ">=", 5.0, 0.6, "high load average"),
+    Rule.simple("LOCK_CONTEND", "deadlock_count", ">=", 1.0, 0.9, "java deadlock detected"),
+    Rule.simple("LOCK_CONTEND", "lock_blocked_max", ">=", 10.0, 0.75, "many threads blocked on one lock"),
+    Rule.simple("IO_WAIT", "ts_iowait_pct_p95", ">=", 20.0, 0.85, "sustained iowait (sampled p95)"),
+    Rule.simple("IO_WAIT", "ts_disk_util_max_pct_p95", ">=", 90.0, 0.7, "disk saturated (sampled p95)"),
+    Rule.simple("CPU", "ts_cpu_busy_pct_p95", ">=", 90.0, 0.7, "sustained cpu busy (sampled p95)"),
+    Rule.simple("MEMORY", "ts_mem_available_pct_slope_per_min", "<=", -5.0, 0.6, "available memory falling"),
+)
+
+AGGREGATES = ("max", "noisy_or")
 
 
 class RuleEngine:
+    """Compiled, immutable rule set; share it freely, keep state in sessions."""
+
     def __init__(self, config: Dict[str, Any]) -> None:
         self.rules: List[Rule] = []
         for item in (config.get("rules") or []):
@@ -50,9 +188,7 @@ class RuleEngine:
                 self.rules.append(
                     Rule(
                         category=str(item.get("category")),
-                        signal=str(item.get("signal")),
-                        op=str(item.get("op")),
-                        threshold=float(item.get("threshold")),
+                        expr=compile_expr(item),
                         confidence=float(item.get("confidence", 0.5)),
                         why=str(item.get("why", "rule matched")),
                     )
@@ -61,29 +197,81 @@ class RuleEngine:
                 continue
 
         if not self.rules:
-            self.rules = [
-                Rule("IO_WAIT", "iowait_pct", ">=", 20.0, 0.8, "high iowait"),
-                Rule("MEMORY", "mem_available_mb", "<=", 200.0, 0.7, "low available memory"),
-                Rule("CPU", "loadavg_1m", ">=", 5.0, 0.6, "high load average"),
-            ]
+            self.rules = list(DEFAULT_RULES)
+
+        self.derived: List[Derived] = []
+        for item in (config.get("derived") or []):
+            try:
+                self.derived.append(_compile_derived(item))
+            except Exception:
+                continue
+
+        aggregate = str(config.get("aggregate") or "max").lower()
+        self.aggregate = aggregate if aggregate in AGGREGATES else "max"
+
+        self.derived_names: FrozenSet[str] = frozenset(d.name for d in self.derived)
+        # Index: raw signal -> derived signals / rules that read it (directly or via a derived signal).
+        self._derived_by_input: Dict[str, List[Derived]] = {}
+        for d in self.derived:
+            for a in d.args:
+                self._derived_by_input.setdefault(a, []).append(d)
+        derived_inputs = {d.name: set(d.args) for d in self.derived}
+        index: Dict[str, Set[int]] = {}
+        for i, rule in enumerate(self.rules):
+            for sig in rule.expr.signals():
+                index.setdefault(sig, set()).add(i)
+                for raw in derived_inputs.get(sig, ()):
+                    index.setdefault(raw, set()).add(i)
+        self._by_signal: Dict[str, Tuple[int, ...]] = {k: tuple(sorted(v)) for k, v in index.items()}
+
+    def rules_for(self, signals: Sequence[str]) -> List[int]:
+        """Indexes of rules that read any of `signals`, in rule order."""
+        hit: Set[int] = set()
+        for s in signals:
+            hit.update(self._by_signal.get(s, ()))
+        return sorted(hit)
+
+    def session(self) -> "RuleSession":
+        return RuleSession(self)
 
     def classify(self, signals: Dict[str, Any]) -> List[Dict[str, Any]]:
-        matched: List[Tuple[str, float, str, str]] = []
-        for r in self.rules:
-            if r.match(signals):
-                matched.append((r.category, r.confidence, r.why, r.signal))
+        """Stateless one-shot classification (a fresh session)."""
+        return self.session().update(signals)
+
+    def hypotheses(self, matched: Sequence[int], values: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        # Per category: aggregate score, and the strongest rule explains it.
+        # Ties keep rule order (of each category's strongest rule).
+        by_cat: Dict[str, List[Tuple[int, Rule]]] = {}
+        for i in sorted(matched):
+            rule = self.rules[i]
+            by_cat.setdefault(rule.category, []).append((i, rule))
+        ranked: List[Tuple[float, int, str, List[Rule]]] = []
+        for cat, items in by_cat.items():
+            items.sort(key=lambda x: (-x[1].confidence, x[0]))
+            order = items[0][0]
+            rules = [r for _, r in items]
+            if self.aggregate == "noisy_or":
+                miss = 1.0
+                for r in rules:
+                    miss *= 1.0 - max(0.0, min(1.0, r.confidence))
+                score = 1.0 - miss
+            else:
+                score = rules[0].confidence
+            ranked.append((score, order, cat, rules))
+        ranked.sort(key=lambda x: (-x[0], x[1]))
 
-        # sort by confidence desc
-        matched.sort(key=lambda x: x[1], reverse=True)
         out: List[Dict[str, Any]] = []
-        for (cat, conf, why, sig) in matched[:3]:
+        for score, _, cat, rules in ranked[:3]:
+            why = rules[0].explain(values)
+            if len(rules) > 1:
+                why += f" +{len(rules) - 1} more rule(s)"
             out.append(
                 {
                     "category": cat,
-                    "confidence": conf,
-                    "why": f"{why} (signal={sig} value={signals.get(sig)})",
+                    "confidence": round(score, 4),
+                    "why": why,
                     "evidence_refs": [],
-                    "counter_evidence": self._counter_evidence(cat, signals),
+                    "counter_evidence": self._counter_evidence(cat, values),
                 }
             )
 
@@ -99,7 +287,7 @@ class RuleEngine:
             )
         return out
 
-    def _counter_evidence(self, category: str, signals: Dict[str, Any]) -> List[str]:
+    def _counter_evidence(self, category: str, signals: Mapping[str, Any]) -> List[str]:
         ce: List[str] = []
         cat = (category or "").upper()
         if cat == "IO_WAIT":
@@ -113,8 +301,69 @@ class RuleEngine:
             iw = _to_float(signals.get("iowait_pct"))
             if iw is not None and iw >= 20.0:
                 ce.append(f"iowait_pct high ({iw}) suggests IO_WAIT")
+        if cat == "LOCK_CONTEND":
+            v = _to_float(signals.get("threads_blocked"))
+            if v is not None and v < 3.0 and not _to_float(signals.get("deadlock_count")):
+                ce.append(f"threads_blocked low ({v})")
         if cat == "MEMORY":
             v = _to_float(signals.get("mem_available_mb"))
             if v is not None and v > 500.0:
                 ce.append(f"mem_available_mb high ({v})")
         return ce
+
+
+class RuleSession:
+    """Incremental evaluation state for one diagnosis session."""
+
+    def __init__(self, engine: RuleEngine) -> None:
+        self.engine = engine
+        self.values: Dict[str, Any] = {}
+        self._matched: Set[int] = set()
+        self._rate_prev: Dict[str, Tuple[float, float]] = {}
+        self.evaluations = 0
+
+    def update(self, signals: Mapping[str, Any], *, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Fold the current signal view in and return hypotheses.
+
+        Only rules reading a signal that was added, changed or removed since
+        the last update are re-evaluated.
+        """
+        now = time.time() if now is None else now
+        values = self.values
+        changed = [k for k, v in signals.items() if k not in values or values[k] != v]
+        changed += [k for k in values if k not in signals and k not in self.engine.derived_names]
+        for k in changed:
+            if k in signals:
+                values[k] = signals[k]
+            else:
+                values.pop(k, None)
+
+        engine = self.engine
+        for d in {d for k in changed for d in engine._derived_by_input.get(k, ())}:
+            v = d.compute(values, self._rate_prev.get(d.name), now)
+            if d.op == "rate":
+                x = _to_float(values.get(d.args[0]))
+                if x is not None:
+                    self._rate_prev[d.name] = (now, x)
+            if v is None:
+                values.pop(d.name, None)
+            else:
+                values[d.name] = round(v, 6)
+
+        for i in engine.rules_for(changed):
+            self.evaluations += 1
+            if engine.rules[i].match(values):
+                self._matched.add(i)
+            else:
+                self._matched.discard(i)
+        return engine.hypotheses(sorted(self._matched), values)
+
+
+@lru_cache(maxsize=16)
+def _engine_for(config_json: str) -> RuleEngine:
+    return RuleEngine(json.loads(config_json))
+
+
+def shared_rule_engine(config: Optional[Dict[str, Any]]) -> RuleEngine:
+    """Process-wide engine for a rules config (compiled once per distinct config)."""
+    return _engine_for(json.dumps(config or {}, sort_keys=True, default=str))
@@ -0,0 +1,295 @@
+"""Speculative prefetch for multi-round diagnose.
+
+While the LLM planner is thinking (seconds), the executor is idle. All
+registry commands are READ_ONLY, so the likely next commands - the top-k of
+the remaining `routes` pool for the primary category, ranked by how often
+the planner picked them in past sessions - are started in the background.
+
+Results sit in a `SpeculativeBuffer` and become evidence only if the plan
+selects them; the rest are cancelled (or, if already finished, audited as
+discarded and dropped). A run that timed out under `timeout_sec` while the
+plan asked for a longer timeout is not used; the caller runs it again.
+Speculative runs take the same per-host slots as planned ones, are skipped
+on hosts whose signals show they are already overloaded, and are capped per
+round and per session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from storage.redaction import hash_text, redact
+
+
+LOG = logging.getLogger("sre_agent.orchestrator.speculation")
+
+_STATS_LOCK = threading.Lock()
+
+
+def _as_float(v: Any, default: float) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return default
+
+
+@dataclass(frozen=True)
+class SpeculationPolicy:
+    enabled: bool = False
+    top_k: int = 2
+    max_total: int = 6
+    timeout_sec: int = 30
+    max_load_per_cpu: float = 4.0
+    max_iowait_pct: float = 50.0
+    stats_path: str = ""
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "SpeculationPolicy":
+        cfg = config.get("speculation") or {}
+        if not isinstance(cfg, Mapping):
+            return cls()
+        stats_path = str(cfg.get("stats_path") or "")
+        if not stats_path:
+            base_dir = (config.get("evidence") or {}).get("base_dir") or "./report"
+            stats_path = os.path.join(str(base_dir), "planner_selection_stats.json")
+        return cls(
+            enabled=str(cfg.get("enabled", False)).lower() not in ("false", "0", "no", ""),
+            top_k=max(0, int(cfg.get("top_k", 2))),
+            max_total=max(0, int(cfg.get("max_total", 6))),
+            timeout_sec=max(1, int(cfg.get("timeout_sec", 30))),
+            max_load_per_cpu=_as_float(cfg.get("max_load_per_cpu"), 4.0),
+            max_iowait_pct=_as_float(cfg.get("max_iowait_pct"), 50.0),
+            stats_path=stats_path,
+        )
+
+    def skip_reason(self, signals: Mapping[str, Any]) -> str:
+        """Why speculation must not add load to this host ("" = allowed)."""
+        if not self.enabled or self.top_k <= 0:
+            return "disabled"
+        load = _as_float(signals.get("loadavg_1m"), 0.0)
+        cpus = _as_float(signals.get("cpu_count"), 0.0)
+        if cpus > 0 and load / cpus > self.max_load_per_cpu:
+            return "host_overloaded"
+        if _as_float(signals.get("iowait_pct"), 0.0) > self.max_iowait_pct:
+            return "host_io_saturated"
+        return ""
+
+
+class SelectionStats:
+    """Per-category counts of cmd_ids the planner selected, persisted as JSON."""
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self._new: Dict[str, Dict[str, int]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self.counts = {
+                        str(cat): {str(k): int(v) for k, v in (m or {}).items()}
+                        for cat, m in data.items()
+                        if isinstance(m, dict)
+                    }
+            except (OSError, ValueError) as exc:
+                LOG.warning("selection stats unreadable path=%s err=%s", path, exc)
+
+    def rank(self, category: str, pool: Sequence[str]) -> List[str]:
+        """`pool` by selection count (desc); ties keep routes.yaml order."""
+        counts = self.counts.get(category) or {}
+        order = {c: i for i, c in enumerate(pool)}
+        return sorted(pool, key=lambda c: (-counts.get(c, 0), order[c]))
+
+    def record(self, category: str, cmd_ids: Sequence[str]) -> None:
+        for cmd_id in cmd_ids:
+            for target in (self.counts, self._new):
+                cat = target.setdefault(category, {})
+                cat[cmd_id] = cat.get(cmd_id, 0) + 1
+
+    def save(self) -> None:
+        """Merge this session's selections into the file (other sessions may have written meanwhile)."""
+        if not self.path or not self._new:
+            return
+        with _STATS_LOCK:
+            merged = SelectionStats(self.path).counts
+            for cat, m in self._new.items():
+                dst = merged.setdefault(cat, {})
+                for k, v in m.items():
+                    dst[k] = dst.get(k, 0) + v
+            parent = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(parent, exist_ok=True)
+            tmp = f"{self.path}.tmp.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(merged, f, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp, self.path)
+        self._new = {}
+
+
+@dataclass
+class _Pending:
+    command: str
+    task: "asyncio.Task[Any]"
+    launched: float
+
+
+def _audit_discarded(ctx: Any, audit_store: Any, cmd_id: str, command: str, run: Any) -> None:
+    redacted, _rules, _count = redact(run.output)
+    audit_store.write(
+        {
+            "session_id": ctx.session_id,
+            "id": f"{cmd_id}-{int(run.start_ts)}-spec",
+            "cmd_id": cmd_id,
+            "cmd": command,
+            "started_at": run.started_at,
+            "elapsed_ms": run.elapsed_ms,
+            "timeout_sec": run.timeout_sec,
+            "output_hash": hash_text(redacted),
+            "speculative": "discarded",
+        }
+    )
+
+
+@dataclass
+class SpeculativeBuffer:
+    """Background runs for one planning round, keyed by cmd_id."""
+
+    pending: Dict[str, _Pending] = field(default_factory=dict)
+    hits: List[str] = field(default_factory=list)
+    # Taken but unusable (timed out under a shorter timeout than planned).
+    rerun: Dict[str, Tuple[str, Any]] = field(default_factory=dict)
+    saved_ms: int = 0
+
+    def __contains__(self, cmd_id: str) -> bool:
+        return cmd_id in self.pending
+
+    async def take(self, cmd_id: str, timeout_sec: int = 0) -> Optional[Tuple[str, Any]]:
+        """(command, CommandRun) for a selected cmd_id; waits if still running.
+
+        None if the run timed out before the plan's `timeout_sec` would have:
+        the caller must run the command itself.
+        """
+        p = self.pending.pop(cmd_id)
+        waited_from = time.monotonic()
+        run = await p.task
+        if run.timed_out and int(timeout_sec) > int(run.timeout_sec):
+            self.rerun[cmd_id] = (p.command, run)
+            return None
+        # Part of the run that overlapped the planner call instead of following it.
+        overlap_ms = int((waited_from - p.launched) * 1000)
+        self.saved_ms += max(0, min(int(run.elapsed_ms), overlap_ms))
+        self.hits.append(cmd_id)
+        return p.command, run
+
+    async def discard(self, *, ctx: Any, audit_store: Any) -> List[str]:
+        """Cancel or drop unselected runs. Finished ones are still audited: they did run on the host."""
+        dropped = list(self.pending)
+        for cmd_id, p in self.pending.items():
+            if not p.task.done():
+                p.task.cancel()
+        for cmd_id, p in self.pending.items():
+            try:
+                run = await p.task
+            except (asyncio.CancelledError, Exception):
+                continue
+            if audit_store is not None:
+                _audit_discarded(ctx, audit_store, cmd_id, p.command, run)
+        if audit_store is not None:
+            for cmd_id, (command, run) in self.rerun.items():
+                _audit_discarded(ctx, audit_store, cmd_id, command, run)
+        self.pending.clear()
+        return dropped
+
+
+class Speculator:
+    """Per-session speculation state: policy, ranking, load cap and counters."""
+
+    def __init__(self, policy: SpeculationPolicy, stats: Optional[SelectionStats] = None) -> None:
+        self.policy = policy
+        self.stats = stats if stats is not None else SelectionStats(policy.stats_path if policy.enabled else "")
+        self.launched = 0
+        self.hits = 0
+        self.saved_ms = 0
+
+    def launch(
+        self,
+        *,
+        orch: Any,
+        ctx: Any,
+        category: str,
+        pool: Sequence[str],
+        signals: Mapping[str, Any],
+        platform: str,
+        commands_cfg: Dict[str, Any],
+        allowed_risks: List[str],
+        deny_keywords: List[str],
+        bindings: Any = None,
+        slots: Optional[asyncio.Semaphore] = None,
+    ) -> Tuple[SpeculativeBuffer, Dict[str, Any]]:
+        """Start background runs for the top-ranked commands; returns (buffer, round trace).
+
+        Each run holds one of `slots` (the session's per-host semaphore) while
+        it executes, so speculation never exceeds `per_host_concurrency`.
+        """
+        buf = SpeculativeBuffer()
+        reason = self.policy.skip_reason(signals)
+        deadline = getattr(ctx, "deadline", None)
+        if not reason and deadline is not None and deadline.expired():
+            reason = "deadline_exceeded"
+        room = min(self.policy.top_k, self.policy.max_total - self.launched)
+        if not reason and room <= 0:
+            reason = "session_cap_reached"
+        if reason:
+            return buf, {"skipped": reason}
+        for cmd_id in self.stats.rank(category, pool):
+            if len(buf.pending) >= room:
+                break
+            command, err = orch.prepare_cmd(
+                ctx=ctx,
+                cmd_id=cmd_id,
+                platform=platform,
+                commands_cfg=commands_cfg,
+                allowed_risks=allowed_risks,
+                deny_keywords=deny_keywords,
+                bindings=bindings,
+            )
+            if err:
+                continue
+            task = asyncio.create_task(
+                self._run(orch, ctx, command, orch.command_limit(commands_cfg, cmd_id), slots)
+            )
+            buf.pending[cmd_id] = _Pending(command=command, task=task, launched=time.monotonic())
+        self.launched += len(buf.pending)
+        LOG.info("speculative prefetch category=%s cmds=%s", category, list(buf.pending))
+        return buf, {"launched": list(buf.pending), "timeout_sec": self.policy.timeout_sec}
+
+    async def _run(self, orch: Any, ctx: Any, command: str, limit: Any, slots: Optional[asyncio.Semaphore]) -> Any:
+        if slots is None:
+            return await orch.run_cmd(ctx, command, self.policy.timeout_sec, limit)
+        async with slots:
+            return await orch.run_cmd(ctx, command, self.policy.timeout_sec, limit)
+
+    def settle(self, buf: SpeculativeBuffer, trace: Dict[str, Any], dropped: Sequence[str]) -> Dict[str, Any]:
+        self.hits += len(buf.hits)
+        self.saved_ms += buf.saved_ms
+        if "launched" in trace:
+            trace.update(
+                {"hits": list(buf.hits), "rerun": list(buf.rerun), "discarded": list(dropped), "saved_ms": buf.saved_ms}
+            )
+        return trace
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.policy.enabled,
+            "launched": self.launched,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.launched, 3) if self.launched else 0.0,
+            "saved_ms": self.saved_ms,
+        }
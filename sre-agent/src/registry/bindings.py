@@ -0,0 +1,242 @@
+"""Command dependencies and output bindings (commands.yaml `bindings:`).
+
+A binding names a value that one command's output provides to another
+command's template, e.g. "pid := top java pid from jps/ps_cpu":
+
+    bindings:
+      pid:
+        from: [jps, ps_cpu]
+        select: java_pid
+
+A command depends on a binding's `from` commands when its template uses the
+placeholder (`{pid}`) or lists the name under `needs:`; `depends_on:` adds
+plain ordering edges. `plan_dag` turns a command list into that DAG (adding
+source commands that have not run yet) and `orchestrator.dag.run_dag`
+executes it.
+
+`select` is a named selector (SELECTORS) or a table spec over the sources'
+parsed output:
+
+    select: {table: procs, column: PID, where: {CMD: '(?i)java'}, order_by: '%CPU'}
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from policy.validators import validate_pid
+
+
+# Bound values are substituted into shell commands: keep them to plain tokens.
+_SAFE_VALUE = re.compile(r"^[A-Za-z0-9_.:@-]{1,128}$")
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+@dataclass(frozen=True)
+class Binding:
+    name: str
+    sources: Tuple[str, ...]
+    select: Any
+
+
+def load_bindings(config: Mapping[str, Any]) -> Dict[str, Binding]:
+    out: Dict[str, Binding] = {}
+    for name, spec in (config.get("bindings") or {}).items():
+        if not isinstance(spec, Mapping):
+            raise ValueError(f"binding {name}: expected a mapping")
+        sources = spec.get("from") or []
+        if isinstance(sources, str):
+            sources = [sources]
+        select = spec.get("select")
+        if isinstance(select, str) and select not in SELECTORS:
+            raise ValueError(f"binding {name}: unknown selector {select!r}")
+        if not isinstance(select, (str, Mapping)):
+            raise ValueError(f"binding {name}: select must be a selector name or table spec")
+        out[str(name)] = Binding(name=str(name), sources=tuple(str(s) for s in sources), select=select)
+    return out
+
+
+def _rows(parsed: Mapping[str, Any], table: str) -> List[Dict[str, Any]]:
+    t = parsed.get(table)
+    if not isinstance(t, Mapping):
+        return []
+    cols = t.get("columns") or []
+    data = t.get("data") or {}
+    n = int(t.get("rows") or 0)
+    return [{c: (data.get(c) or [None] * n)[i] for c in cols} for i in range(n)]
+
+
+def _num(v: Any) -> Optional[float]:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _java_pid(parsed: Mapping[str, Mapping[str, Any]], service: str) -> Optional[str]:
+    """Busiest JVM: jps entries (minus jps itself) ordered by ps_cpu %CPU; a
+    process whose main class / command line mentions the service wins."""
+    cpu: Dict[str, float] = {}
+    names: Dict[str, str] = {}
+    for row in _rows(parsed.get("ps_cpu") or {}, "procs"):
+        pid = str(row.get("PID"))
+        if "java" in str(row.get("CMD") or ""):
+            cpu[pid] = _num(row.get("%CPU")) or 0.0
+            names[pid] = str(row.get("CMD") or "")
+    jvms = [
+        (str(r.get("pid")), str(r.get("main") or ""))
+        for r in _rows(parsed.get("jps") or {}, "jvms")
+        if not str(r.get("main") or "").lower().endswith("jps")
+    ]
+    if jvms:
+        candidates = [(pid, main + " " + names.get(pid, "")) for pid, main in jvms]
+    else:
+        candidates = list(names.items())
+    if not candidates:
+        return None
+    svc = (service or "").lower()
+    order = {pid: i for i, (pid, _) in enumerate(candidates)}
+    best = min(
+        candidates,
+        key=lambda c: (not (svc and svc in c[1].lower()), -cpu.get(c[0], -1.0), order[c[0]]),
+    )
+    return best[0]
+
+
+def _table_select(spec: Mapping[str, Any], parsed: Mapping[str, Mapping[str, Any]], sources: Sequence[str]) -> Optional[str]:
+    where = {str(k): re.compile(str(v)) for k, v in (spec.get("where") or {}).items()}
+    order_by = spec.get("order_by")
+    for cmd_id in sources:
+        rows = [
+            r
+            for r in _rows(parsed.get(cmd_id) or {}, str(spec.get("table") or ""))
+            if all(p.search(str(r.get(col) or "")) for col, p in where.items())
+        ]
+        if order_by:
+            rows.sort(key=lambda r: -(_num(r.get(order_by)) or 0.0))
+        for r in rows:
+            value = r.get(spec.get("column"))
+            if value is not None and str(value) != "":
+                return str(value)
+    return None
+
+
+SELECTORS: Dict[str, Callable[[Mapping[str, Mapping[str, Any]], str], Optional[str]]] = {
+    "java_pid": _java_pid,
+}
+
+
+class BindingState:
+    """Per-session binding values, resolved from the parsed output of source commands."""
+
+    def __init__(
+        self, bindings: Mapping[str, Binding], *, service: str = "", preset: Optional[Mapping[str, Any]] = None
+    ) -> None:
+        self.bindings = dict(bindings)
+        self.service = service or ""
+        self.parsed: Dict[str, Dict[str, Any]] = {}
+        self._preset = {k: str(v) for k, v in (preset or {}).items() if v not in (None, "")}
+        self._cache: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], *, service: str = "", pid: Optional[str] = None) -> "BindingState":
+        # An explicit --pid always wins over discovery.
+        return cls(load_bindings(config), service=service, preset={"pid": pid})
+
+    def wants(self, cmd_id: str) -> bool:
+        return any(cmd_id in b.sources for b in self.bindings.values())
+
+    def observe(self, cmd_id: str, parsed: Dict[str, Any]) -> None:
+        """`parsed` is the parse of the raw (unredacted) output: selectors match
+        on command lines and paths that redaction rewrites to <PATH>. Only the
+        selected value leaves the process, and it must pass _SAFE_VALUE."""
+        if self.wants(cmd_id):
+            self.parsed[cmd_id] = parsed
+            self._cache.clear()
+
+    def get(self, name: str) -> Optional[str]:
+        if name in self._preset:
+            return self._preset[name]
+        if name not in self._cache:
+            self._cache[name] = self._resolve(name)
+        return self._cache[name]
+
+    def _resolve(self, name: str) -> Optional[str]:
+        b = self.bindings.get(name)
+        if b is None or not any(s in self.parsed for s in b.sources):
+            return None
+        if isinstance(b.select, str):
+            value = SELECTORS[b.select]({s: self.parsed[s] for s in b.sources if s in self.parsed}, self.service)
+        else:
+            value = _table_select(b.select, self.parsed, b.sources)
+        if value is None or not _SAFE_VALUE.match(value):
+            return None
+        if name == "pid" and not validate_pid(value):
+            return None
+        return value
+
+    def values(self) -> Dict[str, str]:
+        names = set(self.bindings) | set(self._preset)
+        return {n: v for n in sorted(names) if (v := self.get(n)) is not None}
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for name in sorted(set(self.bindings) | set(self._preset)):
+            if name in self._preset:
+                out[name] = {"value": self._preset[name], "from": "argument"}
+            else:
+                b = self.bindings[name]
+                out[name] = {"value": self.get(name), "from": [s for s in b.sources if s in self.parsed]}
+        return out
+
+
+def needed_bindings(meta: Mapping[str, Any], bindings: Mapping[str, Binding]) -> List[str]:
+    """Binding names a command consumes: template placeholders plus `needs:`."""
+    names = list(meta.get("needs") or []) + _PLACEHOLDER.findall(str(meta.get("cmd") or ""))
+    return [n for n in dict.fromkeys(str(x) for x in names) if n in bindings]
+
+
+def plan_dag(
+    cmd_ids: Sequence[str],
+    commands_cfg: Mapping[str, Any],
+    state: BindingState,
+    *,
+    done: Sequence[str] = (),
+) -> Dict[str, Set[str]]:
+    """{cmd_id: deps} for `cmd_ids` plus the source commands they still need.
+
+    Unresolved bindings pull in their `from` commands unless those already ran
+    (`done`). Insertion order is a topological order (dependencies first, then
+    `cmd_ids` order). Raises ValueError on a dependency cycle.
+    """
+    finished = set(done)
+    graph: Dict[str, Set[str]] = {}
+    visiting: List[str] = []
+
+    def add(cmd_id: str) -> None:
+        if cmd_id in graph or cmd_id in finished:
+            return
+        if cmd_id in visiting:
+            raise ValueError("command dependency cycle: " + " -> ".join(visiting + [cmd_id]))
+        meta = commands_cfg.get(cmd_id)
+        if not isinstance(meta, Mapping):
+            graph[cmd_id] = set()
+            return
+        deps = [str(d) for d in (meta.get("depends_on") or [])]
+        unknown = [d for d in deps if d not in commands_cfg]
+        if unknown:
+            raise ValueError(f"{cmd_id}: depends_on unknown cmd_id {unknown[0]}")
+        for name in needed_bindings(meta, state.bindings):
+            if state.get(name) is None:
+                deps.extend(s for s in state.bindings[name].sources if s in commands_cfg)
+        visiting.append(cmd_id)
+        for dep in deps:
+            add(dep)
+        visiting.pop()
+        graph[cmd_id] = {d for d in deps if d not in finished and d != cmd_id}
+
+    for cmd_id in cmd_ids:
+        add(str(cmd_id))
+    return graph
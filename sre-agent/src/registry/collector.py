@@ -0,0 +1,283 @@
+"""Self-contained /proc collector shipped inline to the target.
+
+The `proc_collector` script is one awk program (POSIX awk: mawk, busybox and
+gawk all run it) sent as the command text over the existing SSH channel;
+nothing is installed on the target. It reads /proc/stat, /proc/diskstats and
+every /proc/<pid>/{stat,io} twice, `interval` seconds apart, plus the gauges
+in /proc/loadavg, /proc/meminfo and /proc/pressure/* and /proc/<pid>/status
+for the top processes, and prints one compact JSON document:
+
+    {"collector": "proc_collector", "version": 1, "interval_sec": 1.0,
+     "cpu": {...}, "load": {...}, "mem": {...}, "vm": {...},
+     "disks": [...], "pressure": {...},
+     "procs": [...], "top_mem": {...}, "top_io": {...}}
+
+Besides awk the target forks only `cat`, `grep`, `getconf` and `sleep` (per-pid
+files are read through them so a vanished process or an unreadable io file
+cannot abort awk). Rates
+are computed remotely from the /proc/uptime delta, so the agent parses the
+document with the `json` parser kind and `registry.signals` maps it straight
+onto signals.
+
+Commands select a script with `script:` in commands.yaml instead of a `cmd`
+template (see registry.commands.render_meta); `interval_sec` and `top_pids`
+tune it.
+"""
+
+from __future__ import annotations
+
+import shlex
+from typing import Any, Callable, Dict, Mapping
+
+
+PROC_COLLECTOR_AWK = r"""
+function rd(f,   l) {
+  l = ""
+  if ((getline l < f) <= 0) l = ""
+  close(f)
+  return l
+}
+function jstr(s) {
+  gsub(/\\/, "\\\\", s)
+  gsub(/"/, "\\\"", s)
+  gsub(/[\001-\037]/, " ", s)
+  return "\"" s "\""
+}
+function f2(v) { return sprintf("%.2f", v) }
+function pct(part, whole) { return whole > 0 ? f2(100 * part / whole) : "null" }
+function snap(k,   f, l, a, n, i, c, t, p, s, j, x) {
+  up[k] = rd("/proc/uptime") + 0
+  f = "/proc/stat"
+  while ((getline l < f) > 0) {
+    n = split(l, a, " ")
+    if (a[1] ~ /^cpu[0-9]*$/) {
+      c = a[1]
+      t = 0
+      for (i = 2; i <= 9 && i <= n; i++) t += a[i]
+      tot[k, c] = t
+      idl[k, c] = a[5] + a[6]
+      iow[k, c] = a[6]
+      usr[k, c] = a[2] + a[3]
+      sys[k, c] = a[4] + a[7] + a[8]
+      stl[k, c] = a[9] + 0
+      if (k == 1 && c != "cpu") cpus[++ncpu] = c
+    } else if (a[1] == "ctxt") {
+      ctxt[k] = a[2]
+    } else if (a[1] == "procs_running") {
+      prun = a[2]
+    } else if (a[1] == "procs_blocked") {
+      pblk = a[2]
+    }
+  }
+  close(f)
+  f = "/proc/diskstats"
+  while ((getline l < f) > 0) {
+    n = split(l, a, " ")
+    if (n < 13 || a[3] ~ /^(loop|ram|zram|fd|sr)[0-9]/) continue
+    if (k == 1) devs[++ndev] = a[3]
+    dio[k, a[3]] = a[4] + a[8]
+    dms[k, a[3]] = a[7] + a[11]
+    drs[k, a[3]] = a[6]
+    dws[k, a[3]] = a[10]
+    dtk[k, a[3]] = a[13]
+  }
+  close(f)
+  # Per-pid files go through cat/grep: a process that exits (or an io file
+  # we may not read) must not abort awk itself.
+  f = "cat /proc/[0-9]*/stat 2>/dev/null"
+  while ((f | getline l) > 0) {
+    p = l + 0
+    j = length(l)
+    while (j > 0 && substr(l, j, 1) != ")") j--
+    split(substr(l, j + 2), s, " ")
+    pt[k, p] = s[12] + s[13]
+    if (k == 1) {
+      pids[++npid] = p
+    } else {
+      comm[p] = substr(l, index(l, "(") + 1, j - index(l, "(") - 1)
+      pst[p] = s[1]
+      prss[p] = s[22] * pagekb
+    }
+  }
+  close(f)
+  f = "grep -H _bytes /proc/[0-9]*/io 2>/dev/null"
+  while ((f | getline x) > 0) {
+    split(x, a, "/")
+    p = a[3] + 0
+    n = split(x, a, " ")
+    if (x ~ /:read_bytes:/) prb[k, p] = a[n]
+    else if (x ~ /:write_bytes:/) pwb[k, p] = a[n]
+  }
+  close(f)
+}
+function meminfo(   f, l, a) {
+  f = "/proc/meminfo"
+  while ((getline l < f) > 0) {
+    split(l, a, " ")
+    mem[a[1]] = a[2]
+  }
+  close(f)
+}
+function pressure(   f, l, a, n, i, r, kv) {
+  f = "grep -H . /proc/pressure/cpu /proc/pressure/memory /proc/pressure/io 2>/dev/null"
+  while ((f | getline l) > 0) {
+    sub(/^\/proc\/pressure\//, "", l)
+    r = substr(l, 1, index(l, ":") - 1)
+    n = split(substr(l, index(l, ":") + 1), a, " ")
+    for (i = 2; i <= n; i++) {
+      split(a[i], kv, "=")
+      if (kv[1] == "avg10" || kv[1] == "avg60") psi[r] = psi[r] (psi[r] == "" ? "" : ",") "\"" a[1] "_" kv[1] "\":" f2(kv[2])
+    }
+  }
+  close(f)
+}
+function proc(p,   l, f, out) {
+  f = "/proc/" p "/status"
+  thr = ""
+  while ((getline l < f) > 0) if (l ~ /^Threads:/) { split(l, a2, " "); thr = a2[2] }
+  close(f)
+  out = "{\"pid\":" p ",\"comm\":" jstr(comm[p]) ",\"state\":" jstr(pst[p]) ",\"cpu_pct\":" f2(pcpu[p])
+  out = out ",\"rss_mb\":" f2(prss[p] / 1024) ",\"mem_pct\":" pct(prss[p], mem["MemTotal:"])
+  if (thr != "") out = out ",\"threads\":" thr
+  if (p in prd) out = out ",\"read_kb_s\":" f2(prd[p]) ",\"write_kb_s\":" f2(pwr[p])
+  return out "}"
+}
+BEGIN {
+  if (interval + 0 <= 0) interval = 1
+  if (top + 0 <= 0) top = 10
+  pagekb = 4
+  hz = 100
+  cmd = "getconf PAGESIZE 2>/dev/null; getconf CLK_TCK 2>/dev/null"
+  if ((cmd | getline l) > 0 && l + 0 > 0) pagekb = l / 1024
+  if ((cmd | getline l) > 0 && l + 0 > 0) hz = l + 0
+  close(cmd)
+
+  snap(1)
+  system("sleep " interval)
+  snap(2)
+  dt = up[2] - up[1]
+  if (dt <= 0) dt = interval
+  meminfo()
+  split(rd("/proc/loadavg"), la, " ")
+  split(la[4], lt, "/")
+
+  d = tot[2, "cpu"] - tot[1, "cpu"]
+  o = "\"cpu\":{\"count\":" ncpu
+  if (d > 0) {
+    o = o ",\"busy_pct\":" pct(d - (idl[2, "cpu"] - idl[1, "cpu"]), d)
+    o = o ",\"user_pct\":" pct(usr[2, "cpu"] - usr[1, "cpu"], d) ",\"sys_pct\":" pct(sys[2, "cpu"] - sys[1, "cpu"], d)
+    o = o ",\"iowait_pct\":" pct(iow[2, "cpu"] - iow[1, "cpu"], d) ",\"steal_pct\":" pct(stl[2, "cpu"] - stl[1, "cpu"], d)
+    o = o ",\"idle_pct\":" pct(idl[2, "cpu"] - idl[1, "cpu"] - (iow[2, "cpu"] - iow[1, "cpu"]), d)
+  }
+  best = -1
+  for (i = 1; i <= ncpu; i++) {
+    c = cpus[i]
+    d = tot[2, c] - tot[1, c]
+    if (d <= 0) continue
+    b = 100 * (d - (idl[2, c] - idl[1, c])) / d
+    if (b > best) { best = b; bestc = c }
+  }
+  if (best >= 0) o = o ",\"core_busy_max_pct\":" f2(best) ",\"core_busy_max_id\":" jstr(substr(bestc, 4))
+  o = o "}"
+
+  o = o ",\"load\":{\"load1\":" f2(la[1]) ",\"load5\":" f2(la[2]) ",\"load15\":" f2(la[3])
+  o = o ",\"runnable\":" (lt[1] + 0) ",\"tasks\":" (lt[2] + 0) "}"
+  o = o ",\"vm\":{\"procs_running\":" (prun + 0) ",\"procs_blocked\":" (pblk + 0)
+  o = o ",\"context_switches_s\":" f2((ctxt[2] - ctxt[1]) / dt) "}"
+
+  mt = mem["MemTotal:"] + 0
+  ma = ("MemAvailable:" in mem) ? mem["MemAvailable:"] : mem["MemFree:"] + mem["Buffers:"] + mem["Cached:"]
+  o = o ",\"mem\":{\"total_mb\":" int(mt / 1024) ",\"available_mb\":" int(ma / 1024) ",\"used_mb\":" int((mt - ma) / 1024)
+  o = o ",\"swap_total_mb\":" int(mem["SwapTotal:"] / 1024) ",\"swap_used_mb\":" int((mem["SwapTotal:"] - mem["SwapFree:"]) / 1024)
+  o = o ",\"dirty_mb\":" int(mem["Dirty:"] / 1024) "}"
+
+  # Whole disks only: a partition is another device's name plus [p]N.
+  nd = 0
+  for (i = 1; i <= ndev; i++) {
+    v = devs[i]
+    part = 0
+    for (j = 1; j <= ndev; j++) {
+      w = devs[j]
+      if (w != v && index(v, w) == 1 && substr(v, length(w) + 1) ~ /^p?[0-9]+$/) { part = 1; break }
+    }
+    if (part || !((2, v) in dtk)) continue
+    du[++nd] = 100 * (dtk[2, v] - dtk[1, v]) / (dt * 1000)
+    if (du[nd] > 100) du[nd] = 100
+    dn[nd] = v
+    n = dio[2, v] - dio[1, v]
+    dw[nd] = n > 0 ? f2((dms[2, v] - dms[1, v]) / n) : "0.00"
+    dr[nd] = f2((drs[2, v] - drs[1, v]) / 2 / dt)
+    dx[nd] = f2((dws[2, v] - dws[1, v]) / 2 / dt)
+  }
+  o = o ",\"disks\":["
+  for (r = 1; r <= nd && r <= 8; r++) {
+    b = 0
+    for (i = 1; i <= nd; i++) if (!(i in dused) && (b == 0 || du[i] > du[b])) b = i
+    dused[b] = 1
+    o = o (r > 1 ? "," : "") "{\"device\":" jstr(dn[b]) ",\"util_pct\":" f2(du[b]) ",\"await_ms\":" dw[b]
+    o = o ",\"read_kb_s\":" dr[b] ",\"write_kb_s\":" dx[b] "}"
+  }
+  o = o "]"
+
+  pressure()
+  ps = ""
+  split("cpu memory io", res, " ")
+  for (i = 1; i <= 3; i++) if (psi[res[i]] != "") ps = ps (ps == "" ? "" : ",") "\"" res[i] "\":{" psi[res[i]] "}"
+  o = o ",\"pressure\":{" ps "}"
+
+  np = 0
+  for (i = 1; i <= npid; i++) {
+    p = pids[i]
+    if (!((1, p) in pt) || !((2, p) in pt)) continue
+    live[++np] = p
+    pcpu[p] = 100 * (pt[2, p] - pt[1, p]) / hz / dt
+    if (((1, p) in prb) && ((2, p) in prb)) {
+      prd[p] = (prb[2, p] - prb[1, p]) / 1024 / dt
+      pwr[p] = (pwb[2, p] - pwb[1, p]) / 1024 / dt
+    }
+  }
+  o = o ",\"procs\":["
+  for (r = 1; r <= top && r <= np; r++) {
+    b = ""
+    for (i = 1; i <= np; i++) {
+      p = live[i]
+      if (!(p in pused) && (b == "" || pcpu[p] > pcpu[b])) b = p
+    }
+    # Idle processes are noise: list only those that used CPU in the interval.
+    if (pcpu[b] <= 0) break
+    pused[b] = 1
+    o = o (r > 1 ? "," : "") proc(b)
+  }
+  o = o "]"
+  bm = ""
+  bi = ""
+  for (i = 1; i <= np; i++) {
+    p = live[i]
+    if (bm == "" || prss[p] > prss[bm]) bm = p
+    if ((p in pwr) && (bi == "" || pwr[p] + prd[p] > pwr[bi] + prd[bi])) bi = p
+  }
+  if (bm != "") o = o ",\"top_mem\":" proc(bm)
+  if (bi != "" && pwr[bi] + prd[bi] > 0) o = o ",\"top_io\":" proc(bi)
+
+  printf "{\"collector\":\"proc_collector\",\"version\":1,\"interval_sec\":%s,%s}\n", f2(dt), o
+}
+"""
+
+
+def proc_collector_command(meta: Mapping[str, Any]) -> str:
+    interval = max(1, min(60, int(meta.get("interval_sec") or 1)))
+    top = max(1, min(100, int(meta.get("top_pids") or 10)))
+    return f"awk -v interval={interval} -v top={top} {shlex.quote(PROC_COLLECTOR_AWK.strip())} </dev/null"
+
+
+SCRIPTS: Dict[str, Callable[[Mapping[str, Any]], str]] = {
+    "proc_collector": proc_collector_command,
+}
+
+
+def script_command(meta: Mapping[str, Any]) -> str:
+    """The full command for a `script:` registry entry."""
+    name = str(meta.get("script") or "")
+    if name not in SCRIPTS:
+        raise ValueError(f"unknown builtin script: {name}")
+    return SCRIPTS[name](meta)
@@ -1,6 +1,8 @@
 """Command registry helpers."""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
+
+from registry.collector import script_command
 
 
 def load_commands(config: Dict[str, Any]) -> Dict[str, Any]:
@@ -11,14 +13,32 @@ def get_command_meta(commands: Dict[str, Any], cmd_id: str) -> Dict[str, Any]:
     if cmd_id not in commands:
         raise KeyError(f"unknown cmd_id: {cmd_id}")
     meta = commands[cmd_id]
-    if not isinstance(meta, dict) or "cmd" not in meta:
+    if not isinstance(meta, dict) or not ("cmd" in meta or "script" in meta):
         raise ValueError(f"invalid command meta for: {cmd_id}")
     return meta
 
 
-def render_command(template: str, service: Optional[str] = None, pid: Optional[str] = None) -> str:
+def render_command(template: str, service: Optional[str] = None, pid: Optional[str] = None, **params: Any) -> str:
+    """Fill {service}/{pid} and any extra placeholders (e.g. proc_sample's {count}/{interval}).
+
+    Callers validate values first; extra params must be numbers or pre-validated tokens.
+    """
     if "{service}" in template and not service:
         raise ValueError("service is required for this command")
     if "{pid}" in template and not pid:
         raise ValueError("pid is required for this command")
-    return template.format(service=service or "", pid=pid or "")
+    try:
+        return template.format(service=service or "", pid=pid or "", **params)
+    except KeyError as exc:
+        raise ValueError(f"{exc.args[0]} is required for this command") from None
+
+
+def render_meta(meta: Mapping[str, Any], service: Optional[str] = None, pid: Optional[str] = None, **params: Any) -> str:
+    """Render a registry entry: its `cmd` template, or a builtin `script:` (registry.collector).
+
+    Builtin scripts are fixed, reviewed code: they take no placeholders and
+    are not matched against deny_keywords.
+    """
+    if meta.get("script"):
+        return script_command(meta)
+    return render_command(str(meta.get("cmd") or ""), service=service, pid=pid, **params)
@@ -2,90 +2,57 @@
 
 Parsers are intentionally lightweight and deterministic.
 They should never fail hard; return best-effort structured fields.
-"""
-
-from __future__ import annotations
 
-import re
-from typing import Any, Dict, List, Optional
+Parsers are declarative: a spec (a dict, or a list of dicts for outputs with
+several sections) names a `kind` and its options, and is compiled once into
+a callable. `KINDS` maps kind -> parser class, `BUILTIN_SPECS` maps cmd_id
+-> spec. A command in commands.yaml selects its parser with `parser:`, either
+a builtin name (`parser: vmstat`) or an inline spec; without one the builtin
+spec for its cmd_id is used.
 
+Kinds:
+- table: columnar output with header detection. Each row is split once into
+  typed column arrays: {"columns", "rows", "data": {col: [...]}, "samples"}.
+  A header that appears again (vmstat/iostat/mpstat intervals) starts a new
+  sample; `samples[i]` is the sample index of row i.
+- kv: `key<sep>value` lines -> {key: value}
+- fields: whitespace-split fields of one line -> {name: value}
+- regex: named groups of the first match -> {name: value}
+- thread_dump: jstack/jcmd Thread.print aggregates (registry.thread_dump)
+- proc_samples: repeated /proc probes -> time-series stats (registry.sampling)
+- json: the first JSON object in the output (e.g. registry.collector's document)
+- first_line / raw: the first line (truncated) / the whole output
 
-def _first_line(text: str) -> str:
-    lines = (text or "").splitlines()
-    return lines[0] if lines else ""
+Table options: header (regex; omitted = headerless, needs `columns`),
+columns (names overriding the header tokens), header_skip (drop N leading
+header tokens), header_start (drop header tokens before this one), rest
+(column that absorbs extra tokens, e.g. a command line with spaces), align
+(left | right; right maps the last N tokens, for rows prefixed by a
+timestamp), label (first token of a row is a row label), partial (keep rows
+with fewer values than columns, padded with None), skip (regex of lines to
+ignore), end (regex that ends a block; default: blank line), types
+({col: int|float|pct|str|auto}; default auto).
+"""
 
+from __future__ import annotations
 
-def parse_output(cmd_id: str, output: str) -> Dict[str, Any]:
-    out = output or ""
-    parsed: Dict[str, Any] = {"cmd_id": cmd_id}
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
 
-    if cmd_id == "uptime":
-        line = _first_line(out)
-        parsed["uptime_line"] = line
-        m = re.search(r"load average[s]?:\s*([0-9.]+)[, ]+([0-9.]+)[, ]+([0-9.]+)", line)
-        if m:
-            parsed["loadavg"] = [float(m.group(1)), float(m.group(2)), float(m.group(3))]
-        return parsed
+from registry.sampling import ProcSampler
+from registry.thread_dump import ThreadDumpAnalyzer
 
-    if cmd_id == "loadavg":
-        parts = _first_line(out).split()
-        if len(parts) >= 3:
-            try:
-                parsed["loadavg"] = [float(parts[0]), float(parts[1]), float(parts[2])]
-            except Exception:
-                pass
-        return parsed
 
-    if cmd_id in ("free",):
-        # free -m output
-        mem_line = ""
-        swap_line = ""
-        for line in out.splitlines():
-            if line.lower().startswith("mem:"):
-                mem_line = line
-            if line.lower().startswith("swap:"):
-                swap_line = line
-        if mem_line:
-            cols = mem_line.split()
-            # Mem: total used free shared buff/cache available
-            if len(cols) >= 7:
-                parsed["mem_mb"] = {
-                    "total": _to_int(cols[1]),
-                    "used": _to_int(cols[2]),
-                    "free": _to_int(cols[3]),
-                    "available": _to_int(cols[6]),
-                }
-        if swap_line:
-            cols = swap_line.split()
-            if len(cols) >= 4:
-                parsed["swap_mb"] = {"total": _to_int(cols[1]), "used": _to_int(cols[2]), "free": _to_int(cols[3])}
-        return parsed
+Spec = Union[str, Mapping[str, Any], Sequence[Mapping[str, Any]]]
 
-    if cmd_id == "iostat":
-        # best-effort: capture %iowait line if present
-        for line in out.splitlines():
-            if "%iowait" in line and "%idle" in line:
-                parsed["cpu_iostat_header"] = line.strip()
-            if line.strip().startswith("avg-cpu"):
-                parsed["avg_cpu_section"] = True
-        # common format has a line with numbers after avg-cpu header
-        # try to parse iowait if header is present in previous line
-        lines = [l.strip() for l in out.splitlines() if l.strip()]
-        for i, line in enumerate(lines):
-            if "%iowait" in line and i + 1 < len(lines):
-                header = line.split()
-                vals = lines[i + 1].split()
-                if len(vals) == len(header):
-                    parsed["iostat_avg_cpu"] = {h: _to_float(v) for h, v in zip(header, vals)}
-                break
-        return parsed
+FIRST_LINE_MAX = 500
 
-    if cmd_id in ("mpstat", "vmstat", "top", "ps_cpu", "ps_mem", "df", "jps", "jstat", "jstack", "journalctl"):
-        parsed["first_line"] = _first_line(out)[:500]
-        return parsed
 
-    parsed["raw"] = out
-    return parsed
+def _first_line(text: str) -> str:
+    lines = (text or "").splitlines()
+    return lines[0] if lines else ""
 
 
 def _to_int(v: str) -> Optional[int]:
@@ -100,3 +67,457 @@ def _to_float(v: str) -> Optional[float]:
         return float(v)
     except Exception:
         return None
+
+
+def _to_pct(v: str) -> Optional[float]:
+    return _to_float(v.rstrip("%"))
+
+
+def _auto(v: str) -> Any:
+    try:
+        return int(v)
+    except ValueError:
+        pass
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+def _to_str(v: str) -> str:
+    return v
+
+
+def _auto_column(values: List[Optional[str]]) -> List[Any]:
+    """Convert a whole column at once: int, else float, else per value.
+
+    Trying the column as a unit keeps the exception cost per column rather
+    than per cell for the common all-numeric case.
+    """
+    for conv in (int, float):
+        try:
+            return [conv(v) if v is not None else None for v in values]
+        except ValueError:
+            continue
+    return [_auto(v) if v is not None else None for v in values]
+
+
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "int": _to_int,
+    "float": _to_float,
+    "pct": _to_pct,
+    "str": _to_str,
+    "auto": _auto,
+}
+
+
+def _converter(types: Mapping[str, str], name: str) -> Callable[[str], Any]:
+    return CONVERTERS.get(str(types.get(name, "auto")), _auto)
+
+
+def _column_name(token: str) -> str:
+    return token.rstrip(":")
+
+
+class TableParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        header = spec.get("header")
+        self.header = re.compile(header) if header else None
+        self.columns: Optional[List[str]] = list(spec["columns"]) if spec.get("columns") else None
+        if self.header is None and self.columns is None:
+            raise ValueError("table parser needs a header regex or columns")
+        self.header_skip = int(spec.get("header_skip") or 0)
+        self.header_start = spec.get("header_start")
+        self.rest = spec.get("rest")
+        self.align_right = str(spec.get("align") or "left") == "right"
+        self.label = bool(spec.get("label"))
+        self.partial = bool(spec.get("partial"))
+        self.skip = re.compile(spec["skip"]) if spec.get("skip") else None
+        self.end = re.compile(spec["end"]) if spec.get("end") else None
+        self.types: Dict[str, str] = dict(spec.get("types") or {})
+
+    def _header_columns(self, line: str) -> List[str]:
+        tokens = line.split()[self.header_skip :]
+        if self.header_start and self.header_start in tokens:
+            tokens = tokens[tokens.index(self.header_start) :]
+        return [_column_name(t) for t in tokens]
+
+    def _layout(self, columns: List[str]) -> Dict[str, Any]:
+        """Precompute how a row's tokens map onto `columns`."""
+        names = list(columns)
+        if self.label:
+            names = ["label"] + names
+        rest = names.index(self.rest) if self.rest in names else -1
+        return {
+            "names": names,
+            "rest": rest,
+            "right": len(names) - rest - 1 if rest >= 0 else 0,
+        }
+
+    def _split(self, tokens: List[str], layout: Dict[str, Any]) -> Optional[List[str]]:
+        n = len(layout["names"])
+        rest = layout["rest"]
+        if rest >= 0:
+            right = layout["right"]
+            if len(tokens) < n - 1:
+                return None
+            mid_end = len(tokens) - right
+            return tokens[:rest] + [" ".join(tokens[rest:mid_end])] + tokens[mid_end:]
+        if len(tokens) < n:
+            if not self.partial or len(tokens) < 2:
+                return None
+            return tokens + [None] * (n - len(tokens))
+        if self.align_right:
+            return tokens[len(tokens) - n :]
+        if len(tokens) > n:
+            # Extra tokens belong to the last column (e.g. "Mounted on").
+            return tokens[: n - 1] + [" ".join(tokens[n - 1 :])]
+        return tokens
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        layout: Optional[Dict[str, Any]] = None
+        data: Dict[str, List[Any]] = {}
+        missing: List[str] = []
+        if self.header is None:
+            layout = self._layout(self.columns or [])
+            data = {name: [] for name in layout["names"]}
+        samples: List[int] = []
+        sample = -1 if self.header is not None else 0
+        in_block = self.header is None
+        for line in text.splitlines():
+            if self.skip is not None and self.skip.search(line):
+                continue
+            if self.header is not None and self.header.search(line):
+                columns = self.columns or self._header_columns(line)
+                if layout is None or layout["names"][int(self.label) :] != columns:
+                    layout = self._layout(columns)
+                    for name in layout["names"]:
+                        data.setdefault(name, [None] * len(samples))
+                    # Columns of an earlier, different header stay row-aligned.
+                    missing = [name for name in data if name not in layout["names"]]
+                sample += 1
+                in_block = True
+                continue
+            if not in_block or layout is None:
+                continue
+            block_end = self.end.search(line) if self.end is not None else not line.strip()
+            if block_end:
+                in_block = self.header is None
+                continue
+            values = self._split(line.split(), layout)
+            if values is None:
+                continue
+            if self.label:
+                values[0] = _column_name(values[0]).lower()
+            for name, value in zip(layout["names"], values):
+                data[name].append(value)
+            samples.append(sample)
+            for name in missing:
+                data[name].append(None)
+        # Rows are split in one pass; typing then runs once per column.
+        for name, col in data.items():
+            kind = str(self.types.get(name, "auto"))
+            if kind == "auto":
+                data[name] = _auto_column(col)
+            elif kind != "str":
+                conv = CONVERTERS.get(kind, _auto)
+                data[name] = [conv(v) if v is not None else None for v in col]
+        return {"columns": list(data), "rows": len(samples), "data": data, "samples": samples}
+
+
+class KVParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.sep = re.compile(spec.get("sep") or r"\s*[:=]\s*")
+        self.types: Dict[str, str] = dict(spec.get("types") or {})
+        self.keys = set(spec.get("keys") or ())
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for line in text.splitlines():
+            parts = self.sep.split(line.strip(), maxsplit=1)
+            if len(parts) != 2 or not parts[0]:
+                continue
+            key = parts[0]
+            if self.keys and key not in self.keys:
+                continue
+            out[key] = _converter(self.types, key)(parts[1].strip().strip('"'))
+        return out
+
+
+class FieldsParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.names: List[str] = list(spec.get("names") or [])
+        self.line = int(spec.get("line") or 0)
+        self.types: Dict[str, str] = dict(spec.get("types") or {})
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) <= self.line:
+            return {}
+        tokens = lines[self.line].split()
+        return {n: _converter(self.types, n)(v) for n, v in zip(self.names, tokens)}
+
+
+class RegexParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        flags = re.IGNORECASE if spec.get("ignorecase") else 0
+        self.pattern = re.compile(spec["pattern"], flags | re.MULTILINE)
+        self.types: Dict[str, str] = dict(spec.get("types") or {})
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        m = self.pattern.search(text)
+        if m is None:
+            return {}
+        return {k: _converter(self.types, k)(v) for k, v in m.groupdict().items() if v is not None}
+
+
+class ThreadDumpParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.top_stacks = int(spec.get("top_stacks") or 5)
+        self.top_locks = int(spec.get("top_locks") or 10)
+        self.max_depth = int(spec.get("max_depth") or 64)
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        analyzer = ThreadDumpAnalyzer(max_depth=self.max_depth)
+        analyzer.feed_lines(text.splitlines())
+        return analyzer.result(top_stacks=self.top_stacks, top_locks=self.top_locks)
+
+
+class ProcSamplesParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.capacity = int(spec.get("capacity") or 3600)
+
+    def __call__(self, text: str) -> Dict[str, Any]:
+        sampler = ProcSampler(capacity=self.capacity)
+        sampler.feed_lines(text.splitlines())
+        return sampler.result()
+
+
+class JSONParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self._decoder = json.JSONDecoder()
+
+    def __call__(self, text: str) -> Any:
+        # Login banners or profile noise may precede the document.
+        start = text.find("{")
+        if start < 0:
+            raise ValueError("no JSON object in output")
+        return self._decoder.raw_decode(text, start)[0]
+
+
+class FirstLineParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        self.max_chars = int(spec.get("max_chars") or FIRST_LINE_MAX)
+
+    def __call__(self, text: str) -> str:
+        return _first_line(text)[: self.max_chars]
+
+
+class RawParser:
+    def __init__(self, spec: Mapping[str, Any]) -> None:
+        pass
+
+    def __call__(self, text: str) -> str:
+        return text
+
+
+KINDS: Dict[str, Callable[[Mapping[str, Any]], Callable[[str], Any]]] = {
+    "table": TableParser,
+    "kv": KVParser,
+    "fields": FieldsParser,
+    "regex": RegexParser,
+    "thread_dump": ThreadDumpParser,
+    "proc_samples": ProcSamplesParser,
+    "json": JSONParser,
+    "first_line": FirstLineParser,
+    "raw": RawParser,
+}
+
+
+BUILTIN_SPECS: Dict[str, Any] = {
+    "uptime": [
+        {"name": "uptime_line", "kind": "first_line"},
+        {
+            "name": "load",
+            "kind": "regex",
+            "pattern": r"load average[s]?:\s*(?P<load1>[0-9.]+)[, ]+(?P<load5>[0-9.]+)[, ]+(?P<load15>[0-9.]+)",
+            "types": {"load1": "float", "load5": "float", "load15": "float"},
+        },
+    ],
+    "loadavg": {
+        "name": "load",
+        "kind": "fields",
+        "names": ["load1", "load5", "load15", "tasks", "last_pid"],
+        "types": {"load1": "float", "load5": "float", "load15": "float"},
+    },
+    "nproc": {"name": "nproc", "kind": "fields", "names": ["cpus"], "types": {"cpus": "int"}},
+    "free": {"name": "mem", "kind": "table", "header": r"^\s+total\s+used\s", "label": True, "partial": True, "skip": r"^-/\+"},
+    "vmstat": {"name": "vmstat", "kind": "table", "header": r"^\s*r\s+b\s+swpd\s"},
+    "iostat": [
+        {
+            "name": "avg_cpu",
+            "kind": "table",
+            "header": r"^avg-cpu:",
+            "header_skip": 1,
+            "align": "right",
+        },
+        {"name": "devices", "kind": "table", "header": r"^Device"},
+    ],
+    "mpstat": {
+        "name": "mpstat",
+        "kind": "table",
+        "header": r"\sCPU\s+%usr\s",
+        "header_start": "CPU",
+        "align": "right",
+        "skip": r"^Average:",
+        "types": {"CPU": "str"},
+    },
+    "top": [
+        {
+            "name": "cpu",
+            "kind": "regex",
+            "pattern": (
+                r"^%?Cpu\(s\):\s*(?P<us>[0-9.]+)\s*us,\s*(?P<sy>[0-9.]+)\s*sy,\s*(?P<ni>[0-9.]+)\s*ni,"
+                r"\s*(?P<id>[0-9.]+)\s*id,\s*(?P<wa>[0-9.]+)\s*wa(?:,\s*(?P<hi>[0-9.]+)\s*hi)?"
+                r"(?:,\s*(?P<si>[0-9.]+)\s*si)?(?:,\s*(?P<st>[0-9.]+)\s*st)?"
+            ),
+            "types": {k: "float" for k in ("us", "sy", "ni", "id", "wa", "hi", "si", "st")},
+        },
+        {
+            "name": "tasks",
+            "kind": "regex",
+            "pattern": r"^Tasks:\s*(?P<total>\d+) total,\s*(?P<running>\d+) running,.*?(?P<zombie>\d+) zombie",
+            "types": {"total": "int", "running": "int", "zombie": "int"},
+        },
+        {"name": "procs", "kind": "table", "header": r"^\s*PID\s+USER\s", "rest": "COMMAND", "types": {"USER": "str"}},
+    ],
+    "ps_cpu": {"name": "procs", "kind": "table", "header": r"^\s*PID\s+PPID\s+CMD\s", "rest": "CMD"},
+    "ps_mem": {"name": "procs", "kind": "table", "header": r"^\s*PID\s+PPID\s+CMD\s", "rest": "CMD"},
+    "df": {
+        "name": "fs",
+        "kind": "table",
+        "header": r"^Filesystem\s",
+        "columns": ["filesystem", "size", "used", "avail", "use_pct", "mounted_on"],
+        "rest": "mounted_on",
+        "types": {"filesystem": "str", "size": "str", "used": "str", "avail": "str", "use_pct": "pct"},
+    },
+    "jps": {"name": "jvms", "kind": "table", "columns": ["pid", "main"], "rest": "main", "types": {"main": "str"}},
+    "jstat": {"name": "gc", "kind": "table", "header": r"^\s*S0\s+S1\s"},
+    "pidstat": {
+        "name": "procs",
+        "kind": "table",
+        "header": r"^#\s+Time\s",
+        "header_skip": 1,
+        "align": "right",
+        "types": {"Command": "str"},
+    },
+    "pidstat_io": {
+        "name": "procs",
+        "kind": "table",
+        "header": r"\sUID\s+PID\s+kB_rd/s\s",
+        "header_start": "UID",
+        "align": "right",
+        "skip": r"^Average:",
+        "types": {"Command": "str"},
+    },
+    "ss": {
+        "name": "conns",
+        "kind": "table",
+        "header": r"^State\s+Recv-Q\s",
+        "columns": ["state", "recv_q", "send_q", "local", "peer", "process"],
+        "rest": "process",
+        "types": {"recv_q": "int", "send_q": "int", "local": "str", "peer": "str", "process": "str"},
+    },
+    "proc_pid_io": {"name": "io", "kind": "kv", "sep": r"\s*:\s*"},
+    "os_release": {"name": "os", "kind": "kv", "sep": r"=", "types": {"VERSION_ID": "str"}},
+    "jstack": {"name": "threads", "kind": "thread_dump"},
+    "jcmd_threads": {"name": "threads", "kind": "thread_dump"},
+    "proc_sample": {"name": "timeseries", "kind": "proc_samples"},
+    "proc_snapshot": {"name": "proc", "kind": "json"},
+    "journalctl": {"name": "first_line", "kind": "first_line"},
+}
+
+
+class CompiledSpec:
+    """A compiled spec: (name, parser) parts applied in order.
+
+    `alias` is the builtin parser name when a command reuses another
+    command's parser; it is recorded as parsed["parser"] so signal
+    extraction can follow it.
+    """
+
+    def __init__(self, spec: Spec, alias: str = "") -> None:
+        self.alias = alias
+        parts = [spec] if isinstance(spec, Mapping) else list(spec)
+        self.parts: List[tuple] = []
+        for part in parts:
+            kind = str(part.get("kind") or "raw")
+            if kind not in KINDS:
+                raise ValueError(f"unknown parser kind: {kind}")
+            self.parts.append((str(part.get("name") or kind), KINDS[kind](part)))
+
+    def __call__(self, cmd_id: str, text: str) -> Dict[str, Any]:
+        parsed: Dict[str, Any] = {"cmd_id": cmd_id}
+        if self.alias and self.alias != cmd_id:
+            parsed["parser"] = self.alias
+        for name, parser in self.parts:
+            try:
+                parsed[name] = parser(text)
+            except Exception as exc:  # best-effort: never fail hard
+                parsed.setdefault("errors", {})[name] = str(exc)
+        return parsed
+
+
+_FALLBACK = CompiledSpec({"name": "raw", "kind": "raw"})
+
+
+def resolve_spec(cmd_id: str, spec: Optional[Spec] = None) -> Optional[Spec]:
+    """A command's spec: an inline spec, a builtin name, or the cmd_id's builtin."""
+    if spec is None:
+        return BUILTIN_SPECS.get(cmd_id)
+    if isinstance(spec, str):
+        if spec not in BUILTIN_SPECS:
+            raise ValueError(f"unknown builtin parser: {spec}")
+        return BUILTIN_SPECS[spec]
+    return spec
+
+
+@lru_cache(maxsize=256)
+def _compile_json(spec_json: str, alias: str) -> CompiledSpec:
+    return CompiledSpec(json.loads(spec_json), alias)
+
+
+def compile_spec(spec: Spec, alias: str = "") -> CompiledSpec:
+    return _compile_json(json.dumps(spec, sort_keys=True), alias)
+
+
+def _compile_for(cmd_id: str, spec: Optional[Spec]) -> Optional[CompiledSpec]:
+    resolved = resolve_spec(cmd_id, spec)
+    if resolved is None:
+        return None
+    return compile_spec(resolved, spec if isinstance(spec, str) else "")
+
+
+class ParserEngine:
+    """Compiles the parser of every registry command once; `parse` is a dict lookup."""
+
+    def __init__(self, commands: Optional[Mapping[str, Any]] = None) -> None:
+        self._parsers: Dict[str, CompiledSpec] = {}
+        for cmd_id, meta in (commands or {}).items():
+            parser = _compile_for(cmd_id, meta.get("parser") if isinstance(meta, Mapping) else None)
+            if parser is not None:
+                self._parsers[cmd_id] = parser
+
+    def parser_for(self, cmd_id: str) -> CompiledSpec:
+        parser = self._parsers.get(cmd_id)
+        if parser is None:
+            parser = self._parsers[cmd_id] = _compile_for(cmd_id, None) or _FALLBACK
+        return parser
+
+    def parse(self, cmd_id: str, output: str) -> Dict[str, Any]:
+        return self.parser_for(cmd_id)(cmd_id, output or "")
+
+
+def parse_output(cmd_id: str, output: str, spec: Optional[Spec] = None) -> Dict[str, Any]:
+    parser = _compile_for(cmd_id, spec) or _FALLBACK
+    return parser(cmd_id, output or "")
@@ -0,0 +1,307 @@
+"""In-session time series from repeated /proc probes.
+
+The `proc_sample` command loops on the target: every interval it prints a
+`--- sample` marker followed by /proc/uptime, /proc/loadavg, a few lines of
+/proc/stat and /proc/meminfo, and /proc/diskstats. One long-lived command
+means one round trip for the whole window and only `cat`/`grep`/`sleep` on
+the target per interval.
+
+`ProcSampler` folds that stream into `SampleSeries`: one fixed-capacity,
+array-backed `Ring` per raw value (gauges and cumulative counters), sharing a
+timestamp ring. `result()` turns counters into per-interval rates and reports
+p50/p95/max and a least-squares slope per derived series.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+SAMPLE_MARKER = "--- sample"
+NAN = float("nan")
+
+# /proc/stat cpu columns: user nice system idle iowait irq softirq steal (guest* are already in user/nice).
+_CPU_FIELDS = 8
+_SECTOR_BYTES = 512
+_MIB = 1024.0 * 1024.0
+# Virtual / removable block devices that only add noise to disk series.
+_SKIP_DISK_RE = re.compile(r"^(loop|ram|zram|fd|sr)\d")
+_PARTITION_TAIL_RE = re.compile(r"^p?\d+$")
+_MEMINFO_KEYS = {"MemTotal:", "MemAvailable:", "SwapTotal:", "SwapFree:", "Dirty:"}
+_STAT_KEYS = {"ctxt", "procs_running", "procs_blocked"}
+
+STATS = ("p50", "p95", "max", "slope_per_min")
+
+
+class Ring:
+    """Fixed-capacity ring of doubles; the oldest value is overwritten."""
+
+    __slots__ = ("_buf", "_head", "size")
+
+    def __init__(self, capacity: int) -> None:
+        self._buf = array("d", [NAN]) * max(1, int(capacity))
+        self._head = 0
+        self.size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def append(self, value: float) -> None:
+        buf = self._buf
+        buf[self._head] = value
+        self._head = (self._head + 1) % len(buf)
+        if self.size < len(buf):
+            self.size += 1
+
+    def values(self) -> array:
+        """Oldest-first copy of the held values."""
+        if self.size < len(self._buf):
+            return self._buf[: self.size]
+        return self._buf[self._head :] + self._buf[: self._head]
+
+
+class SampleSeries:
+    """Per-key rings appended in lockstep with a shared timestamp ring."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(2, int(capacity))
+        self.t = Ring(self.capacity)
+        self._rings: Dict[str, Ring] = {}
+
+    def append(self, t: float, values: Dict[str, float]) -> None:
+        for key in values:
+            if key not in self._rings:
+                # A key first seen mid-stream (hot-plugged disk) is NaN before that.
+                ring = self._rings[key] = Ring(self.capacity)
+                for _ in range(self.t.size):
+                    ring.append(NAN)
+        self.t.append(t)
+        for key, ring in self._rings.items():
+            ring.append(values.get(key, NAN))
+
+    def __len__(self) -> int:
+        return self.t.size
+
+    def keys(self) -> List[str]:
+        return list(self._rings)
+
+    def get(self, key: str) -> array:
+        ring = self._rings.get(key)
+        return ring.values() if ring is not None else array("d", [NAN]) * self.t.size
+
+
+def _finite(values: Iterable[float]) -> List[float]:
+    return [v for v in values if not math.isnan(v)]
+
+
+def percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile over the non-NaN values."""
+    data = sorted(_finite(values))
+    if not data:
+        return None
+    rank = max(1, int(math.ceil(pct / 100.0 * len(data))))
+    return data[rank - 1]
+
+
+def slope(ts: Iterable[float], values: Iterable[float]) -> Optional[float]:
+    """Least-squares slope (value units per second) over the non-NaN points."""
+    pts = [(t, v) for t, v in zip(ts, values) if not math.isnan(v) and not math.isnan(t)]
+    if len(pts) < 2:
+        return None
+    n = float(len(pts))
+    mt = sum(t for t, _ in pts) / n
+    mv = sum(v for _, v in pts) / n
+    den = sum((t - mt) ** 2 for t, _ in pts)
+    if den == 0:
+        return None
+    return sum((t - mt) * (v - mv) for t, v in pts) / den
+
+
+def _rate(counter: array, ts: array, scale: float = 1.0) -> array:
+    """Per-interval rate of a cumulative counter; resets/gaps become NaN."""
+    out = array("d", [NAN]) * max(0, len(counter) - 1)
+    for i in range(1, len(counter)):
+        dv = counter[i] - counter[i - 1]
+        dt = ts[i] - ts[i - 1]
+        if dt > 0 and dv >= 0:
+            out[i - 1] = dv / dt * scale
+    return out
+
+
+def _ratio_pct(num: array, den: array) -> array:
+    """Per-interval 100 * delta(num) / delta(den) for two counters."""
+    out = array("d", [NAN]) * max(0, len(num) - 1)
+    for i in range(1, len(num)):
+        dn = num[i] - num[i - 1]
+        dd = den[i] - den[i - 1]
+        if dd > 0 and dn >= 0:
+            out[i - 1] = 100.0 * dn / dd
+    return out
+
+
+def _round(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v, 3)
+
+
+class ProcSampler:
+    """Streaming parser for `proc_sample` output."""
+
+    def __init__(self, *, capacity: int = 3600) -> None:
+        self.series = SampleSeries(capacity)
+        self._frame: Optional[Dict[str, float]] = None
+        self._t: float = NAN
+        self._disks: Optional[List[str]] = None
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            if line.startswith(SAMPLE_MARKER):
+                self._end_frame()
+                self._frame = {}
+                self._t = NAN
+                continue
+            frame = self._frame
+            if frame is None:
+                continue
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                self._line(frame, parts)
+            except (ValueError, IndexError):
+                # Best effort: a garbled line only loses its own values.
+                continue
+
+    def _line(self, frame: Dict[str, float], parts: List[str]) -> None:
+        head = parts[0]
+        if head == "cpu":
+            vals = [float(x) for x in parts[1 : 1 + _CPU_FIELDS]]
+            vals += [0.0] * (_CPU_FIELDS - len(vals))
+            total = sum(vals)
+            frame["cpu_total"] = total
+            frame["cpu_idle"] = vals[3]
+            frame["cpu_iowait"] = vals[4]
+            frame["cpu_steal"] = vals[7]
+            frame["cpu_busy"] = total - vals[3] - vals[4]
+        elif head in _STAT_KEYS and len(parts) > 1:
+            frame[head] = float(parts[1])
+        elif head in _MEMINFO_KEYS and len(parts) > 1:
+            frame[head[:-1]] = float(parts[1])
+        elif len(parts) >= 14 and parts[0].isdigit() and parts[1].isdigit():
+            name = parts[2]
+            if not _SKIP_DISK_RE.match(name):
+                frame[f"disk:{name}:rsec"] = float(parts[5])
+                frame[f"disk:{name}:wsec"] = float(parts[9])
+                frame[f"disk:{name}:ticks"] = float(parts[12])
+        elif len(parts) == 5 and "/" in parts[3]:
+            frame["load1"] = float(parts[0])
+        elif len(parts) == 2 and math.isnan(self._t):
+            # /proc/uptime: monotonic seconds since boot.
+            self._t = float(parts[0])
+
+    def _end_frame(self) -> None:
+        frame, self._frame = self._frame, None
+        if frame and not math.isnan(self._t):
+            self.series.append(self._t, frame)
+
+    def close(self) -> None:
+        self._end_frame()
+
+    def _whole_disks(self) -> List[str]:
+        if self._disks is None:
+            names = sorted({k.split(":")[1] for k in self.series.keys() if k.startswith("disk:")})
+            # sda1 / nvme0n1p1 are partitions of a listed device; count only the device.
+            self._disks = [
+                n for n in names if not any(n != d and n.startswith(d) and _PARTITION_TAIL_RE.match(n[len(d) :]) for d in names)
+            ]
+        return self._disks
+
+    def derived(self) -> Tuple[array, Dict[str, Tuple[array, array]]]:
+        """(timestamps, {name: (ts, values)}) for every derived series."""
+        s = self.series
+        ts = s.t.values()
+        mid = ts[1:]
+        out: Dict[str, Tuple[array, array]] = {}
+        if "cpu_total" in s.keys():
+            total = s.get("cpu_total")
+            out["cpu_busy_pct"] = (mid, _ratio_pct(s.get("cpu_busy"), total))
+            out["iowait_pct"] = (mid, _ratio_pct(s.get("cpu_iowait"), total))
+            out["steal_pct"] = (mid, _ratio_pct(s.get("cpu_steal"), total))
+        if "ctxt" in s.keys():
+            out["ctxt_per_sec"] = (mid, _rate(s.get("ctxt"), ts))
+        for key, name in (("load1", "loadavg_1m"), ("procs_running", "procs_running"), ("procs_blocked", "procs_blocked")):
+            if key in s.keys():
+                out[name] = (ts, s.get(key))
+        if "MemTotal" in s.keys() and "MemAvailable" in s.keys():
+            mt, ma = s.get("MemTotal"), s.get("MemAvailable")
+            out["mem_available_pct"] = (
+                ts,
+                array("d", [100.0 * a / t if t > 0 else NAN for t, a in zip(mt, ma)]),
+            )
+        if "SwapTotal" in s.keys() and "SwapFree" in s.keys():
+            st, sf = s.get("SwapTotal"), s.get("SwapFree")
+            out["swap_used_pct"] = (ts, array("d", [100.0 * (t - f) / t if t > 0 else NAN for t, f in zip(st, sf)]))
+        disks = self._whole_disks()
+        if disks and len(ts) > 1:
+            util = array("d", [NAN]) * (len(ts) - 1)
+            read = array("d", [NAN]) * (len(ts) - 1)
+            write = array("d", [NAN]) * (len(ts) - 1)
+            for d in disks:
+                # io_ticks is ms spent doing I/O: ms/s / 10 == percent busy.
+                u = _rate(s.get(f"disk:{d}:ticks"), ts, 0.1)
+                r = _rate(s.get(f"disk:{d}:rsec"), ts, _SECTOR_BYTES / _MIB)
+                w = _rate(s.get(f"disk:{d}:wsec"), ts, _SECTOR_BYTES / _MIB)
+                for i in range(len(util)):
+                    if not math.isnan(u[i]) and (math.isnan(util[i]) or u[i] > util[i]):
+                        util[i] = min(100.0, u[i])
+                    if not math.isnan(r[i]):
+                        read[i] = r[i] if math.isnan(read[i]) else read[i] + r[i]
+                    if not math.isnan(w[i]):
+                        write[i] = w[i] if math.isnan(write[i]) else write[i] + w[i]
+            out["disk_util_max_pct"] = (mid, util)
+            out["disk_read_mb_s"] = (mid, read)
+            out["disk_write_mb_s"] = (mid, write)
+        return ts, out
+
+    def result(self) -> Dict[str, Any]:
+        self.close()
+        ts, derived = self.derived()
+        series: Dict[str, Dict[str, Optional[float]]] = {}
+        for name, (xs, ys) in derived.items():
+            if not _finite(ys):
+                continue
+            sl = slope(xs, ys)
+            series[name] = {
+                "p50": _round(percentile(ys, 50)),
+                "p95": _round(percentile(ys, 95)),
+                "max": _round(max(_finite(ys))),
+                "last": _round(_finite(ys)[-1]),
+                "slope_per_min": _round(sl * 60.0 if sl is not None else None),
+            }
+        span = ts[-1] - ts[0] if len(ts) > 1 else 0.0
+        return {
+            "samples": len(ts),
+            "span_sec": round(span, 3),
+            "interval_sec": round(span / (len(ts) - 1), 3) if len(ts) > 1 else None,
+            "disks": list(self._whole_disks()),
+            "series": series,
+            "summary": _summary(len(ts), span, series),
+        }
+
+
+def _summary(samples: int, span: float, series: Dict[str, Dict[str, Optional[float]]]) -> str:
+    parts = [f"samples={samples} span={span:.0f}s"]
+    for name in ("cpu_busy_pct", "iowait_pct", "loadavg_1m", "mem_available_pct", "disk_util_max_pct"):
+        st = series.get(name)
+        if st:
+            parts.append(f"{name} p95={st['p95']} max={st['max']} slope/min={st['slope_per_min']}")
+    return "; ".join(parts)[:500]
+
+
+def analyze_samples(text: str, *, capacity: int = 3600) -> Dict[str, Any]:
+    sampler = ProcSampler(capacity=capacity)
+    sampler.feed_lines(text.splitlines())
+    return sampler.result()
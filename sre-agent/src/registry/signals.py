@@ -1,39 +1,429 @@
 """Signals registry.
 
-Turn parsed outputs into normalized signals.
+Turn parsed outputs into normalized signals. `EXTRACTORS` maps cmd_id (or
+the builtin parser name a command reuses) to a function over the parsed output (see registry.parsers for the
+table layout: {"columns", "rows", "data": {col: [...]}, "samples"}).
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
 
+from registry.sampling import STATS
 
-def extract_signals(parsed: Dict[str, Any]) -> Dict[str, Any]:
-    cmd_id = parsed.get("cmd_id")
-    signals: Dict[str, Any] = {}
-
-    if cmd_id in ("uptime", "loadavg"):
-        if "loadavg" in parsed:
-            signals["loadavg_1m"] = parsed["loadavg"][0]
-            signals["loadavg_5m"] = parsed["loadavg"][1]
-            signals["loadavg_15m"] = parsed["loadavg"][2]
-
-    if cmd_id == "free":
-        mem = parsed.get("mem_mb") or {}
-        swap = parsed.get("swap_mb") or {}
-        if mem.get("available") is not None:
-            signals["mem_available_mb"] = mem.get("available")
-        if mem.get("used") is not None:
-            signals["mem_used_mb"] = mem.get("used")
-        if swap.get("used") is not None:
-            signals["swap_used_mb"] = swap.get("used")
-
-    if cmd_id == "iostat":
-        cpu = parsed.get("iostat_avg_cpu") or {}
-        # key varies across versions; try common ones
+
+def _table(parsed: Dict[str, Any], name: str) -> Dict[str, Any]:
+    table = parsed.get(name)
+    return table if isinstance(table, dict) and isinstance(table.get("data"), dict) else {}
+
+
+def _col(table: Dict[str, Any], name: str) -> List[Any]:
+    return (table.get("data") or {}).get(name) or []
+
+
+def _nums(values: List[Any]) -> List[float]:
+    return [float(v) for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+
+def _avg(values: List[Any]) -> Optional[float]:
+    nums = _nums(values)
+    return round(sum(nums) / len(nums), 2) if nums else None
+
+
+def _last_sample_rows(table: Dict[str, Any]) -> List[int]:
+    samples = table.get("samples") or []
+    if not samples:
+        return []
+    last = samples[-1]
+    return [i for i, s in enumerate(samples) if s == last]
+
+
+def _argmax(values: List[Any], rows: Optional[List[int]] = None) -> Optional[int]:
+    best: Optional[int] = None
+    for i in rows if rows is not None else range(len(values)):
+        v = values[i] if i < len(values) else None
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and (best is None or v > values[best]):
+            best = i
+    return best
+
+
+def _set(signals: Dict[str, Any], key: str, value: Any) -> None:
+    if value is not None:
+        signals[key] = value
+
+
+def _load(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    load = parsed.get("load") or {}
+    signals: Dict[str, Any] = {}
+    _set(signals, "loadavg_1m", load.get("load1"))
+    _set(signals, "loadavg_5m", load.get("load5"))
+    _set(signals, "loadavg_15m", load.get("load15"))
+    return signals
+
+
+def _nproc(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    signals: Dict[str, Any] = {}
+    _set(signals, "cpu_count", (parsed.get("nproc") or {}).get("cpus"))
+    return signals
+
+
+def _free(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "mem")
+    rows = {label: i for i, label in enumerate(_col(table, "label"))}
+    signals: Dict[str, Any] = {}
+
+    def cell(label: str, col: str) -> Any:
+        i = rows.get(label)
+        values = _col(table, col)
+        return values[i] if i is not None and i < len(values) else None
+
+    _set(signals, "mem_total_mb", cell("mem", "total"))
+    _set(signals, "mem_used_mb", cell("mem", "used"))
+    _set(signals, "mem_available_mb", cell("mem", "available"))
+    _set(signals, "swap_used_mb", cell("swap", "used"))
+    return signals
+
+
+def _vmstat(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "vmstat")
+    signals: Dict[str, Any] = {}
+    if not table.get("rows"):
+        return signals
+    # The first vmstat line is the average since boot; use the interval samples.
+    start = 1 if table["rows"] > 1 else 0
+    for col, key in (
+        ("r", "run_queue"),
+        ("b", "blocked_procs"),
+        ("si", "swap_in_kb_s"),
+        ("so", "swap_out_kb_s"),
+        ("cs", "context_switches_s"),
+        ("us", "cpu_user_pct"),
+        ("sy", "cpu_sys_pct"),
+        ("id", "cpu_idle_pct"),
+        ("wa", "iowait_pct"),
+        ("st", "cpu_steal_pct"),
+    ):
+        _set(signals, key, _avg(_col(table, col)[start:]))
+    return signals
+
+
+def _iostat(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    signals: Dict[str, Any] = {}
+    # Like vmstat, the first report is since boot: prefer the last interval.
+    cpu = _table(parsed, "avg_cpu")
+    rows = _last_sample_rows(cpu)
+    if rows:
         for k in ("%iowait", "iowait"):
-            if cpu.get(k) is not None:
-                signals["iowait_pct"] = cpu.get(k)
+            values = _col(cpu, k)
+            if values:
+                _set(signals, "iowait_pct", values[rows[-1]])
                 break
+    dev = _table(parsed, "devices")
+    rows = _last_sample_rows(dev)
+    util = _col(dev, "%util")
+    best = _argmax(util, rows)
+    if best is not None:
+        signals["disk_util_max_pct"] = util[best]
+        devices = _col(dev, "Device")
+        if best < len(devices):
+            signals["disk_util_max_device"] = devices[best]
+        awaits = [a for a in (_col(dev, "r_await"), _col(dev, "w_await"), _col(dev, "await")) if a]
+        worst = max((a[best] for a in awaits if isinstance(a[best], (int, float))), default=None)
+        _set(signals, "disk_await_ms", worst)
+    return signals
+
+
+def _mpstat(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "mpstat")
+    signals: Dict[str, Any] = {}
+    cpus = [str(c) for c in _col(table, "CPU")]
+    idle = _col(table, "%idle")
+    rows = _last_sample_rows(table)
+    busy = {cpus[i]: round(100.0 - idle[i], 2) for i in rows if i < len(idle) and isinstance(idle[i], (int, float))}
+    _set(signals, "cpu_busy_pct", busy.pop("all", None))
+    if busy:
+        core = max(busy, key=lambda c: busy[c])
+        signals["cpu_core_busy_max_pct"] = busy[core]
+        signals["cpu_core_busy_max_id"] = core
+    return signals
+
+
+def _top_proc(table: Dict[str, Any], metric: str, cmd_col: str, prefix: str) -> Dict[str, Any]:
+    signals: Dict[str, Any] = {}
+    values = _col(table, metric)
+    best = _argmax(values)
+    if best is None:
+        return signals
+    signals[f"{prefix}_pct"] = values[best]
+    pids = _col(table, "PID")
+    cmds = _col(table, cmd_col)
+    if best < len(pids):
+        signals[f"{prefix}_pid"] = pids[best]
+    if best < len(cmds):
+        signals[f"{prefix}_cmd"] = str(cmds[best])[:200]
+    return signals
+
+
+def _top(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    signals = _top_proc(_table(parsed, "procs"), "%CPU", "COMMAND", "top_proc_cpu")
+    _set(signals, "procs_zombie", (parsed.get("tasks") or {}).get("zombie"))
+    return signals
 
+
+def _ps_cpu(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    return _top_proc(_table(parsed, "procs"), "%CPU", "CMD", "top_proc_cpu")
+
+
+def _ps_mem(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    return _top_proc(_table(parsed, "procs"), "%MEM", "CMD", "top_proc_mem")
+
+
+def _df(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "fs")
+    signals: Dict[str, Any] = {}
+    use = _col(table, "use_pct")
+    best = _argmax(use)
+    if best is not None:
+        signals["disk_use_max_pct"] = use[best]
+        mounts = _col(table, "mounted_on")
+        if best < len(mounts):
+            signals["disk_use_max_mount"] = mounts[best]
+    return signals
+
+
+def _jps(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    mains = [str(m) for m in _col(_table(parsed, "jvms"), "main")]
+    return {"jvm_count": len([m for m in mains if not m.endswith(".Jps")])}
+
+
+def _jstat(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "gc")
+    signals: Dict[str, Any] = {}
+    if not table.get("rows"):
+        return signals
+    old, meta, fgc, gct = (_nums(_col(table, c)) for c in ("O", "M", "FGC", "GCT"))
+    if old:
+        signals["jvm_old_gen_pct"] = old[-1]
+    if meta:
+        signals["jvm_metaspace_pct"] = meta[-1]
+    if fgc:
+        signals["jvm_fgc_count"] = int(fgc[-1])
+        signals["jvm_fgc_delta"] = int(fgc[-1] - fgc[0])
+    if gct:
+        signals["jvm_gc_time_delta_s"] = round(gct[-1] - gct[0], 3)
+    return signals
+
+
+def _pidstat(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    return _top_proc(_table(parsed, "procs"), "%CPU", "Command", "pidstat_cpu")
+
+
+def _pidstat_io(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "procs")
+    rows = _last_sample_rows(table)
+    signals: Dict[str, Any] = {}
+    writes = _col(table, "kB_wr/s")
+    best = _argmax(writes, rows)
+    if best is not None:
+        signals["pidstat_io_write_kb_s"] = writes[best]
+        pids = _col(table, "PID")
+        if best < len(pids):
+            signals["pidstat_io_write_pid"] = pids[best]
+    reads = _col(table, "kB_rd/s")
+    best = _argmax(reads, rows)
+    if best is not None:
+        signals["pidstat_io_read_kb_s"] = reads[best]
+    delays = [_col(table, "iodelay")[i] for i in rows if i < len(_col(table, "iodelay"))]
+    if _nums(delays):
+        signals["pidstat_iodelay_max"] = max(_nums(delays))
+    return signals
+
+
+def _ss(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    table = _table(parsed, "conns")
+    states = [str(s).upper() for s in _col(table, "state")]
+    recv_q = _nums(_col(table, "recv_q"))
+    send_q = _nums(_col(table, "send_q"))
+    signals: Dict[str, Any] = {
+        "tcp_conn_count": len(states),
+        "tcp_established": states.count("ESTAB"),
+        "tcp_close_wait": states.count("CLOSE-WAIT"),
+    }
+    if recv_q:
+        signals["tcp_recv_q_max"] = int(max(recv_q))
+    if send_q:
+        signals["tcp_send_q_max"] = int(max(send_q))
+    return signals
+
+
+def _proc_pid_io(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    io = parsed.get("io") or {}
+    signals: Dict[str, Any] = {}
+    _set(signals, "proc_read_bytes", io.get("read_bytes"))
+    _set(signals, "proc_write_bytes", io.get("write_bytes"))
+    return signals
+
+
+def _thread_dump(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    dump = parsed.get("threads") or {}
+    if not dump.get("threads"):
+        return {}
+    states = dump.get("states") or {}
+    locks = dump.get("contended_locks") or []
+    cycles = dump.get("deadlocks") or []
+    signals: Dict[str, Any] = {
+        "threads_total": dump["threads"],
+        "threads_blocked": states.get("BLOCKED", 0),
+        "threads_runnable": states.get("RUNNABLE", 0),
+        "threads_waiting": states.get("WAITING", 0) + states.get("TIMED_WAITING", 0),
+        "lock_blocked_max": locks[0]["waiters"] if locks else 0,
+        "deadlock_count": max(len(cycles), int(dump.get("jvm_reported_deadlocks") or 0)),
+    }
+    if locks:
+        signals["lock_blocked_max_class"] = locks[0].get("class") or locks[0].get("lock")
+    # Compact aggregate that stands in for the raw dump in evidence packs/prompts.
+    signals["thread_dump"] = {
+        "summary": dump.get("summary", ""),
+        "states": states,
+        "contended_locks": locks[:3],
+        "deadlocks": cycles[:3],
+        "top_stacks": [
+            {
+                "count": st.get("count"),
+                "states": st.get("states"),
+                "hash": st.get("hash"),
+                "frames": (st.get("frames") or [])[:5],
+            }
+            for st in (dump.get("top_stacks") or [])[:3]
+        ],
+    }
+    return signals
+
+
+def _proc_sample(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    ts = parsed.get("timeseries") or {}
+    series = ts.get("series") or {}
+    if not series:
+        return {}
+    signals: Dict[str, Any] = {"ts_samples": ts.get("samples"), "ts_span_sec": ts.get("span_sec")}
+    for name, stats in series.items():
+        for stat in STATS:
+            _set(signals, f"ts_{name}_{stat}", stats.get(stat))
+    signals["timeseries"] = {"summary": ts.get("summary", ""), "interval_sec": ts.get("interval_sec"), "series": series}
+    return signals
+
+
+# proc_snapshot section -> (document field, signal) pairs.
+_PROC_SNAPSHOT_FIELDS = {
+    "cpu": (
+        ("count", "cpu_count"),
+        ("busy_pct", "cpu_busy_pct"),
+        ("user_pct", "cpu_user_pct"),
+        ("sys_pct", "cpu_sys_pct"),
+        ("idle_pct", "cpu_idle_pct"),
+        ("iowait_pct", "iowait_pct"),
+        ("steal_pct", "cpu_steal_pct"),
+        ("core_busy_max_pct", "cpu_core_busy_max_pct"),
+        ("core_busy_max_id", "cpu_core_busy_max_id"),
+    ),
+    "load": (("load1", "loadavg_1m"), ("load5", "loadavg_5m"), ("load15", "loadavg_15m")),
+    "vm": (
+        ("procs_running", "run_queue"),
+        ("procs_blocked", "blocked_procs"),
+        ("context_switches_s", "context_switches_s"),
+    ),
+    "mem": (
+        ("total_mb", "mem_total_mb"),
+        ("used_mb", "mem_used_mb"),
+        ("available_mb", "mem_available_mb"),
+        ("swap_used_mb", "swap_used_mb"),
+    ),
+}
+
+
+def _proc_snapshot(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """registry.collector's JSON document; keys match the tool-based extractors."""
+    doc = parsed.get("proc")
+    if not isinstance(doc, dict):
+        return {}
+    signals: Dict[str, Any] = {}
+    for section, fields in _PROC_SNAPSHOT_FIELDS.items():
+        values = doc.get(section) or {}
+        for src, key in fields:
+            _set(signals, key, values.get(src))
+
+    disks = [d for d in doc.get("disks") or [] if isinstance(d, dict)]
+    if disks:
+        busiest = max(disks, key=lambda d: d.get("util_pct") or 0.0)
+        _set(signals, "disk_util_max_pct", busiest.get("util_pct"))
+        _set(signals, "disk_util_max_device", busiest.get("device"))
+        _set(signals, "disk_await_ms", busiest.get("await_ms"))
+
+    for resource, values in (doc.get("pressure") or {}).items():
+        for k in ("some_avg10", "full_avg10"):
+            _set(signals, f"psi_{resource}_{k}", (values or {}).get(k))
+
+    # procs is sorted by cpu_pct (busiest first); top_mem is the largest RSS.
+    procs = [p for p in doc.get("procs") or [] if isinstance(p, dict)]
+    tops = (("top_proc_cpu", procs[0] if procs else None, "cpu_pct"), ("top_proc_mem", doc.get("top_mem"), "mem_pct"))
+    for prefix, proc, metric in tops:
+        if isinstance(proc, dict) and proc.get(metric) is not None:
+            signals[f"{prefix}_pct"] = proc[metric]
+            _set(signals, f"{prefix}_pid", proc.get("pid"))
+            _set(signals, f"{prefix}_cmd", str(proc.get("comm") or "")[:200] or None)
+    top_io = doc.get("top_io")
+    if isinstance(top_io, dict):
+        _set(signals, "proc_io_pid", top_io.get("pid"))
+        _set(signals, "proc_io_read_kb_s", top_io.get("read_kb_s"))
+        _set(signals, "proc_io_write_kb_s", top_io.get("write_kb_s"))
+    # One-line snapshot text (orchestrator.graph.snapshot_signal) instead of the raw JSON.
+    parts = []
+    if "cpu_busy_pct" in signals:
+        parts.append(f"cpu {signals['cpu_busy_pct']}% busy, iowait {signals.get('iowait_pct')}%")
+    if "loadavg_1m" in signals:
+        parts.append(f"load {signals['loadavg_1m']} on {signals.get('cpu_count')} cpus")
+    if "mem_available_mb" in signals:
+        parts.append(f"mem {signals['mem_available_mb']}/{signals.get('mem_total_mb')}MB available")
+    if "disk_util_max_pct" in signals:
+        parts.append(f"disk {signals.get('disk_util_max_device')} {signals['disk_util_max_pct']}% util")
+    if "top_proc_cpu_pid" in signals:
+        parts.append(f"top cpu {signals.get('top_proc_cpu_cmd')}[{signals['top_proc_cpu_pid']}] {signals['top_proc_cpu_pct']}%")
+    signals["proc_snapshot"] = {"summary": "; ".join(parts)}
+    return signals
+
+
+EXTRACTORS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "uptime": _load,
+    "loadavg": _load,
+    "nproc": _nproc,
+    "free": _free,
+    "vmstat": _vmstat,
+    "iostat": _iostat,
+    "mpstat": _mpstat,
+    "top": _top,
+    "ps_cpu": _ps_cpu,
+    "ps_mem": _ps_mem,
+    "df": _df,
+    "jps": _jps,
+    "jstat": _jstat,
+    "pidstat": _pidstat,
+    "pidstat_io": _pidstat_io,
+    "ss": _ss,
+    "proc_pid_io": _proc_pid_io,
+    "jstack": _thread_dump,
+    "jcmd_threads": _thread_dump,
+    "proc_sample": _proc_sample,
+    "proc_snapshot": _proc_snapshot,
+}
+
+
+def extract_signals(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    # Commands that reuse a builtin parser (`parser: vmstat`) reuse its extractor too.
+    extractor = EXTRACTORS.get(str(parsed.get("parser") or parsed.get("cmd_id")))
+    signals: Dict[str, Any] = {}
+    if extractor is not None:
+        try:
+            signals = extractor(parsed)
+        except Exception:
+            signals = {}
     return {"signals": signals}
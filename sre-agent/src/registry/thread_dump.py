@@ -0,0 +1,294 @@
+"""Streaming thread dump analyzer (jstack -l / jcmd Thread.print).
+
+`ThreadDumpAnalyzer` consumes a dump line by line (or in arbitrary chunks)
+and keeps aggregates only:
+- frames are interned to ints and a stack is the tuple of its frame ids, so
+  identical stacks across thousands of threads share one entry;
+- per-state thread counts;
+- a lock graph: who holds each monitor / ownable synchronizer, and who is
+  blocked on (or parked waiting for) it;
+- deadlock cycles, found on the thread wait-for graph.
+
+Thread names are not unique in a JVM, so the lock graph is keyed by the
+header's `#N` (else `nid=`, else `tid=`); names are kept for display only.
+
+Memory is bounded by the number of distinct frames/stacks (capped by
+`max_stacks`, `max_depth`) and lock-involved threads, not by dump size.
+`result()` is a compact summary meant to stand in for the raw dump in
+evidence packs and prompts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+_HEADER_RE = re.compile(r'^"(?P<name>.*)"(?:\s+#(?P<num>\d+))?')
+_NID_RE = re.compile(r"\bnid=(\S+)")
+_TID_RE = re.compile(r"\btid=(\S+)")
+_STATE_PREFIX = "java.lang.Thread.State:"
+_LOCK_RE = re.compile(
+    r"^\s*- (?P<kind>waiting to lock|locked|parking to wait for|waiting on|"
+    r"waiting to re-lock in wait\(\)|eliminated)\s+<(?P<addr>[^>]+)>(?:\s*\(a (?P<cls>[^)]+)\))?"
+)
+_OWNABLE_RE = re.compile(r"^\s*- <(?P<addr>[^>]+)>\s*\(a (?P<cls>[^)]+)\)")
+_JVM_DEADLOCK_RE = re.compile(r"^Found (?:one|\d+) Java-level deadlock")
+
+# Lock lines that mean "this thread cannot proceed until the owner releases".
+_BLOCKING = ("waiting to lock", "waiting to re-lock in wait()")
+
+
+class ThreadDumpAnalyzer:
+    def __init__(self, *, max_depth: int = 64, max_stacks: int = 20000) -> None:
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self._frame_ids: Dict[str, int] = {}
+        self._frames: List[str] = []
+        self._stacks: Dict[Tuple[int, ...], Dict[str, Any]] = {}
+        self._overflow_threads = 0
+        self.threads = 0
+        self.states: Dict[str, int] = {}
+        # lock addr -> class name; owner thread key; waiting threads (blocked / parked)
+        self._lock_cls: Dict[str, str] = {}
+        self._owner: Dict[str, str] = {}
+        self._blocked: Dict[str, int] = {}
+        self._parked: Dict[str, int] = {}
+        # thread key -> lock addr; thread key -> name, for lock-involved threads
+        self._waits_for: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._headers = 0
+        self.jvm_reported_deadlocks = 0
+        self._trailer = False
+        self._carry = ""
+        self._reset_thread(None)
+
+    def _reset_thread(self, name: Optional[str], key: str = "") -> None:
+        self._name = name
+        self._key = key
+        self._state = ""
+        self._stack: List[int] = []
+        self._in_ownable = False
+
+    # -- input ---------------------------------------------------------------
+
+    def feed(self, chunk: str) -> None:
+        """Feed an arbitrary chunk of the dump (lines may span chunks)."""
+        buf = self._carry + chunk
+        cut = buf.rfind("\n") + 1
+        self._carry = buf[cut:]
+        self.feed_lines(buf[:cut].splitlines())
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        frame_ids = self._frame_ids
+        for line in lines:
+            if not line:
+                continue
+            c = line[0]
+            if c == "\t" or c == " ":
+                s = line.lstrip()
+                if s.startswith("at "):
+                    if self._name is not None and len(self._stack) < self.max_depth:
+                        frame = s[3:]
+                        fid = frame_ids.get(frame)
+                        if fid is None:
+                            fid = frame_ids[frame] = len(self._frames)
+                            self._frames.append(frame)
+                        self._stack.append(fid)
+                elif s.startswith("- "):
+                    self._lock_line(line)
+                elif s.startswith(_STATE_PREFIX):
+                    rest = s[len(_STATE_PREFIX) :].split(None, 1)
+                    self._state = rest[0] if rest else ""
+                elif s.startswith("Locked ownable synchronizers"):
+                    self._in_ownable = True
+            elif c == '"':
+                self._end_thread()
+                # Threads named again in the JVM's deadlock report are not new threads.
+                m = None if self._trailer else _HEADER_RE.match(line)
+                if m is None:
+                    self._reset_thread(None)
+                else:
+                    self._reset_thread(m.group("name"), self._thread_key(line, m.group("num")))
+            else:
+                if _JVM_DEADLOCK_RE.match(line):
+                    self.jvm_reported_deadlocks += 1
+                    self._trailer = True
+                elif line.startswith("Full thread dump"):
+                    self._trailer = False
+                # Deadlock reports, "JNI global refs", markers, ... end the thread section.
+                self._end_thread()
+                self._reset_thread(None)
+
+    def _thread_key(self, header: str, num: Optional[str]) -> str:
+        self._headers += 1
+        if num:
+            return f"#{num}"
+        for prefix, regex in (("nid=", _NID_RE), ("tid=", _TID_RE)):
+            m = regex.search(header)
+            if m:
+                return prefix + m.group(1)
+        return f"@{self._headers}"
+
+    def _lock_line(self, line: str) -> None:
+        name = self._name
+        if name is None:
+            return
+        key = self._key
+        if self._in_ownable:
+            m = _OWNABLE_RE.match(line)
+            if m:
+                addr = m.group("addr")
+                self._lock_cls.setdefault(addr, m.group("cls"))
+                self._owner[addr] = key
+                self._names[key] = name
+            return
+        m = _LOCK_RE.match(line)
+        if m is None:
+            return
+        kind, addr, cls = m.group("kind"), m.group("addr"), m.group("cls")
+        if cls:
+            self._lock_cls.setdefault(addr, cls)
+        if kind == "locked":
+            self._owner[addr] = key
+        elif kind in _BLOCKING:
+            self._blocked[addr] = self._blocked.get(addr, 0) + 1
+            self._waits_for[key] = addr
+        elif kind == "parking to wait for":
+            self._parked[addr] = self._parked.get(addr, 0) + 1
+            self._waits_for.setdefault(key, addr)
+        else:
+            return
+        self._names[key] = name
+
+    def _end_thread(self) -> None:
+        if self._name is None:
+            return
+        self.threads += 1
+        state = self._state or "UNKNOWN"
+        self.states[state] = self.states.get(state, 0) + 1
+        key = tuple(self._stack)
+        entry = self._stacks.get(key)
+        if entry is None:
+            if len(self._stacks) >= self.max_stacks:
+                self._overflow_threads += 1
+                return
+            entry = self._stacks[key] = {"count": 0, "states": {}, "threads": []}
+        entry["count"] += 1
+        entry["states"][state] = entry["states"].get(state, 0) + 1
+        if len(entry["threads"]) < 3:
+            entry["threads"].append(self._name)
+
+    def close(self) -> None:
+        if self._carry:
+            self.feed_lines([self._carry])
+            self._carry = ""
+        self._end_thread()
+        self._reset_thread(None)
+
+    # -- output --------------------------------------------------------------
+
+    def stack_hash(self, key: Tuple[int, ...]) -> str:
+        text = "\n".join(self._frames[i] for i in key)
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+    def deadlocks(self) -> List[List[str]]:
+        """Cycles in the thread -> (lock owner) wait-for graph, as thread names."""
+        edges: Dict[str, str] = {}
+        for thread, addr in self._waits_for.items():
+            owner = self._owner.get(addr)
+            if owner is not None and owner != thread:
+                edges[thread] = owner
+        cycles: List[List[str]] = []
+        seen: Set[str] = set()
+        for start in edges:
+            if start in seen:
+                continue
+            path: List[str] = []
+            index: Dict[str, int] = {}
+            node: Optional[str] = start
+            while node is not None and node not in seen and node not in index:
+                index[node] = len(path)
+                path.append(node)
+                node = edges.get(node)
+            if node is not None and node in index:
+                cycles.append([self._names.get(k, k) for k in path[index[node] :]])
+            seen.update(path)
+        return cycles
+
+    def contended(self, top: int = 10) -> List[Dict[str, Any]]:
+        """Locks with waiters, most contended first.
+
+        Parked threads only count when the synchronizer has an owner: parking
+        on an idle pool's condition queue is not contention.
+        """
+        out = []
+        for addr in set(self._blocked) | set(self._parked):
+            owner = self._owner.get(addr)
+            blocked = self._blocked.get(addr, 0)
+            parked = self._parked.get(addr, 0) if owner is not None else 0
+            if blocked + parked == 0:
+                continue
+            out.append(
+                {
+                    "lock": addr,
+                    "class": self._lock_cls.get(addr, ""),
+                    "owner": self._names.get(owner, owner) if owner is not None else "",
+                    "blocked": blocked,
+                    "parked": parked,
+                    "waiters": blocked + parked,
+                }
+            )
+        out.sort(key=lambda x: (-x["waiters"], x["lock"]))
+        return out[:top]
+
+    def top_stacks(self, top: int = 5, frames: int = 8) -> List[Dict[str, Any]]:
+        ranked = sorted(self._stacks.items(), key=lambda kv: -kv[1]["count"])[:top]
+        return [
+            {
+                "hash": self.stack_hash(key),
+                "count": entry["count"],
+                "states": dict(entry["states"]),
+                "threads": list(entry["threads"]),
+                "frames": [self._frames[i] for i in key[:frames]],
+            }
+            for key, entry in ranked
+        ]
+
+    def result(self, *, top_stacks: int = 5, top_locks: int = 10) -> Dict[str, Any]:
+        self.close()
+        cycles = self.deadlocks()
+        locks = self.contended(top_locks)
+        stacks = self.top_stacks(top_stacks)
+        top_lock = locks[0] if locks else None
+        summary = (
+            f"threads={self.threads} "
+            + " ".join(f"{k}={v}" for k, v in sorted(self.states.items(), key=lambda kv: -kv[1]))
+            + (
+                f"; most contended {top_lock['class'] or top_lock['lock']} waiters={top_lock['waiters']}"
+                f" owner={top_lock['owner'] or '?'}"
+                if top_lock
+                else ""
+            )
+            + (f"; deadlocks={len(cycles)}" if cycles else "")
+            + (f"; largest identical stack x{stacks[0]['count']}" if stacks and stacks[0]["count"] > 1 else "")
+        )
+        return {
+            "threads": self.threads,
+            "states": dict(self.states),
+            "distinct_stacks": len(self._stacks),
+            "untracked_stack_threads": self._overflow_threads,
+            "distinct_frames": len(self._frames),
+            "top_stacks": stacks,
+            "contended_locks": locks,
+            "deadlocks": cycles,
+            "jvm_reported_deadlocks": self.jvm_reported_deadlocks,
+            "summary": summary[:500],
+        }
+
+
+def analyze_thread_dump(text: str, **kwargs: Any) -> Dict[str, Any]:
+    analyzer = ThreadDumpAnalyzer()
+    analyzer.feed_lines(text.splitlines())
+    return analyzer.result(**kwargs)
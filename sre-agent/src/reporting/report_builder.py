@@ -1,16 +1,82 @@
 """Report builder using LLM adapter and schema-aligned prompt."""
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from adapters.llm.base import LLMClient
+from adapters.llm.cache import invalidate_response
 from reporting.prompt_templates import build_report_prompt
 from reporting.schema_validate import validate_schema
 from policy.action_filter import filter_actions
 
 
-def build_report(llm: LLMClient, evidence: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
+def build_report(
+    llm: LLMClient, evidence: Dict[str, Any], schema: Dict[str, Any], *, timeout: Optional[float] = None
+) -> Dict[str, Any]:
     prompt = build_report_prompt(evidence, schema)
-    report = llm.generate_json(prompt, schema, temperature=0.2)
+    options: Dict[str, Any] = {}
+    if timeout and (getattr(llm, "capabilities", dict)() or {}).get("request_timeout"):
+        options["timeout"] = timeout
+    report = llm.generate_json(prompt, schema, temperature=0.2, **options)
+    try:
+        return _finalize_report(report, evidence, schema)
+    except Exception:
+        # Do not replay a rejected answer from the LLM cache on the next run.
+        invalidate_response(llm, prompt, schema, temperature=0.2)
+        raise
+
+
+def build_fallback_report(evidence: Dict[str, Any], schema: Dict[str, Any], *, reason: str) -> Dict[str, Any]:
+    """Deterministic report from the evidence pack alone, used when no time is left for the LLM."""
+    meta = evidence.get("meta") or {}
+    hyps = [h for h in (evidence.get("hypothesis") or []) if isinstance(h, dict)]
+    top = hyps[0] if hyps else {}
+    categories = (((schema.get("properties") or {}).get("root_cause") or {}).get("properties") or {}).get("category", {}).get("enum") or []
+    category = str(top.get("category") or "UNKNOWN")
+    if categories and category not in categories:
+        category = "UNKNOWN"
+    try:
+        confidence = min(1.0, max(0.0, float(top.get("confidence") or 0.0)))
+    except (TypeError, ValueError):
+        confidence = 0.0
+    try:
+        window = int(meta.get("collection_window_minutes") or 0)
+    except (TypeError, ValueError):
+        window = 0
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "host": str(meta.get("host") or ""),
+            "service": str(meta.get("service") or ""),
+            "timestamp": str(meta.get("timestamp") or ""),
+            "collection_window_minutes": window,
+            "agent_version": str(meta.get("agent_version") or "dev"),
+        },
+        "root_cause": {
+            "category": category,
+            "summary": f"rule-based: {top.get('why') or 'no matching rule'} (LLM report skipped: {reason})",
+            "confidence": confidence,
+        },
+        "evidence_table": [
+            {
+                "cmd_id": str(s.get("cmd_id")),
+                "signal": str(s.get("signal") or ""),
+                "interpretation": str(s.get("summary") or ""),
+                "evidence_ref": str(s.get("audit_ref")),
+            }
+            for s in (evidence.get("snapshots") or [])
+            if isinstance(s, dict) and s.get("cmd_id") and s.get("audit_ref")
+        ],
+        "next_actions": [],
+        "audit": {"session_id": str(meta.get("session_id") or ""), "commands": []},
+        # Snapshots in the pack are already redacted.
+        "redaction": {"applied": True, "rules": [], "replaced_count": 0},
+    }
+    if meta.get("env"):
+        report["meta"]["env"] = str(meta["env"])
+    return _finalize_report(report, evidence, schema)
+
+
+def _finalize_report(report: Dict[str, Any], evidence: Dict[str, Any], schema: Dict[str, Any]) -> Dict[str, Any]:
     # Enforce READ_ONLY/LOW action policy even if schema passes.
     policy = evidence.get("policy", {}) if isinstance(evidence, dict) else {}
     allowed_risks = policy.get("allowed_risks", ["READ_ONLY", "LOW"])
@@ -1,14 +1,144 @@
-"""Schema validation."""
+"""Schema validation.
 
-from typing import Any, Dict
+Validators are compiled once per schema and kept in a process-wide registry:
+`jsonschema.validate` re-checks the schema against its meta-schema and builds
+a new validator on every call, which dominates the cost for the small
+documents validated here (plans, reports, evidence packs, replay cases).
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+- validate_schema(payload, schema): raises ValueError on the first (best) error
+- load_schema(path): schema file cache keyed by path and mtime
+- compiled_validator(schema) / validator_for_path(path): the shared validators
+- structural_check(payload, schema): cheap required-keys/top-level-types check
+  for bulk replay; a payload it rejects also fails the full validation
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from jsonschema import FormatChecker
+from jsonschema.exceptions import ValidationError, best_match
+from jsonschema.validators import validator_for
+
+
+FORMAT_CHECKER = FormatChecker()
+
+# JSON Schema type name -> Python types (bool is not a number here).
+_JSON_TYPES: Dict[str, Tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+
+_LOCK = threading.Lock()
+# canonical schema hash -> validator
+_VALIDATORS: Dict[str, Any] = {}
+# id(schema) -> (schema, validator); the schema is held so its id is not reused.
+_BY_ID: Dict[int, Tuple[Dict[str, Any], Any]] = {}
+# abspath -> (mtime_ns, schema)
+_FILES: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+# id(schema) -> (schema, required keys, {property: allowed types})
+_STRUCTURES: Dict[int, Tuple[Dict[str, Any], Tuple[str, ...], Dict[str, Tuple[type, ...]]]] = {}
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def compiled_validator(schema: Dict[str, Any]) -> Any:
+    """The shared validator for `schema` (checked against its meta-schema once).
+
+    Schemas are treated as immutable once validated against.
+    """
+    hit = _BY_ID.get(id(schema))
+    if hit is not None and hit[0] is schema:
+        return hit[1]
+    key = schema_hash(schema)
+    with _LOCK:
+        validator = _VALIDATORS.get(key)
+        if validator is None:
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            validator = cls(schema, format_checker=FORMAT_CHECKER)
+            _VALIDATORS[key] = validator
+        _BY_ID[id(schema)] = (schema, validator)
+    return validator
+
+
+def load_schema(path: str) -> Dict[str, Any]:
+    """Schema file contents, re-read only when the file changes."""
+    real = os.path.abspath(path)
+    mtime = os.stat(real).st_mtime_ns
+    hit = _FILES.get(real)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    with open(real, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    if not isinstance(schema, dict):
+        raise ValueError(f"invalid json schema: {path}")
+    with _LOCK:
+        _FILES[real] = (mtime, schema)
+    return schema
+
+
+def validator_for_path(path: str) -> Any:
+    return compiled_validator(load_schema(path))
 
 
 def validate_schema(payload: Dict[str, Any], schema: Dict[str, Any]) -> None:
-    try:
-        validate(instance=payload, schema=schema)
-    except ValidationError as exc:
-        path = ".".join([str(p) for p in exc.path]) if exc.path else "<root>"
-        raise ValueError(f"schema validation failed at {path}: {exc.message}") from exc
+    validator = compiled_validator(schema)
+    if validator.is_valid(payload):
+        return
+    exc: Optional[ValidationError] = best_match(validator.iter_errors(payload))
+    if exc is None:
+        return
+    path = ".".join([str(p) for p in exc.path]) if exc.path else "<root>"
+    raise ValueError(f"schema validation failed at {path}: {exc.message}") from exc
+
+
+def is_valid(payload: Any, schema: Dict[str, Any]) -> bool:
+    return bool(compiled_validator(schema).is_valid(payload))
+
+
+def _structure(schema: Dict[str, Any]) -> Tuple[Tuple[str, ...], Dict[str, Tuple[type, ...]]]:
+    hit = _STRUCTURES.get(id(schema))
+    if hit is not None and hit[0] is schema:
+        return hit[1], hit[2]
+    required = tuple(str(k) for k in (schema.get("required") or []))
+    types: Dict[str, Tuple[type, ...]] = {}
+    for name, prop in (schema.get("properties") or {}).items():
+        declared = prop.get("type") if isinstance(prop, dict) else None
+        names = [declared] if isinstance(declared, str) else list(declared or [])
+        if names and all(n in _JSON_TYPES for n in names):
+            types[name] = tuple(t for n in names for t in _JSON_TYPES[n])
+    with _LOCK:
+        _STRUCTURES[id(schema)] = (schema, required, types)
+    return required, types
+
+
+def structural_check(payload: Any, schema: Dict[str, Any]) -> Optional[str]:
+    """Why `payload` cannot match an object schema, or None if it might.
+
+    Only the top level is checked (object, required keys, property types).
+    """
+    if not isinstance(payload, dict):
+        return "<root>: not an object"
+    required, types = _structure(schema)
+    for key in required:
+        if key not in payload:
+            return f"<root>: missing {key!r}"
+    for key, allowed in types.items():
+        if key in payload:
+            value = payload[key]
+            if not isinstance(value, allowed) or (isinstance(value, bool) and bool not in allowed):
+                return f"{key}: wrong type {type(value).__name__}"
+    return None
@@ -1,37 +1,363 @@
-"""Audit store."""
+"""Audit store.
+
+Segmented layout (the default): records are appended to rotating jsonl
+segments under `<audit_log>.d/segments/`, and every record that carries a
+`session_id` gets an entry `<segment> <offset> <length>` in that session's
+offset index `<audit_log>.d/sessions/<session_id>.idx`. `read_session` reads
+the index and seeks straight to the session's records, so its cost is
+O(session) instead of O(whole audit history).
+
+Segments rotate once they reach `segment_max_bytes` or are older than
+`segment_max_age_sec`; a rotated-out segment is made read-only, which tells
+writers in other processes that their cached current segment is stale. A legacy single-file `audit_log` is still read (with a
+warning); `scripts/migrate_audit_log.py` moves it into segments.
+
+With `segmented: false` the store keeps the old single jsonl file.
+"""
+
+from __future__ import annotations
 
 import json
+import logging
 import os
-from typing import Any, Dict
+import re
+import stat
+import threading
+import time
+from hashlib import sha256
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from storage.writer import WriteBehind
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+
+LOG = logging.getLogger("sre_agent.storage.audit_store")
+
+SEGMENT_DIR = "segments"
+SESSION_DIR = "sessions"
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_MAX_AGE_SEC = 24 * 3600
+
+_SEGMENT_RE = re.compile(r"^audit-(\d{6})-(\d+)\.jsonl$")
+_SAFE_SESSION_RE = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+_SEALED_MODE = 0o444
+
+
+def _false(v: Any) -> bool:
+    return str(v).lower() in ("false", "0", "no")
+
+
+def _parse_line(line: str) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except Exception:
+        return None
+    return record if isinstance(record, dict) else None
 
 
 class AuditStore:
-    def __init__(self, path: str) -> None:
+    def __init__(
+        self,
+        path: str,
+        *,
+        writer: Optional[WriteBehind] = None,
+        segmented: bool = True,
+        segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+        segment_max_age_sec: int = DEFAULT_SEGMENT_MAX_AGE_SEC,
+    ) -> None:
         self.path = path
+        # With a writer, appends are batched on its thread; reads flush it first.
+        self.writer = writer
+        self.segmented = segmented
+        self.segment_max_bytes = max(1, int(segment_max_bytes))
+        self.segment_max_age_sec = max(1, int(segment_max_age_sec))
+        self.root = f"{path}.d" if path else ""
+        self._lock = threading.Lock()
+        self._warned_legacy = False
+        # Newest segment as of the last append; re-listed once it is sealed.
+        self._segment: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], *, writer: Optional[WriteBehind] = None) -> Optional["AuditStore"]:
+        """Build from runtime config (`audit_log` + `audit`); None when auditing is off."""
+        path = config.get("audit_log") or ""
+        if not path:
+            return None
+        cfg = config.get("audit") or {}
+        return cls(
+            path,
+            writer=writer,
+            segmented=not _false(cfg.get("segmented", True)),
+            segment_max_bytes=int(cfg.get("segment_max_bytes") or DEFAULT_SEGMENT_MAX_BYTES),
+            segment_max_age_sec=int(cfg.get("segment_max_age_sec") or DEFAULT_SEGMENT_MAX_AGE_SEC),
+        )
+
+    # -- write ---------------------------------------------------------------
 
     def write(self, record: Dict[str, Any]) -> None:
         if not self.path:
             return
-        parent = os.path.dirname(self.path)
-        if parent:
-            os.makedirs(parent, exist_ok=True)
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        line = json.dumps(record, ensure_ascii=False)
+        if not self.segmented:
+            if self.writer is not None:
+                self.writer.append_line(self.path, line)
+                return
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            return
+        item = (line, str(record.get("session_id") or ""))
+        if self.writer is not None:
+            # Records queued together reach append_lines as one batch.
+            self.writer.append_to(self.append_lines, item)
+        else:
+            self.append_lines([item])
 
-    def read_all(self) -> list[Dict[str, Any]]:
-        if not self.path or not os.path.exists(self.path):
+    def append_lines(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Append (json_line, session_id) pairs to the segments and index them.
+
+        Holds the store lock (and an flock across processes) for the whole
+        batch. Returns the number of records written.
+        """
+        fsync = self.writer is not None and self.writer.fsync
+        index: Dict[str, List[str]] = {}
+        count = 0
+        with self._lock, self._process_lock():
+            seg_dir = os.path.join(self.root, SEGMENT_DIR)
+            name, f = self._open_current(seg_dir)
+            try:
+                offset = f.seek(0, os.SEEK_END)
+                for line, session_id in items:
+                    if self._should_rotate(name, offset):
+                        self._sync(f, fsync)
+                        f.close()
+                        os.chmod(os.path.join(seg_dir, name), _SEALED_MODE)
+                        name = self._next_segment(name)
+                        f = open(os.path.join(seg_dir, name), "ab")
+                        offset = f.seek(0, os.SEEK_END)
+                    data = (line + "\n").encode("utf-8")
+                    f.write(data)
+                    if session_id:
+                        index.setdefault(session_id, []).append(f"{name} {offset} {len(data)}\n")
+                    offset += len(data)
+                    count += 1
+                self._sync(f, fsync)
+            finally:
+                f.close()
+            self._segment = name
+            # Index entries are written after their records, so an entry never
+            # points past the end of a segment.
+            for session_id, entries in index.items():
+                idx_path = self._index_path(session_id)
+                os.makedirs(os.path.dirname(idx_path), exist_ok=True)
+                with open(idx_path, "a", encoding="utf-8") as idx:
+                    idx.write("".join(entries))
+                    if fsync:
+                        self._sync(idx, True)
+        return count
+
+    @staticmethod
+    def _sync(f: Any, fsync: bool) -> None:
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+    def _process_lock(self) -> "_FileLock":
+        return _FileLock(os.path.join(self.root, ".lock"))
+
+    def _index_path(self, session_id: str) -> str:
+        name = session_id if _SAFE_SESSION_RE.match(session_id) else sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, SESSION_DIR, f"{name}.idx")
+
+    def segments(self) -> List[str]:
+        """Segment file names, oldest first."""
+        seg_dir = os.path.join(self.root, SEGMENT_DIR)
+        try:
+            names = [n for n in os.listdir(seg_dir) if _SEGMENT_RE.match(n)]
+        except FileNotFoundError:
             return []
-        records: list[Dict[str, Any]] = []
+        return sorted(names)
+
+    def _open_current(self, seg_dir: str) -> Tuple[str, Any]:
+        """(name, append handle) of the newest segment; call under the locks.
+
+        The cached name is used until its segment turns out to be sealed
+        (rotated by another process); only then is the directory listed.
+        """
+        if self._segment is not None:
+            f = _open_unsealed(os.path.join(seg_dir, self._segment))
+            if f is not None:
+                return self._segment, f
+        os.makedirs(seg_dir, exist_ok=True)
+        names = self.segments()
+        if not names:
+            name = _segment_name(1)
+            return name, open(os.path.join(seg_dir, name), "ab")
+        name = names[-1]
+        f = _open_unsealed(os.path.join(seg_dir, name))
+        if f is None:
+            # Sealed by a writer that died before starting the next segment.
+            name = self._next_segment(name)
+            f = open(os.path.join(seg_dir, name), "ab")
+        return name, f
+
+    def _should_rotate(self, name: str, size: int) -> bool:
+        if size <= 0:
+            return False
+        if size >= self.segment_max_bytes:
+            return True
+        m = _SEGMENT_RE.match(name)
+        return m is not None and time.time() - int(m.group(2)) >= self.segment_max_age_sec
+
+    @staticmethod
+    def _next_segment(name: str) -> str:
+        m = _SEGMENT_RE.match(name)
+        return _segment_name(int(m.group(1)) + 1 if m else 1)
+
+    # -- read ----------------------------------------------------------------
+
+    def _flush_writer(self) -> None:
+        if self.writer is not None:
+            self.writer.flush()
+
+    def _legacy_records(self) -> Iterator[Dict[str, Any]]:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        if self.segmented and not self._warned_legacy:
+            self._warned_legacy = True
+            LOG.warning("unmigrated audit log %s is scanned in full; run scripts/migrate_audit_log.py", self.path)
         with open(self.path, "r", encoding="utf-8") as f:
             for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    records.append(json.loads(line))
-                except Exception:
+                record = _parse_line(line)
+                if record is not None:
+                    yield record
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Every record: the legacy file (if any), then segments in order."""
+        self._flush_writer()
+        yield from self._legacy_records()
+        if not self.segmented:
+            return
+        seg_dir = os.path.join(self.root, SEGMENT_DIR)
+        for name in self.segments():
+            with open(os.path.join(seg_dir, name), "r", encoding="utf-8") as f:
+                for line in f:
+                    record = _parse_line(line)
+                    if record is not None:
+                        yield record
+
+    def read_all(self) -> list[Dict[str, Any]]:
+        return list(self.iter_records())
+
+    def read_session(self, session_id: str) -> list[Dict[str, Any]]:
+        self._flush_writer()
+        legacy = [r for r in self._legacy_records() if r.get("session_id") == session_id]
+        if not self.segmented:
+            return legacy
+        return legacy + self._read_indexed(session_id)
+
+    def _read_indexed(self, session_id: str) -> list[Dict[str, Any]]:
+        try:
+            with open(self._index_path(session_id), "r", encoding="utf-8") as f:
+                entries = [line.split() for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+        records: list[Dict[str, Any]] = []
+        seg_dir = os.path.join(self.root, SEGMENT_DIR)
+        handles: Dict[str, Any] = {}
+        try:
+            for entry in entries:
+                if len(entry) != 3:
                     continue
+                name, offset, length = entry[0], int(entry[1]), int(entry[2])
+                seg = handles.get(name)
+                if seg is None:
+                    try:
+                        seg = handles[name] = open(os.path.join(seg_dir, name), "rb")
+                    except FileNotFoundError:
+                        continue
+                seg.seek(offset)
+                record = _parse_line(seg.read(length).decode("utf-8", errors="replace"))
+                # session ids are hashed into index names, so check for collisions.
+                if record is not None and record.get("session_id") == session_id:
+                    records.append(record)
+        finally:
+            for seg in handles.values():
+                seg.close()
         return records
 
-    def read_session(self, session_id: str) -> list[Dict[str, Any]]:
-        return [r for r in self.read_all() if (r.get("session_id") == session_id)]
+    def reindex(self) -> int:
+        """Rebuild every session index from the segments; returns records indexed."""
+        self._flush_writer()
+        with self._lock, self._process_lock():
+            index: Dict[str, List[str]] = {}
+            seg_dir = os.path.join(self.root, SEGMENT_DIR)
+            for name in self.segments():
+                offset = 0
+                with open(os.path.join(seg_dir, name), "rb") as f:
+                    for raw in f:
+                        record = _parse_line(raw.decode("utf-8", errors="replace"))
+                        session_id = str((record or {}).get("session_id") or "")
+                        if session_id:
+                            index.setdefault(session_id, []).append(f"{name} {offset} {len(raw)}\n")
+                        offset += len(raw)
+            sess_dir = os.path.join(self.root, SESSION_DIR)
+            os.makedirs(sess_dir, exist_ok=True)
+            for n in os.listdir(sess_dir):
+                if n.endswith(".idx"):
+                    os.unlink(os.path.join(sess_dir, n))
+            for session_id, entries in index.items():
+                with open(self._index_path(session_id), "w", encoding="utf-8") as f:
+                    f.write("".join(entries))
+        return sum(len(v) for v in index.values())
+
+
+def _open_unsealed(path: str) -> Optional[Any]:
+    """Append handle for path, or None if it is missing or sealed read-only."""
+    try:
+        f = open(path, "ab")
+    except (FileNotFoundError, PermissionError):
+        return None
+    if os.fstat(f.fileno()).st_mode & stat.S_IWUSR:
+        return f
+    f.close()
+    return None
+
+
+def _segment_name(seq: int) -> str:
+    return f"audit-{seq:06d}-{int(time.time())}.jsonl"
+
+
+class _FileLock:
+    """Exclusive flock on a lock file, so concurrent processes append safely."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._f: Optional[Any] = None
+
+    def __enter__(self) -> "_FileLock":
+        if fcntl is None:
+            return self
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._f = open(self.path, "a+")
+        fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._f is not None:
+            try:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._f.close()
+                self._f = None
@@ -0,0 +1,124 @@
+"""Content-addressed blob store.
+
+Blobs live under `<base_dir>/blobs/<sha[:2]>/<sha256><ext><codec suffix>`,
+where the hash is taken over the uncompressed bytes. Identical outputs
+(e.g. `uname`, `os_release`) are stored once across all sessions, and refs
+are deterministic: the same content always yields the same ref.
+
+Compression: gzip (stdlib) or zstd (optional `zstandard` package; falls back
+to gzip when it is not installed) or none.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+
+LOG = logging.getLogger("sre_agent.storage.blob_store")
+
+BLOB_DIR = "blobs"
+
+_SUFFIX = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+def _zstd() -> Optional[Any]:
+    try:
+        import zstandard
+
+        return zstandard
+    except Exception:
+        return None
+
+
+def resolve_codec(codec: str) -> str:
+    codec = (codec or "none").lower()
+    if codec in ("gz",):
+        codec = "gzip"
+    if codec not in _SUFFIX:
+        raise ValueError(f"unknown compression codec: {codec}")
+    if codec == "zstd" and _zstd() is None:
+        LOG.warning("zstandard not installed; falling back to gzip for evidence blobs")
+        return "gzip"
+    return codec
+
+
+def compress(data: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps the blob bytes deterministic.
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=level or 3).compress(data)
+    return data
+
+
+def decompress(data: bytes, path: str) -> bytes:
+    if path.endswith(_SUFFIX["gzip"]):
+        return gzip.decompress(data)
+    if path.endswith(_SUFFIX["zstd"]):
+        zstd = _zstd()
+        if zstd is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstd.ZstdDecompressor().decompress(data)
+    return data
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, base_dir: str, *, codec: str = "gzip", level: Optional[int] = None) -> None:
+        self.base_dir = base_dir
+        self.codec = resolve_codec(codec)
+        self.level = level
+
+    def ref_for(self, digest: str, ext: str) -> str:
+        return os.path.join(BLOB_DIR, digest[:2], f"{digest}{ext}{_SUFFIX[self.codec]}")
+
+    def put(self, data: bytes, *, ext: str = "", digest: Optional[str] = None) -> str:
+        """Store bytes once; returns the ref (relative to base_dir).
+
+        `digest` may be passed when the caller already hashed `data` (sha256).
+        """
+        digest = digest or sha256_hex(data)
+        ref = self.ref_for(digest, ext)
+        self.write(ref, data)
+        return ref
+
+    def write(self, ref: str, data: bytes, *, fsync: bool = False) -> None:
+        """Compress and store data at ref unless the blob already exists."""
+        path = os.path.join(self.base_dir, ref)
+        if os.path.exists(path):
+            return
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        # Write-then-rename so concurrent sessions never observe partial blobs.
+        fd, tmp = tempfile.mkstemp(dir=parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compress(data, self.codec, self.level))
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def get(self, ref: str) -> bytes:
+        return read_ref(self.base_dir, ref)
+
+
+def read_ref(base_dir: str, ref: str) -> bytes:
+    """Read any evidence ref (blob or legacy per-session file), decompressing as needed."""
+    path = os.path.join(base_dir, ref)
+    with open(path, "rb") as f:
+        return decompress(f.read(), path)
@@ -5,7 +5,15 @@ Stores three layers:
 - redacted: output after redaction
 - parsed: structured extraction
 
-Refs are returned as workspace-relative paths under the session directory.
+Refs are returned as paths relative to the evidence base dir. With
+`content_addressed` (the default via `from_config`) the three layers are
+stored as compressed, deduplicated blobs (see storage.blob_store) and refs
+point into `blobs/`; otherwise they are plain files under the session
+directory. `read_text`/`read_json` resolve either kind of ref.
+
+With a `WriteBehind` writer, refs are computed up front (content hash or a
+fresh uuid) and the file writes happen on the writer thread; call
+`flush()` before reading evidence back.
 """
 
 from __future__ import annotations
@@ -14,7 +22,10 @@ import json
 import os
 import uuid
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
+
+from storage.blob_store import BlobStore, read_ref, sha256_hex
+from storage.writer import WriteBehind, write_file
 
 
 @dataclass(frozen=True)
@@ -25,42 +36,97 @@ class EvidenceRefs:
 
 
 class EvidenceStore:
-    def __init__(self, base_dir: str, session_id: str) -> None:
+    def __init__(
+        self,
+        base_dir: str,
+        session_id: str,
+        *,
+        blobs: Optional[BlobStore] = None,
+        writer: Optional[WriteBehind] = None,
+    ) -> None:
         self.base_dir = base_dir
         self.session_id = session_id
         self.session_dir = os.path.join(base_dir, session_id)
+        self.blobs = blobs
+        self.writer = writer
         self._ensure_dirs()
 
+    @classmethod
+    def from_config(
+        cls, evidence_cfg: Optional[Mapping[str, Any]], session_id: str, *, writer: Optional[WriteBehind] = None
+    ) -> "EvidenceStore":
+        """Build a store from the `evidence` config section."""
+        cfg = evidence_cfg or {}
+        base_dir = cfg.get("base_dir", "report")
+        blobs = None
+        if str(cfg.get("content_addressed", True)).lower() not in ("false", "0", "no"):
+            level = cfg.get("compression_level")
+            blobs = BlobStore(base_dir, codec=str(cfg.get("compression") or "gzip"), level=int(level) if level else None)
+        return cls(base_dir, session_id, blobs=blobs, writer=writer)
+
     def _ensure_dirs(self) -> None:
-        for sub in ("raw", "redacted", "parsed", "index"):
+        subs = ("index",) if self.blobs is not None else ("raw", "redacted", "parsed", "index")
+        for sub in subs:
             os.makedirs(os.path.join(self.session_dir, sub), exist_ok=True)
 
     def _new_id(self) -> str:
         return uuid.uuid4().hex
 
-    def put_raw(self, cmd_id: str, data: str) -> str:
-        evid = self._new_id()
-        path = os.path.join(self.session_dir, "raw", f"{cmd_id}-{evid}.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(data or "")
-        return os.path.relpath(path, self.base_dir)
+    def _fsync(self) -> bool:
+        return self.writer is not None and self.writer.fsync
+
+    def _put_blob(self, data: bytes, ext: str, digest: Optional[str] = None) -> str:
+        assert self.blobs is not None
+        ref = self.blobs.ref_for(digest or sha256_hex(data), ext)
+        if self.writer is not None:
+            self.writer.submit(self._write_blob, ref, data)
+        else:
+            self._write_blob(ref, data)
+        return ref
 
-    def put_redacted(self, cmd_id: str, data: str) -> str:
-        evid = self._new_id()
-        path = os.path.join(self.session_dir, "redacted", f"{cmd_id}-{evid}.txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(data or "")
+    def _write_blob(self, ref: str, data: bytes) -> None:
+        assert self.blobs is not None
+        self.blobs.write(ref, data, fsync=self._fsync())
+
+    def _put_file(self, path: str, data: bytes) -> str:
+        if self.writer is not None:
+            self.writer.submit(write_file, path, data, self._fsync())
+        else:
+            write_file(path, data)
         return os.path.relpath(path, self.base_dir)
 
+    def put_raw(self, cmd_id: str, data: str) -> str:
+        body = (data or "").encode("utf-8")
+        if self.blobs is not None:
+            return self._put_blob(body, ".txt")
+        return self._put_file(os.path.join(self.session_dir, "raw", f"{cmd_id}-{self._new_id()}.txt"), body)
+
+    def put_redacted(self, cmd_id: str, data: str, digest: Optional[str] = None) -> str:
+        """`digest`: sha256 of data (storage.redaction.hash_text) if already computed."""
+        body = (data or "").encode("utf-8")
+        if self.blobs is not None:
+            return self._put_blob(body, ".txt", digest)
+        return self._put_file(os.path.join(self.session_dir, "redacted", f"{cmd_id}-{self._new_id()}.txt"), body)
+
     def put_parsed(self, cmd_id: str, data: Dict[str, Any]) -> str:
-        evid = self._new_id()
-        path = os.path.join(self.session_dir, "parsed", f"{cmd_id}-{evid}.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data or {}, f, ensure_ascii=True, indent=2)
-        return os.path.relpath(path, self.base_dir)
+        if self.blobs is not None:
+            body = json.dumps(data or {}, ensure_ascii=True, indent=2, sort_keys=True).encode("utf-8")
+            return self._put_blob(body, ".json")
+        body = json.dumps(data or {}, ensure_ascii=True, indent=2).encode("utf-8")
+        return self._put_file(os.path.join(self.session_dir, "parsed", f"{cmd_id}-{self._new_id()}.json"), body)
 
     def write_index(self, name: str, payload: Dict[str, Any]) -> str:
-        path = os.path.join(self.session_dir, "index", f"{name}.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(payload or {}, f, ensure_ascii=True, indent=2)
-        return os.path.relpath(path, self.base_dir)
+        # Serialized now: callers keep mutating payloads (e.g. evidence_pack) after this call.
+        body = json.dumps(payload or {}, ensure_ascii=True, indent=2).encode("utf-8")
+        return self._put_file(os.path.join(self.session_dir, "index", f"{name}.json"), body)
+
+    def flush(self) -> None:
+        """Wait for pending write-behind writes (no-op for synchronous stores)."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def read_text(self, ref: str) -> str:
+        return read_ref(self.base_dir, ref).decode("utf-8", errors="replace")
+
+    def read_json(self, ref: str) -> Any:
+        return json.loads(read_ref(self.base_dir, ref).decode("utf-8"))
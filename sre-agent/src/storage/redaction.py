@@ -1,31 +1,171 @@
-"""Redaction helpers."""
+"""Redaction helpers.
+
+All rules are compiled into one alternation with a named group per rule, so
+`redact` is a single scan that rewrites and counts in the same pass.
+`StreamRedactor` applies the same pattern to chunked output, and
+`redact_value` to the strings of a parsed structure.
+
+Parsers run on the raw output and the parsed layer is redacted afterwards
+(`redact_value`): with the PATH rule active, parsing redacted text would turn
+ps/jps command lines, df filesystems and mount points into `<PATH>` before
+any parser or binding saw them.
+
+Rule patterns must not match whitespace: the stream redactor relies on it to
+find chunk cut points that no match can straddle.
+"""
 
 import re
+from functools import lru_cache
 from hashlib import sha256
-from typing import List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 
 RULES = [
     ("IP", re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")),
-    ("EMAIL", re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")),
-    ("SECRET", re.compile(r"(AKIA|ASIA|sk-|token=|apikey=)[A-Za-z0-9\-_]+", re.IGNORECASE)),
-    ("PATH", re.compile(r"/(?:[\\w.-]+/)+[\\w.-]+")),
-    ("USER", re.compile(r"\buser(?:name)?=\\w+\b", re.IGNORECASE)),
+    # The lookbehind starts the local part only at a token boundary; without it
+    # every character of a long word is retried as a potential address start.
+    ("EMAIL", re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")),
+    # (?=...) first-char guards: case-insensitive literals are not prefix-optimized.
+    ("SECRET", re.compile(r"(?=[AaSsTt])(?:AKIA|ASIA|sk-|token=|apikey=)[A-Za-z0-9\-_]+", re.IGNORECASE)),
+    ("PATH", re.compile(r"/(?:[\w.-]+/)+[\w.-]+")),
+    # The leftmost match wins in the combined scan, so a value that starts an
+    # IP, e-mail or secret is left to that rule (user=<EMAIL>, not <USER>@...).
+    (
+        "USER",
+        re.compile(
+            r"\b(?=[Uu])user(?:name)?="
+            r"(?!(?:\d{1,3}\.){3}\d{1,3}\b|[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}|AKIA|ASIA|sk-|token=|apikey=)"
+            r"\w+\b",
+            re.IGNORECASE,
+        ),
+    ),
 ]
 
+RULE_NAMES = [name for name, _ in RULES]
 
-def redact(text: str) -> Tuple[str, List[str], int]:
-    replaced_count = 0
-    applied: List[str] = []
-    redacted = text
+
+# A literal every match of the rule contains. Rules whose literal is absent
+# from the text are left out of the alternation for that text, so the scan
+# only pays for rules that can match.
+_REQUIRED = {"IP": ".", "EMAIL": "@", "PATH": "/", "USER": "="}
+
+
+@lru_cache(maxsize=None)
+def _compile_combined(names: Tuple[str, ...]) -> "re.Pattern[str]":
+    # Earlier rules win when several match at the same position.
+    parts = []
     for name, pattern in RULES:
-        matches = pattern.findall(redacted)
-        if matches:
-            applied.append(name)
-            replaced_count += len(matches)
-            redacted = pattern.sub(f"<{name}>", redacted)
+        if name not in names:
+            continue
+        body = pattern.pattern
+        if pattern.flags & re.IGNORECASE:
+            body = f"(?i:{body})"
+        parts.append(f"(?P<{name}>{body})")
+    return re.compile("|".join(parts) or r"(?!)")
+
+
+COMBINED = _compile_combined(tuple(RULE_NAMES))
+
+
+def combined_for(text: str) -> "re.Pattern[str]":
+    """The combined pattern restricted to rules that can match `text`."""
+    names = tuple(name for name in RULE_NAMES if _REQUIRED.get(name, "") in text)
+    return _compile_combined(names)
+
+
+class _Counter:
+    """re.sub callback: replace a match with <RULE> and count it."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = {}
+
+    def __call__(self, m: "re.Match[str]") -> str:
+        name = m.lastgroup or ""
+        self.counts[name] = self.counts.get(name, 0) + 1
+        return f"<{name}>"
+
+    def summary(self) -> Tuple[List[str], int]:
+        applied = [name for name in RULE_NAMES if self.counts.get(name)]
+        return applied, sum(self.counts.values())
+
+
+def redact_counts(text: str) -> Tuple[str, Dict[str, int]]:
+    """Single-pass redaction; returns (redacted, replacements per rule)."""
+    counter = _Counter()
+    redacted = combined_for(text).sub(counter, text)
+    return redacted, counter.counts
+
+
+def redact(text: str) -> Tuple[str, List[str], int]:
+    counter = _Counter()
+    redacted = combined_for(text).sub(counter, text)
+    applied, replaced_count = counter.summary()
     return redacted, applied, replaced_count
 
 
+def redact_value(value: Any, counter: Optional[_Counter] = None) -> Any:
+    """Copy of a JSON-like value with every string (keys included) redacted."""
+    counter = counter if counter is not None else _Counter()
+    if isinstance(value, str):
+        return combined_for(value).sub(counter, value)
+    if isinstance(value, dict):
+        return {redact_value(k, counter) if isinstance(k, str) else k: redact_value(v, counter) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_value(v, counter) for v in value]
+    return value
+
+
+def redact_parsed(value: Any) -> Tuple[Any, List[str], int]:
+    """`redact` for a parsed structure: (redacted copy, applied rules, replacements)."""
+    counter = _Counter()
+    redacted = redact_value(value, counter)
+    applied, replaced_count = counter.summary()
+    return redacted, applied, replaced_count
+
+
+class StreamRedactor:
+    """Redact output chunk by chunk with results identical to `redact`.
+
+    Text after the last whitespace of a chunk is carried over to the next
+    one, since a match may continue there. A carry that grows past
+    `max_carry` (one huge whitespace-free token) is flushed as is to keep
+    memory bounded.
+    """
+
+    def __init__(self, max_carry: int = 64 * 1024) -> None:
+        self.max_carry = max_carry
+        self._carry = ""
+        self._counter = _Counter()
+
+    def feed(self, chunk: str) -> str:
+        buf = self._carry + chunk
+        cut = _last_ws_end(buf)
+        if cut == 0 and len(buf) <= self.max_carry:
+            self._carry = buf
+            return ""
+        if cut == 0:
+            cut = len(buf)
+        self._carry = buf[cut:]
+        head = buf[:cut]
+        return combined_for(head).sub(self._counter, head)
+
+    def close(self) -> str:
+        buf, self._carry = self._carry, ""
+        return combined_for(buf).sub(self._counter, buf) if buf else ""
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counter.counts)
+
+    def summary(self) -> Tuple[List[str], int]:
+        """(applied rule names, total replacements) so far, as returned by `redact`."""
+        return self._counter.summary()
+
+
+def _last_ws_end(text: str) -> int:
+    """Index just past the last newline/space/tab (0 if there is none)."""
+    return max(text.rfind("\n"), text.rfind(" "), text.rfind("\t")) + 1
+
+
 def hash_text(text: str) -> str:
     return sha256(text.encode("utf-8")).hexdigest()
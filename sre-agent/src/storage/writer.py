@@ -0,0 +1,206 @@
+"""Write-behind persistence.
+
+`WriteBehind` moves evidence/audit disk I/O off the command critical path:
+stores enqueue already-serialized payloads on a bounded queue and one writer
+thread performs the writes in batches (audit appends to the same file are
+coalesced into a single write, and items queued with `append_to` for the same
+sink reach it as one list). `flush()` is the barrier callers use before
+reading back or finalizing a session; it re-raises the first write error.
+
+Durability per batch:
+- none:  leave appends in the process buffer until the next flush() barrier
+- flush: flush appends to the OS after every batch (default)
+- fsync: flush and fsync appends and evidence files
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from typing import IO, Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+LOG = logging.getLogger("sre_agent.storage.writer")
+
+DURABILITY = ("none", "flush", "fsync")
+
+_STOP = object()
+_APPEND = "append"
+_GROUP = "group"
+_CALL = "call"
+_BARRIER = "barrier"
+
+
+class WriteBehind:
+    def __init__(self, *, durability: str = "flush", queue_size: int = 1024, batch_size: int = 64) -> None:
+        durability = (durability or "flush").lower()
+        if durability not in DURABILITY:
+            raise ValueError(f"unknown durability: {durability}")
+        self.durability = durability
+        self.batch_size = max(1, int(batch_size))
+        # Bounded: a full queue blocks submitters (backpressure) instead of growing memory.
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._handles: Dict[str, IO[str]] = {}
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Mapping[str, Any]]) -> Optional["WriteBehind"]:
+        """Build from `evidence.write_behind`; None when disabled (synchronous writes)."""
+        cfg = cfg or {}
+        if str(cfg.get("enabled", True)).lower() in ("false", "0", "no"):
+            return None
+        return cls(
+            durability=str(cfg.get("durability") or "flush"),
+            queue_size=int(cfg.get("queue_size") or 1024),
+            batch_size=int(cfg.get("batch_size") or 64),
+        )
+
+    @property
+    def fsync(self) -> bool:
+        return self.durability == "fsync"
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="sre-evidence-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Run fn(*args) on the writer thread."""
+        self._ensure_started()
+        self._q.put((_CALL, fn, args))
+
+    def append_line(self, path: str, line: str) -> None:
+        """Append one line (newline added) to path; batched per file."""
+        self._ensure_started()
+        self._q.put((_APPEND, path, line))
+
+    def append_to(self, sink: Callable[[List[Any]], Any], item: Any) -> None:
+        """Queue item for sink; items for the same sink in one batch go to a single sink(items) call."""
+        self._ensure_started()
+        self._q.put((_GROUP, sink, item))
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is written (and handed to the OS)."""
+        if self._thread is not None:
+            self._q.put((_BARRIER,))
+            self._q.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                thread = self._thread
+            if thread is not None:
+                self._q.put(_STOP)
+                thread.join()
+                self._thread = None
+
+    def __enter__(self) -> "WriteBehind":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            try:
+                self._write_batch([item for item in batch if item is not _STOP])
+            except BaseException as exc:  # keep the writer alive; surface on flush()
+                LOG.exception("write-behind batch failed")
+                with self._lock:
+                    self._errors.append(exc)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+            if stop:
+                self._close_handles()
+                return
+
+    def _write_batch(self, batch: List[Tuple[Any, ...]]) -> None:
+        appends: Dict[str, List[str]] = {}
+        groups: Dict[Callable[[List[Any]], Any], List[Any]] = {}
+        barrier = False
+        for item in batch:
+            if item[0] == _APPEND:
+                appends.setdefault(item[1], []).append(item[2])
+                continue
+            if item[0] == _GROUP:
+                groups.setdefault(item[1], []).append(item[2])
+                continue
+            if item[0] == _BARRIER:
+                barrier = True
+                continue
+            _, fn, args = item
+            try:
+                fn(*args)
+            except BaseException as exc:
+                LOG.exception("write-behind job failed")
+                with self._lock:
+                    self._errors.append(exc)
+        for sink, items in groups.items():
+            try:
+                sink(items)
+            except BaseException as exc:
+                LOG.exception("write-behind group append failed")
+                with self._lock:
+                    self._errors.append(exc)
+        for path, lines in appends.items():
+            f = self._handle(path)
+            f.write("".join(line + "\n" for line in lines))
+            if self.durability != "none":
+                f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        if barrier:
+            for f in self._handles.values():
+                f.flush()
+
+    def _handle(self, path: str) -> IO[str]:
+        f = self._handles.get(path)
+        if f is None:
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            f = open(path, "a", encoding="utf-8")
+            self._handles[path] = f
+        return f
+
+    def _close_handles(self) -> None:
+        for f in self._handles.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._handles.clear()
+
+
+def write_file(path: str, data: bytes, fsync: bool = False) -> None:
+    """Write a whole file (used for evidence files by sync and write-behind paths)."""
+    with open(path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.base import ThreadedAsyncExecutor, as_async_executor  # noqa: E402
+from adapters.exec.batch import BatchItem  # noqa: E402
+from adapters.exec.local import AsyncLocalExecutor, LocalExecutor  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+
+
+class AsyncSleepyExecutor:
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run(self, host, command, timeout=30):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.1)
+            return f"{host}:{command}\n"
+        finally:
+            self.in_flight -= 1
+
+    async def run_batch(self, host, items, *, concurrency=1):
+        raise AssertionError("batch not enabled")
+
+    def close(self) -> None:
+        pass
+
+
+class TestAsyncLocalExecutor(unittest.TestCase):
+    def test_run_and_stderr(self) -> None:
+        out = asyncio.run(AsyncLocalExecutor({}).run("localhost", "echo hi; echo oops >&2", timeout=5))
+        self.assertEqual(out, "hi\n\n[stderr]\noops\n")
+
+    def test_timeout_kills_command(self) -> None:
+        start = time.time()
+        out = asyncio.run(AsyncLocalExecutor({}).run("localhost", "sleep 5", timeout=1))
+        self.assertEqual(out, "command timeout after 1s")
+        self.assertLess(time.time() - start, 3)
+
+    def test_run_batch(self) -> None:
+        items = [BatchItem("a", "echo a"), BatchItem("b", "echo b")]
+        res = asyncio.run(AsyncLocalExecutor({}).run_batch("localhost", items, concurrency=2))
+        self.assertEqual([r.output for r in res], ["a\n", "b\n"])
+
+
+class TestAsyncAdapter(unittest.TestCase):
+    def test_as_async_executor(self) -> None:
+        self.assertIsInstance(as_async_executor(LocalExecutor({})), ThreadedAsyncExecutor)
+        ex = AsyncLocalExecutor({})
+        self.assertIs(as_async_executor(ex), ex)
+
+    def test_orchestrator_with_async_executor(self) -> None:
+        cmd_ids = [f"c{i}" for i in range(8)]
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {c: {"cmd": c, "risk": "READ_ONLY", "platform": "linux"} for c in cmd_ids},
+                "baseline": {"cmds": {"linux": cmd_ids}},
+                "execution": {"per_host_concurrency": 8},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+            }
+            executor = AsyncSleepyExecutor()
+            orch = Orchestrator(cfg, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="a1", exec_mode="ssh", platform="linux")
+            start = time.time()
+            pack = orch.run(ctx)
+            self.assertLess(time.time() - start, 0.5)
+            self.assertEqual(executor.max_in_flight, 8)
+            self.assertEqual([s["signal"] for s in pack["snapshots"]], [f"h:{c}" for c in cmd_ids])
+
+
+if __name__ == "__main__":
+    unittest.main()
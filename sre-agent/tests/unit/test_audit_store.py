@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from storage.audit_store import AuditStore  # noqa: E402
+from storage.writer import WriteBehind  # noqa: E402
+
+
+class TestSegmentedAuditStore(unittest.TestCase):
+    def test_rotation_and_session_index(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AuditStore(os.path.join(tmp, "audit.log"), segment_max_bytes=200)
+            for i in range(30):
+                store.write({"session_id": f"s{i % 3}", "id": i, "cmd_id": "uptime"})
+            store.write({"id": "no-session"})
+
+            self.assertGreater(len(store.segments()), 3)
+            self.assertEqual([r["id"] for r in store.read_session("s1")], list(range(1, 30, 3)))
+            self.assertEqual(store.read_session("missing"), [])
+            self.assertEqual(len(store.read_all()), 31)
+
+    def test_read_session_does_not_scan_other_sessions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AuditStore(os.path.join(tmp, "audit.log"))
+            store.write({"session_id": "a", "id": 1})
+            store.write({"session_id": "b", "id": 2})
+            # Garbage in the segment outside session a's offsets is never read.
+            seg = os.path.join(store.root, "segments", store.segments()[-1])
+            with open(seg, "a", encoding="utf-8") as f:
+                f.write("not json\n")
+            store.write({"session_id": "a", "id": 3})
+            self.assertEqual([r["id"] for r in store.read_session("a")], [1, 3])
+
+    def test_write_behind_and_reindex(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.log")
+            with WriteBehind() as writer:
+                store = AuditStore(path, writer=writer, segment_max_bytes=100)
+                for i in range(10):
+                    store.write({"session_id": "s/x", "id": i})
+                self.assertEqual([r["id"] for r in store.read_session("s/x")], list(range(10)))
+            for name in os.listdir(os.path.join(store.root, "sessions")):
+                os.unlink(os.path.join(store.root, "sessions", name))
+            self.assertEqual(store.read_session("s/x"), [])
+            self.assertEqual(store.reindex(), 10)
+            self.assertEqual([r["id"] for r in store.read_session("s/x")], list(range(10)))
+
+    def test_write_behind_appends_queued_records_in_one_call(self) -> None:
+        class CountingStore(AuditStore):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.batches = []
+                self.listings = 0
+
+            def append_lines(self, items):
+                items = list(items)
+                self.batches.append(len(items))
+                return super().append_lines(items)
+
+            def segments(self):
+                self.listings += 1
+                return super().segments()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with WriteBehind(batch_size=64) as writer:
+                store = CountingStore(os.path.join(tmp, "audit.log"), writer=writer)
+                gate = threading.Event()
+                writer.submit(gate.wait, 5)  # hold the writer thread while records queue up
+                for i in range(20):
+                    store.write({"session_id": f"s{i % 2}", "id": i})
+                gate.set()
+                writer.flush()
+                for i in range(20, 25):
+                    store.write({"session_id": "s0", "id": i})
+                    writer.flush()
+                self.assertEqual(store.batches, [20, 1, 1, 1, 1, 1])
+                # The segment directory is listed once, not on every append.
+                self.assertEqual(store.listings, 1)
+                self.assertEqual([r["id"] for r in store.read_session("s1")], list(range(1, 20, 2)))
+
+    def test_picks_up_segments_rotated_by_another_writer(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.log")
+            a = AuditStore(path)
+            b = AuditStore(path, segment_max_bytes=1)
+            a.write({"session_id": "s", "id": 0})
+            b.write({"session_id": "s", "id": 1})
+            b.write({"session_id": "s", "id": 2})
+            a.write({"session_id": "s", "id": 3})
+            names = a.segments()
+            self.assertEqual([n.split("-")[1] for n in names], ["000001", "000002", "000003"])
+            with open(os.path.join(a.root, "segments", names[-1]), "r", encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["id"] for line in f], [2, 3])
+            # Rotated-out segments are sealed read-only.
+            self.assertFalse(os.stat(os.path.join(a.root, "segments", names[0])).st_mode & 0o222)
+            self.assertEqual([r["id"] for r in a.read_session("s")], [0, 1, 2, 3])
+
+    def test_migrate_legacy_log(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.log")
+            with open(path, "w", encoding="utf-8") as f:
+                for i in range(5):
+                    f.write(json.dumps({"session_id": "old", "id": i}) + "\n")
+                f.write("broken\n")
+            store = AuditStore(path)
+            # Unmigrated logs are still readable.
+            self.assertEqual(len(store.read_session("old")), 5)
+
+            script = os.path.join(ROOT_DIR, "scripts", "migrate_audit_log.py")
+            out = subprocess.run([sys.executable, script, path], capture_output=True, text=True, check=True)
+            summary = json.loads(out.stdout)
+            self.assertEqual((summary["migrated"], summary["skipped"]), (5, 1))
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual([r["id"] for r in AuditStore(path).read_session("old")], list(range(5)))
+
+    def test_legacy_single_file_mode(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.log")
+            store = AuditStore.from_config({"audit_log": path, "audit": {"segmented": False}})
+            store.write({"session_id": "s", "id": 1})
+            self.assertTrue(os.path.isfile(path))
+            self.assertFalse(os.path.exists(store.root))
+            self.assertEqual(store.read_session("s"), [{"session_id": "s", "id": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.batch import BatchItem, build_batch_script, parse_batch_output  # noqa: E402
+
+
+class TestBatchFraming(unittest.TestCase):
+    def test_parse_frames(self) -> None:
+        items = [BatchItem("a", "x"), BatchItem("b", "y", timeout=3)]
+        text = (
+            "noise\n"
+            "<<<SRE:n1:BEGIN:0>>>\nline1\nline2\n\n<<<SRE:n1:STDERR:0>>>\n\n<<<SRE:n1:END:0:0:12>>>\n"
+            "<<<SRE:n1:BEGIN:1>>>\npartial\n<<<SRE:n1:STDERR:1>>>\nboom\n<<<SRE:n1:END:1:124:3001:40>>>\n"
+        )
+        res = parse_batch_output(text, items, nonce="n1")
+        self.assertEqual(res[0].output, "line1\nline2\n")
+        self.assertEqual(res[0].exit_code, 0)
+        self.assertEqual(res[0].elapsed_ms, 12)
+        self.assertEqual((res[0].start_offset_ms, res[1].start_offset_ms), (0, 40))
+        self.assertTrue(res[1].timed_out)
+        self.assertIn("[stderr]\nboom", res[1].output)
+        self.assertIn("command timeout after 3s", res[1].output)
+
+    def test_missing_frames_use_fallback(self) -> None:
+        items = [BatchItem("a", "x")]
+        res = parse_batch_output("", items, nonce="n1", fallback_output="ssh error: boom", fallback_elapsed_ms=7)
+        self.assertEqual(res[0].output, "ssh error: boom")
+        self.assertEqual(res[0].elapsed_ms, 7)
+
+    @unittest.skipUnless(shutil.which("bash"), "bash not available")
+    def test_script_roundtrip(self) -> None:
+        items = [
+            BatchItem("a", "echo hello; echo warn >&2"),
+            BatchItem("b", "printf 'no newline'; exit 3"),
+            BatchItem("c", "echo \"it's quoted\""),
+        ]
+        script = build_batch_script(items, nonce="rt", concurrency=2)
+        proc = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=30)
+        res = parse_batch_output(proc.stdout, items, nonce="rt")
+        self.assertEqual([r.key for r in res], ["a", "b", "c"])
+        self.assertEqual(res[0].output, "hello\n\n[stderr]\nwarn\n")
+        self.assertEqual(res[1].output, "no newline")
+        self.assertEqual(res[1].exit_code, 3)
+        self.assertEqual(res[2].output, "it's quoted\n")
+
+    @unittest.skipUnless(shutil.which("bash"), "bash not available")
+    def test_script_writes_nothing_on_target(self) -> None:
+        items = [BatchItem("a", "printf 'x\\n\\n\\n'"), BatchItem("b", "sleep 1; echo b"), BatchItem("c", "echo c")]
+        script = build_batch_script(items, nonce="nf", concurrency=1)
+        self.assertNotIn("mktemp", script)
+        self.assertNotIn("/tmp", script)
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, TMPDIR=tmp)
+            proc = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=30, cwd=tmp, env=env)
+            self.assertEqual(os.listdir(tmp), [])
+        res = parse_batch_output(proc.stdout, items, nonce="nf")
+        self.assertEqual([r.output for r in res], ["x\n\n\n", "b\n", "c\n"])
+        # One slot: "c" starts only after "b" has slept for ~1s.
+        self.assertLess(res[1].start_offset_ms, 500)
+        self.assertGreaterEqual(res[2].start_offset_ms, 900)
+
+    @unittest.skipUnless(shutil.which("bash") and shutil.which("sleep"), "bash/sleep not available")
+    def test_timeout_enforced_without_coreutils_timeout(self) -> None:
+        items = [BatchItem("slow", "sleep 10; echo late", timeout=1), BatchItem("ok", "echo ok", timeout=5)]
+        script = build_batch_script(items, nonce="wd", concurrency=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            # A PATH with the tools the script needs, minus `timeout`.
+            for tool in ("bash", "cat", "date", "head", "sleep", "tr"):
+                os.symlink(shutil.which(tool), os.path.join(tmp, tool))
+            proc = subprocess.run(
+                ["bash", "-c", script], capture_output=True, text=True, timeout=30, env={"PATH": tmp}
+            )
+        res = parse_batch_output(proc.stdout, items, nonce="wd")
+        self.assertTrue(res[0].timed_out)
+        self.assertEqual(res[0].exit_code, 124)
+        self.assertNotIn("late", res[0].output)
+        self.assertLess(res[0].elapsed_ms, 5000)
+        self.assertEqual(res[1].output, "ok\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.dag import run_dag  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+from registry.bindings import BindingState, plan_dag  # noqa: E402
+from registry.parsers import ParserEngine  # noqa: E402
+from storage.redaction import redact  # noqa: E402
+
+
+FIXTURES = os.path.join(ROOT_DIR, "tests", "fixtures", "outputs")
+# Two JVMs started by absolute path, as ps/jps print them on real hosts.
+ABS_FIXTURES = os.path.join(ROOT_DIR, "tests", "fixtures", "bindings")
+
+COMMANDS = {
+    "uname": {"cmd": "uname -a", "risk": "READ_ONLY", "platform": "linux"},
+    "jps": {"cmd": "jps -l", "risk": "READ_ONLY", "platform": "linux", "parser": "jps"},
+    "ps_cpu": {"cmd": "ps_cpu", "risk": "READ_ONLY", "platform": "linux", "parser": "ps_cpu"},
+    "jstat": {"cmd": "jstat -gcutil {pid} 1 5", "risk": "READ_ONLY", "platform": "linux"},
+    "mpstat": {"cmd": "mpstat", "risk": "READ_ONLY", "platform": "linux"},
+}
+BINDINGS = {"pid": {"from": ["jps", "ps_cpu"], "select": "java_pid"}}
+
+
+def _fixture(name, base=FIXTURES):
+    with open(os.path.join(base, f"{name}.txt"), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _parsed(cmd_id):
+    return ParserEngine(COMMANDS).parse(cmd_id, _fixture(cmd_id))
+
+
+class FixtureExecutor:
+    """jps/ps_cpu answer from fixtures; every command sleeps a little."""
+
+    def __init__(self, delay=0.1, base=FIXTURES):
+        self.delay = delay
+        self.base = base
+        self.commands = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def run(self, host, command, timeout=30):
+        with self.lock:
+            self.commands.append(command)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if command == "jps -l":
+                return _fixture("jps", self.base)
+            if command == "ps_cpu":
+                return _fixture("ps_cpu", self.base)
+            return f"out:{command}\n"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestBindingState(unittest.TestCase):
+    def test_java_pid_from_jps_and_ps_cpu(self) -> None:
+        state = BindingState.from_config({"bindings": BINDINGS}, service="svc")
+        self.assertIsNone(state.get("pid"))
+        state.observe("jps", _parsed("jps"))
+        state.observe("ps_cpu", _parsed("ps_cpu"))
+        self.assertEqual(state.get("pid"), "4242")
+        self.assertEqual(state.summary()["pid"], {"value": "4242", "from": ["jps", "ps_cpu"]})
+
+        # An explicit pid wins over discovery.
+        preset = BindingState.from_config({"bindings": BINDINGS}, pid="77")
+        preset.observe("jps", _parsed("jps"))
+        self.assertEqual(preset.get("pid"), "77")
+
+    def test_table_selector(self) -> None:
+        cfg = {"bindings": {"top_pid": {"from": "ps_cpu", "select": {"table": "procs", "column": "PID", "order_by": "%CPU"}}}}
+        state = BindingState.from_config(cfg)
+        state.observe("ps_cpu", _parsed("ps_cpu"))
+        self.assertEqual(state.get("top_pid"), "4242")
+
+
+class TestPlanDag(unittest.TestCase):
+    def test_unresolved_binding_pulls_in_sources(self) -> None:
+        state = BindingState.from_config({"bindings": BINDINGS})
+        dag = plan_dag(["jstat", "mpstat"], COMMANDS, state)
+        self.assertEqual(list(dag), ["jps", "ps_cpu", "jstat", "mpstat"])
+        self.assertEqual(dag["jstat"], {"jps", "ps_cpu"})
+        self.assertEqual(dag["mpstat"], set())
+
+        # Sources that already ran (baseline) are not re-run.
+        dag = plan_dag(["jstat"], COMMANDS, state, done=["jps", "ps_cpu"])
+        self.assertEqual(dag, {"jstat": set()})
+
+    def test_cycles_are_rejected(self) -> None:
+        cmds = {
+            "a": {"cmd": "a", "depends_on": ["b"]},
+            "b": {"cmd": "b", "depends_on": ["a"]},
+        }
+        with self.assertRaises(ValueError):
+            plan_dag(["a"], cmds, BindingState({}))
+        with self.assertRaises(ValueError):
+            asyncio.run(run_dag({"a": {"b"}, "b": {"a"}}, lambda n: asyncio.sleep(0)))
+
+
+class TestTargetedDag(unittest.TestCase):
+    def test_targeted_stage_discovers_pid_and_runs_branches_concurrently(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": COMMANDS,
+                "bindings": BINDINGS,
+                "baseline": {"cmds": {"linux": ["uname"]}},
+                "execution": {"per_host_concurrency": 4},
+                "evidence": {"base_dir": tmp},
+                "routes": {"UNKNOWN": ["jstat", "mpstat"]},
+            }
+            executor = FixtureExecutor()
+            ctx = OrchestratorContext(host="h", service="svc", session_id="b1", exec_mode="ssh", platform="linux")
+            pack = Orchestrator(cfg, executor=executor).run(ctx)
+
+        self.assertIn("jstat -gcutil 4242 1 5", executor.commands)
+        # jps, ps_cpu and mpstat are independent; only jstat waits.
+        self.assertGreaterEqual(executor.max_in_flight, 3)
+        self.assertEqual([s["cmd_id"] for s in pack["snapshots"]], ["uname", "jps", "ps_cpu", "jstat", "mpstat"])
+        self.assertEqual(pack["next_checks"], [])
+        self.assertEqual(pack["metrics"]["bindings"]["pid"]["value"], "4242")
+
+    def test_absolute_path_jvms_survive_redaction(self) -> None:
+        # Redaction rewrites both command lines to `<PATH> ...`; the binding
+        # still sees `java` and the service name in the raw output.
+        cases = (("svc", ["jps", "ps_cpu"], "4242"), ("tomcat", ["jps", "ps_cpu"], "3131"), ("svc", ["ps_cpu"], "4242"))
+        for service, sources, want in cases:
+            with self.subTest(service=service, sources=sources), tempfile.TemporaryDirectory() as tmp:
+                cfg = {
+                    "commands": COMMANDS,
+                    "bindings": {"pid": {"from": sources, "select": "java_pid"}},
+                    "baseline": {"cmds": {"linux": ["uname"]}},
+                    "evidence": {"base_dir": tmp},
+                    "routes": {"UNKNOWN": ["jstat"]},
+                }
+                executor = FixtureExecutor(delay=0, base=ABS_FIXTURES)
+                ctx = OrchestratorContext(host="h", service=service, session_id="b2", exec_mode="ssh", platform="linux")
+                Orchestrator(cfg, executor=executor).run(ctx)
+                self.assertIn(f"jstat -gcutil {want} 1 5", executor.commands)
+        self.assertNotIn("java", redact(_fixture("ps_cpu", ABS_FIXTURES))[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
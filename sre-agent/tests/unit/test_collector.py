@@ -0,0 +1,79 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.local import LocalExecutor  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+from registry.collector import script_command  # noqa: E402
+from registry.commands import get_command_meta, render_meta  # noqa: E402
+from registry.parsers import parse_output  # noqa: E402
+from registry.signals import extract_signals  # noqa: E402
+
+
+SNAPSHOT_META = {"script": "proc_collector", "interval_sec": 1, "top_pids": 5, "risk": "READ_ONLY", "platform": "linux"}
+
+
+class TestScriptCommand(unittest.TestCase):
+    def test_script_entries_render_the_builtin(self) -> None:
+        meta = get_command_meta({"proc_snapshot": SNAPSHOT_META}, "proc_snapshot")
+        command = render_meta(meta, service="svc", pid="1")
+        self.assertTrue(command.startswith("awk -v interval=1 -v top=5 "))
+        # Out-of-range tuning is clamped; the program text is shell-quoted as one word.
+        self.assertIn("-v interval=60 -v top=100 '", script_command({"script": "proc_collector", "interval_sec": 999, "top_pids": 10**6}))
+        with self.assertRaises(ValueError):
+            script_command({"script": "nope"})
+
+
+@unittest.skipUnless(shutil.which("awk") and os.path.exists("/proc/stat"), "needs awk and /proc")
+class TestCollectorOnThisHost(unittest.TestCase):
+    def test_one_second_json_snapshot(self) -> None:
+        start = time.monotonic()
+        out = LocalExecutor({}).run("localhost", render_meta(SNAPSHOT_META), timeout=10)
+        elapsed = time.monotonic() - start
+        parsed = parse_output("proc_snapshot", out)
+        self.assertNotIn("errors", parsed, out[:500])
+        self.assertEqual(parsed["proc"]["collector"], "proc_collector")
+        self.assertLess(elapsed, 5.0)
+        signals = extract_signals(parsed)["signals"]
+        for key in ("cpu_count", "cpu_busy_pct", "loadavg_1m", "mem_available_mb", "run_queue"):
+            self.assertIn(key, signals)
+        self.assertGreaterEqual(signals["cpu_count"], 1)
+        self.assertLessEqual(len(parsed["proc"]["procs"]), 5)
+
+
+class FixtureExecutor:
+    def run(self, host, command, timeout=30):
+        if command.startswith("awk "):
+            with open(os.path.join(ROOT_DIR, "tests", "fixtures", "outputs", "proc_snapshot.txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        return "ok\n"
+
+
+class TestCollectorBaseline(unittest.TestCase):
+    def test_snapshot_feeds_rules_in_one_command(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {"proc_snapshot": SNAPSHOT_META},
+                "baseline": {"cmds": {"linux": ["proc_snapshot"]}},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+                "rules": {"rules": [{"category": "IO_WAIT", "signal": "iowait_pct", "op": ">=", "threshold": 20, "confidence": 0.8}]},
+            }
+            ctx = OrchestratorContext(host="h", service="svc", session_id="c1", exec_mode="ssh", platform="linux")
+            pack = Orchestrator(cfg, executor=FixtureExecutor()).run(ctx)
+        self.assertEqual(pack["hypothesis"][0]["category"], "IO_WAIT")
+        self.assertEqual(pack["signals"]["mem_available_mb"], 512)
+        # The snapshot line is the compact summary, not the raw JSON document.
+        self.assertTrue(pack["snapshots"][0]["signal"].startswith("cpu 71.29% busy"))
+
+
+if __name__ == "__main__":
+    unittest.main()
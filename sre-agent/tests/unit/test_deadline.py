@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose  # noqa: E402
+from reporting.report_builder import build_fallback_report  # noqa: E402
+from reporting.schema_validate import validate_schema  # noqa: E402
+from test_multi_stage import PLAN_SCHEMA, REPORT_SCHEMA, LoadExecutor, StubLLM, diagnose_config  # noqa: E402
+
+
+class TestDeadline(unittest.TestCase):
+    def test_clamp_reserve_and_run(self) -> None:
+        unbounded = Deadline.after(0)
+        self.assertFalse(unbounded.bounded)
+        self.assertEqual(unbounded.clamp(300), 300)
+        self.assertIs(unbounded.reserve(10), unbounded)
+
+        d = Deadline.after(10)
+        self.assertEqual(d.clamp(300), 10)
+        self.assertEqual(d.clamp(5), 5)
+        self.assertEqual(d.reserve(8).clamp(300), 2)
+        # Past the deadline the clamp still allows 1s, and expired() says so.
+        past = d.reserve(60)
+        self.assertTrue(past.expired())
+        self.assertEqual(past.clamp(30), 1)
+
+        async def slow():
+            await asyncio.sleep(1)
+            return "late"
+
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(Deadline.after(0.05).run(slow()))
+        self.assertEqual(asyncio.run(Deadline.after(5).run(asyncio.sleep(0, result="ok"))), "ok")
+
+
+class TimeoutRecorder:
+    def __init__(self):
+        self.timeouts = []
+
+    def run(self, host, command, timeout=30):
+        self.timeouts.append((command, timeout))
+        return "ok\n"
+
+
+class TestOrchestratorDeadline(unittest.TestCase):
+    def test_command_timeouts_clamped_and_skipped_after_deadline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {"uname": {"cmd": "uname -a", "risk": "READ_ONLY", "platform": "linux"}},
+                "baseline": {"cmds": {"linux": ["uname"]}},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+            }
+            executor = TimeoutRecorder()
+            ctx = OrchestratorContext(host="h", service="svc", session_id="d1", platform="linux", deadline=Deadline.after(3))
+            Orchestrator(cfg, executor=executor).run(ctx)
+            self.assertEqual(executor.timeouts, [("uname -a", 3)])
+
+            executor = TimeoutRecorder()
+            ctx = OrchestratorContext(host="h", service="svc", session_id="d2", platform="linux", deadline=Deadline(time.monotonic() - 1))
+            pack = Orchestrator(cfg, executor=executor).run(ctx)
+            self.assertEqual(executor.timeouts, [])
+            self.assertEqual(pack["snapshots"], [])
+
+
+class SlowPlanLLM(StubLLM):
+    """The planner call outlives the budget; reports are fast."""
+
+    def __init__(self, delay):
+        super().__init__(plan_cmds=["mpstat"])
+        self.delay = delay
+
+    def generate_json(self, prompt, schema, *, temperature=0.0):
+        if "decision" in (schema.get("properties") or {}):
+            time.sleep(self.delay)
+        return super().generate_json(prompt, schema, temperature=temperature)
+
+
+class TestDiagnoseDeadline(unittest.TestCase):
+    def test_slow_planner_is_abandoned_and_report_falls_back(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = diagnose_config(tmp)
+            # Without a pid, ps_pid fails in the targeted phase and is left for the planner.
+            cfg["routes"]["CPU"] = ["mpstat", "ps_pid"]
+            cfg["commands"]["ps_pid"] = {"cmd": "ps -p {pid}", "risk": "READ_ONLY", "platform": "linux"}
+            ctx = OrchestratorContext(host="h", service="svc", session_id="dl1", exec_mode="ssh", platform="linux")
+            t0 = time.monotonic()
+            result = multi_round_diagnose(
+                config=cfg,
+                ctx=ctx,
+                executor=LoadExecutor(),
+                llm=SlowPlanLLM(delay=1.5),
+                plan_schema_path=PLAN_SCHEMA,
+                report_schema_path=REPORT_SCHEMA,
+                budget=DiagnoseBudget(time_budget_sec=2, report_reserve_sec=1),
+            )
+            elapsed = time.monotonic() - t0
+        trace = result["diagnosis_trace"]
+        self.assertEqual(trace["stop_reason"], "time_budget_exceeded")
+        self.assertEqual(trace["rounds"][-1]["decision"], "DEADLINE")
+        self.assertEqual(trace["report"]["source"], "fallback")
+        self.assertEqual(result["diagnosis_report"]["root_cause"]["category"], "CPU")
+        # Only the abandoned planner thread runs past the 1s loop deadline.
+        self.assertLess(elapsed, 1.9)
+        self.assertLessEqual(trace["elapsed_sec"], 2.0)
+
+    def test_fallback_report_is_schema_valid(self) -> None:
+        with open(REPORT_SCHEMA, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        pack = {
+            "meta": {"host": "h", "service": "svc", "session_id": "s", "timestamp": "t", "collection_window_minutes": 30},
+            "hypothesis": [{"category": "NOT_A_CATEGORY", "confidence": 3, "why": "x"}],
+            "snapshots": [{"cmd_id": "uname", "signal": "Linux", "summary": "collected", "audit_ref": "uname-1"}, {"cmd_id": "x"}],
+        }
+        report = build_fallback_report(pack, schema, reason="test")
+        validate_schema(report, schema)
+        self.assertEqual(report["root_cause"]["category"], "UNKNOWN")
+        self.assertEqual(report["root_cause"]["confidence"], 1.0)
+        self.assertEqual([e["cmd_id"] for e in report["evidence_table"]], ["uname"])
+
+
+if __name__ == "__main__":
+    unittest.main()
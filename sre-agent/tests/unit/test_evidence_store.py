@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from storage.evidence_store import EvidenceStore  # noqa: E402
+from storage.redaction import hash_text  # noqa: E402
+
+
+class TestContentAddressedStore(unittest.TestCase):
+    def test_dedup_across_sessions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {"base_dir": tmp, "compression": "gzip"}
+            s1 = EvidenceStore.from_config(cfg, "s1")
+            s2 = EvidenceStore.from_config(cfg, "s2")
+            text = "Linux host 6.1.0 x86_64\n" * 200
+            r1 = s1.put_raw("uname", text)
+            r2 = s2.put_raw("uname", text)
+            self.assertEqual(r1, r2)
+            self.assertTrue(r1.startswith("blobs" + os.sep))
+            self.assertTrue(r1.endswith(".txt.gz"))
+            self.assertLess(os.path.getsize(os.path.join(tmp, r1)), len(text) // 10)
+            self.assertEqual(s2.read_text(r1), text)
+            self.assertFalse(os.path.exists(os.path.join(tmp, "s1", "raw")))
+
+    def test_redacted_ref_uses_content_hash(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EvidenceStore.from_config({"base_dir": tmp}, "s1")
+            text = "load 1.0\n"
+            ref = store.put_redacted("uptime", text, digest=hash_text(text))
+            self.assertIn(hash_text(text), ref)
+            self.assertEqual(store.put_redacted("uptime", text), ref)
+
+    def test_parsed_roundtrip(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EvidenceStore.from_config({"base_dir": tmp, "compression": "none"}, "s1")
+            ref = store.put_parsed("loadavg", {"loadavg": [1.0, 2.0, 3.0], "cmd_id": "loadavg"})
+            self.assertTrue(ref.endswith(".json"))
+            self.assertEqual(store.read_json(ref)["loadavg"], [1.0, 2.0, 3.0])
+
+    def test_legacy_layout_still_readable(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EvidenceStore.from_config({"base_dir": tmp, "content_addressed": False}, "s1")
+            ref = store.put_raw("uname", "Linux\n")
+            self.assertTrue(ref.startswith(os.path.join("s1", "raw")))
+            self.assertEqual(store.read_text(ref), "Linux\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.fleet import fleet_session_id, parse_host_list, run_fleet  # noqa: E402
+from orchestrator.graph import OrchestratorContext  # noqa: E402
+
+
+class LoadByHostExecutor:
+    """Serves /proc/loadavg per host; 'bad' hosts raise."""
+
+    def __init__(self, loads):
+        self.loads = loads
+
+    def run(self, host, command, timeout=30):
+        if host not in self.loads:
+            raise ConnectionError(f"unreachable {host}")
+        return f"{self.loads[host]} 1.00 1.00 1/100 123\n"
+
+
+class TestFleet(unittest.TestCase):
+    def test_parse_host_list(self) -> None:
+        self.assertEqual(parse_host_list(["a\n", " b # note\n", "\n", "# c\n", "a\n"]), ["a", "b"])
+
+    def test_session_id_is_path_safe(self) -> None:
+        self.assertEqual(fleet_session_id("f1", "root@10.0.0.1:22"), "f1-root_10.0.0.1_22")
+
+    def test_run_fleet_ranks_and_tolerates_failures(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {"loadavg": {"cmd": "cat /proc/loadavg", "risk": "READ_ONLY", "platform": "linux"}},
+                "baseline": {"cmds": {"linux": ["loadavg"]}},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+                "rules": {
+                    "rules": [
+                        {"category": "CPU", "signal": "loadavg_1m", "op": ">=", "threshold": 5, "confidence": 0.6},
+                        {"category": "RUN_QUEUE", "signal": "loadavg_1m", "op": ">=", "threshold": 20, "confidence": 0.9},
+                    ]
+                },
+            }
+            executor = LoadByHostExecutor({"h1": "6.0", "h2": "25.0", "h3": "0.5"})
+            base = OrchestratorContext(host="", service="svc", session_id="f1", exec_mode="ssh", platform="linux")
+            summary = run_fleet(
+                config=cfg,
+                hosts=["h1", "h2", "h3", "bad"],
+                base_ctx=base,
+                executor=executor,
+                max_workers=4,
+            )
+            self.assertEqual(summary["succeeded"], 3)
+            self.assertEqual(summary["failed"], 1)
+            self.assertEqual([h["host"] for h in summary["hosts"]], ["h2", "h1", "h3", "bad"])
+            self.assertEqual(summary["hosts"][0]["primary"], "RUN_QUEUE")
+            self.assertIn("unreachable", summary["hosts"][-1]["error"])
+            self.assertTrue(os.path.isdir(os.path.join(tmp, "f1-h1")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from evaluation.latency import STAGES, compare_results, percentile, run_benchmark  # noqa: E402
+from orchestrator import graph  # noqa: E402
+from registry.parsers import ParserEngine  # noqa: E402
+
+
+CONFIG_DIR = os.path.join(ROOT_DIR, "configs")
+OUTPUTS_DIR = os.path.join(ROOT_DIR, "tests", "fixtures", "outputs")
+
+
+class TestLatencyBenchmark(unittest.TestCase):
+    def test_stage_times_from_recorded_outputs(self) -> None:
+        parse, redact = ParserEngine.__dict__["parse"], graph.redact
+        for scenario in ("run", "diagnose"):
+            with self.subTest(scenario=scenario):
+                result = run_benchmark(
+                    scenario, config_dir=CONFIG_DIR, outputs_dir=OUTPUTS_DIR, iterations=3, warmup=0, alloc_iterations=1,
+                    latency_ms=5,
+                )
+                stages = result["stages"]
+                self.assertEqual(set(stages), set(STAGES))
+                for stage in ("config_load", "redaction", "parsing", "evidence_writes", "rules"):
+                    self.assertGreater(stages[stage]["p50_ms"], 0.0, stage)
+                # Every baseline command slept 5ms; they overlap, so exec can exceed total.
+                self.assertGreaterEqual(stages["exec"]["p50_ms"], 5 * 7)
+                self.assertLessEqual(stages["total"]["p50_ms"], stages["total"]["p99_ms"])
+                self.assertGreater(result["alloc"]["peak_kb_max"], 0)
+        self.assertGreater(stages["prompt_build"]["p50_ms"], 0.0)
+        self.assertGreater(stages["schema_validation"]["p50_ms"], 0.0)
+        # The wrapped entry points are restored.
+        self.assertIs(ParserEngine.__dict__["parse"], parse)
+        self.assertIs(graph.redact, redact)
+
+    def test_compare_flags_regressions(self) -> None:
+        self.assertEqual(percentile([5, 1, 4, 2, 3], 50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+        base = {"stages": {"parsing": {"p50_ms": 1.0, "p99_ms": 2.0}, "rules": {"p50_ms": 0.1, "p99_ms": 0.2}}}
+        cur = {"stages": {"parsing": {"p50_ms": 1.1, "p99_ms": 4.0}, "rules": {"p50_ms": 0.3, "p99_ms": 0.3}}}
+        # rules tripled but stays under min_ms; parsing p99 doubled.
+        self.assertEqual(compare_results(cur, base), [{"stage": "parsing", "metric": "p99_ms", "baseline": 2.0, "current": 4.0}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.llm.base import create_llm_client  # noqa: E402
+from adapters.llm.cache import CachedLLMClient, LLMCache, with_cache  # noqa: E402
+from orchestrator.graph import OrchestratorContext  # noqa: E402
+from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose  # noqa: E402
+from reporting.report_builder import build_report  # noqa: E402
+
+SCHEMA = {"type": "object", "properties": {"answer": {"type": "string"}}, "required": ["answer"]}
+
+
+class CountingLLM:
+    def __init__(self, answer="ok"):
+        self.answer = answer
+        self.calls = 0
+
+    def generate_json(self, prompt, schema, *, temperature=0.0):
+        self.calls += 1
+        return {"answer": self.answer} if self.answer is not None else {"wrong": prompt}
+
+    def capabilities(self):
+        return {"json_schema": False, "tool_calling": False, "streaming": False}
+
+
+def _cached(tmp, inner, **cache_cfg):
+    cfg = {"model": "m1", "cache": {"enabled": True, "path": os.path.join(tmp, "llm.sqlite3"), **cache_cfg}}
+    return with_cache(inner, "qwen", cfg)
+
+
+class TestLLMCache(unittest.TestCase):
+    def test_hit_miss_and_key_parts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            inner = CountingLLM()
+            llm = _cached(tmp, inner)
+            self.assertIsInstance(llm, CachedLLMClient)
+            self.assertEqual(llm.generate_json("p", SCHEMA, temperature=0.2), {"answer": "ok"})
+            self.assertEqual(llm.generate_json("p", SCHEMA, temperature=0.2), {"answer": "ok"})
+            self.assertEqual(inner.calls, 1)
+            # Temperature, prompt and schema are all part of the key.
+            llm.generate_json("p", SCHEMA, temperature=0.0)
+            llm.generate_json("p2", SCHEMA, temperature=0.2)
+            llm.generate_json("p", {**SCHEMA, "title": "x"}, temperature=0.2)
+            self.assertEqual(inner.calls, 4)
+            stats = llm.cache_stats()
+            self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 4, 4))
+
+            # Persistent: a new process (client) reads the same file.
+            again = _cached(tmp, CountingLLM("other"))
+            self.assertEqual(again.generate_json("p", SCHEMA, temperature=0.2), {"answer": "ok"})
+
+    def test_ttl_lru_and_bypass(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            inner = CountingLLM()
+            cache = LLMCache(os.path.join(tmp, "c.sqlite3"), ttl_sec=0.2, max_entries=2)
+            llm = CachedLLMClient(inner, cache, vendor="qwen", model="m")
+            llm.generate_json("a", SCHEMA)
+            llm.generate_json("b", SCHEMA)
+            llm.generate_json("a", SCHEMA)  # a is now most recently used
+            llm.generate_json("c", SCHEMA)  # evicts b
+            self.assertEqual(cache.stats()["evictions"], 1)
+            calls = inner.calls
+            llm.generate_json("a", SCHEMA)
+            self.assertEqual(inner.calls, calls)
+            llm.generate_json("b", SCHEMA)
+            self.assertEqual(inner.calls, calls + 1)
+
+            time.sleep(0.3)
+            llm.generate_json("a", SCHEMA)
+            self.assertEqual(cache.stats()["expired"], 1)
+
+            llm.bypass = True
+            calls = inner.calls
+            llm.generate_json("a", SCHEMA)
+            self.assertEqual(inner.calls, calls + 1)
+            self.assertEqual(cache.stats()["bypassed"], 1)
+
+    def test_rejected_report_is_not_replayed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            inner = CountingLLM(answer=None)
+            llm = _cached(tmp, inner)
+            with self.assertRaises(Exception):
+                build_report(llm, {"policy": {}}, SCHEMA)
+            self.assertEqual(llm.cache_stats()["entries"], 0)
+
+    def test_disabled_by_default(self) -> None:
+        inner = CountingLLM()
+        self.assertIs(with_cache(inner, "qwen", {}), inner)
+        self.assertNotIsInstance(create_llm_client("qwen", {"cache": {"enabled": False}}), CachedLLMClient)
+
+    def test_counters_in_diagnosis_trace(self) -> None:
+        from test_multi_stage import PLAN_SCHEMA, REPORT_SCHEMA, LoadExecutor, StubLLM, diagnose_config
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = diagnose_config(tmp)
+            cfg["routes"]["CPU"] = ["mpstat"]
+            llm = _cached(tmp, StubLLM(plan_cmds=[]))
+            ctx = OrchestratorContext(host="h", service="svc", session_id="c1", exec_mode="ssh", platform="linux")
+            result = multi_round_diagnose(
+                config=cfg,
+                ctx=ctx,
+                executor=LoadExecutor(),
+                llm=llm,
+                plan_schema_path=PLAN_SCHEMA,
+                report_schema_path=REPORT_SCHEMA,
+                budget=DiagnoseBudget(max_rounds=2),
+            )
+            counters = result["diagnosis_trace"]["llm_cache"]
+            self.assertEqual((counters["misses"], counters["stores"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.graph import OrchestratorContext  # noqa: E402
+from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose  # noqa: E402
+
+PLAN_SCHEMA = os.path.join(ROOT_DIR, "schemas", "plan_schema.json")
+REPORT_SCHEMA = os.path.join(ROOT_DIR, "schemas", "report_schema.json")
+
+
+class StubLLM:
+    """Plans the given cmd_ids once, then stops; builds a minimal valid report."""
+
+    def __init__(self, plan_cmds):
+        self.plan_cmds = list(plan_cmds)
+        self.calls = 0
+
+    def generate_json(self, prompt, schema, *, temperature=0.0):
+        self.calls += 1
+        if "decision" in (schema.get("properties") or {}):
+            cmds, self.plan_cmds = self.plan_cmds, []
+            return {
+                "decision": "CONTINUE" if cmds else "STOP",
+                "current_hypothesis": {"category": "CPU", "confidence": 0.5, "why": "stub"},
+                "next_cmds": [
+                    {"cmd_id": c, "purpose": "p", "expected_signal": "s", "timeout_sec": 5, "priority": 1} for c in cmds
+                ],
+                "missing_info": [],
+                "stop_reason": "" if cmds else "enough",
+            }
+        return {
+            "meta": {
+                "host": "h",
+                "service": "svc",
+                "timestamp": "2026-01-01T00:00:00Z",
+                "collection_window_minutes": 30,
+                "agent_version": "dev",
+            },
+            "root_cause": {"category": "CPU", "summary": "stub", "confidence": 0.5},
+            "evidence_table": [],
+            "next_actions": [],
+            "audit": {"session_id": "s", "commands": []},
+            "redaction": {"applied": False, "rules": [], "replaced_count": 0},
+        }
+
+    def capabilities(self):
+        return {"json_schema": False, "tool_calling": False, "streaming": False}
+
+
+class LoadExecutor:
+    def run(self, host, command, timeout=30):
+        if command == "cat /proc/loadavg":
+            return "9.00 1.00 1.00 1/100 123\n"
+        return f"out:{command}\n"
+
+
+def diagnose_config(base_dir):
+    return {
+        "commands": {
+            "loadavg": {"cmd": "cat /proc/loadavg", "risk": "READ_ONLY", "platform": "linux"},
+            "mpstat": {"cmd": "mpstat", "risk": "READ_ONLY", "platform": "linux"},
+            "ps_cpu": {"cmd": "ps_cpu", "risk": "READ_ONLY", "platform": "linux"},
+            "top": {"cmd": "top", "risk": "READ_ONLY", "platform": "linux"},
+        },
+        "baseline": {"cmds": {"linux": ["loadavg"]}},
+        "evidence": {"base_dir": base_dir},
+        "routes": {"CPU": ["mpstat", "ps_cpu", "top"]},
+    }
+
+
+class TestMultiRoundDiagnose(unittest.TestCase):
+    def test_plan_round_executes_selected_cmds(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = diagnose_config(tmp)
+            # routing.yaml CPU pool is executed deterministically; planner then picks from what is left.
+            cfg["routes"]["CPU"] = ["mpstat"]
+            cfg["routes"]["CPU_PLAN"] = []
+            llm = StubLLM(plan_cmds=[])
+            ctx = OrchestratorContext(host="h", service="svc", session_id="m1", exec_mode="ssh", platform="linux")
+            result = multi_round_diagnose(
+                config=cfg,
+                ctx=ctx,
+                executor=LoadExecutor(),
+                llm=llm,
+                plan_schema_path=PLAN_SCHEMA,
+                report_schema_path=REPORT_SCHEMA,
+                budget=DiagnoseBudget(max_rounds=2),
+            )
+            trace = result["diagnosis_trace"]
+            self.assertEqual(trace["initial_primary"], "CPU")
+            self.assertEqual(trace["stop_reason"], "allowed_cmd_pool_exhausted")
+            self.assertEqual([s["cmd_id"] for s in result["evidence_pack"]["snapshots"]], ["loadavg", "mpstat"])
+            self.assertTrue(os.path.exists(os.path.join(tmp, "m1", "index", "diagnosis_report.json")))
+
+
+class PriorityLLM(StubLLM):
+    """Plans `plan` = [(cmd_id, priority)] in the first round."""
+
+    def __init__(self, plan):
+        super().__init__(plan_cmds=[])
+        self.plan = list(plan)
+
+    def generate_json(self, prompt, schema, *, temperature=0.0):
+        out = super().generate_json(prompt, schema, temperature=temperature)
+        if "decision" in (schema.get("properties") or {}) and self.plan:
+            out["decision"], out["stop_reason"] = "CONTINUE", ""
+            out["next_cmds"] = [
+                {"cmd_id": c, "purpose": "p", "expected_signal": "s", "timeout_sec": 5, "priority": p} for c, p in self.plan
+            ]
+            self.plan = []
+        return out
+
+
+class MemoryIOExecutor:
+    """loadavg -> CPU, targeted free -> MEMORY (routes MEMORY stay for the planner), vmstat -> IO_WAIT."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+
+    def run(self, host, command, timeout=30):
+        self.started.append(command)
+        time.sleep(self.delays.get(command, 0.0))
+        if command == "cat /proc/loadavg":
+            return "9.00 1.00 1.00 1/100 123\n"
+        if command in ("free", "vmstat"):
+            with open(os.path.join(ROOT_DIR, "tests", "fixtures", "outputs", f"{command}.txt"), "r", encoding="utf-8") as f:
+                text = f.read()
+            return text.replace("761         512", "761         150")
+        return f"out:{command}\n"
+
+
+class TestPlannedCommandDispatch(unittest.TestCase):
+    def _diagnose(self, tmp, executor, *, concurrency, threshold):
+        cfg = diagnose_config(tmp)
+        for cmd_id in ("free", "vmstat", "iostat", "ps_mem"):
+            cfg["commands"][cmd_id] = {"cmd": cmd_id, "risk": "READ_ONLY", "platform": "linux"}
+        cfg["routes"] = {"CPU": ["free"], "MEMORY": ["vmstat", "iostat", "ps_mem"]}
+        cfg["execution"] = {"per_host_concurrency": concurrency}
+        llm = PriorityLLM([("ps_mem", 3), ("iostat", 1), ("vmstat", 2)])
+        ctx = OrchestratorContext(host="h", service="svc", session_id="d1", exec_mode="ssh", platform="linux")
+        return multi_round_diagnose(
+            config=cfg,
+            ctx=ctx,
+            executor=executor,
+            llm=llm,
+            plan_schema_path=PLAN_SCHEMA,
+            report_schema_path=REPORT_SCHEMA,
+            budget=DiagnoseBudget(max_rounds=1, confidence_threshold=threshold),
+        )
+
+    def test_dispatch_follows_priority(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = MemoryIOExecutor({})
+            result = self._diagnose(tmp, executor, concurrency=1, threshold=0.99)
+        self.assertEqual(executor.started[-3:], ["iostat", "vmstat", "ps_mem"])
+        round1 = result["diagnosis_trace"]["rounds"][0]
+        self.assertEqual([e["cmd_id"] for e in round1["executed"]], ["iostat", "vmstat", "ps_mem"])
+        self.assertEqual(round1["cancelled"], [])
+        self.assertEqual(result["evidence_pack"]["hypothesis"][0]["category"], "IO_WAIT")
+
+    def test_confidence_mid_round_cancels_in_flight(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = MemoryIOExecutor({"iostat": 0.5, "ps_mem": 0.5})
+            result = self._diagnose(tmp, executor, concurrency=3, threshold=0.75)
+        trace = result["diagnosis_trace"]
+        round1 = trace["rounds"][0]
+        self.assertEqual([e["cmd_id"] for e in round1["executed"]], ["vmstat"])
+        self.assertEqual(round1["cancelled"], ["iostat", "ps_mem"])
+        self.assertEqual(trace["stop_reason"], "confidence_threshold_reached")
+        # Cancelled commands are not evidence and stay out of the executed set.
+        self.assertNotIn("ps_mem", [s["cmd_id"] for s in result["evidence_pack"]["snapshots"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
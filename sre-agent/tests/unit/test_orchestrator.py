@@ -0,0 +1,150 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.batch import BatchResult  # noqa: E402
+from config import load_configs  # noqa: E402
+from evaluation.latency import RecordedExecutor  # noqa: E402
+from registry.commands import load_commands  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext, route_table  # noqa: E402
+from storage.audit_store import AuditStore  # noqa: E402
+
+
+class SleepyExecutor:
+    """Fake executor: each command sleeps, later commands finish first."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def run(self, host, command, timeout=30):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delays.get(command, 0.0))
+            return f"out:{command}\n"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class BatchExecutor:
+    def __init__(self) -> None:
+        self.batches = []
+
+    def run(self, host, command, timeout=30):
+        raise AssertionError("expected batched execution")
+
+    def run_batch(self, host, items, *, concurrency=1):
+        self.batches.append([i.key for i in items])
+        # Items past `concurrency` start once an earlier one has finished.
+        return [
+            BatchResult(
+                key=i.key,
+                output=f"out:{i.command}\n",
+                exit_code=0,
+                elapsed_ms=5,
+                start_offset_ms=0 if n < concurrency else 2000,
+            )
+            for n, i in enumerate(items)
+        ]
+
+
+def _config(base_dir, cmd_ids, concurrency):
+    return {
+        "commands": {c: {"cmd": c, "risk": "READ_ONLY", "platform": "linux"} for c in cmd_ids},
+        "baseline": {"cmds": {"linux": list(cmd_ids)}},
+        "execution": {"per_host_concurrency": concurrency},
+        "evidence": {"base_dir": base_dir},
+        "audit_log": os.path.join(base_dir, "audit.log"),
+        "routes": {},
+    }
+
+
+class TestOrchestratorBaseline(unittest.TestCase):
+    def test_concurrent_baseline_keeps_order(self) -> None:
+        cmd_ids = ["c1", "c2", "c3", "c4"]
+        delays = {"c1": 0.3, "c2": 0.2, "c3": 0.1, "c4": 0.0}
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = _config(tmp, cmd_ids, concurrency=4)
+            executor = SleepyExecutor(delays)
+            orch = Orchestrator(cfg, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="s1", exec_mode="ssh", platform="linux")
+
+            start = time.time()
+            pack = orch.run(ctx)
+            elapsed = time.time() - start
+
+            self.assertLess(elapsed, 0.55)
+            self.assertGreater(executor.max_in_flight, 1)
+            self.assertEqual([s["cmd_id"] for s in pack["snapshots"]], cmd_ids)
+            audit = AuditStore(cfg["audit_log"]).read_session("s1")
+            self.assertEqual([r["cmd_id"] for r in audit], cmd_ids)
+
+    def test_concurrency_limit(self) -> None:
+        cmd_ids = ["c1", "c2", "c3", "c4"]
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = _config(tmp, cmd_ids, concurrency=2)
+            executor = SleepyExecutor({c: 0.05 for c in cmd_ids})
+            orch = Orchestrator(cfg, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="s2", exec_mode="ssh", platform="linux")
+            orch.run(ctx)
+            self.assertLessEqual(executor.max_in_flight, 2)
+
+    def test_batched_baseline_single_round_trip(self) -> None:
+        cmd_ids = ["c1", "c2", "c3"]
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = _config(tmp, cmd_ids, concurrency=2)
+            cfg["execution"]["batch"] = True
+            executor = BatchExecutor()
+            orch = Orchestrator(cfg, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="s3", exec_mode="ssh", platform="linux")
+            pack = orch.run(ctx)
+            self.assertEqual(executor.batches, [cmd_ids])
+            self.assertEqual([s["signal"] for s in pack["snapshots"]], ["out:c1", "out:c2", "out:c3"])
+            audit = AuditStore(cfg["audit_log"]).read_session("s3")
+            self.assertEqual([r["elapsed_ms"] for r in audit], [5, 5, 5])
+            self.assertEqual(len({r["batch_started_at"] for r in audit}), 1)
+            started = [datetime.fromisoformat(r["started_at"]) for r in audit]
+            self.assertEqual(started[0], started[1])
+            self.assertAlmostEqual((started[2] - started[0]).total_seconds(), 2.0, places=3)
+
+
+class TestShippedRouting(unittest.TestCase):
+    def test_targeted_stage_runs_with_shipped_configs(self) -> None:
+        names = ("runtime.yaml", "policy.yaml", "commands.yaml", "routing.yaml", "rules.yaml")
+        cfg = load_configs([os.path.join(ROOT_DIR, "configs", n) for n in names])
+        # load_configs merges routing.yaml as routes: {CATEGORY: [...]}.
+        self.assertEqual(route_table(cfg), cfg["routes"])
+        self.assertIn("iostat", route_table(cfg)["IO_WAIT"])
+        self.assertEqual(route_table({"routes": {"routes": {"CPU": ["mpstat"]}}}), {"CPU": ["mpstat"]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg["evidence"]["base_dir"] = tmp
+            cfg["audit_log"] = os.path.join(tmp, "audit.log")
+            outputs = os.path.join(ROOT_DIR, "tests", "fixtures", "outputs")
+            executor = RecordedExecutor(load_commands(cfg), outputs, service="svc", pid="4242")
+            ctx = OrchestratorContext(host="h", service="svc", session_id="r1", exec_mode="ssh", platform="linux", pid="4242")
+            pack = Orchestrator(cfg, executor=executor).run(ctx)
+
+        # proc_snapshot.txt reads as IO_WAIT; its routed commands follow the baseline.
+        self.assertEqual(pack["hypothesis"][0]["category"], "IO_WAIT")
+        ran = [s["cmd_id"] for s in pack["snapshots"]]
+        for cmd_id in route_table(cfg)["IO_WAIT"]:
+            self.assertIn(cmd_id, ran)
+
+
+if __name__ == "__main__":
+    unittest.main()
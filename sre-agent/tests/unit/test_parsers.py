@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from registry.parsers import ParserEngine, parse_output  # noqa: E402
+from registry.signals import extract_signals  # noqa: E402
+from storage.redaction import redact  # noqa: E402
+
+CORPUS_DIR = os.path.join(ROOT_DIR, "tests", "fixtures", "outputs")
+
+
+def _corpus() -> dict:
+    out = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith(".txt"):
+            with open(os.path.join(CORPUS_DIR, name), "r", encoding="utf-8") as f:
+                out[name[:-4]] = f.read()
+    return out
+
+
+class TestParserCorpus(unittest.TestCase):
+    def test_corpus_signals(self) -> None:
+        with open(os.path.join(CORPUS_DIR, "expected_signals.json"), "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        engine = ParserEngine()
+        for cmd_id, text in _corpus().items():
+            with self.subTest(cmd_id=cmd_id):
+                parsed = engine.parse(cmd_id, text)
+                self.assertNotIn("errors", parsed)
+                self.assertEqual(extract_signals(parsed)["signals"], expected[cmd_id])
+
+    def test_redacted_output_keeps_numeric_signals(self) -> None:
+        # The orchestrator parses redacted output; placeholders must not shift columns.
+        for cmd_id in ("ss", "df", "ps_cpu"):
+            text = _corpus()[cmd_id]
+            redacted, _, _ = redact(text)
+            raw = extract_signals(parse_output(cmd_id, text))["signals"]
+            red = extract_signals(parse_output(cmd_id, redacted))["signals"]
+            numeric = {k: v for k, v in raw.items() if isinstance(v, (int, float))}
+            self.assertEqual({k: red.get(k) for k in numeric}, numeric)
+
+
+class TestTableParser(unittest.TestCase):
+    def test_repeated_header_samples(self) -> None:
+        parsed = parse_output("iostat", _corpus()["iostat"])
+        cpu = parsed["avg_cpu"]
+        self.assertEqual(cpu["rows"], 2)
+        self.assertEqual(cpu["samples"], [0, 1])
+        self.assertEqual(cpu["data"]["%iowait"], [4.2, 28.4])
+        self.assertEqual(parsed["devices"]["data"]["Device"], ["vda", "vdb", "vda", "vdb"])
+
+    def test_rest_column_and_pct(self) -> None:
+        fs = parse_output("df", _corpus()["df"])["fs"]
+        self.assertEqual(fs["data"]["mounted_on"][-1], "/data/app logs")
+        self.assertEqual(fs["data"]["use_pct"], [0.0, 1.0, 95.0, 26.0])
+
+    def test_inline_spec_and_builtin_alias(self) -> None:
+        commands = {
+            "vm_long": {"cmd": "vmstat 5 3", "parser": "vmstat"},
+            "custom": {"cmd": "x", "parser": {"name": "t", "kind": "table", "header": "^a b", "types": {"b": "str"}}},
+        }
+        engine = ParserEngine(commands)
+        vm = engine.parse("vm_long", _corpus()["vmstat"])
+        self.assertEqual(vm["parser"], "vmstat")
+        self.assertIn("run_queue", extract_signals(vm)["signals"])
+        custom = engine.parse("custom", "a b\n1 2\n3 4\n")
+        self.assertEqual(custom["t"]["data"], {"a": [1, 3], "b": ["2", "4"]})
+
+    def test_unknown_command_keeps_raw(self) -> None:
+        self.assertEqual(parse_output("uname", "Linux h 5.15\n"), {"cmd_id": "uname", "raw": "Linux h 5.15\n"})
+        self.assertEqual(extract_signals(parse_output("vmstat", "garbage"))["signals"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.graph import OrchestratorContext  # noqa: E402
+from orchestrator.multi_stage import DiagnoseBudget, multi_round_diagnose  # noqa: E402
+from orchestrator.planner_prompt import PlanPromptBuilder, build_plan_prompt, estimate_tokens  # noqa: E402
+
+PLAN_SCHEMA = os.path.join(ROOT_DIR, "schemas", "plan_schema.json")
+REPORT_SCHEMA = os.path.join(ROOT_DIR, "schemas", "report_schema.json")
+
+
+def _schema():
+    with open(PLAN_SCHEMA, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _state(round_idx, signals, snapshots):
+    return {
+        "meta": {"host": "h", "service": "svc"},
+        "primary_category": "CPU",
+        "hypothesis": [{"category": "CPU", "confidence": 0.6, "why": "load_per_cpu > 1.5", "evidence_refs": ["x"]}],
+        "signals": signals,
+        "snapshots": snapshots,
+        "executed_cmd_ids": [s["cmd_id"] for s in snapshots],
+        "budget": {"round": round_idx, "max_rounds": 3},
+    }
+
+
+def _snap(i, width=40):
+    return {"cmd_id": f"cmd_{i}", "signal": f"line {i} " + "x" * width, "summary": "baseline", "audit_ref": f"a{i}"}
+
+
+class TestPlanPromptBuilder(unittest.TestCase):
+    def test_stable_prefix_and_append_only_delta(self) -> None:
+        builder = PlanPromptBuilder(plan_schema=_schema(), max_cmds_per_round=3, token_budget=100000)
+        first = builder.build(state=_state(1, {"load1": 9.0, "cpu_cores": 4}, [_snap(0)]), allowed_cmd_pool=["a", "b"])
+        second = builder.build(
+            state=_state(2, {"load1": 9.0, "cpu_cores": 4, "cpu_iowait_pct": 30.0}, [_snap(0), _snap(1)]),
+            allowed_cmd_pool=["b"],
+        )
+        self.assertEqual(first.prefix, second.prefix)
+        self.assertEqual(first.level, 0)
+        # Round 2 extends round 1 byte-for-byte; only the new section is new.
+        self.assertTrue(second.context.startswith(first.context))
+        delta = second.context[len(first.context) :]
+        self.assertIn('"cpu_iowait_pct":30.0', delta)
+        self.assertNotIn("load1", delta)
+        self.assertIn("cmd_1", delta)
+        self.assertNotIn("cmd_0", delta)
+        self.assertEqual(second.delta_tokens, estimate_tokens(delta))
+        self.assertIn("allowed_cmd_pool", build_plan_prompt(
+            state=_state(1, {}, []), allowed_cmd_pool=["a"], plan_schema=_schema(), max_cmds_per_round=3
+        ))
+
+    def test_budget_compaction_is_deterministic(self) -> None:
+        signals = {f"ts_metric_{i}_p50": i / 3 for i in range(40)}
+        signals["threads"] = {"summary": "threads=120 blocked=30", "top": ["x" * 200] * 20}
+        snapshots = [_snap(i, width=300) for i in range(30)]
+
+        def run(budget):
+            b = PlanPromptBuilder(plan_schema=_schema(), max_cmds_per_round=3, token_budget=budget)
+            return [b.build(state=_state(r, dict(signals, round=r), snapshots[: 10 * r]), allowed_cmd_pool=["a"]) for r in (1, 2, 3)]
+
+        full = run(100000)
+        self.assertEqual([p.level for p in full], [0, 0, 0])
+        for budget in (3000, 1200, 700):
+            prompts = run(budget)
+            self.assertEqual([p.text for p in prompts], [p.text for p in run(budget)])
+            self.assertGreater(max(p.level for p in prompts), 0)
+            for p in prompts:
+                self.assertLessEqual(p.prefix_tokens + p.context_tokens, budget)
+                # The newest round and the pool always survive compaction.
+                self.assertIn('"allowed_cmd_pool":["a"]', p.context)
+        tight = run(500)[-1]
+        self.assertEqual(tight.level, 4)
+        self.assertIn("truncated", tight.context)
+        self.assertLessEqual(tight.prefix_tokens + tight.context_tokens, 500)
+
+
+class PrefixLLM:
+    """Records prefix-split calls; plans one command, then stops."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.planned = False
+
+    def generate_json(self, prompt, schema, *, temperature=0.0, prefix=""):
+        from test_multi_stage import StubLLM
+
+        self.calls.append((prefix, prompt))
+        stub = StubLLM(plan_cmds=[] if self.planned else ["ps_cpu"])
+        if "decision" in (schema.get("properties") or {}):
+            self.planned = True
+        return stub.generate_json(prompt, schema, temperature=temperature)
+
+    def capabilities(self):
+        return {"json_schema": False, "tool_calling": False, "streaming": False, "prompt_prefix": True}
+
+
+class TestDiagnosePromptTrace(unittest.TestCase):
+    def test_prefix_sent_separately_and_tokens_traced(self) -> None:
+        from test_multi_stage import LoadExecutor, diagnose_config
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = diagnose_config(tmp)
+            # Without a pid these fail in the targeted phase and stay in the planner pool.
+            cfg["commands"]["ps_cpu"]["cmd"] = "ps -p {pid}"
+            cfg["commands"]["top"]["cmd"] = "top -p {pid}"
+            llm = PrefixLLM()
+            ctx = OrchestratorContext(host="h", service="svc", session_id="p1", exec_mode="ssh", platform="linux")
+            result = multi_round_diagnose(
+                config=cfg,
+                ctx=ctx,
+                executor=LoadExecutor(),
+                llm=llm,
+                plan_schema_path=PLAN_SCHEMA,
+                report_schema_path=REPORT_SCHEMA,
+                budget=DiagnoseBudget(max_rounds=3, prompt_token_budget=4000),
+            )
+        plan_calls = [c for c in llm.calls if c[0]]
+        self.assertEqual(len(plan_calls), 2)
+        self.assertEqual(plan_calls[0][0], plan_calls[1][0])
+        self.assertTrue(plan_calls[1][1].startswith(plan_calls[0][1]))
+
+        trace = result["diagnosis_trace"]
+        prompts = [r["prompt"] for r in trace["rounds"]]
+        self.assertEqual(len(prompts), 2)
+        for p in prompts:
+            self.assertEqual(p["token_budget"], 4000)
+            self.assertLessEqual(p["total_tokens"], 4000)
+            self.assertIn("llm_ms", p)
+        self.assertLess(prompts[1]["delta_tokens"], prompts[1]["context_tokens"])
+        self.assertEqual(trace["prompt_tokens"]["total"], sum(p["total_tokens"] for p in prompts))
+
+
+if __name__ == "__main__":
+    unittest.main()
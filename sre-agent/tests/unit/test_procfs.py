@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec import local  # noqa: E402
+from adapters.exec.local import AsyncLocalExecutor, LocalExecutor  # noqa: E402
+from adapters.exec.procfs import ProcfsBackend  # noqa: E402
+from registry.parsers import parse_output  # noqa: E402
+from registry.signals import extract_signals  # noqa: E402
+
+
+COMMANDS = {
+    "loadavg": {"cmd": "cat /proc/loadavg", "procfs": "cat"},
+    "proc_pid_io": {"cmd": "cat /proc/{pid}/io", "procfs": "cat"},
+    "free": {"cmd": "free -m", "procfs": "free_m"},
+    "nproc": {"cmd": "nproc", "procfs": "nproc"},
+    "uptime": {"cmd": "uptime"},
+}
+
+MEMINFO = """MemTotal:       16266240 kB
+MemFree:          409600 kB
+MemAvailable:     524288 kB
+Buffers:          102400 kB
+Cached:           204800 kB
+Shmem:             65536 kB
+SReclaimable:      51200 kB
+SwapTotal:       2097152 kB
+SwapFree:         755712 kB
+"""
+
+
+def _fake_proc(tmp):
+    with open(os.path.join(tmp, "meminfo"), "w", encoding="utf-8") as f:
+        f.write(MEMINFO)
+    with open(os.path.join(tmp, "loadavg"), "w", encoding="utf-8") as f:
+        f.write("6.12 5.40 4.88 7/412 9876\n")
+    os.makedirs(os.path.join(tmp, "4242"))
+    with open(os.path.join(tmp, "4242", "io"), "w", encoding="utf-8") as f:
+        f.write("rchar: 10\nwchar: 20\nread_bytes: 4096\nwrite_bytes: 8192\n")
+    return {"commands": COMMANDS, "procfs_root": tmp}
+
+
+class TestProcfsBackend(unittest.TestCase):
+    def test_marked_commands_are_served_and_parse_like_the_tools(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = ProcfsBackend.from_config(_fake_proc(tmp))
+            load = extract_signals(parse_output("loadavg", backend.run("cat /proc/loadavg")))["signals"]
+            self.assertEqual(load["loadavg_1m"], 6.12)
+            io = extract_signals(parse_output("proc_pid_io", backend.run("cat /proc/4242/io")))["signals"]
+            self.assertEqual(io, {"proc_read_bytes": 4096, "proc_write_bytes": 8192})
+            mem = extract_signals(parse_output("free", backend.run("free -m")))["signals"]
+            self.assertEqual(mem, {"mem_total_mb": 15885, "mem_used_mb": 15373, "mem_available_mb": 512, "swap_used_mb": 1310})
+            self.assertEqual(int(backend.run("nproc")), len(os.sched_getaffinity(0)))
+            # A vanished process reads like cat's error.
+            self.assertIn("cat: /proc/99999/io: No such file or directory", backend.run("cat /proc/99999/io"))
+            self.assertEqual(backend.served, 5)
+
+    def test_only_exact_registry_commands_match(self) -> None:
+        backend = ProcfsBackend.from_config({"commands": COMMANDS})
+        for command in ("uptime", "cat /proc/loadavg; id", "cat /proc/x/io", "cat /proc/1/io /etc/shadow", "free -m -h"):
+            with self.subTest(command=command):
+                self.assertIsNone(backend.run(command))
+        self.assertIsNone(ProcfsBackend.from_config({"commands": COMMANDS, "procfs_native": False}))
+        with self.assertRaises(ValueError):
+            ProcfsBackend.from_config({"commands": {"x": {"cmd": "cat /proc/x", "procfs": "bogus"}}})
+
+
+class TestLocalExecutorFastPath(unittest.TestCase):
+    def test_no_subprocess_for_procfs_commands(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = _fake_proc(tmp)
+            with mock.patch.object(local, "run_streaming", side_effect=AssertionError("forked")):
+                self.assertTrue(LocalExecutor(cfg).run("localhost", "cat /proc/loadavg").startswith("6.12"))
+            with mock.patch.object(local.asyncio, "create_subprocess_shell", side_effect=AssertionError("forked")):
+                out = asyncio.run(AsyncLocalExecutor(cfg).run("localhost", "free -m"))
+            self.assertIn("Mem:", out)
+            # Everything else still runs through the shell.
+            self.assertEqual(LocalExecutor(cfg).run("localhost", "echo hi"), "hi\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
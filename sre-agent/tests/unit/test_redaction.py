@@ -0,0 +1,124 @@
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+from storage.redaction import StreamRedactor, redact, redact_counts, redact_parsed  # noqa: E402
+
+SAMPLE = (
+    "Jan 01 00:00:01 host svc[42]: GET /api/v1/orders/7 from 10.1.2.3 user=alice took 5ms\n"
+    "contact ops@example.com token=abc123 AKIAXYZ username=bob file=/var/log/svc/app.log\n"
+    "\tat java.lang.Thread.run(Thread.java:748)\n"
+)
+
+
+class TestRedaction(unittest.TestCase):
+    def test_single_pass_counts(self) -> None:
+        redacted, counts = redact_counts(SAMPLE)
+        self.assertEqual(counts, {"PATH": 2, "IP": 1, "USER": 2, "EMAIL": 1, "SECRET": 2})
+        self.assertNotIn("alice", redacted)
+        self.assertNotIn("10.1.2.3", redacted)
+        self.assertIn("Thread.java:748", redacted)
+
+        _, applied, replaced = redact(SAMPLE)
+        self.assertEqual(applied, ["IP", "EMAIL", "SECRET", "PATH", "USER"])
+        self.assertEqual(replaced, 8)
+
+    def test_path_and_user_match_word_chars(self) -> None:
+        self.assertEqual(redact("see /home/alice/.ssh/id_rsa now")[0], "see <PATH> now")
+        self.assertEqual(redact("login USER=root ok")[0], "login <USER> ok")
+        self.assertEqual(redact("no paths here: /tmp")[2], 0)
+
+    def test_user_value_left_to_earlier_rules(self) -> None:
+        self.assertEqual(redact("user=bob@example.com"), ("user=<EMAIL>", ["EMAIL"], 1))
+        self.assertEqual(redact("username=10.0.0.1 user=token=abc")[0], "username=<IP> user=<SECRET>")
+        self.assertEqual(redact("user=bob@example.com")[0], StreamRedactor().feed("user=bob@example.com\n").rstrip())
+
+    def test_stream_matches_crossing_chunks(self) -> None:
+        text = SAMPLE * 50
+        expected = redact(text)
+        rng = random.Random(7)
+        for _ in range(20):
+            r = StreamRedactor()
+            out = []
+            pos = 0
+            while pos < len(text):
+                step = rng.randint(1, 40)
+                out.append(r.feed(text[pos : pos + step]))
+                pos += step
+            out.append(r.close())
+            self.assertEqual("".join(out), expected[0])
+            self.assertEqual(r.summary(), (expected[1], expected[2]))
+
+    def test_stream_carry_is_bounded(self) -> None:
+        r = StreamRedactor(max_carry=16)
+        self.assertEqual(r.feed("x" * 10), "")
+        self.assertEqual(r.feed("y" * 10), "x" * 10 + "y" * 10)
+        self.assertEqual(r.close(), "")
+
+
+DF_ABS = """Filesystem             Size  Used Avail Use% Mounted on
+/dev/vda1               97G   40G   57G  42% /
+/dev/mapper/vg-docker  493G  470G   23G  96% /var/lib/docker
+"""
+
+
+class MapExecutor:
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    def run(self, host, command, timeout=30):
+        return self.outputs.get(command, "")
+
+
+class TestParseBeforeRedaction(unittest.TestCase):
+    def test_redact_parsed_counts_like_redact(self) -> None:
+        value = {"rows": ["/var/lib/docker", 3, None], "/opt/a/b": {"ip": "10.0.0.1"}}
+        redacted, applied, count = redact_parsed(value)
+        self.assertEqual(redacted, {"rows": ["<PATH>", 3, None], "<PATH>": {"ip": "<IP>"}})
+        self.assertEqual((applied, count), (["IP", "PATH"], 3))
+
+    def test_absolute_paths_parse_then_redact(self) -> None:
+        with open(os.path.join(ROOT_DIR, "tests", "fixtures", "bindings", "ps_cpu.txt"), "r", encoding="utf-8") as f:
+            ps = f.read()
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {
+                    "df": {"cmd": "df -h", "risk": "READ_ONLY", "platform": "linux", "parser": "df"},
+                    "ps_cpu": {"cmd": "ps_cpu", "risk": "READ_ONLY", "platform": "linux", "parser": "ps_cpu"},
+                },
+                "baseline": {"cmds": {"linux": ["df", "ps_cpu"]}},
+                "evidence": {"base_dir": tmp, "content_addressed": False},
+                "routes": {},
+            }
+            ctx = OrchestratorContext(host="h", service="svc", session_id="r1", exec_mode="ssh", platform="linux")
+            pack = Orchestrator(cfg, executor=MapExecutor({"df -h": DF_ABS, "ps_cpu": ps})).run(ctx)
+            parsed = {}
+            for path in glob.glob(os.path.join(tmp, "r1", "parsed", "*.json")):
+                with open(path, "r", encoding="utf-8") as f:
+                    parsed[os.path.basename(path).split("-")[0]] = f.read()
+
+        signals = pack["signals"]
+        # Numbers come from the raw parse; strings reach the pack redacted.
+        self.assertEqual(signals["disk_use_max_pct"], 96.0)
+        self.assertEqual(signals["disk_use_max_mount"], "<PATH>")
+        self.assertEqual(signals["top_proc_cpu_pid"], 4242)
+        self.assertEqual(signals["top_proc_cpu_pct"], 187.3)
+        self.assertEqual(signals["top_proc_cpu_cmd"], "<PATH> -Xmx10g -jar <PATH>")
+        self.assertNotIn("/usr/lib/jvm", json.dumps(pack))
+        self.assertNotIn("/usr/lib/jvm", parsed["ps_cpu"])
+        self.assertNotIn("/var/lib/docker", parsed["df"])
+        self.assertIn("<PATH>", parsed["df"])
+
+
+if __name__ == "__main__":
+    unittest.main()
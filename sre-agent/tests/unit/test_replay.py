@@ -1,6 +1,7 @@
 import json
 import os
 import sys
+import tempfile
 import unittest
 from datetime import datetime, timezone
 
@@ -11,6 +12,7 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 
+from evaluation.corpus import ReplayOptions, replay_corpus  # noqa: E402
 from evaluation.replay import replay_one  # noqa: E402
 
 
@@ -46,5 +48,60 @@ class TestReplay(unittest.TestCase):
             self.assertEqual(res.predicted, c["expected_category"])
 
 
+RULES = {
+    "rules": [
+        {"category": "IO_WAIT", "signal": "iowait_pct", "op": ">=", "threshold": 20, "confidence": 0.8},
+        {"category": "CPU", "signal": "loadavg_1m", "op": ">=", "threshold": 8, "confidence": 0.6},
+    ]
+}
+
+
+def _pack(session_id, category, signals):
+    return {
+        "meta": {"host": "h", "service": "svc", "session_id": session_id, "timestamp": "t"},
+        "snapshots": [],
+        "hypothesis": [{"category": category, "confidence": 0.8, "why": "w", "evidence_refs": []}],
+        "next_checks": [],
+        "signals": signals,
+    }
+
+
+class TestCorpusReplay(unittest.TestCase):
+    def test_jsonl_and_report_tree_with_precision_recall(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonl = os.path.join(tmp, "cases.jsonl")
+            with open(jsonl, "w", encoding="utf-8") as f:
+                for i in range(6):
+                    f.write(json.dumps({"id": f"io{i}", "expected_category": "IO_WAIT", "signals": {"iowait_pct": 40}}) + "\n")
+                # Labelled CPU but the rules see IO_WAIT: one CPU false negative, one IO_WAIT false positive.
+                f.write(json.dumps({"id": "miss", "expected_category": "CPU", "signals": {"iowait_pct": 40}}) + "\n")
+                f.write("not json\n")
+            reports = os.path.join(tmp, "report")
+            for session_id, category, signals in (("s1", "CPU", {"loadavg_1m": 12}), ("s2", "CPU", {"loadavg_1m": 1})):
+                os.makedirs(os.path.join(reports, session_id, "index"))
+                with open(os.path.join(reports, session_id, "index", "evidence_pack.json"), "w", encoding="utf-8") as f:
+                    json.dump(_pack(session_id, category, signals), f)
+            opts = ReplayOptions(
+                schema_path=os.path.join(ROOT_DIR, "schemas", "evidence_schema.json"),
+                rules=RULES,
+                # s2 is relabelled; s1 keeps the category recorded in its pack.
+                labels={"s2": "UNKNOWN"},
+            )
+            seen = []
+            inline = replay_corpus([jsonl, reports], opts, chunk_size=3, on_result=seen.append)
+            pooled = replay_corpus([jsonl, reports], opts, workers=2, chunk_size=3)
+
+        self.assertEqual(inline["total"], 9)
+        self.assertEqual(inline["errors"], 1)
+        self.assertEqual(inline["schema_pass_rate"], 1.0)
+        self.assertEqual(inline["per_category"]["IO_WAIT"], {"precision": 0.857143, "recall": 1.0, "support": 6, "tp": 6, "fp": 1, "fn": 0})
+        self.assertEqual(inline["per_category"]["CPU"]["recall"], 0.5)
+        self.assertEqual(inline["per_category"]["UNKNOWN"]["tp"], 1)
+        self.assertIn("s1", [r.case_id for r in seen])
+        self.assertGreater(inline["cases_per_sec"], 0)
+        for key in ("total", "errors", "accuracy", "per_category"):
+            self.assertEqual(pooled[key], inline[key])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,7 @@
+import json
 import os
 import sys
+import tempfile
 import unittest
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -8,7 +10,14 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 from reporting.prompt_templates import build_evidence_prompt, build_report_prompt
-from reporting.schema_validate import validate_schema
+from reporting.schema_validate import (
+    compiled_validator,
+    is_valid,
+    load_schema,
+    structural_check,
+    validate_schema,
+    validator_for_path,
+)
 
 
 class TestReporting(unittest.TestCase):
@@ -29,5 +38,42 @@ class TestReporting(unittest.TestCase):
             validate_schema({"a": 1}, schema)
 
 
+class TestSchemaRegistry(unittest.TestCase):
+    def test_validators_are_compiled_once_per_schema(self) -> None:
+        schema = {"type": "object", "properties": {"a": {"type": "string"}}, "required": ["a"]}
+        validator = compiled_validator(schema)
+        self.assertIs(compiled_validator(dict(schema)), validator)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "s.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(schema, f)
+            self.assertIs(load_schema(path), load_schema(path))
+            self.assertIs(validator_for_path(path), validator)
+            # A rewritten file is picked up.
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"type": "array"}, f)
+            os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+            self.assertEqual(load_schema(path), {"type": "array"})
+
+    def test_structural_check_agrees_with_full_validation(self) -> None:
+        schema = load_schema(os.path.join(ROOT_DIR, "schemas", "evidence_schema.json"))
+        pack = {
+            "meta": {"host": "h", "service": "svc", "timestamp": "t"},
+            "snapshots": [],
+            "hypothesis": [],
+            "next_checks": [],
+        }
+        self.assertIsNone(structural_check(pack, schema))
+        self.assertTrue(is_valid(pack, schema))
+        for bad in ([], {**pack, "snapshots": {}}, {k: v for k, v in pack.items() if k != "meta"}, {**pack, "meta": "x"}):
+            with self.subTest(bad=bad):
+                self.assertIsNotNone(structural_check(bad, schema))
+                self.assertFalse(is_valid(bad, schema))
+        # Nested errors are left to the full validator.
+        nested = {**pack, "meta": {"host": "h"}}
+        self.assertIsNone(structural_check(nested, schema))
+        self.assertFalse(is_valid(nested, schema))
+
+
 if __name__ == "__main__":
     unittest.main()
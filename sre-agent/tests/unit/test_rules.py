@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config import load_configs  # noqa: E402
+from orchestrator.rules import RuleEngine, shared_rule_engine  # noqa: E402
+
+
+CONFIG = {
+    "derived": [
+        {"name": "load_per_cpu", "op": "ratio", "args": ["loadavg_1m", "cpu_count"]},
+        {"name": "fgc_per_min", "op": "rate", "args": ["jvm_fgc_count"], "scale": 60},
+    ],
+    "rules": [
+        {"category": "IO_WAIT", "signal": "iowait_pct", "op": ">=", "threshold": 20, "confidence": 0.8},
+        {"category": "IO_WAIT", "signal": "disk_util_max_pct", "op": ">=", "threshold": 90, "confidence": 0.5},
+        {
+            "category": "CPU",
+            "all": [
+                {"signal": "load_per_cpu", "op": ">=", "threshold": 2},
+                {"any": [{"signal": "iowait_pct", "op": "<", "threshold": 20}, {"signal": "steal_pct", "op": ">", "threshold": 10}]},
+            ],
+            "confidence": 0.7,
+            "why": "load above cpu count",
+        },
+        {"category": "GC", "signal": "fgc_per_min", "op": ">=", "threshold": 1, "confidence": 0.6},
+        {"category": "MEMORY", "signal": "mem_available_mb", "op": "<=", "threshold": 200, "confidence": 0.7},
+    ],
+}
+
+
+class TestRuleEngine(unittest.TestCase):
+    def test_compound_and_derived(self) -> None:
+        engine = RuleEngine(CONFIG)
+        hyps = engine.classify({"loadavg_1m": 9.0, "cpu_count": 4, "iowait_pct": 3.0})
+        self.assertEqual(hyps[0]["category"], "CPU")
+        self.assertIn("load_per_cpu=2.25", hyps[0]["why"])
+        # OR branch: high iowait fails the first alternative, steal satisfies the second.
+        hyps = engine.classify({"loadavg_1m": 9.0, "cpu_count": 4, "iowait_pct": 30.0, "steal_pct": 15})
+        self.assertEqual([h["category"] for h in hyps], ["IO_WAIT", "CPU"])
+        self.assertEqual(engine.classify({"loadavg_1m": 9.0, "cpu_count": 4, "iowait_pct": 30.0})[0]["category"], "IO_WAIT")
+        self.assertEqual(len(engine.classify({"loadavg_1m": 9.0, "iowait_pct": 30.0})), 1)
+
+    def test_incremental_session_only_reevaluates_changed_inputs(self) -> None:
+        engine = RuleEngine(CONFIG)
+        session = engine.session()
+        signals = {"iowait_pct": 3.0, "loadavg_1m": 1.0, "cpu_count": 4, "mem_available_mb": 900}
+        self.assertEqual(session.update(signals)[0]["category"], "UNKNOWN")
+        first = session.evaluations
+        # Only the MEMORY rule reads mem_available_mb.
+        signals = dict(signals, mem_available_mb=100)
+        self.assertEqual(session.update(signals)[0]["category"], "MEMORY")
+        self.assertEqual(session.evaluations - first, 1)
+        # Nothing changed: nothing is evaluated, the result is stable.
+        before = session.evaluations
+        self.assertEqual(session.update(signals)[0]["category"], "MEMORY")
+        self.assertEqual(session.evaluations, before)
+        # A removed signal un-matches its rules.
+        signals.pop("mem_available_mb")
+        self.assertEqual(session.update(signals)[0]["category"], "UNKNOWN")
+
+    def test_rate_between_updates(self) -> None:
+        session = RuleEngine(CONFIG).session()
+        self.assertEqual(session.update({"jvm_fgc_count": 10}, now=100.0)[0]["category"], "UNKNOWN")
+        self.assertNotIn("fgc_per_min", session.values)
+        hyps = session.update({"jvm_fgc_count": 13}, now=160.0)
+        self.assertEqual(session.values["fgc_per_min"], 3.0)
+        self.assertEqual(hyps[0]["category"], "GC")
+
+    def test_category_aggregation(self) -> None:
+        signals = {"iowait_pct": 30.0, "disk_util_max_pct": 95.0}
+        hyp = RuleEngine(CONFIG).classify(signals)[0]
+        self.assertEqual(hyp["confidence"], 0.8)
+        self.assertIn("+1 more rule", hyp["why"])
+        hyp = RuleEngine(dict(CONFIG, aggregate="noisy_or")).classify(signals)[0]
+        self.assertAlmostEqual(hyp["confidence"], 0.9)
+
+    def test_shared_engine_and_shipped_rules(self) -> None:
+        rules_cfg = load_configs([os.path.join(ROOT_DIR, "configs", "rules.yaml")])["rules"]
+        engine = shared_rule_engine(rules_cfg)
+        self.assertIs(engine, shared_rule_engine(dict(rules_cfg)))
+        self.assertIs(shared_rule_engine({}), shared_rule_engine(None))
+        # Every shipped rule compiled (a broken one would be silently skipped).
+        self.assertEqual(len(engine.rules), len(rules_cfg["rules"]))
+        self.assertEqual(len(engine.derived), len(rules_cfg["derived"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.graph import Orchestrator, OrchestratorContext, sampling_plan  # noqa: E402
+from orchestrator.rules import RuleEngine  # noqa: E402
+from registry.parsers import parse_output  # noqa: E402
+from registry.sampling import Ring, SAMPLE_MARKER  # noqa: E402
+from registry.signals import extract_signals  # noqa: E402
+
+
+def _samples(n: int, *, interval: float = 5.0) -> str:
+    """proc_sample-like output: cpu 50% busy + 30% iowait, sda 95% busy, memory draining."""
+    out = []
+    for i in range(n):
+        t = 1000.0 + i * interval
+        jiffies = int(i * interval * 100)  # 100 jiffies/s, one cpu
+        out += [
+            SAMPLE_MARKER,
+            f"{t:.2f} 3600.00",
+            f"{4.0 + i:.2f} 3.00 2.00 3/512 {9000 + i}",
+            f"cpu  {jiffies // 2} 0 0 {jiffies // 5} {jiffies * 3 // 10} 0 0 0 0 0",
+            f"ctxt {i * 1000}",
+            "procs_running 3",
+            "procs_blocked 1",
+            "MemTotal:       1000000 kB",
+            f"MemAvailable:   {500000 - i * 50000} kB",
+            "SwapTotal:            0 kB",
+            "SwapFree:             0 kB",
+            f"   8       0 sda {i * 10} 0 {i * 2048} 0 {i * 5} 0 {i * 4096} 0 0 {int(i * interval * 950)} 0",
+            f"   8       1 sda1 {i * 10} 0 {i * 2048} 0 {i * 5} 0 {i * 4096} 0 0 {int(i * interval * 950)} 0",
+            "   7       0 loop0 1 0 2 0 0 0 0 0 0 999999 0",
+        ]
+    return "\n".join(out) + "\n"
+
+
+class TestRing(unittest.TestCase):
+    def test_ring_keeps_latest_in_order(self) -> None:
+        ring = Ring(3)
+        for v in range(5):
+            ring.append(float(v))
+        self.assertEqual(list(ring.values()), [2.0, 3.0, 4.0])
+        self.assertEqual(ring.size, 3)
+
+
+class TestProcSamples(unittest.TestCase):
+    def test_rates_percentiles_and_slopes(self) -> None:
+        parsed = parse_output("proc_sample", _samples(10))
+        ts = parsed["timeseries"]
+        self.assertEqual(ts["samples"], 10)
+        self.assertEqual(ts["interval_sec"], 5.0)
+        # Partitions and loop devices do not count as disks.
+        self.assertEqual(ts["disks"], ["sda"])
+
+        sig = extract_signals(parsed)["signals"]
+        self.assertAlmostEqual(sig["ts_cpu_busy_pct_p95"], 50.0, places=1)
+        self.assertAlmostEqual(sig["ts_iowait_pct_p95"], 30.0, places=1)
+        self.assertAlmostEqual(sig["ts_ctxt_per_sec_p50"], 200.0, places=1)
+        self.assertAlmostEqual(sig["ts_disk_util_max_pct_p95"], 95.0, places=1)
+        self.assertAlmostEqual(sig["ts_disk_write_mb_s_p50"], 4096 * 512 / 1048576 / 5.0, places=2)
+        self.assertAlmostEqual(sig["ts_loadavg_1m_slope_per_min"], 12.0, places=2)
+        self.assertAlmostEqual(sig["ts_mem_available_pct_slope_per_min"], -60.0, places=2)
+        self.assertIn("samples=10", sig["timeseries"]["summary"])
+
+        hyps = RuleEngine({}).classify(sig)
+        self.assertEqual(hyps[0]["category"], "IO_WAIT")
+        self.assertIn("MEMORY", [h["category"] for h in hyps])
+
+    def test_truncated_and_garbled_output(self) -> None:
+        text = "noise before first marker\n" + _samples(4) + SAMPLE_MARKER + "\ncpu  x y z\n"
+        parsed = parse_output("proc_sample", text)
+        # The last, garbled frame has no timestamp and is dropped.
+        self.assertEqual(parsed["timeseries"]["samples"], 4)
+
+    def test_sampling_plan(self) -> None:
+        ctx = OrchestratorContext(host="h", service="svc", window_minutes=30)
+        self.assertIsNone(sampling_plan({}, ctx))
+        plan = sampling_plan({"sampling": {"max_duration_sec": 60}}, OrchestratorContext(host="h", service="svc", sample_interval_sec=5))
+        self.assertEqual((plan.count, plan.interval_sec), (13, 5.0))
+        plan = sampling_plan({}, OrchestratorContext(host="h", service="svc", sample_interval_sec=1, sample_duration_sec=10))
+        self.assertEqual(plan.count, 11)
+
+
+class SampleExecutor:
+    def __init__(self) -> None:
+        self.commands = []
+
+    def run(self, host, command, timeout=30):
+        self.commands.append((command, timeout))
+        return _samples(6) if "--- sample" in command else "ok\n"
+
+
+class TestOrchestratorSampling(unittest.TestCase):
+    def test_sampling_feeds_rules_and_snapshots(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {
+                    "uname": {"cmd": "uname -a", "risk": "READ_ONLY", "platform": "linux"},
+                    "proc_sample": {
+                        "cmd": "for i in $(seq {count}); do echo '--- sample'; sleep {interval}; done",
+                        "risk": "READ_ONLY",
+                        "platform": "linux",
+                    },
+                },
+                "baseline": {"cmds": {"linux": ["uname"]}},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+            }
+            executor = SampleExecutor()
+            ctx = OrchestratorContext(
+                host="h",
+                service="svc",
+                session_id="s1",
+                platform="linux",
+                sample_interval_sec=2,
+                sample_duration_sec=10,
+            )
+            pack = Orchestrator(cfg, executor=executor).run(ctx)
+
+        sampled = [c for c in executor.commands if "--- sample" in c[0]]
+        self.assertEqual(len(sampled), 1)
+        self.assertIn("seq 6", sampled[0][0])
+        self.assertIn("sleep 2", sampled[0][0])
+        self.assertEqual(sampled[0][1], 40)
+        self.assertEqual([s["cmd_id"] for s in pack["snapshots"]], ["uname", "proc_sample"])
+        self.assertTrue(pack["snapshots"][1]["signal"].startswith("samples=6"))
+        self.assertIn("ts_iowait_pct_p95", pack["signals"])
+        self.assertEqual(pack["hypothesis"][0]["category"], "IO_WAIT")
+
+
+if __name__ == "__main__":
+    unittest.main()
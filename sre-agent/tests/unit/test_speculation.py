@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+from orchestrator.speculation import SelectionStats, SpeculationPolicy, Speculator  # noqa: E402
+from storage.evidence_store import EvidenceStore  # noqa: E402
+
+COMMANDS = {
+    "mpstat": {"cmd": "mpstat", "risk": "READ_ONLY", "platform": "linux"},
+    "ps_cpu": {"cmd": "ps_cpu", "risk": "READ_ONLY", "platform": "linux"},
+    "top": {"cmd": "top", "risk": "READ_ONLY", "platform": "linux"},
+    "kill_it": {"cmd": "kill -9 1", "risk": "READ_ONLY", "platform": "linux"},
+}
+
+
+class SlowExecutor:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.commands = []
+
+    def run(self, host, command, timeout=30):
+        self.commands.append(command)
+        time.sleep(self.delay)
+        return f"out:{command}\n"
+
+
+class CountingExecutor(SlowExecutor):
+    """Tracks peak concurrency; commands in `hang` report a timeout."""
+
+    def __init__(self, delay=0.05, hang=()):
+        super().__init__(delay)
+        self.hang = set(hang)
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def run(self, host, command, timeout=30):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            out = super().run(host, command, timeout)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return f"command timeout after {timeout}s" if command in self.hang else out
+
+
+class MemoryAudit:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class TestSelectionStats(unittest.TestCase):
+    def test_rank_record_and_merge_on_save(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats.json")
+            a = SelectionStats(path)
+            self.assertEqual(a.rank("CPU", ["mpstat", "ps_cpu", "top"]), ["mpstat", "ps_cpu", "top"])
+            a.record("CPU", ["top", "top", "ps_cpu"])
+            self.assertEqual(a.rank("CPU", ["mpstat", "ps_cpu", "top"]), ["top", "ps_cpu", "mpstat"])
+            # A concurrent session saved first; both sessions' counts survive.
+            b = SelectionStats(path)
+            b.record("CPU", ["mpstat"])
+            b.save()
+            a.save()
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), {"CPU": {"mpstat": 1, "ps_cpu": 1, "top": 2}})
+
+    def test_policy_from_config_and_load_cap(self) -> None:
+        self.assertFalse(SpeculationPolicy.from_config({}).enabled)
+        policy = SpeculationPolicy.from_config({"speculation": {"enabled": True, "top_k": 3}, "evidence": {"base_dir": "/x"}})
+        self.assertEqual((policy.top_k, policy.stats_path), (3, os.path.join("/x", "planner_selection_stats.json")))
+        self.assertEqual(policy.skip_reason({"loadavg_1m": 4.0, "cpu_count": 4}), "")
+        self.assertEqual(policy.skip_reason({"loadavg_1m": 40.0, "cpu_count": 4}), "host_overloaded")
+        self.assertEqual(policy.skip_reason({"iowait_pct": 80}), "host_io_saturated")
+
+
+class TestSpeculator(unittest.TestCase):
+    def test_selected_runs_commit_and_others_are_discarded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = SlowExecutor()
+            orch = Orchestrator({"commands": COMMANDS, "evidence": {"base_dir": tmp}}, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="sp1", platform="linux")
+            store = EvidenceStore.from_config({"base_dir": tmp}, "sp1")
+            audit = MemoryAudit()
+            stats = SelectionStats()
+            stats.record("CPU", ["top"])
+            spec = Speculator(SpeculationPolicy(enabled=True, top_k=3, max_total=4), stats=stats)
+
+            async def round_trip(pool):
+                buf, trace = spec.launch(
+                    orch=orch,
+                    ctx=ctx,
+                    category="CPU",
+                    pool=pool,
+                    signals={},
+                    platform="linux",
+                    commands_cfg=COMMANDS,
+                    allowed_risks=["READ_ONLY"],
+                    deny_keywords=["kill"],
+                )
+                await asyncio.sleep(0.1)  # the planner "thinks"
+                committed = []
+                if "top" in buf:
+                    command, run = await buf.take("top")
+                    committed.append(orch.record_cmd(ctx=ctx, cmd_id="top", command=command, run=run, store=store, audit_store=audit))
+                dropped = await buf.discard(ctx=ctx, audit_store=audit)
+                return spec.settle(buf, trace, dropped), committed
+
+            trace, committed = asyncio.run(round_trip(["kill_it", "mpstat", "ps_cpu", "top"]))
+            # Ranked by history (top first); policy-blocked commands never start.
+            self.assertEqual(trace["launched"], ["top", "mpstat", "ps_cpu"])
+            self.assertEqual(trace["hits"], ["top"])
+            self.assertEqual(sorted(trace["discarded"]), ["mpstat", "ps_cpu"])
+            self.assertGreater(trace["saved_ms"], 0)
+            self.assertEqual(committed[0][0], "out:top\n")
+            self.assertNotIn("kill -9 1", executor.commands)
+            # Discarded runs did execute, so they are audited but not stored as evidence.
+            spec_audit = sorted(r["cmd_id"] for r in audit.records if r.get("speculative") == "discarded")
+            self.assertEqual(spec_audit, ["mpstat", "ps_cpu"])
+
+            # Session cap: 3 of 4 used, so one more at most; then none.
+            trace, _ = asyncio.run(round_trip(["mpstat", "ps_cpu"]))
+            self.assertEqual(len(trace["launched"]), 1)
+            trace, _ = asyncio.run(round_trip(["mpstat"]))
+            self.assertEqual(trace, {"skipped": "session_cap_reached"})
+            self.assertEqual(spec.summary()["launched"], 4)
+            self.assertEqual(spec.summary()["hits"], 1)
+
+    def test_runs_take_host_slots_and_short_timeouts_are_rerun(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = CountingExecutor(hang=["ps_cpu"])
+            orch = Orchestrator({"commands": COMMANDS, "evidence": {"base_dir": tmp}}, executor=executor)
+            ctx = OrchestratorContext(host="h", service="svc", session_id="sp2", platform="linux")
+            audit = MemoryAudit()
+            spec = Speculator(SpeculationPolicy(enabled=True, top_k=3, max_total=6, timeout_sec=5), stats=SelectionStats())
+
+            async def round_trip():
+                slots = asyncio.Semaphore(1)
+                buf, trace = spec.launch(
+                    orch=orch,
+                    ctx=ctx,
+                    category="CPU",
+                    pool=["mpstat", "ps_cpu", "top"],
+                    signals={},
+                    platform="linux",
+                    commands_cfg=COMMANDS,
+                    allowed_risks=["READ_ONLY"],
+                    deny_keywords=[],
+                    slots=slots,
+                )
+                taken = {c: await buf.take(c, 60) for c in ("mpstat", "ps_cpu")}
+                dropped = await buf.discard(ctx=ctx, audit_store=audit)
+                return spec.settle(buf, trace, dropped), taken
+
+            trace, taken = asyncio.run(round_trip())
+            self.assertEqual(executor.peak, 1)
+            self.assertEqual(trace["timeout_sec"], 5)
+            self.assertEqual(taken["mpstat"][1].timeout_sec, 5)
+            # Timed out after 5s while the plan allowed 60s: not a usable hit.
+            self.assertIsNone(taken["ps_cpu"])
+            self.assertEqual((trace["hits"], trace["rerun"]), (["mpstat"], ["ps_cpu"]))
+            discarded = {r["cmd_id"]: r["timeout_sec"] for r in audit.records if r.get("speculative") == "discarded"}
+            # "top" only got the slot after ps_cpu and was cancelled unfinished.
+            self.assertEqual(discarded, {"ps_cpu": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
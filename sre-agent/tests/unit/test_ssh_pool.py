@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.ssh_pool import ControlMasterPool, ParamikoPool, _PooledTransport  # noqa: E402
+
+
+class FakeTransport:
+    def __init__(self) -> None:
+        self.active = True
+        self.sessions = 0
+        self.fail_open = False
+
+    def is_active(self) -> bool:
+        return self.active
+
+    def send_ignore(self) -> None:
+        if not self.active:
+            raise EOFError("dead")
+
+    def open_session(self, timeout=None):
+        if self.fail_open:
+            raise EOFError("channel open failed")
+        self.sessions += 1
+        return object()
+
+
+class FakeClient:
+    def __init__(self, transport) -> None:
+        self.transport = transport
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeParamikoPool(ParamikoPool):
+    def __init__(self, **kw) -> None:
+        super().__init__(port=22, user="root", password="pw", **kw)
+        self.connects = 0
+
+    def _connect(self, host):
+        self.connects += 1
+        t = FakeTransport()
+        return _PooledTransport(client=FakeClient(t), transport=t)
+
+
+class TestParamikoPool(unittest.TestCase):
+    def test_reuses_transport(self) -> None:
+        pool = FakeParamikoPool()
+        t1 = pool.acquire("h1")
+        t2 = pool.acquire("h1")
+        self.assertIs(t1, t2)
+        pool.open_session("h1", 5)
+        pool.open_session("h1", 5)
+        self.assertEqual(pool.connects, 1)
+        self.assertEqual(t1.sessions, 2)
+
+    def test_reconnects_dead_transport(self) -> None:
+        pool = FakeParamikoPool()
+        t1 = pool.acquire("h1")
+        t1.active = False
+        t2 = pool.acquire("h1")
+        self.assertIsNot(t1, t2)
+        self.assertEqual(pool.connects, 2)
+
+    def test_reconnect_on_channel_failure(self) -> None:
+        pool = FakeParamikoPool()
+        t1 = pool.acquire("h1")
+        t1.fail_open = True
+        pool.open_session("h1", 5)
+        self.assertEqual(pool.connects, 2)
+
+    def test_idle_eviction(self) -> None:
+        pool = FakeParamikoPool(idle_timeout_sec=1)
+        pool.acquire("h1")
+        for entry in pool._entries.values():
+            entry.last_used -= 5
+        pool.evict_idle()
+        self.assertEqual(pool._entries, {})
+
+    def test_close(self) -> None:
+        pool = FakeParamikoPool()
+        pool.acquire("h1")
+        client = next(iter(pool._entries.values())).client
+        pool.close()
+        self.assertTrue(client.closed)
+
+
+class TestControlMasterPool(unittest.TestCase):
+    def test_options_and_mux_failure(self) -> None:
+        pool = ControlMasterPool(idle_timeout_sec=60)
+        try:
+            opts = " ".join(pool.ssh_options())
+            self.assertIn("ControlMaster=auto", opts)
+            self.assertIn("ControlPersist=60s", opts)
+            self.assertTrue(pool.is_mux_failure(255, "Control socket connect(/tmp/x): Connection refused"))
+            self.assertFalse(pool.is_mux_failure(1, "Control socket connect"))
+            self.assertFalse(pool.is_mux_failure(255, "Permission denied (publickey)"))
+            self.assertTrue(pool.is_mux_failure(255, "mux_client_request_session: read from master failed: Broken pipe\n"))
+            self.assertTrue(pool.is_mux_failure(255, "remote noise\nmux_client_hello_exchange: write packet: Broken pipe"))
+            # Generic connection errors are not multiplexing failures.
+            self.assertFalse(pool.is_mux_failure(255, "ssh: connect to host h port 22: Connection refused"))
+            self.assertFalse(pool.is_mux_failure(255, "write failed: Broken pipe"))
+            self.assertFalse(pool.is_mux_failure(255, "client_loop: send disconnect: Broken pipe"))
+            self.assertFalse(pool.is_mux_failure(255, "app log: see mux_client_foo: docs"))
+        finally:
+            pool.close()
+        self.assertFalse(os.path.exists(pool.control_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from adapters.exec.batch import BatchItem, build_batch_script, new_nonce, parse_batch_output  # noqa: E402
+from adapters.exec.local import AsyncLocalExecutor, LocalExecutor  # noqa: E402
+from adapters.exec.stream import OutputLimit, StreamCapture, is_truncated, output_limit  # noqa: E402
+from orchestrator.graph import Orchestrator, OrchestratorContext  # noqa: E402
+
+# Prints ~100 MB and would run for a long time without the cap.
+FLOOD = "yes 0123456789012345678901234567890123456789 | head -c 100000000"
+LIMIT = OutputLimit(max_bytes=64 * 1024, head_bytes=1024, tail_bytes=1024)
+# ~200 KB, past the cap but under the default ceiling, with a marker at the very end.
+LOG = "seq 1 30000; echo THE-END"
+
+
+class TestStreamCapture(unittest.TestCase):
+    def test_output_limit_resolution(self) -> None:
+        self.assertIsNone(output_limit({}, {}))
+        lim = output_limit({"max_bytes": 100}, {"max_bytes": 10, "head_bytes": 80, "tail_bytes": 80})
+        self.assertEqual(lim, OutputLimit(max_bytes=100, head_bytes=80, tail_bytes=20))
+        self.assertEqual(output_limit({"max_bytes": 10, "ceiling_bytes": 50}, {}).ceiling, 50)
+        self.assertEqual(output_limit({}, {"max_bytes": 10}), OutputLimit(10, 5, 5))
+
+    def test_head_tail_retention(self) -> None:
+        with StreamCapture(OutputLimit(max_bytes=20, head_bytes=4, tail_bytes=4)) as cap:
+            self.assertTrue(cap.feed(b"HEAD012345678"))
+            # Past the cap, reading goes on into a rolling tail: the kept tail
+            # is the real end of the output, not the bytes before the cut.
+            self.assertTrue(cap.feed(b"abc-dropped-middle-"))
+            self.assertTrue(cap.feed(b"TAIL"))
+            self.assertTrue(cap.truncated)
+            out = cap.render()
+        self.assertTrue(out.startswith("HEAD\n...\nTAIL\n"))
+        self.assertNotIn("dropped", out)
+        self.assertTrue(is_truncated(out))
+        self.assertIn("of 36]", out)
+
+    def test_ceiling_stops_reading(self) -> None:
+        with StreamCapture(OutputLimit(max_bytes=20, head_bytes=4, tail_bytes=4, ceiling_bytes=30)) as cap:
+            self.assertTrue(cap.feed(b"x" * 25))
+            self.assertFalse(cap.feed(b"y" * 10))
+            self.assertFalse(cap.feed(b"z"))
+            out = cap.render()
+        self.assertTrue(out.startswith("xxxx\n...\nyyyy\n"))
+        self.assertIn("of 35+ (stopped at ceiling)", out)
+        self.assertEqual(OutputLimit(max_bytes=20).ceiling, 80)
+
+    def test_spills_to_disk(self) -> None:
+        with StreamCapture() as cap:
+            for _ in range(40):
+                cap.feed(b"x" * 65536)
+            self.assertTrue(cap.out._file._rolled)
+            self.assertFalse(cap.truncated)
+            self.assertEqual(len(cap.render()), 40 * 65536)
+
+
+class TestCappedExecutors(unittest.TestCase):
+    def test_local_terminates_early(self) -> None:
+        start = time.time()
+        out = LocalExecutor({}).run("localhost", FLOOD, timeout=20, limit=LIMIT)
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(is_truncated(out))
+        self.assertLess(len(out), 4096)
+
+    def test_local_under_cap_unchanged(self) -> None:
+        out = LocalExecutor({}).run("localhost", "echo hi; echo oops >&2", timeout=5, limit=LIMIT)
+        self.assertEqual(out, "hi\n\n[stderr]\noops\n")
+
+    def test_local_keeps_real_end(self) -> None:
+        out = LocalExecutor({}).run("localhost", LOG, timeout=20, limit=LIMIT)
+        self.assertTrue(is_truncated(out))
+        self.assertTrue(out.startswith("1\n2\n"))
+        self.assertIn("29999\n30000\nTHE-END\n[sre-agent: output truncated", out)
+        self.assertNotIn("stopped at ceiling", out)
+
+    def test_local_run_batch_with_limit(self) -> None:
+        items = [BatchItem("log", LOG, 20, LIMIT), BatchItem("small", "echo ok", 20, LIMIT)]
+        res = LocalExecutor({}).run_batch("localhost", items)
+        self.assertTrue(res[0].truncated)
+        self.assertIn("THE-END", res[0].output)
+        self.assertEqual(res[1].output, "ok\n")
+
+    def test_async_local_terminates_early(self) -> None:
+        start = time.time()
+        out = asyncio.run(AsyncLocalExecutor({}).run("localhost", FLOOD, timeout=20, limit=LIMIT))
+        self.assertLess(time.time() - start, 5)
+        self.assertTrue(is_truncated(out))
+
+    def test_batch_script_caps_remotely(self) -> None:
+        items = [BatchItem("big", FLOOD, 20, LIMIT), BatchItem("small", "echo ok", 20, LIMIT)]
+        nonce = new_nonce()
+        script = build_batch_script(items, nonce=nonce, concurrency=2)
+        proc = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=30)
+        res = parse_batch_output(proc.stdout, items, nonce=nonce)
+        self.assertTrue(res[0].truncated)
+        self.assertEqual(res[0].exit_code, 0)
+        self.assertFalse(res[1].truncated)
+        self.assertEqual(res[1].output, "ok\n")
+        self.assertIn("stopped at ceiling", res[0].output)
+
+    def test_batch_script_keeps_real_end(self) -> None:
+        items = [BatchItem("log", LOG, 20, LIMIT)]
+        nonce = new_nonce()
+        script = build_batch_script(items, nonce=nonce)
+        proc = subprocess.run(["bash", "-c", script], capture_output=True, text=True, timeout=30)
+        res = parse_batch_output(proc.stdout, items, nonce=nonce)
+        self.assertTrue(res[0].truncated)
+        self.assertEqual(res[0].exit_code, 0)
+        self.assertTrue(res[0].output.startswith("1\n2\n"))
+        self.assertIn("30000\nTHE-END\n[sre-agent: output truncated", res[0].output)
+
+
+class TestOrchestratorTruncation(unittest.TestCase):
+    def test_index_records_truncation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = {
+                "commands": {"flood": {"cmd": FLOOD, "risk": "READ_ONLY", "platform": "linux", "max_bytes": 65536}},
+                "baseline": {"cmds": {"linux": ["flood"]}},
+                "execution": {"output": {"max_bytes": 1024}},
+                "evidence": {"base_dir": tmp},
+                "routes": {},
+            }
+            ctx = OrchestratorContext(host="h", service="svc", session_id="t1", exec_mode="local", platform="linux")
+            pack = Orchestrator(cfg, executor=LocalExecutor({})).run(ctx)
+            self.assertEqual(pack["metrics"]["truncated"], 1)
+            index_dir = os.path.join(tmp, "t1", "index")
+            events = [f for f in os.listdir(index_dir) if f.startswith("event-flood")]
+            self.assertEqual(len(events), 1)
+            with open(os.path.join(index_dir, events[0]), "r", encoding="utf-8") as f:
+                event = json.load(f)
+            self.assertTrue(event["output"]["truncated"])
+            self.assertLessEqual(event["output"]["bytes"], 65536 + 512)
+
+
+if __name__ == "__main__":
+    unittest.main()
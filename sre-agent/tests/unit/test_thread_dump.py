@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from orchestrator.rules import RuleEngine  # noqa: E402
+from registry.parsers import parse_output  # noqa: E402
+from registry.signals import extract_signals  # noqa: E402
+from registry.thread_dump import ThreadDumpAnalyzer, analyze_thread_dump  # noqa: E402
+
+FIXTURE = os.path.join(ROOT_DIR, "tests", "fixtures", "outputs", "jstack.txt")
+
+
+def _dump(n: int) -> str:
+    """A jstack-like dump: n pool threads, a third BLOCKED on one monitor."""
+    lines = ['Full thread dump OpenJDK 64-Bit Server VM (17.0.9+9 mixed mode):', ""]
+    for i in range(n):
+        lines.append(f'"exec-{i}" #{i + 40} daemon prio=5 os_prio=0 tid=0x{i:016x} nid=0x{i:x} waiting')
+        if i % 3 == 0:
+            lines += [
+                "   java.lang.Thread.State: BLOCKED (on object monitor)",
+                "\tat com.example.Cache.get(Cache.java:42)",
+                "\t- waiting to lock <0x00000000cafe0001> (a com.example.Cache)",
+            ]
+        else:
+            lines += [
+                "   java.lang.Thread.State: WAITING (parking)",
+                "\tat jdk.internal.misc.Unsafe.park(java.base@17.0.9/Native Method)",
+                f"\t- parking to wait for  <0x{i:016x}> (a java.util.concurrent.locks.AbstractQueuedSynchronizer$ConditionObject)",
+            ]
+        lines += ["\tat java.lang.Thread.run(java.base@17.0.9/Thread.java:833)", ""]
+    lines += [
+        '"loader" #9 prio=5 os_prio=0 tid=0x1 nid=0x1 runnable',
+        "   java.lang.Thread.State: RUNNABLE",
+        "\tat com.example.Cache.load(Cache.java:80)",
+        "\t- locked <0x00000000cafe0001> (a com.example.Cache)",
+        "",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class TestThreadDumpAnalyzer(unittest.TestCase):
+    def test_fixture_locks_and_deadlock(self) -> None:
+        with open(FIXTURE, "r", encoding="utf-8") as f:
+            result = analyze_thread_dump(f.read())
+        self.assertEqual(result["threads"], 9)
+        self.assertEqual(result["states"]["BLOCKED"], 4)
+        top = result["contended_locks"][0]
+        self.assertEqual((top["class"], top["owner"], top["blocked"]), ("com.example.cache.LocalCache", "http-nio-8080-exec-1", 2))
+        # Parked on an owned ReentrantLock counts; parked on an idle condition queue does not.
+        parked = {lock["class"]: lock["parked"] for lock in result["contended_locks"]}
+        self.assertEqual(parked["java.util.concurrent.locks.ReentrantLock$NonfairSync"], 1)
+        self.assertNotIn("java.util.concurrent.locks.AbstractQueuedSynchronizer$ConditionObject", parked)
+        self.assertEqual([sorted(c) for c in result["deadlocks"]], [["worker-a", "worker-b"]])
+        self.assertEqual(result["jvm_reported_deadlocks"], 1)
+        self.assertEqual(result["top_stacks"][0]["count"], 2)
+
+    def test_duplicate_thread_names(self) -> None:
+        def thread(header, state, *lock_lines):
+            return [header, f"   java.lang.Thread.State: {state}", "\tat com.example.Job.run(Job.java:1)", *lock_lines, ""]
+
+        lines = ["Full thread dump OpenJDK 64-Bit Server VM (17.0.9+9 mixed mode):", ""]
+        # x#1 -> y#2 -> x#3 is a chain, not a cycle, though the names alternate.
+        lines += thread('"x" #1 prio=5 tid=0x1 nid=0x1 waiting', "BLOCKED", "\t- waiting to lock <0xa1> (a java.lang.Object)")
+        lines += thread(
+            '"y" #2 prio=5 tid=0x2 nid=0x2 waiting',
+            "BLOCKED",
+            "\t- waiting to lock <0xa2> (a java.lang.Object)",
+            "\t- locked <0xa1> (a java.lang.Object)",
+        )
+        lines += thread('"x" #3 prio=5 tid=0x3 nid=0x3 runnable', "RUNNABLE", "\t- locked <0xa2> (a java.lang.Object)")
+        # Two threads both named "w" deadlocked on each other (keyed by nid: no #N).
+        lines += thread(
+            '"w" prio=5 tid=0x4 nid=0x4 waiting',
+            "BLOCKED",
+            "\t- waiting to lock <0xb2> (a java.lang.Object)",
+            "\t- locked <0xb1> (a java.lang.Object)",
+        )
+        lines += thread(
+            '"w" prio=5 tid=0x5 nid=0x5 waiting',
+            "BLOCKED",
+            "\t- waiting to lock <0xb1> (a java.lang.Object)",
+            "\t- locked <0xb2> (a java.lang.Object)",
+        )
+        result = analyze_thread_dump("\n".join(lines) + "\n")
+        self.assertEqual(result["threads"], 5)
+        self.assertEqual(result["deadlocks"], [["w", "w"]])
+        owners = {lock["lock"]: lock["owner"] for lock in result["contended_locks"]}
+        self.assertEqual(owners, {"0xa1": "y", "0xa2": "x", "0xb1": "w", "0xb2": "w"})
+
+    def test_chunked_feed_matches_whole_text(self) -> None:
+        text = _dump(50)
+        analyzer = ThreadDumpAnalyzer()
+        for i in range(0, len(text), 97):
+            analyzer.feed(text[i : i + 97])
+        self.assertEqual(analyzer.result(), analyze_thread_dump(text))
+
+    def test_large_dump_is_fast_and_aggregated(self) -> None:
+        text = _dump(10000)
+        start = time.perf_counter()
+        result = analyze_thread_dump(text)
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(result["threads"], 10001)
+        self.assertEqual(result["contended_locks"][0]["waiters"], 3334)
+        self.assertLessEqual(result["distinct_stacks"], 3)
+        self.assertLess(len(str(result)), 5000)
+
+    def test_lock_contend_rule(self) -> None:
+        signals = extract_signals(parse_output("jcmd_threads", _dump(60)))["signals"]
+        self.assertEqual(signals["lock_blocked_max"], 20)
+        self.assertIn("waiters=20", signals["thread_dump"]["summary"])
+        hypotheses = RuleEngine({}).classify(signals)
+        self.assertEqual(hypotheses[0]["category"], "LOCK_CONTEND")
+
+
+if __name__ == "__main__":
+    unittest.main()
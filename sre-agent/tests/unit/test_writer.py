@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from storage.audit_store import AuditStore  # noqa: E402
+from storage.evidence_store import EvidenceStore  # noqa: E402
+from storage.writer import WriteBehind  # noqa: E402
+
+
+class TestWriteBehind(unittest.TestCase):
+    def test_submit_does_not_wait_for_io(self) -> None:
+        gate = threading.Event()
+        done = []
+        with WriteBehind() as writer:
+            start = time.time()
+            writer.submit(lambda: (gate.wait(2), done.append(1)))
+            writer.submit(done.append, 2)
+            self.assertLess(time.time() - start, 0.5)
+            self.assertEqual(done, [])
+            gate.set()
+            writer.flush()
+            self.assertEqual(done, [1, 2])
+
+    def test_errors_surface_on_flush(self) -> None:
+        writer = WriteBehind()
+        try:
+            writer.submit(lambda: 1 / 0)
+            with self.assertRaises(ZeroDivisionError):
+                writer.flush()
+            writer.flush()  # reported once
+        finally:
+            writer.close()
+
+    def test_rejects_unknown_durability(self) -> None:
+        with self.assertRaises(ValueError):
+            WriteBehind(durability="sometimes")
+
+    def test_audit_appends_in_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit", "audit.log")
+            for durability in ("none", "flush", "fsync"):
+                with WriteBehind(durability=durability, batch_size=8) as writer:
+                    store = AuditStore(path, writer=writer)
+                    for i in range(50):
+                        store.write({"session_id": durability, "id": i})
+                    self.assertEqual([r["id"] for r in store.read_session(durability)], list(range(50)))
+
+    def test_evidence_refs_before_write(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            with WriteBehind() as writer:
+                store = EvidenceStore.from_config({"base_dir": tmp}, "s1", writer=writer)
+                ref = store.put_raw("uname", "Linux\n")
+                idx = store.write_index("event-1", {"raw_ref": ref})
+                store.flush()
+                self.assertEqual(store.read_text(ref), "Linux\n")
+                self.assertTrue(os.path.exists(os.path.join(tmp, idx)))
+
+    def test_disabled_by_config(self) -> None:
+        self.assertIsNone(WriteBehind.from_config({"enabled": False}))
+        self.assertEqual(WriteBehind.from_config({"durability": "fsync"}).durability, "fsync")
+
+
+if __name__ == "__main__":
+    unittest.main()